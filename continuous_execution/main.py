@@ -65,6 +65,7 @@ if __name__ == '__main__':
     scheduler.add_job(move_data_from_RVwebsite_to_destinations, 'cron', args=[var_mgr_jobs],
                       kwargs={'int_level_of_thoroughness': 1,
                               'max_multiple_vids': 48,
+                              'incremental_pull_of_vids': True,
                               'trial_runs': False},
                       name='FREQUENT JOB',
                       hour=my_globals.str_job_sched_frequent_hours,
@@ -33,7 +33,8 @@ from my_algolia_functions import update_and_push_multiple_indexes
 def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
                                              int_level_of_thoroughness=1,
                                              max_multiple_vids=48,
-                                             trial_runs=False):
+                                             trial_runs=False,
+                                             incremental_pull_of_vids=False):
     """This function executes many workflows in succession which previously had been
     run manually one after the other. For example, first pulling info from the website,
     then processing this info into guests and subjects, then converting the info
@@ -54,7 +55,10 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
     for each product. Counter-intuitively, if for example, 24 is passed, then 48 videos
     will be pulled because 24 is the index that the website uses to return the next set of
     24 videos. So in this example if the maximum number of videos to pull that is wanted
-    is 24, then the parameter passed to this function can be any number between 0 and 23."""
+    is 24, then the parameter passed to this function can be any number between 0 and 23.
+    If incremental_pull_of_vids is True (only used at level 1) max_multiple_vids is ignored, and
+    instead, videos are pulled from newest to oldest until pages with nothing new are found.
+    Levels 2 and 3 always pull everything, which is needed to detect deleted videos."""
     logging.info('---------------------------------------------')
     logging.info("STARTING function 'move_vid_data_fromRV_toAT'")
     logging.info('---------------------------------------------')
@@ -121,10 +125,12 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
 
         # if we are doing a fully thorough run, then the first thing to
         # do is to re-pull the number of vids returned on each page, and
-        # the max multiple that still returns data.
+        # the max multiple that still returns data. Finding the max multiple downloads the
+        # last page of videos of each product, so those pages are kept, to be re-used by the pull of videos.
+        dict_prefetched_pages = {}
         if int_level_of_thoroughness >= 2:
             logging.debug(my_globals.str_logging_func_next + pull_products_info_from_web_and_save2files.__name__)
-            pull_products_info_from_web_and_save2files()
+            dict_prefetched_pages = pull_products_info_from_web_and_save2files()
             logging.debug(my_globals.str_logging_func_exited + pull_products_info_from_web_and_save2files.__name__)
 
         # make sure execution of the program hasn't been told to stop by another module
@@ -135,7 +141,7 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
         # a partial pull or a full pull of videos. If it is a partial pull,
         # then, the number of videos to pull should have been given to this
         # function as a parameter.
-        dict_args = {'pullShowsInfo': True, 'pullVideosInfo': True}
+        dict_args = {'pullShowsInfo': True, 'pullVideosInfo': True, 'dict_prefetched_pages': dict_prefetched_pages}
         # depending on the int_level_of_thoroughness level requested, the arguments
         # above are sufficient for the function call that is about to happen.
         # However, depending on the int_level_of_thoroughness, some additional arguments
@@ -144,7 +150,11 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
         # is reqeusted, the 'max_multiple' does nothing, because all
         # videos are pulled.
         if int_level_of_thoroughness == 1:  # for 'low thoroughness' only get a certain number of videos
-            dict_args['max_multiple'] = max_multiple_vids
+            if incremental_pull_of_vids:
+                # or only as many as needed to reach the videos that we already have, unchanged
+                dict_args['stop_after_x_unchanged_pages'] = my_globals.int_incremental_pull_unchanged_pages_to_stop
+            else:
+                dict_args['max_multiple'] = max_multiple_vids
         logging.info(my_globals.str_logging_func_next + refresh_vids_and_shows_from_rv_website.__name__)
         retrieved_fresh_vid_data_without_errors = refresh_vids_and_shows_from_rv_website(**dict_args)
         logging.info(my_globals.str_logging_func_exited + refresh_vids_and_shows_from_rv_website.__name__)
@@ -293,7 +303,7 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
                                 variable_manager, num_vids_to_use=num_vids)
         logging.debug(my_globals.str_logging_func_next + ta.update_term_count_dataframes.__name__)
         # this is a very time-expensive call if re-building from scratch, but quick if only new videos have been added
-        ta.update_term_count_dataframes()
+        ta.update_term_count_dataframes(num_worker_processes=my_globals.int_num_worker_processes_nlp)
         logging.debug(my_globals.str_logging_func_exited + ta.update_term_count_dataframes.__name__)
         end_time = time.time()
         logging.debug('Time it took to update term-count data: '
@@ -307,7 +317,8 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
         ta.update_pseudotranscript_files(path_web_vid_ds,
                                          keep_terms_that_appear_more_than=2,
                                          force_update=False,
-                                         fullpath_file_with_terms_to_not_include=path_unwanted_terms)
+                                         fullpath_file_with_terms_to_not_include=path_unwanted_terms,
+                                         num_worker_processes=my_globals.int_num_worker_processes_nlp)
         logging.debug(my_globals.str_logging_func_exited + ta.update_pseudotranscript_files.__name__)
         end_time = time.time()
         logging.debug('Time it took to update pseudo-transcript data: '
@@ -347,7 +358,7 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
             logging.debug(my_globals.str_logging_func_next + ta.update_term_count_dataframes.__name__)
             # this is a very time-expensive call if re-building from scratch,
             # but quick if only new videos have been added
-            ta.update_term_count_dataframes()
+            ta.update_term_count_dataframes(num_worker_processes=my_globals.int_num_worker_processes_nlp)
             logging.debug(my_globals.str_logging_func_exited + ta.update_term_count_dataframes.__name__)
             end_time = time.time()
             logging.debug('Time it took to update term-count data: '
@@ -359,7 +370,8 @@ def move_data_from_RVwebsite_to_destinations(variable_manager,  # noqa: C901
             # files, hence the 'transcript' name of the class being used.
             ta.update_pub_pseudotext_files(keep_terms_that_appear_more_than=2,
                                            fullpath_file_with_terms_to_not_include=path_unwanted_terms,
-                                           force_update=False)
+                                           force_update=False,
+                                           num_worker_processes=my_globals.int_num_worker_processes_nlp)
             logging.debug(my_globals.str_logging_func_exited + ta.update_pub_pseudotext_files.__name__)
             end_time = time.time()
             logging.debug('Time it took to update pseudo-fulltext data: '
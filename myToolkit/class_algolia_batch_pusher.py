@@ -0,0 +1,100 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import my_globals
+
+
+class AlgoliaBatchPusher:
+    """Pushes records to an Algolia index with 'partial_update_objects' (many records per request)
+    instead of one 'partial_update_object' per record, which is a full round-trip to Algolia for
+    every single record.
+    How it works:
+    - records are added one at a time with 'add', and are grouped into batches. A batch is sent as
+    soon as adding another record would take it over the maximum number of records, or the maximum
+    number of bytes, per batch.
+    - batches are sent by a small pool of threads, so several of them can be in flight at once (while
+    the caller goes on preparing the next records.) If the maximum number of batches is already in
+    flight, 'add' waits for one of them to come back before sending another.
+    - every batch Algolia accepts comes back with the IDs of the tasks that will index it. Nothing waits
+    for those tasks until 'finish', which waits on all of them at the end.
+    - 'finish' returns, in the order the records were added, a tuple per record with the 'payload' that
+    was given with it and None if its batch was acknowledged (accepted, and its tasks finished) or the
+    Exception if it wasn't. The payload is whatever the caller needs to remember about a record to
+    update its own data once the record is known to be pushed (the caller should NOT do that before.)"""
+
+    def __init__(self, algolia_index, int_max_records_per_batch=my_globals.int_algolia_max_records_per_batch,
+                 int_max_bytes_per_batch=my_globals.int_algolia_max_bytes_per_batch,
+                 int_batches_in_flight=my_globals.int_algolia_batches_in_flight):
+        self.algolia_index = algolia_index
+        self.int_max_records_per_batch = int_max_records_per_batch
+        self.int_max_bytes_per_batch = int_max_bytes_per_batch
+        self.int_batches_in_flight = int_batches_in_flight
+        self.int_num_batches_sent = 0
+        self.__executor = ThreadPoolExecutor(max_workers=int_batches_in_flight)
+        self.__lst_records = []
+        self.__lst_payloads = []
+        self.__int_bytes = 0
+        # one tuple per batch sent: (the future that sends it, the payloads of its records)
+        self.__lst_batches_sent = []
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def add(self, dict_record, int_record_size_in_bytes, payload=None):
+        """Adds a record to be pushed. The size is the one the caller already worked out to check the
+        record against the Algolia limit per record (it is only used for grouping the batches.)"""
+        if self.__lst_records and \
+                ((len(self.__lst_records) >= self.int_max_records_per_batch) or
+                 (self.__int_bytes + int_record_size_in_bytes > self.int_max_bytes_per_batch)):
+            self.__send_batch()
+        self.__lst_records.append(dict_record)
+        self.__lst_payloads.append(payload)
+        self.__int_bytes += int_record_size_in_bytes
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def finish(self):
+        """Sends the batch that is still being filled, waits for all the batches to be sent, and then for
+        all their Algolia tasks to finish. Returns a list with a tuple (payload, None or the Exception)
+        per record added, in the order they were added."""
+        if self.__lst_records:
+            self.__send_batch()
+        lst_results = []
+        int_batches_with_issues = 0
+        for future_batch, lst_payloads in self.__lst_batches_sent:
+            exception_of_batch = None
+            try:
+                for task_id in future_batch.result():
+                    self.algolia_index.wait_task(task_id)
+            except Exception as e:
+                logging.warning('A batch of ' + str(len(lst_payloads)) + ' records was not acknowledged by'
+                                ' Algolia. The Exception was: ' + repr(e))
+                exception_of_batch = e
+                int_batches_with_issues += 1
+            lst_results.extend([(payload, exception_of_batch) for payload in lst_payloads])
+        self.__executor.shutdown(wait=True)
+        self.__lst_batches_sent = []
+        logging.info('Batches sent to Algolia: ' + str(self.int_num_batches_sent) + '. Batches with issues: ' +
+                     str(int_batches_with_issues))
+        return lst_results
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __send_batch(self):
+        # if as many batches as allowed are still being sent, wait for one of them
+        lst_in_flight = [future_batch for future_batch, _ in self.__lst_batches_sent if not future_batch.done()]
+        if len(lst_in_flight) >= self.int_batches_in_flight:
+            wait(lst_in_flight, return_when=FIRST_COMPLETED)
+        future_batch = self.__executor.submit(self.__push_batch, self.__lst_records)
+        self.__lst_batches_sent.append((future_batch, self.__lst_payloads))
+        self.int_num_batches_sent += 1
+        self.__lst_records = []
+        self.__lst_payloads = []
+        self.__int_bytes = 0
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __push_batch(self, lst_records):
+        """Runs in one of the threads of the pool. Returns the IDs of the Algolia tasks of the batch
+        (the client may split a batch into more than one request, each with its own task.)"""
+        response = self.algolia_index.partial_update_objects(lst_records, {'createIfNotExists': True})
+        return [dict_raw_response['taskID'] for dict_raw_response in response.raw_responses]
+    # ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,101 @@
+import os
+import json
+import logging
+import my_globals
+
+
+class AlgoliaDirtyIndex:
+    """Keeps, for an instance of SimpleDS with Algolia units, which units have fields whose value
+    updated locally is not the value pushed to Algolia ('dirty' fields), and which fields those are.
+    Without it, the push to Algolia has to read every unit in the SimpleDS (a file read each) just to
+    find out that nearly all of them have nothing to push.
+    - the functions that update the units locally set the dirty fields of every unit they create or
+    update, and the push sets them again once a unit has been pushed (a unit with no dirty fields left
+    is dropped from the index.) The dirty fields always come from the unit itself (see
+    AlgoliaDataUnit.fetch_fields_not_yet_pushed) so they are never 'guessed'.
+    - the index is saved as a JSON file in the directory of the SimpleDS.
+    - the index is only trusted once it is 'complete': that is, once a push has looked at every unit
+    in the SimpleDS and recorded its dirty fields. If the file doesn't exist (or can't be loaded) the
+    index is not complete, and the push goes through all the units, as it always used to, which makes
+    it complete again.
+    To be on the safe side, the index should be saved BEFORE the SimpleDS when units are updated locally,
+    and AFTER the SimpleDS when they are pushed. If anything goes wrong in between, a unit is left marked
+    as dirty when it isn't (which only costs a read) rather than the other way around."""
+    __key_complete = 'complete'
+    __key_records = 'dirty_fields_of_records'
+
+    def __init__(self, fullpath_index):
+        self.fullpath_index = fullpath_index
+        self.bool_complete = False
+        self.dict_dirty_fields = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __contains__(self, record_id):
+        return record_id in self.dict_dirty_fields
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __len__(self):
+        return len(self.dict_dirty_fields)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        if not os.path.isfile(self.fullpath_index):
+            logging.info('There is no index of dirty Algolia records at ' + self.fullpath_index + '. The next'
+                         ' push will look at every record.')
+            return
+        try:
+            with open(self.fullpath_index, mode='r') as index_file:
+                dict_saved = json.load(index_file)
+            self.dict_dirty_fields = dict_saved[self.__key_records]
+            self.bool_complete = dict_saved[self.__key_complete]
+        except Exception as e:
+            logging.warning('Could not load the index of dirty Algolia records. The next push will look at'
+                            ' every record. The Exception was: ' + repr(e))
+            self.dict_dirty_fields = {}
+            self.bool_complete = False
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        fullpath_tmp = self.fullpath_index + '.tmp'
+        with open(fullpath_tmp, mode='w') as index_file:
+            json.dump({self.__key_complete: self.bool_complete, self.__key_records: self.dict_dirty_fields},
+                      index_file)
+        os.replace(fullpath_tmp, self.fullpath_index)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def set_dirty_fields(self, record_id, lst_dirty_fields):
+        """Replaces the dirty fields of a record. A record without dirty fields is dropped."""
+        if lst_dirty_fields:
+            self.dict_dirty_fields[record_id] = sorted(lst_dirty_fields)
+        else:
+            self.dict_dirty_fields.pop(record_id, None)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def remove(self, record_id):
+        self.dict_dirty_fields.pop(record_id, None)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_ids_with_dirty_fields_in(self, lst_fields):
+        """Returns a set with the IDs of the records that have at least one of the fields given dirty (only
+        those fields can be pushed to the index in question, so the rest of the records have nothing to push.)"""
+        set_fields = set(lst_fields)
+        return {record_id for record_id, lst_dirty_fields in self.dict_dirty_fields.items()
+                if not set_fields.isdisjoint(lst_dirty_fields)}
+    # ------------------------ END FUNCTION ------------------------ #
+
+
+def make_dirty_index_of_algolia_simpleds(path_to_algolia_simpleds):
+    """Returns the AlgoliaDirtyIndex of the Algolia SimpleDS in the directory given, loaded from disk."""
+    dirty_index = AlgoliaDirtyIndex(path_to_algolia_simpleds + my_globals.str_filename_algolia_dirty_index)
+    dirty_index.load()
+    return dirty_index
+
+
+# ------------------------ END FUNCTION ------------------------ #
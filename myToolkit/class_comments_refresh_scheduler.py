@@ -0,0 +1,132 @@
+import os
+import json
+import logging
+import my_globals
+
+
+class CommentsRefreshScheduler:
+    """This class decides which videos should have their comments statistics refreshed, when
+    there is only a budget for a certain number of requests to the RV website.
+    Old videos almost never get new comments, while videos that are recent, or that had their
+    comments change recently, change a lot. So rather than refreshing the first N videos in
+    date order, each video gets an estimate of how many comments it has gained since we last
+    checked it (its 'expected change'), and the videos with the highest estimates are the ones
+    refreshed.
+    The estimate is the 'comment velocity' of the video (comments per day) times the days since
+    it was last checked. The velocity is the geometric mean of two rates:
+    - the comments the video has, divided by its age in days (plus one comment, so a video with
+    no comments yet still gets some priority while it is young.)
+    - one comment per day-since-its-comments-last-changed (this comes from the DATA-UPDATED column
+    of the additional video info SimpleDS) so videos that are active now are checked often, and
+    videos that got all their comments years ago, and nothing since, are not.
+    Videos that have never had their comments fetched go first (newest first.) A video is only
+    'never fetched' if the scheduler has no record of checking it either: videos with no comments
+    at all are never added to the SimpleDS, so for those the record of the scheduler is all there is.
+    The time each video was last checked, and how many comments it had, is kept in a small
+    JSON file, because the SimpleDS only records when the comments CHANGED, not when they were
+    last looked at."""
+    __flt_ms_per_day = 24 * 60 * 60 * 1000.0
+    __key_last_checked = 'last_checked'
+    __key_num_comments = 'num_comments'
+
+    def __init__(self, fullpath_state=my_globals.str_fullfilepath_comments_refresh_schedule):
+        self.fullpath_state = fullpath_state
+        self.dict_state = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        if os.path.isfile(self.fullpath_state):
+            try:
+                with open(self.fullpath_state, mode='r') as state_file:
+                    self.dict_state = json.load(state_file)
+            except Exception as e:
+                logging.warning('Could not load the state of the comments refresh scheduler. All videos will be'
+                                ' treated as never checked. The Exception was: ' + repr(e))
+                self.dict_state = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.fullpath_state), exist_ok=True)
+        fullpath_tmp = self.fullpath_state + '.tmp'
+        with open(fullpath_tmp, mode='w') as state_file:
+            json.dump(self.dict_state, state_file)
+        os.replace(fullpath_tmp, self.fullpath_state)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def record_checked(self, vid_id, int_timestamp_checked, int_num_comments):
+        """Remembers that the comments of a video were fetched at the time given."""
+        self.dict_state[vid_id] = {self.__key_last_checked: int_timestamp_checked,
+                                   self.__key_num_comments: int_num_comments}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def forget_videos_not_in(self, set_vid_ids):
+        """Removes from the state the videos that are not in the set given (deleted at source.)"""
+        for vid_id in set(self.dict_state) - set_vid_ids:
+            del self.dict_state[vid_id]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def estimate_expected_change(self, int_now, int_timestamp_created, int_timestamp_last_changed,
+                                 int_timestamp_last_checked, int_num_comments):
+        """Returns the number of comments a video is expected to have gained since it was last checked."""
+        flt_age_days = max((int_now - int_timestamp_created) / self.__flt_ms_per_day, 1.0)
+        flt_comments_per_day = (int_num_comments + 1) / flt_age_days
+        if int_timestamp_last_changed > 0:
+            flt_days_since_change = max((int_now - int_timestamp_last_changed) / self.__flt_ms_per_day, 1.0)
+            flt_comments_per_day = (flt_comments_per_day / flt_days_since_change) ** 0.5
+        flt_days_since_checked = max((int_now - int_timestamp_last_checked) / self.__flt_ms_per_day, 0.0)
+        return flt_comments_per_day * flt_days_since_checked
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def choose_videos_to_refresh(self, web_vid_ds, other_vidinfo_ds, int_request_budget, int_now):
+        """Returns a list with (at most) int_request_budget video IDs, the ones whose comments are
+        most worth refreshing, in order of priority. web_vid_ds is the SimpleDS of website videos
+        (every video in it is a candidate) and other_vidinfo_ds the SimpleDS of additional video info."""
+        lst_never_fetched = []
+        lst_scored = []
+        for vid_id in web_vid_ds:
+            int_timestamp_created = web_vid_ds.fetch_created(vid_id)
+            vid_in_other_vidinfo_ds = vid_id in other_vidinfo_ds
+            dict_vid_state = self.dict_state.get(vid_id)
+            if dict_vid_state is None:
+                if not vid_in_other_vidinfo_ds:
+                    lst_never_fetched.append((int_timestamp_created, vid_id))
+                    continue
+                # the comments were fetched before the scheduler existed. The count is taken from the
+                # SimpleDS (only this once.) We don't know when it was last checked, but the weekly job
+                # checks every video, so it is treated as checked a week ago (or when it last changed,
+                # if that was more recent.)
+                dict_existing_data = other_vidinfo_ds.fetch_data(vid_id)
+                if my_globals.str_vid_comments not in dict_existing_data:
+                    lst_never_fetched.append((int_timestamp_created, vid_id))
+                    continue
+                dict_vid_state = {self.__key_last_checked: max(other_vidinfo_ds.fetch_lastupdated(vid_id),
+                                                               int_now - int(7 * self.__flt_ms_per_day)),
+                                  self.__key_num_comments:
+                                      dict_existing_data[my_globals.str_vid_comments][
+                                          my_globals.str_vid_comments_num_total]}
+                self.dict_state[vid_id] = dict_vid_state
+            # a video that was checked, but isn't in the SimpleDS (it has no comments) has never changed
+            int_timestamp_last_changed = 0
+            if vid_in_other_vidinfo_ds:
+                int_timestamp_last_changed = other_vidinfo_ds.fetch_lastupdated(vid_id)
+            flt_expected_change = self.estimate_expected_change(int_now, int_timestamp_created,
+                                                                int_timestamp_last_changed,
+                                                                dict_vid_state[self.__key_last_checked],
+                                                                dict_vid_state[self.__key_num_comments])
+            lst_scored.append((flt_expected_change, vid_id))
+        lst_never_fetched.sort(reverse=True)
+        lst_scored.sort(reverse=True)
+        lst_chosen = [vid_id for _, vid_id in lst_never_fetched][:int_request_budget]
+        lst_chosen += [vid_id for _, vid_id in lst_scored][:int_request_budget - len(lst_chosen)]
+        if lst_scored and (len(lst_chosen) > len(lst_never_fetched)):
+            logging.info('Comments refresh scheduler. Videos never fetched: ' + str(len(lst_never_fetched)) +
+                         '. Lowest expected change among the videos chosen: ' +
+                         '{:.3f}'.format(lst_scored[len(lst_chosen) - len(lst_never_fetched) - 1][0]) + ' comments.')
+        return lst_chosen
+    # ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,209 @@
+import os
+import pickle
+import logging
+import numpy as np
+import pandas as pd
+
+
+class DocCountStore:
+    """This class keeps the Document COUNT vector of a universe of documents (transcripts),
+    which is: for every term, the number of documents the term appears in.
+    Unlike the plain doc-count CSV (which can only grow) this class also remembers which
+    terms each document contributed to the vector. That means a document can be removed
+    from the vector (decrement) or replaced by a newer version of itself (for example when
+    a transcript is updated on the website) by only touching the terms of that document,
+    instead of wiping the whole vector and re-building it from every term-count file.
+    How it is stored:
+    - the doc-count vector is still saved to the same CSV as always (terms as the index, and
+    a single column with the count, including the 'cheeky' row that counts the documents) so
+    anything that reads that CSV keeps working.
+    - next to the CSV, a pickle file holds the 'contributions': a vocabulary (list of terms,
+    where the position in the list is the ID of the term) and, for each document, a numpy
+    array with the IDs of the terms it contributed. The counts themselves are not stored in
+    the pickle, they are simply re-counted from the contributions when loading.
+    - the pickle also holds the IDF that was used the last time TF-IDF was calculated, so
+    we can tell which documents have terms whose IDF has since moved enough to make
+    their TF-IDF worth re-calculating."""
+    __key_vocabulary = 'vocabulary'
+    __key_doc_terms = 'terms_contributed_by_each_document'
+    __key_idf_last_used = 'idf_used_at_last_tfidf_calculation'
+
+    def __init__(self, fullpath_doc_count_vector_as_csv, str_column_name_terms, str_column_name_count,
+                 str_cheeky_document_counter):
+        """Receives the full path of the doc-count CSV (the contributions are saved in the same
+        place, with '.contributions.pkl' added to the name), the names of the columns used in
+        the CSV, and the 'cheeky' term that every document contributes (so the vector always
+        has a row with the number of documents that have contributed to it.)"""
+        self.fullpath_doc_count_vector_as_csv = fullpath_doc_count_vector_as_csv
+        self.fullpath_contributions = fullpath_doc_count_vector_as_csv + '.contributions.pkl'
+        self.__column_name_terms = str_column_name_terms
+        self.__column_name_count = str_column_name_count
+        self.__str_cheeky_document_counter = str_cheeky_document_counter
+        self.lst_vocabulary = []
+        self.dict_term2id = {}
+        self.dict_doc_terms = {}
+        self.array_counts = np.zeros(0, dtype=np.int64)
+        self.dict_idf_last_used = {}
+        self.contributions_were_found = False
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __contains__(self, doc_id):
+        return doc_id in self.dict_doc_terms
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __len__(self):
+        return len(self.dict_doc_terms)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        """Loads the contributions from disk (if they exist) and re-counts the doc-count
+        vector from them. If the doc-count CSV exists, but there are no contributions saved
+        next to it (a vector built by an older version of the code) then 'contributions_were_found'
+        is left as False, so the caller knows the vector has to be re-built once from scratch."""
+        self.contributions_were_found = False
+        if os.path.isfile(self.fullpath_contributions):
+            try:
+                with open(self.fullpath_contributions, mode='rb') as contributions_file:
+                    dict_saved = pickle.load(contributions_file)
+                self.lst_vocabulary = dict_saved[self.__key_vocabulary]
+                self.dict_doc_terms = dict_saved[self.__key_doc_terms]
+                self.dict_idf_last_used = dict_saved[self.__key_idf_last_used]
+                self.dict_term2id = {a_term: term_id for term_id, a_term in enumerate(self.lst_vocabulary)}
+                self.__recount()
+                self.contributions_were_found = True
+            except Exception as e:
+                logging.warning('Could not load the contributions of the doc-count vector. The vector will need'
+                                ' to be re-built. The Exception was: ' + repr(e))
+                self.wipe()
+        elif not os.path.isfile(self.fullpath_doc_count_vector_as_csv):
+            # nothing on disk at all, so an empty store is exactly what is on disk
+            self.contributions_were_found = True
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        """Saves the doc-count vector CSV and the contributions. Both are written to a temporary
+        file first, and then moved into place, so an interruption never leaves half a file."""
+        series_doc_count = self.fetch_doc_count_as_series()
+        fullpath_tmp = self.fullpath_doc_count_vector_as_csv + '.tmp'
+        series_doc_count.to_csv(fullpath_tmp, sep='\t', index=True, header=True)
+        os.replace(fullpath_tmp, self.fullpath_doc_count_vector_as_csv)
+        dict_to_save = {self.__key_vocabulary: self.lst_vocabulary,
+                        self.__key_doc_terms: self.dict_doc_terms,
+                        self.__key_idf_last_used: self.dict_idf_last_used}
+        fullpath_tmp = self.fullpath_contributions + '.tmp'
+        with open(fullpath_tmp, mode='wb') as contributions_file:
+            pickle.dump(dict_to_save, contributions_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(fullpath_tmp, self.fullpath_contributions)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def wipe(self):
+        """Empties the store (in memory only, the files on disk change when 'save' is called.)"""
+        self.lst_vocabulary = []
+        self.dict_term2id = {}
+        self.dict_doc_terms = {}
+        self.array_counts = np.zeros(0, dtype=np.int64)
+        self.dict_idf_last_used = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def add_document(self, doc_id, iterable_terms):
+        """Adds the terms of a document to the doc-count vector. If the document had already
+        contributed to the vector, its previous terms are taken out first, so this also works
+        as a 'replace'. Only the terms of this document are touched."""
+        if doc_id in self.dict_doc_terms:
+            self.remove_document(doc_id)
+        set_terms = set(iterable_terms)
+        set_terms.add(self.__str_cheeky_document_counter)
+        lst_ids = []
+        for a_term in set_terms:
+            term_id = self.dict_term2id.get(a_term)
+            if term_id is None:
+                term_id = len(self.lst_vocabulary)
+                self.dict_term2id[a_term] = term_id
+                self.lst_vocabulary.append(a_term)
+            lst_ids.append(term_id)
+        if len(self.lst_vocabulary) > len(self.array_counts):
+            # grow the array of counts (with some room to spare, so it doesn't happen every time)
+            array_new_counts = np.zeros(max(len(self.lst_vocabulary), 2 * len(self.array_counts)), dtype=np.int64)
+            array_new_counts[:len(self.array_counts)] = self.array_counts
+            self.array_counts = array_new_counts
+        # the IDs are kept sorted, which makes them the same order as the vocabulary (the
+        # order in which terms were first seen) and so the CSV keeps its familiar order.
+        array_ids = np.sort(np.asarray(lst_ids, dtype=np.int32))
+        self.array_counts[array_ids] += 1
+        self.dict_doc_terms[doc_id] = array_ids
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def remove_document(self, doc_id):
+        """Takes the terms of a document out of the doc-count vector. Returns True if the
+        document was in the vector, False otherwise."""
+        array_ids = self.dict_doc_terms.pop(doc_id, None)
+        if array_ids is None:
+            return False
+        self.array_counts[array_ids] -= 1
+        return True
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_all_doc_ids_as_python_set(self):
+        return set(self.dict_doc_terms.keys())
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_doc_count_as_series(self):
+        """Returns the doc-count vector as a series (terms as the index) in the same format
+        it has always been saved to disk in. Terms that no document has any more are left out."""
+        array_counts = self.array_counts[:len(self.lst_vocabulary)]
+        array_present = array_counts > 0
+        series_doc_count = pd.Series(array_counts[array_present], name=self.__column_name_count, dtype='int64',
+                                     index=pd.Index(np.asarray(self.lst_vocabulary, dtype=object)[array_present],
+                                                    name=self.__column_name_terms))
+        return series_doc_count
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def record_idf_used(self, series_idf):
+        """Remembers the IDF that has just been used to calculate TF-IDF, so that later on we can
+        tell which documents are affected by changes to the IDF."""
+        self.dict_idf_last_used = series_idf.to_dict()
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def find_documents_needing_tfidf_refresh(self, series_idf_new, flt_threshold):
+        """Compares a new IDF with the one recorded the last time TF-IDF was calculated, and
+        returns the set of documents that contain at least one term whose IDF has moved by more
+        than the threshold (in absolute value.) If no IDF was ever recorded, the set is empty,
+        because we have nothing to compare against."""
+        if not self.dict_idf_last_used:
+            return set()
+        series_idf_old = pd.Series(self.dict_idf_last_used, dtype='float64')
+        # terms that didn't exist before don't count here. A document can only have a term that is
+        # new to the IDF if it was added or replaced since, and those don't have TF-IDF anyway.
+        series_idf_old = series_idf_old.reindex(series_idf_new.index)
+        series_shift = (series_idf_new - series_idf_old).abs()
+        series_shift = series_shift.drop(self.__str_cheeky_document_counter, errors='ignore')
+        array_shifted = np.zeros(len(self.lst_vocabulary), dtype=bool)
+        for a_term in series_shift.index[series_shift > flt_threshold]:
+            term_id = self.dict_term2id.get(a_term)
+            if term_id is not None:
+                array_shifted[term_id] = True
+        if not array_shifted.any():
+            return set()
+        return {doc_id for doc_id, array_ids in self.dict_doc_terms.items() if array_shifted[array_ids].any()}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __recount(self):
+        """Re-builds the counts of every term from the contributions of all documents."""
+        if self.dict_doc_terms:
+            self.array_counts = np.bincount(np.concatenate(list(self.dict_doc_terms.values())),
+                                            minlength=len(self.lst_vocabulary)).astype(np.int64)
+        else:
+            self.array_counts = np.zeros(len(self.lst_vocabulary), dtype=np.int64)
+    # ------------------------ END FUNCTION ------------------------ #
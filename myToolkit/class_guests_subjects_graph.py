@@ -0,0 +1,200 @@
+import os
+import pickle
+import logging
+import my_globals
+from my_building_blocks import extractIndividualItemsFromTextList
+
+
+class GuestsSubjectsGraph:
+    """This class keeps the 'graph' of which persons (guests, from the featuring field of the
+    website videos) talked about which subjects (topics, tags and asset names of the videos.)
+    Rather than re-building everything from all the videos on every run, it remembers, for
+    every video, the persons and subjects that were extracted from it (and the hash the video
+    had at the time) so only the videos that are new, changed or deleted need to be looked at.
+    Two inverted indexes are kept as well (person -> videos and subject -> videos) as sets, so
+    adding or removing a video only touches the persons and subjects of that video.
+    The dictionary of guests and their subjects (the one saved to JSON and pushed to Airtable)
+    is made from the graph by 'make_guests_subjects_dict', with exactly the same content and
+    order of keys as the old way of building it:
+    - the guests are in the order they first appear in (videos in the order of the SimpleDS,
+    and the persons of each video sorted), leaving out the folks to ignore.
+    - the subjects of each guest are sorted, without duplicates, and without the names of any
+    of the guests (a guest's name can show up as a tag of another guest's video.)
+    The dictionary made the last time is saved too (along with the folks that were ignored, and
+    the file it was written to) so that a run where nothing changed doesn't need to write anything."""
+    __key_vid_hashes = 'video_hashes'
+    __key_vid_persons = 'persons_of_each_video'
+    __key_vid_subjects = 'subjects_of_each_video'
+    __key_last_output = 'last_output'
+    __key_last_ignored = 'folks_ignored_in_last_output'
+    __key_last_file = 'file_of_last_output'
+
+    def __init__(self, fullpath_state=my_globals.str_fullfilepath_guests_subjects_graph):
+        self.fullpath_state = fullpath_state
+        self.dict_vid_hashes = {}
+        self.dict_vid_persons = {}
+        self.dict_vid_subjects = {}
+        self.dict_person_vids = {}
+        self.dict_subject_vids = {}
+        self.dict_last_output = None
+        self.lst_last_ignored = None
+        self.fullpath_last_file = ''
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __len__(self):
+        return len(self.dict_vid_hashes)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        """Loads the graph from disk (if it exists). The inverted indexes are not saved, they are
+        re-built from the persons and subjects of each video when loading."""
+        if not os.path.isfile(self.fullpath_state):
+            return
+        try:
+            with open(self.fullpath_state, mode='rb') as state_file:
+                dict_saved = pickle.load(state_file)
+            dict_vid_hashes = dict_saved[self.__key_vid_hashes]
+            dict_vid_persons = dict_saved[self.__key_vid_persons]
+            dict_vid_subjects = dict_saved[self.__key_vid_subjects]
+            self.dict_last_output = dict_saved[self.__key_last_output]
+            self.lst_last_ignored = dict_saved[self.__key_last_ignored]
+            self.fullpath_last_file = dict_saved[self.__key_last_file]
+        except Exception as e:
+            logging.warning('Could not load the graph of guests and subjects. It will be re-built from all'
+                            ' videos. The Exception was: ' + repr(e))
+            return
+        for vid_id in dict_vid_hashes:
+            self.__index_video(vid_id, dict_vid_hashes[vid_id], dict_vid_persons[vid_id], dict_vid_subjects[vid_id])
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.fullpath_state), exist_ok=True)
+        dict_to_save = {self.__key_vid_hashes: self.dict_vid_hashes,
+                        self.__key_vid_persons: self.dict_vid_persons,
+                        self.__key_vid_subjects: self.dict_vid_subjects,
+                        self.__key_last_output: self.dict_last_output,
+                        self.__key_last_ignored: self.lst_last_ignored,
+                        self.__key_last_file: self.fullpath_last_file}
+        fullpath_tmp = self.fullpath_state + '.tmp'
+        with open(fullpath_tmp, mode='wb') as state_file:
+            pickle.dump(dict_to_save, state_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(fullpath_tmp, self.fullpath_state)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def set_video(self, vid_id, str_hash, raw_featuring, lst_subject_fields):
+        """Adds a video to the graph (or replaces it, if it was already there.) Receives the raw
+        featuring field of the video, and a list with the values of the fields that have subjects
+        in them (topics, tags, asset names.)"""
+        self.remove_video(vid_id)
+        tuple_persons = ()
+        if type(raw_featuring) is str:
+            tuple_persons = tuple(sorted(extractIndividualItemsFromTextList(raw_featuring)))
+        elif raw_featuring is not None:
+            logging.error('Unexpected type of object in the featuring field of video ' + str(vid_id) +
+                          ' while building the graph of guests and subjects.')
+        set_subjects = set()
+        for a_field_value in lst_subject_fields:
+            # fields missing from the video come back as None or the empty string
+            if a_field_value:
+                set_subjects.update(a_field_value)
+        self.__index_video(vid_id, str_hash, tuple_persons, frozenset(set_subjects))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def remove_video(self, vid_id):
+        """Takes a video out of the graph. Only the persons and subjects of this video are touched."""
+        if self.dict_vid_hashes.pop(vid_id, None) is None:
+            return
+        for a_person in set(self.dict_vid_persons.pop(vid_id)):
+            set_vids = self.dict_person_vids[a_person]
+            set_vids.discard(vid_id)
+            if not set_vids:
+                del self.dict_person_vids[a_person]
+        for a_subject in self.dict_vid_subjects.pop(vid_id):
+            set_vids = self.dict_subject_vids[a_subject]
+            set_vids.discard(vid_id)
+            if not set_vids:
+                del self.dict_subject_vids[a_subject]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def sync_with_projection(self, lst_vid_ids, web_vids_projection, str_field_featuring, lst_subject_fields):
+        """Makes the graph match the videos given (the IDs of all the videos in the SimpleDS, and
+        a WebsiteVidsProjection already in sync with it): videos no longer there are removed, and
+        videos that are new, or whose hash changed, are (re)added. Returns the number of videos
+        added, updated or removed."""
+        set_vid_ids = set(lst_vid_ids)
+        lst_to_remove = [vid_id for vid_id in self.dict_vid_hashes if vid_id not in set_vid_ids]
+        for vid_id in lst_to_remove:
+            self.remove_video(vid_id)
+        int_num_set = 0
+        for vid_id in lst_vid_ids:
+            str_hash = web_vids_projection.fetch_hash(vid_id)
+            if self.dict_vid_hashes.get(vid_id) != str_hash:
+                self.set_video(vid_id, str_hash, web_vids_projection.fetch_field(vid_id, str_field_featuring),
+                               [web_vids_projection.fetch_field(vid_id, a_field) for a_field in lst_subject_fields])
+                int_num_set += 1
+        if lst_to_remove or int_num_set:
+            logging.info('Graph of guests and subjects updated. Videos added or updated: ' + str(int_num_set) +
+                         '. Videos removed: ' + str(len(lst_to_remove)))
+        return int_num_set + len(lst_to_remove)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def is_last_output_still_valid(self, list_of_folks_2_ignore):
+        """True if the dictionary made last time was made ignoring the same folks, and the file it was
+        written to still exists. (Only meaningful if no videos have changed since then.)"""
+        return (self.dict_last_output is not None) and (self.lst_last_ignored == list(list_of_folks_2_ignore)) \
+            and os.path.isfile(self.fullpath_last_file)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def record_output(self, dict_guests_subjects, list_of_folks_2_ignore, fullpath_file):
+        self.dict_last_output = dict_guests_subjects
+        self.lst_last_ignored = list(list_of_folks_2_ignore)
+        self.fullpath_last_file = fullpath_file
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def make_guests_subjects_dict(self, lst_vid_ids, list_of_folks_2_ignore):
+        """Returns the dictionary of {guest: sorted list of subjects} for the videos given (in the
+        order given, which decides the order of the guests.)"""
+        set_folks_2_ignore = set(list_of_folks_2_ignore)
+        dict_guests_subjects = {}
+        for vid_id in lst_vid_ids:
+            for a_person in self.dict_vid_persons[vid_id]:
+                if (a_person not in set_folks_2_ignore) and (a_person not in dict_guests_subjects):
+                    dict_guests_subjects[a_person] = None
+        for a_person in dict_guests_subjects:
+            set_subjects = set()
+            for vid_id in self.dict_person_vids[a_person]:
+                set_subjects.update(self.dict_vid_subjects[vid_id])
+            # names of guests are not subjects (not even of other guests)
+            dict_guests_subjects[a_person] = sorted(set_subjects.difference(dict_guests_subjects))
+        return dict_guests_subjects
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_vids_of_person(self, str_person):
+        return set(self.dict_person_vids.get(str_person, ()))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_vids_of_subject(self, str_subject):
+        return set(self.dict_subject_vids.get(str_subject, ()))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __index_video(self, vid_id, str_hash, tuple_persons, frozenset_subjects):
+        self.dict_vid_hashes[vid_id] = str_hash
+        self.dict_vid_persons[vid_id] = tuple_persons
+        self.dict_vid_subjects[vid_id] = frozenset_subjects
+        for a_person in tuple_persons:
+            self.dict_person_vids.setdefault(a_person, set()).add(vid_id)
+        for a_subject in frozenset_subjects:
+            self.dict_subject_vids.setdefault(a_subject, set()).add(vid_id)
+    # ------------------------ END FUNCTION ------------------------ #
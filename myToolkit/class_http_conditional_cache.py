@@ -0,0 +1,239 @@
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+import my_globals
+
+
+class CachedHttpResponse:
+    """What HttpConditionalCache.get returns. It looks enough like a requests response
+    (status_code, content, json()) for the code that used to receive one, and adds:
+    - is_unchanged: True if the page is known to be the same as the last time it was fetched
+    (the server said so with a 304, or the body downloaded has the same hash as last time.)
+    - from_cache: True if the content came from the cache on disk (a 304.)
+    NOTE that if the page was requested with keep_body=False and the server answered with a 304,
+    there is no content (it is None), since the cache did not keep the body."""
+
+    def __init__(self, status_code, content, is_unchanged=False, from_cache=False):
+        self.status_code = status_code
+        self.content = content
+        self.is_unchanged = is_unchanged
+        self.from_cache = from_cache
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def json(self):
+        return json.loads(self.content)
+    # ------------------------ END FUNCTION ------------------------ #
+
+
+class HttpConditionalCache:
+    """An on-disk cache of pages downloaded from the RV website, so that pages that have not
+    changed since the last time they were fetched don't have to be downloaded (and parsed) again.
+    For every url it keeps:
+    - the ETag and Last-Modified headers the server sent, which are sent back the next time
+    (as If-None-Match and If-Modified-Since) so the server can answer '304 Not Modified' with
+    no body at all.
+    - a hash of the body, so that even if the server ignores the headers above, we can still
+    tell the body is the same as last time (and the caller can skip parsing it.)
+    - the body itself, in its own file, so a 304 can be answered with the content. For
+    endpoints where the caller only wants to know whether the page changed (and does not need the
+    content when it didn't) the page can be requested with keep_body=False, and then only the
+    headers and the hash above are kept.
+    So the cache does not grow forever, when it is saved, the urls that have not been requested for
+    more than int_max_days_unused days are dropped, and if the bodies kept still take more than
+    int_max_bytes_of_bodies, the bodies that were used the longest time ago are evicted.
+    Every request is counted against an 'endpoint' (just a name chosen by the caller, like
+    'video sets' or 'comments') so the summary shows, per endpoint, how many requests were
+    answered with a 304, how many bodies were unchanged, and how many bytes were saved.
+    The object can be shared by several threads. The index of urls is only written to disk
+    when 'save' is called."""
+    __key_etag = 'etag'
+    __key_last_modified = 'last_modified'
+    __key_body_hash = 'body_hash'
+    __key_body_size = 'body_size'
+    __key_has_body = 'has_body'
+    __key_last_used = 'last_used'
+    str_counter_requests = 'requests'
+    str_counter_not_modified = 'not modified (304)'
+    str_counter_unchanged_body = 'unchanged body'
+    str_counter_changed = 'changed or new'
+    str_counter_bytes_downloaded = 'bytes downloaded'
+    str_counter_bytes_saved = 'bytes saved'
+
+    def __init__(self, path_to_cache_dir=my_globals.str_dir4_http_cache,
+                 int_max_bytes_of_bodies=my_globals.int_http_cache_max_bytes_of_bodies,
+                 int_max_days_unused=my_globals.int_http_cache_max_days_unused):
+        self.path_to_cache_dir = path_to_cache_dir
+        self.int_max_bytes_of_bodies = int_max_bytes_of_bodies
+        self.int_max_days_unused = int_max_days_unused
+        self.path_to_bodies = path_to_cache_dir + 'bodies/'
+        self.fullpath_index = path_to_cache_dir + 'index.json'
+        os.makedirs(self.path_to_bodies, exist_ok=True)
+        self.dict_index = {}
+        self.dict_counters = {}
+        self.__lock = threading.Lock()
+        if os.path.isfile(self.fullpath_index):
+            try:
+                with open(self.fullpath_index, mode='r') as index_file:
+                    self.dict_index = json.load(index_file)
+            except Exception as e:
+                logging.warning('Could not load the index of the HTTP cache. Starting with an empty cache.'
+                                ' The Exception was: ' + repr(e))
+        # the entries saved before the cache kept track of when each url was last used count as used now
+        # (otherwise they would all be the first to be evicted.)
+        int_now = int(time.time())
+        for dict_entry in self.dict_index.values():
+            dict_entry.setdefault(self.__key_last_used, int_now)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def get(self, requests_session, str_url, str_endpoint, keep_body=True, **kwargs):  # noqa: C901
+        """Makes a (conditional) GET request with the session given, and returns a CachedHttpResponse.
+        Any other arguments (timeout, for example) are passed on to the session's 'get'.
+        Responses with a status other than 200 or 304 are returned as they are, and not cached.
+        If keep_body is False, the body of the page is not kept on disk (only its headers and hash) so
+        if the server answers with a 304, the response returned has no content. This is meant for the
+        callers that do not need the content of a page when it is unchanged."""
+        with self.__lock:
+            dict_entry = self.dict_index.get(str_url, {})
+        dict_headers = dict(kwargs.pop('headers', None) or {})
+        fullpath_body = self.__fullpath_body(str_url)
+        body_file_exists = os.path.isfile(fullpath_body)
+        # we only ask for a 304 if we are able to answer with the body we have (or if the caller
+        # does not want the body, in which case a 304 is answered with no content at all.)
+        can_answer_not_modified = bool(dict_entry) and (body_file_exists or not keep_body)
+        if can_answer_not_modified:
+            if dict_entry.get(self.__key_etag):
+                dict_headers['If-None-Match'] = dict_entry[self.__key_etag]
+            if dict_entry.get(self.__key_last_modified):
+                dict_headers['If-Modified-Since'] = dict_entry[self.__key_last_modified]
+        response = requests_session.get(str_url, headers=dict_headers, **kwargs)
+
+        if (response.status_code == 304) and can_answer_not_modified:
+            bytes_body = None
+            if keep_body:
+                with open(fullpath_body, mode='rb') as body_file:
+                    bytes_body = body_file.read()
+            elif body_file_exists:
+                # the body was kept by an earlier request that wanted it, but it is not wanted anymore
+                self.__remove_body_file(fullpath_body)
+            self.__count(str_endpoint, self.str_counter_not_modified, 0,
+                         int_bytes_saved=dict_entry.get(self.__key_body_size, 0))
+            with self.__lock:
+                self.dict_index[str_url] = dict(dict_entry, **{self.__key_has_body: keep_body,
+                                                               self.__key_last_used: int(time.time())})
+            return CachedHttpResponse(200, bytes_body, is_unchanged=True, from_cache=keep_body)
+
+        bytes_body = response.content
+        if response.status_code != 200:
+            self.__count(str_endpoint, self.str_counter_changed, len(bytes_body))
+            return CachedHttpResponse(response.status_code, bytes_body)
+
+        str_body_hash = hashlib.sha256(bytes_body).hexdigest()
+        is_unchanged = (dict_entry.get(self.__key_body_hash) == str_body_hash) and \
+            (body_file_exists or not keep_body)
+        if is_unchanged:
+            self.__count(str_endpoint, self.str_counter_unchanged_body, len(bytes_body))
+        else:
+            self.__count(str_endpoint, self.str_counter_changed, len(bytes_body))
+        if keep_body and not is_unchanged:
+            fullpath_tmp = fullpath_body + '.' + str(threading.get_ident()) + '.tmp'
+            with open(fullpath_tmp, mode='wb') as body_file:
+                body_file.write(bytes_body)
+            os.replace(fullpath_tmp, fullpath_body)
+        elif (not keep_body) and body_file_exists:
+            self.__remove_body_file(fullpath_body)
+        dict_new_entry = {self.__key_etag: response.headers.get('ETag', ''),
+                          self.__key_last_modified: response.headers.get('Last-Modified', ''),
+                          self.__key_body_hash: str_body_hash,
+                          self.__key_body_size: len(bytes_body),
+                          self.__key_has_body: keep_body,
+                          self.__key_last_used: int(time.time())}
+        with self.__lock:
+            self.dict_index[str_url] = dict_new_entry
+        return CachedHttpResponse(200, bytes_body, is_unchanged=is_unchanged)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        """Saves the index of urls to disk. Before doing so, it keeps the cache within its limits:
+        the urls that were not requested for more than int_max_days_unused days are dropped and then,
+        while the bodies kept take more than int_max_bytes_of_bodies, the url whose body was used the
+        longest time ago is dropped. The body files that no url in the index needs anymore (including
+        any left behind if the index could not be loaded) are deleted."""
+        int_oldest_last_used_allowed = int(time.time()) - (self.int_max_days_unused * 24 * 60 * 60)
+        with self.__lock:
+            int_len_before = len(self.dict_index)
+            self.dict_index = {str_url: dict_entry for str_url, dict_entry in self.dict_index.items()
+                               if dict_entry.get(self.__key_last_used, 0) >= int_oldest_last_used_allowed}
+            # the entries saved before the cache could do without the body all have one
+            lst_urls_with_body = sorted([str_url for str_url in self.dict_index
+                                         if self.dict_index[str_url].get(self.__key_has_body, True)],
+                                        key=lambda str_url: self.dict_index[str_url][self.__key_last_used])
+            int_bytes_of_bodies = sum([self.dict_index[str_url].get(self.__key_body_size, 0)
+                                       for str_url in lst_urls_with_body])
+            for str_url in lst_urls_with_body:
+                if int_bytes_of_bodies <= self.int_max_bytes_of_bodies:
+                    break
+                int_bytes_of_bodies -= self.dict_index.pop(str_url).get(self.__key_body_size, 0)
+            int_urls_evicted = int_len_before - len(self.dict_index)
+            set_body_files_needed = {os.path.basename(self.__fullpath_body(str_url)) for str_url in lst_urls_with_body
+                                     if str_url in self.dict_index}
+            str_index = json.dumps(self.dict_index)
+        # the temporary files belong to bodies still being written, so they are left alone
+        for str_filename in os.listdir(self.path_to_bodies):
+            if (str_filename not in set_body_files_needed) and (not str_filename.endswith('.tmp')):
+                self.__remove_body_file(self.path_to_bodies + str_filename)
+        if int_urls_evicted > 0:
+            logging.info('HTTP cache: ' + str(int_urls_evicted) + ' urls were evicted, to keep the cache within'
+                         ' its limits. Bytes of bodies kept: ' + str(int_bytes_of_bodies))
+        fullpath_tmp = self.fullpath_index + '.tmp'
+        with open(fullpath_tmp, mode='w') as index_file:
+            index_file.write(str_index)
+        os.replace(fullpath_tmp, self.fullpath_index)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def log_summary(self):
+        """Logs the hit/miss counters of every endpoint used since the object was created."""
+        with self.__lock:
+            for str_endpoint in self.dict_counters:
+                dict_endpoint_counters = self.dict_counters[str_endpoint]
+                logging.info('HTTP cache summary for ' + str_endpoint + ': ' +
+                             ', '.join([a_counter + ' = ' + str(dict_endpoint_counters[a_counter])
+                                        for a_counter in dict_endpoint_counters]))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __fullpath_body(self, str_url):
+        return self.path_to_bodies + hashlib.sha256(str_url.encode('utf-8')).hexdigest()
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __remove_body_file(self, fullpath_body):
+        # another thread could have removed (or replaced) the same file in the meantime
+        try:
+            os.remove(fullpath_body)
+        except FileNotFoundError:
+            pass
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __count(self, str_endpoint, str_outcome, int_bytes_downloaded, int_bytes_saved=0):
+        with self.__lock:
+            if str_endpoint not in self.dict_counters:
+                self.dict_counters[str_endpoint] = {self.str_counter_requests: 0,
+                                                    self.str_counter_not_modified: 0,
+                                                    self.str_counter_unchanged_body: 0,
+                                                    self.str_counter_changed: 0,
+                                                    self.str_counter_bytes_downloaded: 0,
+                                                    self.str_counter_bytes_saved: 0}
+            dict_endpoint_counters = self.dict_counters[str_endpoint]
+            dict_endpoint_counters[self.str_counter_requests] += 1
+            dict_endpoint_counters[str_outcome] += 1
+            dict_endpoint_counters[self.str_counter_bytes_downloaded] += int_bytes_downloaded
+            dict_endpoint_counters[self.str_counter_bytes_saved] += int_bytes_saved
+    # ------------------------ END FUNCTION ------------------------ #
@@ -2,13 +2,26 @@ import my_globals
 import my_config
 import logging
 from airtable import Airtable
+from class_token_bucket import TokenBucket
+
+# all the requests made to Airtable (by every instance of the class below) take a token from
+# this limiter first, so together they never go over the requests per second Airtable accepts.
+airtable_rate_limiter = TokenBucket(my_globals.flt_airtable_max_requests_per_second,
+                                    my_globals.int_airtable_request_burst)
 
 
 class MyAirtWrapper(Airtable):
     """An child class I created of the Airtable python wrapper I found on the
-    interwebs. My class allows for performing some additional checks."""
+    interwebs. My class allows for performing some additional checks.
+    It also rate-limits every request it makes (with a limiter shared by all
+    instances) and has 'batch' methods that create, update or delete up to 10
+    records per request, instead of one record per request. These are named
+    '..._with_results' so that they don't hide the batch_insert, batch_update
+    and batch_delete of the Airtable wrapper, which return something different."""
 
-    def __init__(self, str_airtable_table, timeout=my_globals.int_timeout, perform_checks=False):
+    def __init__(self, str_airtable_table, timeout=my_globals.int_timeout, perform_checks=False,
+                 rate_limiter=airtable_rate_limiter):
+        self.rate_limiter = rate_limiter
         okay_to_initialize = False
         if perform_checks:
             if self.confirm_airtable_intended_base():
@@ -54,4 +67,84 @@ class MyAirtWrapper(Airtable):
             logging.error('UNKNOWN AIRTABLE BASE - NEITHER PROD NOR TEST. Exiting...')
             exit(0)
         return str_base_env
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def _request(self, method, url, params=None, json_data=None):
+        """Every request the Airtable wrapper makes goes through this method, so this is where
+        the (shared) rate limiter is applied."""
+        self.rate_limiter.take()
+        return super()._request(method, url, params=params, json_data=json_data)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def batch_insert_with_results(self, lst_records_fields, typecast=False):
+        """Creates records (lst_records_fields is a list with a dictionary of fields per record)
+        up to 10 per request. Returns a list, in the same order as the records given, with a tuple
+        per record: (the record created, None) if it worked, or ({}, the Exception) if it didn't."""
+        return self.__batch_write('post', [{'fields': dict_fields} for dict_fields in lst_records_fields],
+                                  typecast)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def batch_update_with_results(self, lst_records_ids_and_fields, typecast=False):
+        """Updates records (lst_records_ids_and_fields is a list of tuples with the Airtable ID of the
+        record, and a dictionary with the fields to update) up to 10 per request. Returns a list of
+        tuples, one per record, in the same way as batch_insert_with_results."""
+        return self.__batch_write('patch', [{'id': str_record_id, 'fields': dict_fields}
+                                            for str_record_id, dict_fields in lst_records_ids_and_fields],
+                                  typecast)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def batch_delete_with_results(self, lst_record_ids):
+        """Deletes records (given their Airtable IDs) up to 10 per request. Returns a list of tuples,
+        one per record, in the same way as batch_insert_with_results."""
+        lst_results = []
+        int_chunk_size = my_globals.int_airtable_max_records_per_request
+        for int_start in range(0, len(lst_record_ids), int_chunk_size):
+            lst_chunk = lst_record_ids[int_start:int_start + int_chunk_size]
+            try:
+                dict_response = self._request('delete', self.url_table, params={'records[]': lst_chunk})
+                lst_results.extend([(a_record, None) for a_record in dict_response['records']])
+            except Exception as e:
+                logging.warning('A batch delete of ' + str(len(lst_chunk)) + ' Airtable records failed. Deleting'
+                                ' them one at a time to find the ones with problems. The Exception was: ' + repr(e))
+                for str_record_id in lst_chunk:
+                    try:
+                        lst_results.append((self._request('delete', self.url_table + '/' + str_record_id), None))
+                    except Exception as e_record:
+                        lst_results.append(({}, e_record))
+        return lst_results
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __batch_write(self, str_method, lst_records, typecast):
+        """Sends the records to Airtable (with a POST to create them, or a PATCH to update them) up to 10
+        per request. Airtable rejects a whole request if any of its records is bad, so when a request
+        fails, its records are sent again one at a time. That way the good ones still get written, and
+        each failure is attributed to the record that caused it."""
+        lst_results = []
+        int_chunk_size = my_globals.int_airtable_max_records_per_request
+        for int_start in range(0, len(lst_records), int_chunk_size):
+            lst_chunk = lst_records[int_start:int_start + int_chunk_size]
+            try:
+                dict_response = self._request(str_method, self.url_table,
+                                              json_data={'records': lst_chunk, 'typecast': typecast})
+                lst_results.extend([(a_record, None) for a_record in dict_response['records']])
+            except Exception as e:
+                logging.warning('A batch ' + str_method + ' of ' + str(len(lst_chunk)) + ' Airtable records failed.'
+                                ' Sending them one at a time to find the ones with problems. The Exception was: ' +
+                                repr(e))
+                for dict_record in lst_chunk:
+                    str_url = self.url_table
+                    if 'id' in dict_record:
+                        str_url += '/' + dict_record['id']
+                    try:
+                        lst_results.append((self._request(str_method, str_url,
+                                                          json_data={'fields': dict_record['fields'],
+                                                                     'typecast': typecast}), None))
+                    except Exception as e_record:
+                        lst_results.append(({}, e_record))
+        return lst_results
     # ------------------------ END FUNCTION ------------------------ #
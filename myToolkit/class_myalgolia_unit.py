@@ -273,6 +273,24 @@ class AlgoliaDataUnit:
 
     # ------------------------ END FUNCTION ------------------------ #
 
+    def fetch_fields_not_yet_pushed(self):
+        """Returns a list with the fields whose value updated locally is different from the value
+        that was last pushed to Algolia (the 'dirty' fields of the unit, see AlgoliaDirtyIndex.) Lists
+        are compared regardless of their order, as when making the record to push."""
+        lst_fields = []
+        for a_key, dict_values in self.dict_algolia_unit.items():
+            val_previously_pushed = dict_values[self.key_for_values_pushed]
+            val_current = dict_values[self.key_for_values_current]
+            if type(val_previously_pushed) is list:
+                val_previously_pushed = sorted(val_previously_pushed)
+            if type(val_current) is list:
+                val_current = sorted(val_current)
+            if val_previously_pushed != val_current:
+                lst_fields.append(a_key)
+        return lst_fields
+
+    # ------------------------ END FUNCTION ------------------------ #
+
     def dump_algolia_unit_as_dict(self):
         return self.dict_algolia_unit
 
@@ -0,0 +1,279 @@
+import os
+import json
+import mmap
+import logging
+
+
+class PackedPayloadStore:
+    """A class for storing many small python dictionaries (payloads) in a single
+    'packed' file, rather than one file per payload. This is intended to be used by
+    SimpleDS as an alternative to its one-JSON-file-per-entry 'current data' directory,
+    which is slow when the data lives on a network filesystem (like EFS), because
+    every single fetch is a separate round-trip.
+    How it works:
+    - the packed file is append-only. Every time a payload is added or updated, a new
+    record is appended at the end of the file. Every record is a single line that looks
+    like: ID<tab>JSON<newline>. A deletion appends a 'tombstone', which is a record with
+    an empty JSON part.
+    - an offset index (a dictionary of ID -> [offset, length]) keeps track of where the
+    latest version of each payload starts in the packed file. The index is saved to its
+    own small file when 'flush' is called, together with the size of the packed file at
+    that moment. If the program stops before the index is saved, the next time the store is
+    opened, the records appended after that size are simply re-read from the packed file,
+    so nothing is lost. A record that was only partly written (the program stopped half-way
+    through writing it) is cut off the end of the file, so the next record starts cleanly.
+    - reads use mmap, so fetching lots of payloads is a matter of reading slices of a single
+    file, instead of opening thousands of files.
+    - because updates and deletions leave old versions of the records behind, the file
+    grows over time. 'compact' rewrites the file with only the current version of each
+    payload. 'flush' calls it automatically when more than half the file is dead records."""
+    __separator = b'\t'
+    __end_of_record = b'\n'
+    __key_index = 'index'
+    __key_size_covered = 'size_of_packed_file_covered_by_index'
+    __key_dead_bytes = 'dead_bytes'
+
+    def __init__(self, fullpath_packed_file, name=''):
+        """Receives the full path of the packed file. The index file is stored next to it
+        with the same name plus '.idx'. The 'name' is only used for logging."""
+        self.fullpath_packed_file = fullpath_packed_file
+        self.fullpath_index_file = fullpath_packed_file + '.idx'
+        self.name = name
+        self.dict_index = {}
+        self.int_dead_bytes = 0
+        self.__file_for_appending = None
+        self.__mmap = None
+        self.__int_mmap_size = 0
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __contains__(self, item_id):
+        return item_id in self.dict_index
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __len__(self):
+        return len(self.dict_index)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def open(self):
+        """Opens the store, creating the packed file if it doesn't exist yet, and loads
+        the offset index (catching up with any records the saved index doesn't know about.)"""
+        logging.debug('Opening packed payload store: ' + self.name)
+        if not os.path.isfile(self.fullpath_packed_file):
+            open(self.fullpath_packed_file, mode='wb').close()
+        int_size_covered = 0
+        if os.path.isfile(self.fullpath_index_file):
+            try:
+                with open(self.fullpath_index_file, mode='r') as index_file:
+                    dict_saved = json.load(index_file)
+                self.dict_index = dict_saved[self.__key_index]
+                self.int_dead_bytes = dict_saved[self.__key_dead_bytes]
+                int_size_covered = dict_saved[self.__key_size_covered]
+            except Exception as e:
+                logging.warning('Could not load the index of the packed payload store. It will be rebuilt from'
+                                ' the packed file. ' + self.name + ' The Exception was: ' + repr(e))
+                self.dict_index = {}
+                self.int_dead_bytes = 0
+                int_size_covered = 0
+        int_size_packed_file = os.path.getsize(self.fullpath_packed_file)
+        if int_size_covered > int_size_packed_file:
+            # this should never happen, but if it does, the index can't be trusted
+            logging.warning('Index of packed payload store is ahead of the packed file. Rebuilding it. ' + self.name)
+            self.dict_index = {}
+            self.int_dead_bytes = 0
+            int_size_covered = 0
+        if int_size_covered < int_size_packed_file:
+            int_end_of_complete_records = self.__replay_records_from(int_size_covered)
+            if int_end_of_complete_records < int_size_packed_file:
+                # the last record was only partly written. It is cut off, otherwise the next record
+                # appended would be glued to it (and both would be read back as one broken record.)
+                logging.warning('Removing a partly written record at the end of the packed payload store: ' +
+                                self.name)
+                os.truncate(self.fullpath_packed_file, int_end_of_complete_records)
+        self.__file_for_appending = open(self.fullpath_packed_file, mode='ab')
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def is_open(self):
+        return self.__file_for_appending is not None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def close(self):
+        self.flush(allow_compaction=False)
+        self.__close_mmap()
+        if self.__file_for_appending is not None:
+            self.__file_for_appending.close()
+            self.__file_for_appending = None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch(self, item_id):
+        """Returns the payload (a python dictionary) stored for the ID."""
+        int_offset, int_length = self.dict_index[item_id]
+        if (int_offset + int_length) > self.__int_mmap_size:
+            # the record was appended after the mmap was created, so we re-create it
+            self.__refresh_mmap()
+        bytes_record = self.__mmap[int_offset:int_offset + int_length]
+        return json.loads(bytes_record)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_all_ids_as_python_set(self):
+        return set(self.dict_index.keys())
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def put(self, item_id, the_data):
+        """Adds or replaces the payload for an ID, by appending a record to the packed file."""
+        bytes_id = item_id.encode('utf-8')
+        bytes_json = json.dumps(the_data).encode('utf-8')
+        # make sure whatever is buffered is accounted for, so 'tell' is the real end of the file
+        self.__file_for_appending.flush()
+        int_record_start = self.__file_for_appending.tell()
+        self.__file_for_appending.write(bytes_id + self.__separator + bytes_json + self.__end_of_record)
+        self.__file_for_appending.flush()
+        int_json_offset = int_record_start + len(bytes_id) + len(self.__separator)
+        if item_id in self.dict_index:
+            self.int_dead_bytes += self.__size_of_full_record(item_id)
+        self.dict_index[item_id] = [int_json_offset, len(bytes_json)]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def delete(self, item_id):
+        """Removes the payload for an ID, by appending a tombstone to the packed file."""
+        if item_id in self.dict_index:
+            bytes_tombstone = item_id.encode('utf-8') + self.__separator + self.__end_of_record
+            self.__file_for_appending.write(bytes_tombstone)
+            self.__file_for_appending.flush()
+            self.int_dead_bytes += self.__size_of_full_record(item_id) + len(bytes_tombstone)
+            self.dict_index.pop(item_id)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def flush(self, allow_compaction=True):
+        """Makes sure everything appended is on disk, and saves the offset index. If more than
+        half of the packed file is taken up by old versions of records, it is compacted first."""
+        if self.__file_for_appending is None:
+            return
+        self.__file_for_appending.flush()
+        os.fsync(self.__file_for_appending.fileno())
+        int_size_packed_file = os.path.getsize(self.fullpath_packed_file)
+        if allow_compaction and int_size_packed_file > 0 and (self.int_dead_bytes / int_size_packed_file) > 0.5:
+            self.compact()
+        else:
+            self.__save_index(int_size_packed_file)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def compact(self):
+        """Rewrites the packed file keeping only the current version of each payload. The new
+        file is written alongside the existing one, and only replaces it once it is complete."""
+        logging.info('Compacting packed payload store: ' + self.name)
+        self.__refresh_mmap()
+        fullpath_tmp = self.fullpath_packed_file + '.compacting'
+        dict_new_index = {}
+        with open(fullpath_tmp, mode='wb') as new_file:
+            # we write the records in the order of their current offsets, so the new
+            # file is read sequentially from the old one
+            for item_id in sorted(self.dict_index, key=lambda an_id: self.dict_index[an_id][0]):
+                int_offset, int_length = self.dict_index[item_id]
+                bytes_id = item_id.encode('utf-8')
+                int_record_start = new_file.tell()
+                new_file.write(bytes_id + self.__separator + self.__mmap[int_offset:int_offset + int_length] +
+                               self.__end_of_record)
+                dict_new_index[item_id] = [int_record_start + len(bytes_id) + len(self.__separator), int_length]
+            new_file.flush()
+            os.fsync(new_file.fileno())
+        self.__close_mmap()
+        self.__file_for_appending.close()
+        os.replace(fullpath_tmp, self.fullpath_packed_file)
+        self.__file_for_appending = open(self.fullpath_packed_file, mode='ab')
+        self.dict_index = dict_new_index
+        self.int_dead_bytes = 0
+        self.__save_index(os.path.getsize(self.fullpath_packed_file))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def wipe(self):
+        """Deletes all payloads."""
+        logging.debug('Wiping packed payload store: ' + self.name)
+        self.__close_mmap()
+        if self.__file_for_appending is not None:
+            self.__file_for_appending.close()
+        open(self.fullpath_packed_file, mode='wb').close()
+        self.__file_for_appending = open(self.fullpath_packed_file, mode='ab')
+        self.dict_index = {}
+        self.int_dead_bytes = 0
+        self.__save_index(0)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __size_of_full_record(self, item_id):
+        """Size in bytes of the whole record (ID, separator, JSON and end-of-record)
+        currently pointed to by the index for the ID."""
+        return len(item_id.encode('utf-8')) + len(self.__separator) + self.dict_index[item_id][1] + \
+            len(self.__end_of_record)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __replay_records_from(self, int_start_offset):
+        """Reads the records from the packed file starting at the given offset, and updates
+        the index with them. Used when the saved index is behind the packed file.
+        RETURNS the offset where the last complete record ends (which is the size of the file,
+        unless the last record was only partly written.)"""
+        logging.info('Re-reading records of packed payload store that are not in its index: ' + self.name)
+        with open(self.fullpath_packed_file, mode='rb') as packed_file:
+            packed_file.seek(int_start_offset)
+            int_position = int_start_offset
+            for bytes_line in packed_file:
+                if not bytes_line.endswith(self.__end_of_record):
+                    # a partially written last record (the program stopped half-way through
+                    # a write). We ignore it (the caller cuts it off the file.)
+                    break
+                bytes_id, _, bytes_json_and_eol = bytes_line.partition(self.__separator)
+                item_id = bytes_id.decode('utf-8')
+                int_json_length = len(bytes_json_and_eol) - len(self.__end_of_record)
+                if item_id in self.dict_index:
+                    self.int_dead_bytes += self.__size_of_full_record(item_id)
+                if int_json_length > 0:
+                    self.dict_index[item_id] = [int_position + len(bytes_id) + len(self.__separator), int_json_length]
+                else:
+                    # a tombstone
+                    self.int_dead_bytes += len(bytes_line)
+                    self.dict_index.pop(item_id, None)
+                int_position += len(bytes_line)
+        return int_position
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __save_index(self, int_size_covered):
+        dict_to_save = {self.__key_index: self.dict_index,
+                        self.__key_dead_bytes: self.int_dead_bytes,
+                        self.__key_size_covered: int_size_covered}
+        fullpath_tmp = self.fullpath_index_file + '.tmp'
+        with open(fullpath_tmp, mode='w') as index_file:
+            json.dump(dict_to_save, index_file)
+        os.replace(fullpath_tmp, self.fullpath_index_file)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __refresh_mmap(self):
+        self.__close_mmap()
+        self.__file_for_appending.flush()
+        int_size = os.path.getsize(self.fullpath_packed_file)
+        if int_size > 0:
+            with open(self.fullpath_packed_file, mode='rb') as packed_file:
+                self.__mmap = mmap.mmap(packed_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.__int_mmap_size = int_size
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __close_mmap(self):
+        if self.__mmap is not None:
+            self.__mmap.close()
+            self.__mmap = None
+        self.__int_mmap_size = 0
+    # ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,349 @@
+import io
+import os
+import json
+import time
+import signal
+import hashlib
+import logging
+import threading
+import multiprocessing
+from math import ceil
+import PyPDF2
+import pdfplumber
+import my_globals
+
+
+class PdfPageTimeout(Exception):
+    pass
+
+
+class PdfPoolError(Exception):
+    """Raised when the pool a document was being extracted with stopped running (it was terminated
+    because another document ran out of time.) It says nothing about the PDF itself."""
+    pass
+
+
+def raise_pdf_page_timeout(signum, frame):
+    raise PdfPageTimeout('Extracting the text of the page took too long.')
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def run_with_page_timeout(func, flt_timeout_secs):
+    """Runs func() and returns what it returns, but raises PdfPageTimeout if it takes longer than
+    flt_timeout_secs. This is meant to be run in the worker processes of the pool (where tasks run in
+    the main thread, which is the only one that can receive signals.) It uses SIGALRM, so on platforms
+    that don't have it, pages have no time limit (but the whole document still does.)"""
+    if (flt_timeout_secs <= 0) or (not hasattr(signal, 'setitimer')):
+        return func()
+    signal.signal(signal.SIGALRM, raise_pdf_page_timeout)
+    signal.setitimer(signal.ITIMER_REAL, flt_timeout_secs)
+    try:
+        return func()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def count_pdf_pages_with_pdfplumber(bytes_pdf):
+    with pdfplumber.open(io.BytesIO(bytes_pdf)) as pdf_reader:
+        return len(pdf_reader.pages)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def extract_pdf_pages_with_pdfplumber(bytes_pdf, int_first_page, int_end_page, flt_page_timeout_secs):
+    """Extracts the text of the pages from int_first_page up to (but not including) int_end_page.
+    Returns a list with a (text, error, timed out) tuple for every page. The text is None for pages where
+    the extraction failed (or took too long) and then the error says why."""
+    lst_pages = []
+    try:
+        with pdfplumber.open(io.BytesIO(bytes_pdf)) as pdf_reader:
+            for int_page in range(int_first_page, int_end_page):
+                try:
+                    # on one PDF I ran into a page that threw an unknown exception, so rather than
+                    # completely ignoring the PDF, every page that doesn't throw an error is kept.
+                    str_page_text = run_with_page_timeout(pdf_reader.pages[int_page].extract_text,
+                                                          flt_page_timeout_secs)
+                    if isinstance(str_page_text, str):
+                        lst_pages.append((str_page_text, '', False))
+                    else:
+                        lst_pages.append((None, 'no text returned', False))
+                except Exception as e:
+                    lst_pages.append((None, repr(e), isinstance(e, PdfPageTimeout)))
+    except Exception as e:
+        lst_pages += [(None, repr(e), False)] * (int_end_page - int_first_page - len(lst_pages))
+    return lst_pages
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def extract_pdf_text_with_pypdf2(bytes_pdf, flt_page_timeout_secs):
+    """Extracts the text of a whole PDF with PyPDF2. Raises an exception if the PDF can't be
+    opened. Returns the text, and a list of (page number, error, timed out) tuples for the pages that failed."""
+    pdf_reader = PyPDF2.PdfFileReader(io.BytesIO(bytes_pdf))
+    str_text = ''
+    lst_errors = []
+    for int_page in range(pdf_reader.numPages):
+        try:
+            str_text += run_with_page_timeout(lambda int_pg=int_page: pdf_reader.getPage(int_pg).extractText(),
+                                              flt_page_timeout_secs).replace('\n', ' ')
+        except Exception as e:
+            lst_errors.append((int_page, repr(e), isinstance(e, PdfPageTimeout)))
+    return str_text, lst_errors
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+class PdfExtractionResult:
+    """What PdfTextExtractor.extract_text returns: the text, and what happened along the way
+    (so the callers can keep reporting on it the way they always have.)"""
+
+    def __init__(self):
+        self.str_text = ''
+        self.opened_with_pdfplumber = False
+        self.extracted_with_pdfplumber = False
+        self.attempted_pypdf2 = False
+        self.opened_with_pypdf2 = False
+        self.extracted_with_pypdf2 = False
+        self.timed_out = False
+        self.page_timed_out = False
+        self.pypdf2_page_timed_out = False
+        self.pool_failed = False
+        self.from_cache = False
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+
+class PdfTextExtractor:
+    """This class extracts the text from PDFs (publications, and video transcripts in PDF format.)
+    - it works on the bytes of the PDF in memory, rather than writing the PDF to a temporary file.
+    - the pages are extracted by a pool of processes (each process gets a range of pages) so a big
+    PDF is extracted in parallel, and a PDF that makes the extraction library misbehave can't
+    stall the calling process.
+    - every page has a time limit, and so does the whole document. A page that runs out of time
+    counts as a failed page. If the document runs out of time the pool is terminated (that is the
+    only way to stop a process that is stuck) and the text is empty. A new pool is started the
+    next time it is needed. Other threads that were extracting with the pool that was terminated
+    notice it (within a second) and give up on their document too, with an empty text. A thread
+    only ever terminates the pool its own document was extracted with, never a newer one.
+    - pdfplumber is tried first, and PyPDF2 only if pdfplumber didn't get the text of more than
+    90% of the pages (as it has always been done.)
+    - the text extracted is kept in a cache on disk, by the hash of the contents of the PDF. A PDF
+    that was downloaded again, but hasn't changed, is never extracted again (that includes the PDFs
+    that needed PyPDF2, whose result is just as repeatable.) The results that are not cached are those
+    that depended on luck, as the next attempt might do better: documents that ran out of time or lost
+    their pool, and documents whose text is missing a page that ran out of time.
+    The pool uses multiprocessing (rather than concurrent.futures) because its processes can be
+    terminated. The object can be shared by several threads. 'close' should be called when done."""
+
+    def __init__(self, int_num_processes=my_globals.int_pdf_extraction_processes,
+                 flt_page_timeout_secs=my_globals.flt_pdf_page_timeout_secs,
+                 flt_document_timeout_secs=my_globals.flt_pdf_document_timeout_secs,
+                 path_to_cache_dir=my_globals.str_dir4_pdf_text_cache):
+        self.int_num_processes = max(int_num_processes, 1)
+        self.flt_page_timeout_secs = flt_page_timeout_secs
+        self.flt_document_timeout_secs = flt_document_timeout_secs
+        self.path_to_cache_dir = path_to_cache_dir
+        os.makedirs(self.path_to_cache_dir, exist_ok=True)
+        self.__pool = None
+        self.__lock = threading.Lock()
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def extract_text(self, bytes_pdf, str_doc_id=''):
+        """Returns a PdfExtractionResult with the text of the PDF given (as bytes.) str_doc_id
+        is only used for logging."""
+        str_pdf_hash = hashlib.sha256(bytes_pdf).hexdigest()
+        result = self.__fetch_from_cache(str_pdf_hash)
+        if result is not None:
+            logging.info('The text of the PDF of ' + str_doc_id + ' was already extracted before. Using that.')
+            return result
+        result = PdfExtractionResult()
+        flt_deadline = time.monotonic() + self.flt_document_timeout_secs
+        # the whole document is extracted with the same pool (even if another thread replaces it)
+        pool = self.__fetch_pool()
+        try:
+            self.__extract_with_pdfplumber(pool, bytes_pdf, str_doc_id, result, flt_deadline)
+            # now we check to see if pdfplumber was able to extract the text.
+            # if it was not, we try with PyPDF2
+            if not result.str_text:
+                self.__extract_with_pypdf2(pool, bytes_pdf, str_doc_id, result, flt_deadline)
+        except multiprocessing.TimeoutError:
+            logging.error('Extracting the text from the PDF of ' + str_doc_id + ' took longer than ' +
+                          str(self.flt_document_timeout_secs) + ' seconds. Giving up on it.')
+            result.str_text = ''
+            result.timed_out = True
+            self.__terminate_pool(pool)
+        except PdfPoolError as e:
+            logging.error('Extracting the text from the PDF of ' + str_doc_id + ' could not be finished because'
+                          ' the pool of processes stopped running. Giving up on it. The Exception was: ' + repr(e))
+            result.str_text = ''
+            result.pool_failed = True
+        # a page of pdfplumber that ran out of time only matters if the text of pdfplumber is the one kept
+        page_timeout_in_text = result.pypdf2_page_timed_out or \
+            (result.page_timed_out and result.extracted_with_pdfplumber)
+        if not (result.timed_out or result.pool_failed or page_timeout_in_text):
+            self.__save_to_cache(str_pdf_hash, result)
+        return result
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def close(self):
+        """Stops the pool of processes (after letting it finish whatever it is doing.)"""
+        with self.__lock:
+            if self.__pool is not None:
+                self.__pool.close()
+                self.__pool.join()
+                self.__pool = None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __extract_with_pdfplumber(self, pool, bytes_pdf, str_doc_id, result, flt_deadline):
+        logging.info('Attempting to open the PDF with pdfplumber.')
+        try:
+            int_num_pages = self.__run_in_pool(pool, count_pdf_pages_with_pdfplumber, (bytes_pdf,), flt_deadline)
+            result.opened_with_pdfplumber = True
+        except (multiprocessing.TimeoutError, PdfPoolError):
+            raise
+        except Exception as e:
+            logging.error('Problem opening the PDF with pdfplumber. The Exception was: ' + repr(e))
+            return
+        if int_num_pages == 0:
+            return
+        # each process gets a range of consecutive pages
+        int_pages_per_task = ceil(int_num_pages / min(self.int_num_processes, int_num_pages))
+        lst_async_results = [self.__submit_to_pool(pool, extract_pdf_pages_with_pdfplumber,
+                                                   (bytes_pdf, int_first_page,
+                                                    min(int_first_page + int_pages_per_task, int_num_pages),
+                                                    self.flt_page_timeout_secs))
+                             for int_first_page in range(0, int_num_pages, int_pages_per_task)]
+        lst_pages = []
+        for async_result in lst_async_results:
+            lst_pages += self.__wait_for_result(pool, async_result, flt_deadline)
+        str_text = ''
+        counter_pages_success = 0
+        for int_page, (str_page_text, str_error, page_timed_out) in enumerate(lst_pages):
+            if page_timed_out:
+                result.page_timed_out = True
+            if str_page_text is None:
+                logging.error('While extracting text from the PDF using pdfplumber there was an issue with ' +
+                              str_doc_id + ' at page ' + str(int_page + 1) + '. All other pages are still'
+                              ' processed. The Exception was: ' + str_error)
+            else:
+                str_text += str_page_text
+                counter_pages_success += 1
+        if str_text.strip() and (counter_pages_success / int_num_pages > .9):
+            result.str_text = str_text.strip()
+            result.extracted_with_pdfplumber = True
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __extract_with_pypdf2(self, pool, bytes_pdf, str_doc_id, result, flt_deadline):
+        logging.info('Attempting to open the PDF with PyPDF2.')
+        result.attempted_pypdf2 = True
+        try:
+            str_text, lst_errors = self.__run_in_pool(pool, extract_pdf_text_with_pypdf2,
+                                                      (bytes_pdf, self.flt_page_timeout_secs), flt_deadline)
+            result.opened_with_pypdf2 = True
+        except (multiprocessing.TimeoutError, PdfPoolError):
+            raise
+        except Exception as e:
+            logging.error('Problem opening the PDF with PyPDF2. The Exception was: ' + repr(e))
+            return
+        for int_page, str_error, page_timed_out in lst_errors:
+            if page_timed_out:
+                result.pypdf2_page_timed_out = True
+            logging.error('While extracting text from the PDF using PyPDF2 there was an issue with ' +
+                          str_doc_id + ' at page ' + str(int_page) + '. All other pages are still'
+                          ' processed. The Exception was: ' + str_error)
+        result.str_text = str_text.strip()
+        result.extracted_with_pypdf2 = bool(result.str_text)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __run_in_pool(self, pool, func, tpl_args, flt_deadline):
+        """Runs a function in the pool and waits for its result, but only until the deadline.
+        If the deadline passes, multiprocessing.TimeoutError is raised."""
+        return self.__wait_for_result(pool, self.__submit_to_pool(pool, func, tpl_args), flt_deadline)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __submit_to_pool(self, pool, func, tpl_args):
+        """Hands a task to the pool. If the pool is no longer running (another thread terminated it)
+        PdfPoolError is raised, so it isn't mistaken for a problem with the PDF."""
+        try:
+            return pool.apply_async(func, tpl_args)
+        except ValueError as e:
+            raise PdfPoolError(repr(e))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __wait_for_result(self, pool, async_result, flt_deadline):
+        """Waits for the result of a task until the deadline (and then raises multiprocessing.TimeoutError.)
+        A task of a pool that was terminated never finishes, so the wait is done a second at a time, and
+        if the pool was terminated in the meantime (it is no longer the pool of the object) PdfPoolError
+        is raised, rather than waiting for nothing until the deadline."""
+        while True:
+            flt_secs_left = flt_deadline - time.monotonic()
+            try:
+                return async_result.get(timeout=max(min(flt_secs_left, 1.0), 0.0))
+            except multiprocessing.TimeoutError:
+                if flt_secs_left <= 1.0:
+                    raise
+                if self.__pool is not pool:
+                    raise PdfPoolError('The pool was terminated while the task was running.')
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __fetch_pool(self):
+        with self.__lock:
+            if self.__pool is None:
+                self.__pool = multiprocessing.Pool(processes=self.int_num_processes)
+            return self.__pool
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __terminate_pool(self, pool):
+        """Terminates the pool given, but only if it is still the pool of the object. If it isn't, it
+        was already terminated (by another thread) and the pool of the object now is a new one, which
+        is left alone."""
+        with self.__lock:
+            if self.__pool is pool:
+                self.__pool.terminate()
+                self.__pool.join()
+                self.__pool = None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __fetch_from_cache(self, str_pdf_hash):
+        fullpath_cached = self.path_to_cache_dir + str_pdf_hash + '.json'
+        if not os.path.isfile(fullpath_cached):
+            return None
+        try:
+            with open(fullpath_cached, mode='r') as cached_file:
+                dict_cached = json.load(cached_file)
+            result = PdfExtractionResult()
+            result.__dict__.update(dict_cached)
+            result.from_cache = True
+            return result
+        except Exception as e:
+            logging.warning('Could not read the cached text of a PDF. It will be extracted again.'
+                            ' The Exception was: ' + repr(e))
+            return None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __save_to_cache(self, str_pdf_hash, result):
+        fullpath_cached = self.path_to_cache_dir + str_pdf_hash + '.json'
+        fullpath_tmp = fullpath_cached + '.' + str(threading.get_ident()) + '.tmp'
+        with open(fullpath_tmp, mode='w') as cached_file:
+            json.dump(vars(result), cached_file)
+        os.replace(fullpath_tmp, fullpath_cached)
+    # ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,195 @@
+import os
+import glob
+import json
+import logging
+import my_globals
+from my_content_hashing import make_canonical_hash
+
+
+class SetFilesManifest:
+    """The pulls of videos and publications from the RV website save what the website returns to
+    'set files' (each one a page, with a set of records in its 'data' list.) Several functions then
+    need to know things about those files: how many there are per product, the IDs in them, whether
+    the IDs are consistent, the records that changed, etc. Rather than each one of them globbing the
+    directory and loading every JSON file again, the manifest is built (in one pass) right after the
+    pull, and those functions read the manifest instead.
+    For each set file, the manifest keeps:
+    - the modification time and size of the file when it was read (so a file that changed since is
+    noticed, and read again.)
+    - the IDs of the records in it, in order, and the canonical hash of each record (the same hash that
+    is stored in the SimpleDS, see my_content_hashing.)
+    - error flags: whether the file could not be parsed, and the titles of the records whose two IDs
+    (the top level one, and the one in the 'attributes') don't match.
+    'refresh' brings the manifest up to date with the directory, only reading the files that are new or
+    changed, so it is cheap to call from every consumer (it only stats the files when nothing changed.)
+    The manifest is saved as a JSON file, outside of the directory of set files."""
+    __key_mtime = 'mtime_ns'
+    __key_size = 'size'
+    __key_ids = 'ids'
+    __key_hashes = 'hashes'
+    __key_parse_error = 'parse_error'
+    __key_mismatched_titles = 'titles_with_mismatched_ids'
+
+    def __init__(self, path_to_set_files, fullpath_manifest, str_attributes_id_field, str_attributes_title_field,
+                 str_name=''):
+        """Receives the directory of the set files, where the manifest is saved, and the names of the fields
+        (inside the 'attributes' of each record) with the ID and the title of the record. The name is only
+        used for logging."""
+        self.path_to_set_files = path_to_set_files
+        self.fullpath_manifest = fullpath_manifest
+        self.str_attributes_id_field = str_attributes_id_field
+        self.str_attributes_title_field = str_attributes_title_field
+        self.str_name = str_name
+        self.dict_files = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        if os.path.isfile(self.fullpath_manifest):
+            try:
+                with open(self.fullpath_manifest, mode='r') as manifest_file:
+                    self.dict_files = json.load(manifest_file)
+            except Exception as e:
+                logging.warning('Could not load the manifest of ' + self.str_name + '. All the files will be read'
+                                ' again. The Exception was: ' + repr(e))
+                self.dict_files = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.fullpath_manifest), exist_ok=True)
+        fullpath_tmp = self.fullpath_manifest + '.tmp'
+        with open(fullpath_tmp, mode='w') as manifest_file:
+            json.dump(self.dict_files, manifest_file)
+        os.replace(fullpath_tmp, self.fullpath_manifest)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def refresh(self):
+        """Loads the manifest and brings it up to date with the set files on disk: files that are new,
+        or whose modification time or size changed, are read; files that are gone are dropped. The
+        manifest is saved if anything changed. Returns the number of files that were read."""
+        self.load()
+        dict_files_on_disk = {}
+        for a_fullpath in glob.glob(self.path_to_set_files + '*.json'):
+            stat_result = os.stat(a_fullpath)
+            dict_files_on_disk[os.path.basename(a_fullpath)] = (stat_result.st_mtime_ns, stat_result.st_size)
+        lst_gone = [a_file for a_file in self.dict_files if a_file not in dict_files_on_disk]
+        for a_file in lst_gone:
+            del self.dict_files[a_file]
+        int_files_read = 0
+        for a_file, (int_mtime_ns, int_size) in dict_files_on_disk.items():
+            dict_entry = self.dict_files.get(a_file)
+            if (dict_entry is None) or (dict_entry[self.__key_mtime] != int_mtime_ns) or \
+                    (dict_entry[self.__key_size] != int_size):
+                self.dict_files[a_file] = self.__read_set_file(a_file, int_mtime_ns, int_size)
+                int_files_read += 1
+        if lst_gone or int_files_read:
+            logging.info('Manifest of ' + self.str_name + ' refreshed. Files read: ' + str(int_files_read) +
+                         '. Files gone: ' + str(len(lst_gone)) + '. Files in the manifest: ' +
+                         str(len(self.dict_files)))
+            self.save()
+        return int_files_read
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_fullpaths_of_files(self):
+        return [self.path_to_set_files + a_file for a_file in self.dict_files]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def count_files_with_name_containing(self, str_part_of_name):
+        """The number of set files with the string given in their name (a product ID, for example.)"""
+        return len([a_file for a_file in self.dict_files if str_part_of_name in a_file])
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_ids_in_file(self, str_fullpath_file):
+        """The IDs of the records in a set file (a file not in the manifest has no records.)"""
+        dict_entry = self.dict_files.get(os.path.basename(str_fullpath_file), {})
+        return dict_entry.get(self.__key_ids, [])
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_ids_and_hashes_in_file(self, str_fullpath_file):
+        dict_entry = self.dict_files.get(os.path.basename(str_fullpath_file), {})
+        return list(zip(dict_entry.get(self.__key_ids, []), dict_entry.get(self.__key_hashes, [])))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_all_ids_as_list(self):
+        """The IDs of the records in all the set files (duplicates included.)"""
+        lst_all_ids = []
+        for dict_entry in self.dict_files.values():
+            lst_all_ids.extend(dict_entry[self.__key_ids])
+        return lst_all_ids
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_files_that_could_not_be_parsed(self):
+        return {a_file: dict_entry[self.__key_parse_error] for a_file, dict_entry in self.dict_files.items()
+                if dict_entry[self.__key_parse_error]}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_titles_with_mismatched_ids(self):
+        lst_titles = []
+        for dict_entry in self.dict_files.values():
+            lst_titles.extend(dict_entry[self.__key_mismatched_titles])
+        return lst_titles
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def file_has_records_that_differ_from(self, str_fullpath_file, web_ds):
+        """True if any record of the set file is not in the SimpleDS given, or has a different hash
+        in it. (Records with the same hash need no looking at, so neither does a file full of them.)"""
+        for str_id, str_hash in self.fetch_ids_and_hashes_in_file(str_fullpath_file):
+            if (str_id not in web_ds) or (web_ds.fetch_hash(str_id) != str_hash):
+                return True
+        return False
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __read_set_file(self, str_file, int_mtime_ns, int_size):
+        dict_entry = {self.__key_mtime: int_mtime_ns, self.__key_size: int_size, self.__key_ids: [],
+                      self.__key_hashes: [], self.__key_parse_error: '', self.__key_mismatched_titles: []}
+        try:
+            with open(self.path_to_set_files + str_file, mode='r') as set_file:
+                lst_records = json.load(set_file)['data']
+            for a_record in lst_records:
+                str_id = a_record[my_globals.str_vid_id]
+                dict_attributes = a_record[my_globals.str_vid_attributes]
+                if str_id != dict_attributes[self.str_attributes_id_field]:
+                    dict_entry[self.__key_mismatched_titles].append(dict_attributes[self.str_attributes_title_field])
+                dict_entry[self.__key_ids].append(str_id)
+                dict_entry[self.__key_hashes].append(make_canonical_hash(a_record))
+        except Exception as e:
+            logging.error('Could not read the set file ' + str_file + ' for the manifest of ' + self.str_name +
+                          '. The Exception was: ' + repr(e))
+            dict_entry[self.__key_parse_error] = repr(e)
+        return dict_entry
+    # ------------------------ END FUNCTION ------------------------ #
+
+
+def make_manifest_of_vid_sets():
+    """Returns a SetFilesManifest of the files with sets of videos, brought up to date with the files on disk."""
+    manifest = SetFilesManifest(my_globals.str_dir_path_raw_website_json_video_sets,
+                                my_globals.str_fullfilepath_manifest_video_sets, 'video_id', 'video_title',
+                                'video sets')
+    manifest.refresh()
+    return manifest
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_manifest_of_pub_sets():
+    """Returns a SetFilesManifest of the files with sets of publications, brought up to date with the files on disk."""
+    manifest = SetFilesManifest(my_globals.str_dir_path_raw_website_json_pubs_sets,
+                                my_globals.str_fullfilepath_manifest_pub_sets, 'issue_id', 'issue_title',
+                                'publication sets')
+    manifest.refresh()
+    return manifest
+
+
+# ------------------------ END FUNCTION ------------------------ #
@@ -4,6 +4,7 @@ import json
 import glob
 import logging
 import pandas as pd
+from class_packed_payload_store import PackedPayloadStore
 
 
 class SimpleDS:
@@ -56,18 +57,52 @@ class SimpleDS:
     filename_changes_append = '_changes'
     filename_deletions_append = '_deleted'
 
-    def __init__(self, full_directory_path, name=''):
+    index_format_csv = 'csv'
+    index_format_pickle = 'pickle'
+    payload_format_files = 'files'
+    payload_format_packed = 'packed'
+    filename_packed_payloads = 'packed_payloads.bin'
+
+    def __init__(self, full_directory_path, name='', index_format=index_format_pickle,
+                 payload_format=payload_format_files):
         """This function receives the directory path where the instance of SimpleDS
         stores its files. It also receives an optimal 'name' parameter. This has
         little effect other than being used for identifying the instance of
-        SimpleDS in logging."""
+        SimpleDS in logging.
+        The 'index_format' parameter decides how the dataframe (the index of the
+        SimpleDS) is stored on disk. The original format was a tab separated CSV,
+        which is nice to look at, but slow to load because the TAGS column has to be
+        eval'd row by row to turn it back into lists. The default is now a pickle of
+        the dataframe, which stores the tags as native lists. If a SimpleDS that was
+        saved as CSV is loaded using the pickle format, it is migrated automatically
+        (one time) the first time it is loaded.
+        The 'payload_format' parameter decides how the data of each entry is stored.
+        'files' is the original one-JSON-file-per-entry in the 'current data'
+        subdirectory. 'packed' stores all of the data in a single append-only file
+        (see the PackedPayloadStore class), which is much faster when the data
+        directory is on a network filesystem. Existing JSON files are imported into
+        the packed file the first time a SimpleDS is loaded with the 'packed' format."""
         logging.debug('Initializing an instance of SimpleDS')
         self.path = full_directory_path
         self.path_files = self.path + self.str_subdir_data
         self.path_files_changelog = self.path + self.str_subdir_prev_vrsns
         self.df = pd.DataFrame(columns=self.ds_dict_columns2indexes.keys())
-        self.fullpath_to_df = self.path + 'pandasdf.csv'
+        self.fullpath_to_df_csv = self.path + 'pandasdf.csv'
+        self.fullpath_to_df_pickle = self.path + 'pandasdf.pkl'
+        if index_format == self.index_format_csv:
+            self.fullpath_to_df = self.fullpath_to_df_csv
+        elif index_format == self.index_format_pickle:
+            self.fullpath_to_df = self.fullpath_to_df_pickle
+        else:
+            logging.error('Unknown index format for SimpleDS: ' + str(index_format) + '. Using '
+                          + self.index_format_pickle + ' instead. ' + name)
+            index_format = self.index_format_pickle
+            self.fullpath_to_df = self.fullpath_to_df_pickle
+        self.index_format = index_format
         self.name = name
+        self.payload_store = None
+        if payload_format == self.payload_format_packed:
+            self.payload_store = PackedPayloadStore(self.path + self.filename_packed_payloads, name)
 
     # ------------------------ END FUNCTION ------------------------ #
 
@@ -112,6 +147,11 @@ class SimpleDS:
     # ------------------------ END FUNCTION ------------------------ #
 
     def load(self):
+        # if we are using the pickle format, but the SimpleDS has so far only ever been
+        # saved as a CSV, we do the one-time migration before anything else.
+        if (self.index_format == self.index_format_pickle) and \
+                (not os.path.isfile(self.fullpath_to_df_pickle)) and os.path.isfile(self.fullpath_to_df_csv):
+            self.__migrate_csv_to_pickle()
         if not os.path.isfile(self.fullpath_to_df):
             # if the file for the pandas dataframe does NOT exist
             # in the directory given by the user, then ask the user
@@ -136,16 +176,22 @@ class SimpleDS:
                 exit(0)
         # now if we reach this part of the code, the file for the
         # dataframe should exist.
-        # the line below loads the datastructure's dataframe - NOTE THAT
-        # it is necessary to use a converter on the 'TAGS' column because
-        # otherwise it is loaded as a string, instead of a list.
         logging.debug('Loading SimpleDS dataframe from disk: ' + self.name)
-        self.df = pd.read_csv(self.fullpath_to_df, sep='\t', converters={self.ds_field_datatags: eval})
+        if self.index_format == self.index_format_pickle:
+            # the pickle keeps the TAGS column as lists, so no converter is needed
+            self.df = pd.read_pickle(self.fullpath_to_df)
+        else:
+            # the line below loads the datastructure's dataframe - NOTE THAT
+            # it is necessary to use a converter on the 'TAGS' column because
+            # otherwise it is loaded as a string, instead of a list.
+            self.df = pd.read_csv(self.fullpath_to_df, sep='\t', converters={self.ds_field_datatags: eval})
         self.df.set_index('ID', drop=False, inplace=True)
         # because we keep the column containing the name of the change log empty
         # until it is needed, there can be type errors when trying to read a value that is
         # nan, so here we make the column specifically a string.
         self.df[self.ds_field_datafilename_changes] = self.df[self.ds_field_datafilename_changes].astype(str)
+        if self.payload_store is not None:
+            self.__open_payload_store()
         self.check_status_okay()
 
     # ------------------------ END FUNCTION ------------------------ #
@@ -163,6 +209,8 @@ class SimpleDS:
     def fetch_data(self, item_id):
         """Function loads (from disk) and returns the actual
         data corresponding to the ID that was passed"""
+        if self.payload_store is not None:
+            return self.payload_store.fetch(item_id)
         data_filename = item_id + self.files_ext
         with open(self.path_files + data_filename, mode='r') as datafile:
             return json.load(datafile)
@@ -206,9 +254,12 @@ class SimpleDS:
         # there are no tags, an empty list is initialized.
 
         # write the incoming data to disk
-        with open(self.path_files + entry_filename, mode='w') as datafile:
-            logging.debug('Saving metadata to file as part of SimpleDS: ' + self.name)
-            json.dump(the_data, datafile)
+        if self.payload_store is not None:
+            self.payload_store.put(item_id, the_data)
+        else:
+            with open(self.path_files + entry_filename, mode='w') as datafile:
+                logging.debug('Saving metadata to file as part of SimpleDS: ' + self.name)
+                json.dump(the_data, datafile)
 
     # ------------------------ END FUNCTION ------------------------ #
 
@@ -268,9 +319,12 @@ class SimpleDS:
 
         # now overwrite the exiting data file with the incoming
         # data passed to the method
-        with open(filepath, mode='w') as datafile:
-            logging.debug('Saving new incoming data to disk as part of SimpleDS: ' + self.name)
-            json.dump(new_data, datafile)
+        if self.payload_store is not None:
+            self.payload_store.put(item_id, new_data)
+        else:
+            with open(filepath, mode='w') as datafile:
+                logging.debug('Saving new incoming data to disk as part of SimpleDS: ' + self.name)
+                json.dump(new_data, datafile)
 
     # ------------------------ END FUNCTION ------------------------ #
 
@@ -294,10 +348,19 @@ class SimpleDS:
             # now construct the full path for the deletion file
             full_deletion_file_path = base_filename_path + '_' + str(num_previous_deletions) + self.files_ext
             try:
-                os.rename(fullfilepath_current, full_deletion_file_path)
+                if self.payload_store is not None:
+                    # with a packed payload store there is no file to move, so we
+                    # write the data out to the deletion file instead.
+                    with open(full_deletion_file_path, mode='w') as deletion_file:
+                        json.dump(self.payload_store.fetch(item_id), deletion_file)
+                    self.payload_store.delete(item_id)
+                else:
+                    os.rename(fullfilepath_current, full_deletion_file_path)
             except Exception as e:
                 logging.warning('There was a problem while attempting to ARCHIVE a file that is part of an instance of'
                                 ' of SimpleDS. The Exception is:' + repr(e))
+        elif self.payload_store is not None:
+            self.payload_store.delete(item_id)
         else:
             # we are in this part of the IF/ELSE if we don't want to keep a version of the current file,
             # we just want to delete it.
@@ -404,13 +467,19 @@ class SimpleDS:
         # and the size of the pandas dataframe are the same.
         num_files = 0
         set_of_files = set()
-        for entry in os.scandir(self.path_files):
-            if not entry.name.startswith('.'):
-                num_files += 1
-                filename_no_json_extension = entry.name
-                if entry.name.endswith('.json'):
-                    filename_no_json_extension = entry.name[:-5]
-                set_of_files.add(filename_no_json_extension)
+        if self.payload_store is not None:
+            # with a packed payload store, the 'files' are the entries of the store,
+            # which we can get from its index without touching the filesystem.
+            set_of_files = self.payload_store.fetch_all_ids_as_python_set()
+            num_files = len(set_of_files)
+        else:
+            for entry in os.scandir(self.path_files):
+                if not entry.name.startswith('.'):
+                    num_files += 1
+                    filename_no_json_extension = entry.name
+                    if entry.name.endswith('.json'):
+                        filename_no_json_extension = entry.name[:-5]
+                    set_of_files.add(filename_no_json_extension)
         if num_files != len(self.df):
             status_okay = False
         if not status_okay:
@@ -428,11 +497,22 @@ class SimpleDS:
 
     def save2disk(self):
         self.check_status_okay()
-        separator = '\t'
-        save_index = False
-        logging.debug('Saving dataframe to CSV with separator -> ' + separator + ' and saving index =' +
-                      str(save_index) + '. ' + self.name)
-        self.df.to_csv(self.fullpath_to_df, sep=separator, index=save_index)
+        if self.payload_store is not None:
+            self.payload_store.flush()
+        if self.index_format == self.index_format_pickle:
+            logging.debug('Saving dataframe to pickle. ' + self.name)
+            # we write to a temporary file first and then rename it, so that
+            # if something goes wrong half-way through the write, the previous
+            # version of the index is still intact on disk.
+            fullpath_tmp = self.fullpath_to_df + '.tmp'
+            self.df.to_pickle(fullpath_tmp)
+            os.replace(fullpath_tmp, self.fullpath_to_df)
+        else:
+            separator = '\t'
+            save_index = False
+            logging.debug('Saving dataframe to CSV with separator -> ' + separator + ' and saving index =' +
+                          str(save_index) + '. ' + self.name)
+            self.df.to_csv(self.fullpath_to_df, sep=separator, index=save_index)
 
     # ------------------------ END FUNCTION ------------------------ #
 
@@ -485,16 +565,53 @@ class SimpleDS:
         # this is a 'private' function (although there isn't
         # really such a thing in python) that deletes the file
         # that stores the dataframe on disk as CSV
-        logging.debug('Deleting CSV file that contains the main dataframe of a SimpleDS instance: ' + self.name)
+        logging.debug('Deleting file that contains the main dataframe of a SimpleDS instance: ' + self.name)
         os.remove(self.fullpath_to_df)
 
     # ------------------------ END FUNCTION ------------------------ #
 
+    def __open_payload_store(self):
+        """Opens the packed payload store. If the packed file doesn't exist yet, but there
+        are JSON files in the 'current data' directory (because the SimpleDS used the 'files'
+        payload format until now), they are imported into the packed file. The JSON files are
+        left where they are, so that the SimpleDS can still be used with the 'files' format
+        if needed (bearing in mind they will not receive any further updates.)"""
+        bool_needs_import = not os.path.isfile(self.payload_store.fullpath_packed_file)
+        self.payload_store.open()
+        if bool_needs_import and len(self.df) > 0:
+            logging.info('Importing the data files of a SimpleDS into a packed payload store: ' + self.name)
+            for item_id in self.df.index:
+                fullpath_data_file = self.path_files + self.df.loc[item_id, self.ds_field_datafilename]
+                if os.path.isfile(fullpath_data_file):
+                    with open(fullpath_data_file, mode='r') as datafile:
+                        self.payload_store.put(item_id, json.load(datafile))
+            self.payload_store.flush()
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __migrate_csv_to_pickle(self):
+        """This is a one-time migration of the dataframe of a SimpleDS from the
+        original CSV format to the pickle format. After the pickle is written, the
+        CSV is renamed (rather than deleted) so that it is not picked up again by
+        mistake, but is still around in case something needs to be checked."""
+        logging.info('Migrating SimpleDS dataframe from CSV to pickle format: ' + self.name)
+        df_from_csv = pd.read_csv(self.fullpath_to_df_csv, sep='\t', converters={self.ds_field_datatags: eval})
+        df_from_csv.set_index('ID', drop=False, inplace=True)
+        df_from_csv[self.ds_field_datafilename_changes] = df_from_csv[self.ds_field_datafilename_changes].astype(str)
+        df_from_csv.to_pickle(self.fullpath_to_df_pickle)
+        os.replace(self.fullpath_to_df_csv, self.fullpath_to_df_csv + '.migrated')
+
+    # ------------------------ END FUNCTION ------------------------ #
+
     def __wipe_currentfiles(self):
         # this is a 'private' function (although there isn't really
         # really such a thing in python) that deletes all the files
         # in the database directory that stores the 'current 'data
         # files.
+        if self.payload_store is not None:
+            if not self.payload_store.is_open():
+                self.payload_store.open()
+            self.payload_store.wipe()
         lst_of_filenames = []
         # make a list of the files in the directory that contains
         # 'current' data.
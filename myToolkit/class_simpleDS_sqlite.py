@@ -0,0 +1,489 @@
+import os
+import time
+import json
+import glob
+import sqlite3
+import logging
+from class_simpleDS import SimpleDS
+
+
+class SimpleDSSqlite:
+    """A version of SimpleDS where the 'dataframe' (the index of entries with their
+    timestamps, filenames, hash and tags) is stored in a SQLite database instead of a
+    pandas dataframe that gets rewritten to disk as a whole.
+    The public methods are the same as those of SimpleDS, so an instance of this class
+    can be used anywhere an instance of SimpleDS is used.
+    The main differences are:
+    - every add/update/delete/tag operation is written to the database straight away
+    as a single row write (in its own transaction), so nothing is lost if the program
+    stops before 'save2disk' is called.
+    - optionally (and by default), the data itself (the python dictionary of each entry)
+    is also stored in the database, rather than one JSON file per entry in the 'current'
+    subdirectory. This avoids hitting the filesystem once per entry.
+    The database uses WAL (write-ahead-log) mode, so that reads are not blocked while
+    a write is taking place.
+    Change logs and archived (deleted) entries are still written as files to the
+    'previous versions' subdirectory, exactly as SimpleDS does, because those are only
+    ever written and are rarely (if ever) read by the code."""
+    ds_field_dataid = SimpleDS.ds_field_dataid
+    ds_field_datalastupdated = SimpleDS.ds_field_datalastupdated
+    ds_field_datacreated = SimpleDS.ds_field_datacreated
+    ds_field_datafilename = SimpleDS.ds_field_datafilename
+    ds_field_datafilename_changes = SimpleDS.ds_field_datafilename_changes
+    ds_field_hash = SimpleDS.ds_field_hash
+    ds_field_datatags = SimpleDS.ds_field_datatags
+    str_subdir_data = SimpleDS.str_subdir_data
+    str_subdir_prev_vrsns = SimpleDS.str_subdir_prev_vrsns
+    str_to_use_when_no_change_log = SimpleDS.str_to_use_when_no_change_log
+    files_ext = SimpleDS.files_ext
+    filename_changes_append = SimpleDS.filename_changes_append
+    filename_deletions_append = SimpleDS.filename_deletions_append
+    filename_db = 'simpleds.sqlite'
+    __table_name = 'entries'
+    # maps the field names used by SimpleDS to the column names in the database
+    __dict_fields2columns = {ds_field_dataid: 'id',
+                             ds_field_datalastupdated: 'data_updated',
+                             ds_field_datacreated: 'data_created',
+                             ds_field_datafilename: 'file_current',
+                             ds_field_datafilename_changes: 'file_changes',
+                             ds_field_hash: 'hash',
+                             ds_field_datatags: 'tags'}
+
+    def __init__(self, full_directory_path, name='', store_data_in_db=True):
+        """This function receives the directory path where the instance stores
+        its files, and an optional 'name' that is only used for logging.
+        If store_data_in_db is True, the data of each entry is stored inside the
+        database. Otherwise it is stored as one JSON file per entry in the 'current'
+        subdirectory, just like SimpleDS does."""
+        logging.debug('Initializing an instance of SimpleDSSqlite')
+        self.path = full_directory_path
+        self.path_files = self.path + self.str_subdir_data
+        self.path_files_changelog = self.path + self.str_subdir_prev_vrsns
+        self.fullpath_to_db = self.path + self.filename_db
+        self.store_data_in_db = store_data_in_db
+        self.name = name
+        self.conn = None
+        # the list below holds the order in which the entries are iterated through.
+        # It gets populated by the 'sort' method (and by 'load', in insertion order).
+        self.lst_ids_in_iteration_order = []
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __contains__(self, item_id):
+        """This dunder/magic method makes it possible to check
+        if a particular string representing the ID of a data
+        row is in the data structure."""
+        cursor = self.conn.execute('SELECT 1 FROM ' + self.__table_name + ' WHERE id = ?', (item_id,))
+        return cursor.fetchone() is not None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM ' + self.__table_name).fetchone()[0]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __iter__(self):
+        # the iterator goes through a snapshot of the IDs, in the order set by
+        # the last call to 'sort'. Because it is a snapshot, it is safe to delete
+        # entries while iterating.
+        self.counter = 0
+        set_ids_in_db = self.fetch_all_ids_as_python_set()
+        self.__lst_ids_being_iterated = [an_id for an_id in self.lst_ids_in_iteration_order if an_id in set_ids_in_db]
+        return self
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __next__(self):
+        if self.counter < len(self.__lst_ids_being_iterated):
+            data_id = self.__lst_ids_being_iterated[self.counter]
+            self.counter += 1
+            return data_id
+        else:
+            raise StopIteration
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        """Opens (or creates, if it doesn't exist yet) the database and makes
+        sure the directory structure exists."""
+        os.makedirs(self.path_files, exist_ok=True)
+        os.makedirs(self.path_files_changelog, exist_ok=True)
+        if not os.path.isfile(self.fullpath_to_db):
+            logging.info('No SQLite database found for SimpleDSSqlite. Creating one: ' + self.name)
+        logging.debug('Loading SimpleDSSqlite database from disk: ' + self.name)
+        # each write method below wraps its writes in 'with self.conn:', which
+        # commits the transaction when the block finishes (or rolls it back on error.)
+        self.conn = sqlite3.connect(self.fullpath_to_db)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('CREATE TABLE IF NOT EXISTS ' + self.__table_name + ' ('
+                          'id TEXT PRIMARY KEY, '
+                          'data_updated INTEGER, '
+                          'data_created INTEGER, '
+                          'file_current TEXT, '
+                          'file_changes TEXT, '
+                          'hash TEXT, '
+                          'tags TEXT, '
+                          'data TEXT)')
+        self.lst_ids_in_iteration_order = \
+            [row[0] for row in self.conn.execute('SELECT id FROM ' + self.__table_name + ' ORDER BY rowid')]
+        self.check_status_okay()
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_lastupdated(self, item_id):
+        return int(self.__fetch_column(item_id, self.ds_field_datalastupdated))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_created(self, item_id):
+        return int(self.__fetch_column(item_id, self.ds_field_datacreated))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_data(self, item_id):
+        """Function loads (from the database or from disk) and returns the actual
+        data corresponding to the ID that was passed"""
+        if self.store_data_in_db:
+            cursor = self.conn.execute('SELECT data FROM ' + self.__table_name + ' WHERE id = ?', (item_id,))
+            row = cursor.fetchone()
+            if row is None:
+                raise KeyError(item_id)
+            return json.loads(row[0])
+        else:
+            data_filename = item_id + self.files_ext
+            with open(self.path_files + data_filename, mode='r') as datafile:
+                return json.load(datafile)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_hash(self, item_id):
+        return self.__fetch_column(item_id, self.ds_field_hash)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_all_ids_as_python_set(self):
+        return set(row[0] for row in self.conn.execute('SELECT id FROM ' + self.__table_name))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def add_entry(self, item_id, timestamp_dataupdated,
+                  timestamp_datacreated, the_data, data_hash=''):
+        logging.debug('Adding entry to SimpleDSSqlite: ' + self.name)
+        entry_filename = item_id + self.files_ext
+        str_data = json.dumps(the_data)
+        data_for_db = None
+        if self.store_data_in_db:
+            data_for_db = str_data
+        else:
+            with open(self.path_files + entry_filename, mode='w') as datafile:
+                logging.debug('Saving metadata to file as part of SimpleDSSqlite: ' + self.name)
+                datafile.write(str_data)
+        # same as SimpleDS, the 'INSERT OR REPLACE' overwrites the entry if it already
+        # exists, and adds it if it doesn't.
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO ' + self.__table_name +
+                              ' (id, data_updated, data_created, file_current, file_changes, hash, tags, data)'
+                              ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                              (item_id, timestamp_dataupdated, timestamp_datacreated, entry_filename,
+                               self.str_to_use_when_no_change_log, data_hash, '[]', data_for_db))
+        if item_id not in self.lst_ids_in_iteration_order:
+            self.lst_ids_in_iteration_order.append(item_id)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def update_entry(self, item_id, new_data, update_timestamp, created_timestamp='', new_data_hash='',
+                     dict_of_the_changes={}, log_changes=False):
+        """This method updates an entry.
+        IMPORTANT NOTE. This method does not detect changes. If changes are
+        to be tracked in a log, the changes should already be detected in
+        a dictionary, and passed to this function as a parameter."""
+        logging.debug('Updating an entry in SimpleDSSqlite: ' + self.name)
+        dict_columns_to_update = {self.ds_field_datalastupdated: update_timestamp}
+        if new_data_hash:
+            dict_columns_to_update[self.ds_field_hash] = new_data_hash
+        if created_timestamp:
+            dict_columns_to_update[self.ds_field_datacreated] = created_timestamp
+        if log_changes:
+            filename_changelog = self.__fetch_column(item_id, self.ds_field_datafilename_changes)
+            if filename_changelog == self.str_to_use_when_no_change_log:
+                filename_changelog = item_id + self.filename_changes_append + self.files_ext
+                dict_columns_to_update[self.ds_field_datafilename_changes] = filename_changelog
+                with open(self.path_files_changelog + filename_changelog, mode='w') as change_log_file:
+                    change_log_file.write('{}')
+            fullpath_change_log = self.path_files_changelog + filename_changelog
+            with open(fullpath_change_log, mode='r') as change_log_file:
+                dict_change_log = json.load(change_log_file)
+            timestamp_now = int(round(time.time() * 1000))
+            dict_change_log[timestamp_now] = dict_of_the_changes
+            with open(fullpath_change_log, mode='w') as change_log_file:
+                json.dump(dict_change_log, change_log_file)
+
+        str_data = json.dumps(new_data)
+        if self.store_data_in_db:
+            dict_columns_to_update['data'] = str_data
+        else:
+            filepath = self.path_files + self.__fetch_column(item_id, self.ds_field_datafilename)
+            with open(filepath, mode='w') as datafile:
+                logging.debug('Saving new incoming data to disk as part of SimpleDSSqlite: ' + self.name)
+                datafile.write(str_data)
+        self.__update_columns(item_id, dict_columns_to_update)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def delete_entry(self, item_id, keep_version_of_file_in_log_directory=True):
+        """This method removes an entry. There are two options for the data. It can be
+        deleted completely, or a copy of it can be kept in the 'change log' directory."""
+        filename_current = self.__fetch_column(item_id, self.ds_field_datafilename)
+        fullfilepath_current = self.path_files + filename_current
+        if keep_version_of_file_in_log_directory:
+            base_filename_path = self.path_files_changelog + item_id + self.filename_deletions_append
+            list_of_previous_deletion_files = glob.glob(base_filename_path + '*')
+            num_previous_deletions = len(list_of_previous_deletion_files)
+            full_deletion_file_path = base_filename_path + '_' + str(num_previous_deletions) + self.files_ext
+            try:
+                if self.store_data_in_db:
+                    with open(full_deletion_file_path, mode='w') as deletion_file:
+                        json.dump(self.fetch_data(item_id), deletion_file)
+                else:
+                    os.rename(fullfilepath_current, full_deletion_file_path)
+            except Exception as e:
+                logging.warning('There was a problem while attempting to ARCHIVE an entry that is part of an instance'
+                                ' of SimpleDSSqlite. The Exception is:' + repr(e))
+        elif not self.store_data_in_db:
+            try:
+                os.remove(fullfilepath_current)
+            except Exception as e:
+                logging.warning('There was a problem while attempting to DELETE a file that is part of an instance'
+                                ' of SimpleDSSqlite. The Exception is:' + repr(e))
+        try:
+            with self.conn:
+                self.conn.execute('DELETE FROM ' + self.__table_name + ' WHERE id = ?', (item_id,))
+        except Exception as e:
+            logging.warning('There was a problem while attempting to remove an entry from the database inside'
+                            ' an instance of SimpleDSSqlite. The Exception is: ' + repr(e))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def update_hash(self, item_id, str_hash):
+        self.__update_columns(item_id, {self.ds_field_hash: str_hash})
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def tag_add(self, item_id, str_tag):
+        """This function adds a tag for the data represented by item_id.
+        The tag is only added if it isn't in the list already."""
+        lst_tags = self.__fetch_tags(item_id)
+        if str_tag not in lst_tags:
+            logging.debug('Adding tag to row: ' + item_id + ' in SimpleDSSqlite: ' + self.name)
+            lst_tags.append(str_tag)
+            self.__update_columns(item_id, {self.ds_field_datatags: json.dumps(lst_tags)})
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def tag_add_all_rows(self, str_tag):
+        """This function adds a tag to all of the rows. It is done in a single transaction."""
+        logging.debug('Adding a tag to all rows in SimpleDSSqlite: ' + self.name)
+        with self.conn:
+            for item_id, str_tags in self.conn.execute('SELECT id, tags FROM ' + self.__table_name).fetchall():
+                lst_tags = json.loads(str_tags)
+                if str_tag not in lst_tags:
+                    lst_tags.append(str_tag)
+                    self.conn.execute('UPDATE ' + self.__table_name + ' SET tags = ? WHERE id = ?',
+                                      (json.dumps(lst_tags), item_id))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def tag_remove(self, item_id, str_tag):
+        """This function removes a tag for the data represented by item_id."""
+        logging.debug('Removing tag from row: ' + item_id + ' in SimpleDSSqlite: ' + self.name)
+        lst_tags = self.__fetch_tags(item_id)
+        if str_tag in lst_tags:
+            lst_tags.remove(str_tag)
+            self.__update_columns(item_id, {self.ds_field_datatags: json.dumps(lst_tags)})
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def tag_remove_all_rows(self, str_tag):
+        """This function removes a tag from all of the rows that have it. It is done
+        in a single transaction."""
+        logging.debug('Removing tag: ' + str_tag + ' from all rows in SimpleDSSqlite: ' + self.name)
+        with self.conn:
+            for item_id, str_tags in self.conn.execute('SELECT id, tags FROM ' + self.__table_name).fetchall():
+                lst_tags = json.loads(str_tags)
+                if str_tag in lst_tags:
+                    lst_tags.remove(str_tag)
+                    self.conn.execute('UPDATE ' + self.__table_name + ' SET tags = ? WHERE id = ?',
+                                      (json.dumps(lst_tags), item_id))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def tag_check(self, item_id, str_tag):
+        """Method returns a boolean value indicating whether the tag
+        exists in tags column for a particular row or not."""
+        return str_tag in self.__fetch_tags(item_id)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def tag_replace(self, item_id, str_tag_existing, str_tag_new):
+        """Method replaces an existing tag, with a new tag. If the 'existing' tag
+        is not present, the method simply does nothing."""
+        if self.tag_check(item_id, str_tag_existing):
+            self.tag_remove(item_id, str_tag_existing)
+            self.tag_add(item_id, str_tag_new)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def sort(self, col_name='DATA-CREATED', ascending=False):
+        logging.debug('Sorting instance of SimpleDSSqlite: ' + self.name)
+        str_column = self.__dict_fields2columns[col_name]
+        str_direction = 'ASC' if ascending else 'DESC'
+        self.lst_ids_in_iteration_order = \
+            [row[0] for row in self.conn.execute('SELECT id FROM ' + self.__table_name +
+                                                 ' ORDER BY ' + str_column + ' ' + str_direction)]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def check_status_okay(self):
+        """If the data is stored in the database, the database is always consistent
+        with itself, so there is nothing to check other than that every row has data.
+        If the data is stored in files, we do the same check that SimpleDS does: compare
+        the entries in the database with the files in the data directory."""
+        logging.debug('Checking status of SimpleDSSqlite: ' + self.name)
+        status_okay = True
+        if self.store_data_in_db:
+            lst_ids_without_data = [row[0] for row in self.conn.execute('SELECT id FROM ' + self.__table_name +
+                                                                        ' WHERE data IS NULL')]
+            if lst_ids_without_data:
+                status_okay = False
+                logging.error('Issue with consistency of the datastructure! ' + self.name)
+                logging.error('Entries in the database that have no data: ' + str(lst_ids_without_data))
+        else:
+            set_of_files = set()
+            for entry in os.scandir(self.path_files):
+                if not entry.name.startswith('.'):
+                    filename_no_json_extension = entry.name
+                    if entry.name.endswith(self.files_ext):
+                        filename_no_json_extension = entry.name[:-len(self.files_ext)]
+                    set_of_files.add(filename_no_json_extension)
+            set_of_entries_ds = self.fetch_all_ids_as_python_set()
+            if set_of_files != set_of_entries_ds:
+                status_okay = False
+                logging.error('Issue with consistency of the datastructure! ' + self.name)
+                logging.error("Entries in the database that don't have an associated file: " +
+                              str(list(set_of_entries_ds.difference(set_of_files))))
+                logging.error("Files that don't have an entry in the database: " +
+                              str(list(set_of_files.difference(set_of_entries_ds))))
+        return status_okay
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save2disk(self):
+        """Every write is already committed to the database when it happens, so
+        all there is left to do here is check the status, and fold the write-ahead-log
+        back into the main database file."""
+        self.check_status_okay()
+        logging.debug('Checkpointing SimpleDSSqlite database. ' + self.name)
+        self.conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def delete_all_items_with_specific_tag_and_save_2disk(self, str_tag,
+                                                          keep_deleted_files_in_change_log=True, trial_run=True):
+        """This method deletes all entries that have been tagged with
+        a specific tag, and RETURNS a set with all the IDs that were removed."""
+        set_of_ids_deleted = set()
+        try:
+            lst_rows_with_tags = self.conn.execute('SELECT id, tags FROM ' + self.__table_name +
+                                                   " WHERE tags != '[]'").fetchall()
+            for item_id, str_tags in lst_rows_with_tags:
+                if str_tag in json.loads(str_tags):
+                    if not trial_run:
+                        self.delete_entry(item_id,
+                                          keep_version_of_file_in_log_directory=keep_deleted_files_in_change_log)
+                    set_of_ids_deleted.add(item_id)
+        except Exception as e:
+            logging.error('There was a problem while deleting all rows with a particular tag.'
+                          ' The Exception was: ' + repr(e))
+        self.save2disk()
+        return set_of_ids_deleted
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def import_from_simpleds(self, simple_ds):
+        """Copies all the entries of an (already loaded) instance of SimpleDS into
+        this instance, in one transaction. This is the migration path from SimpleDS to
+        SimpleDSSqlite. Change log filenames are kept, so existing change logs keep working
+        as long as the 'previous versions' directory is the same (or has been copied.)"""
+        logging.info('Importing SimpleDS into SimpleDSSqlite: ' + self.name)
+        with self.conn:
+            for item_id in simple_ds:
+                the_data = simple_ds.fetch_data(item_id)
+                row = simple_ds.df.loc[item_id]
+                data_for_db = None
+                if self.store_data_in_db:
+                    data_for_db = json.dumps(the_data)
+                else:
+                    with open(self.path_files + row[self.ds_field_datafilename], mode='w') as datafile:
+                        json.dump(the_data, datafile)
+                self.conn.execute('INSERT OR REPLACE INTO ' + self.__table_name +
+                                  ' (id, data_updated, data_created, file_current, file_changes, hash, tags, data)'
+                                  ' VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                  (item_id, int(row[self.ds_field_datalastupdated]),
+                                   int(row[self.ds_field_datacreated]), row[self.ds_field_datafilename],
+                                   str(row[self.ds_field_datafilename_changes]), str(row[self.ds_field_hash]),
+                                   json.dumps(list(row[self.ds_field_datatags])), data_for_db))
+                if item_id not in self.lst_ids_in_iteration_order:
+                    self.lst_ids_in_iteration_order.append(item_id)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def wipe(self):
+        """Deletes all entries (and their 'current' data files if the data is not stored in
+        the database.) It does not do anything to the files containing previous versions."""
+        logging.debug('Wiping all entries of SimpleDSSqlite: ' + self.name)
+        with self.conn:
+            self.conn.execute('DELETE FROM ' + self.__table_name)
+        if not self.store_data_in_db:
+            for entry in list(os.scandir(self.path_files)):
+                os.remove(entry.path)
+        self.lst_ids_in_iteration_order = []
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __fetch_column(self, item_id, str_field):
+        cursor = self.conn.execute('SELECT ' + self.__dict_fields2columns[str_field] + ' FROM ' +
+                                   self.__table_name + ' WHERE id = ?', (item_id,))
+        row = cursor.fetchone()
+        if row is None:
+            raise KeyError(item_id)
+        return row[0]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __fetch_tags(self, item_id):
+        return json.loads(self.__fetch_column(item_id, self.ds_field_datatags))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __update_columns(self, item_id, dict_fields_and_values):
+        """Updates one row. The keys of the dictionary are SimpleDS field names (or
+        'data' for the data column) and the values are the new values."""
+        lst_assignments = []
+        lst_values = []
+        for a_field in dict_fields_and_values:
+            lst_assignments.append(self.__dict_fields2columns.get(a_field, a_field) + ' = ?')
+            lst_values.append(dict_fields_and_values[a_field])
+        lst_values.append(item_id)
+        with self.conn:
+            self.conn.execute('UPDATE ' + self.__table_name + ' SET ' + ', '.join(lst_assignments) +
+                              ' WHERE id = ?', lst_values)
+    # ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,124 @@
+import logging
+import numpy as np
+import pandas as pd
+from scipy.sparse import csr_matrix
+import my_globals
+
+
+class SparseTfidfEngine:
+    """This class holds the term-count of a whole corpus of documents (transcripts) as a
+    single sparse matrix, with one row per document and one column per term, and computes
+    the TF-IDF of every document in one vectorized operation.
+    Rows and columns are mapped to document IDs and terms by the lists/dictionaries kept
+    in the object (lst_doc_ids/dict_doc_id2row and lst_vocabulary/dict_term2col.)
+    The matrices are stored in CSR (compressed sparse row) format, which is three arrays:
+    'data' (the values), 'indices' (the column of each value) and 'indptr' (where each
+    row starts in the other two arrays.) We keep the terms of each row in the same order
+    as they were in the term-count dataframe of the document, so that the TF-IDF dataframe
+    produced for a document is exactly the same as the one the older, one-document-at-a-time
+    code used to produce.
+    Apart from generating the per-document TF-IDF files, the matrices are available
+    (matrix_term_count and matrix_tfidf) for other uses, such as similarity between documents."""
+    __column_name_terms = my_globals.str_trnscrpt_class_column_terms
+    __column_name_count = my_globals.str_trnscrpt_class_column_count
+
+    def __init__(self):
+        self.lst_doc_ids = []
+        self.dict_doc_id2row = {}
+        self.lst_vocabulary = []
+        self.dict_term2col = {}
+        self.matrix_term_count = csr_matrix((0, 0))
+        self.matrix_tfidf = csr_matrix((0, 0))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load_term_counts(self, dict_doc_ids_and_term_count_dfs):
+        """Receives a dictionary where the keys are document IDs, and the values are the
+        term-count dataframe of each document (the index has the terms, and the single column
+        has the count.) All of them are put into the term-count sparse matrix in one go."""
+        lst_term_arrays = []
+        lst_count_arrays = []
+        lst_row_lengths = []
+        for doc_id in dict_doc_ids_and_term_count_dfs:
+            df_tc = dict_doc_ids_and_term_count_dfs[doc_id]
+            self.dict_doc_id2row[doc_id] = len(self.lst_doc_ids)
+            self.lst_doc_ids.append(doc_id)
+            lst_term_arrays.append(df_tc.index.to_numpy())
+            lst_count_arrays.append(df_tc.iloc[:, 0].to_numpy(dtype=np.float64))
+            lst_row_lengths.append(len(df_tc))
+        if not lst_term_arrays:
+            logging.warning('No term-count data was given to the sparse TF-IDF engine.')
+            return
+        array_all_terms = np.concatenate(lst_term_arrays)
+        # the vocabulary is every distinct term in the corpus. pandas 'factorize' gives us,
+        # in one vectorized call, both the distinct terms and the column of every term.
+        array_columns, index_vocabulary = pd.factorize(array_all_terms)
+        self.lst_vocabulary = list(index_vocabulary)
+        self.dict_term2col = {a_term: col for col, a_term in enumerate(self.lst_vocabulary)}
+        array_indptr = np.zeros(len(lst_row_lengths) + 1, dtype=np.int64)
+        np.cumsum(lst_row_lengths, out=array_indptr[1:])
+        # NOTE. We build the matrix directly from its three arrays, and deliberately don't
+        # sort the indices, so that each row keeps the order of its term-count dataframe.
+        self.matrix_term_count = csr_matrix((np.concatenate(lst_count_arrays), array_columns, array_indptr),
+                                            shape=(len(self.lst_doc_ids), len(self.lst_vocabulary)))
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def compute_tfidf(self, df_idf):
+        """Computes the TF-IDF of every document at once. Receives the IDF as a dataframe
+        (or series) where the index has the terms. The term-frequency of each document is its
+        term-count divided by the sum of all its term-counts, and the TF-IDF is the term-frequency
+        multiplied by the IDF of each term."""
+        series_idf = df_idf
+        if isinstance(df_idf, pd.DataFrame):
+            series_idf = df_idf.iloc[:, 0]
+        # line up the IDF with the columns of the matrix. Terms that (for some reason) are
+        # not in the IDF get a TF-IDF of zero.
+        array_idf = series_idf.reindex(self.lst_vocabulary).to_numpy(dtype=np.float64)
+        array_missing = np.isnan(array_idf)
+        if array_missing.any():
+            logging.warning(str(int(array_missing.sum())) + ' terms were not found in the IDF. Their TF-IDF'
+                                                            ' will be zero.')
+            array_idf[array_missing] = 0.0
+        matrix_tc = self.matrix_term_count
+        array_row_lengths = np.diff(matrix_tc.indptr)
+        # the sum of all counts in each row. add.reduceat on an empty row would return the
+        # value of the next row, so empty rows are set to 1 (they have nothing to divide anyway.)
+        array_row_totals = np.ones(matrix_tc.shape[0], dtype=np.float64)
+        array_non_empty = array_row_lengths > 0
+        if matrix_tc.nnz > 0:
+            array_row_totals[array_non_empty] = np.add.reduceat(matrix_tc.data, matrix_tc.indptr[:-1][array_non_empty])
+        array_tf = matrix_tc.data / np.repeat(array_row_totals, array_row_lengths)
+        array_tfidf = array_tf * array_idf[matrix_tc.indices]
+        self.matrix_tfidf = csr_matrix((array_tfidf, matrix_tc.indices, matrix_tc.indptr), shape=matrix_tc.shape)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_tfidf_as_df(self, doc_id):
+        """Returns the TF-IDF of a single document as a dataframe, in the same format as the
+        TF-IDF files have always been saved in (terms as the index, sorted by TF-IDF.)"""
+        int_row = self.dict_doc_id2row[doc_id]
+        int_start = self.matrix_tfidf.indptr[int_row]
+        int_end = self.matrix_tfidf.indptr[int_row + 1]
+        array_cols = self.matrix_tfidf.indices[int_start:int_end]
+        df_tfidf = pd.DataFrame({self.__column_name_count: self.matrix_tfidf.data[int_start:int_end]},
+                                index=pd.Index(np.asarray(self.lst_vocabulary, dtype=object)[array_cols],
+                                               name=self.__column_name_terms))
+        df_tfidf.sort_values(by=self.__column_name_count, ascending=False, inplace=True)
+        return df_tfidf
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def find_most_similar_documents(self, doc_id, int_how_many=10):
+        """Returns a list of (document ID, cosine similarity) tuples with the documents
+        whose TF-IDF is most similar to the TF-IDF of the document given."""
+        matrix_normalized = self.matrix_tfidf.copy()
+        array_norms = np.sqrt(np.asarray(matrix_normalized.multiply(matrix_normalized).sum(axis=1)).ravel())
+        array_norms[array_norms == 0] = 1.0
+        matrix_normalized.data = matrix_normalized.data / np.repeat(array_norms, np.diff(matrix_normalized.indptr))
+        int_row = self.dict_doc_id2row[doc_id]
+        array_similarities = np.asarray((matrix_normalized @ matrix_normalized[int_row].T).todense()).ravel()
+        array_similarities[int_row] = -1.0
+        array_best_rows = np.argsort(-array_similarities)[:int_how_many]
+        return [(self.lst_doc_ids[a_row], float(array_similarities[a_row])) for a_row in array_best_rows]
+    # ------------------------ END FUNCTION ------------------------ #
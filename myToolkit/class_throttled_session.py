@@ -0,0 +1,109 @@
+import time
+import random
+import logging
+import threading
+from urllib.parse import urlparse
+import requests
+import my_globals
+
+
+class ThrottledSession:
+    """This class is a stand-in for a requests session, for making many requests to the
+    RV website from several threads at the same time.
+    - each thread gets its own requests session (requests sessions are not guaranteed to be
+    thread-safe) and every one of those sessions is a copy of the cookies and headers of the
+    (already authenticated) session the object is created with, so all threads are logged-in.
+    - requests to the same host are spaced out so that no more than a certain number per second
+    are made, regardless of how many threads are making them.
+    - requests that fail because of a connection problem, or because the server answered with
+    a status that usually means 'try again later' (429 and some 5xx), are retried a few times,
+    waiting longer each time (exponential backoff, plus a bit of randomness.)
+    The 'get' method receives the same arguments as the 'get' of a requests session, so objects
+    of this class can be passed to anything that expects a requests session and only calls 'get'."""
+    __set_statuses_to_retry = {429, 500, 502, 503, 504}
+
+    def __init__(self, authenticated_requests_session,
+                 flt_max_requests_per_second_per_host=my_globals.flt_max_requests_per_second_per_host,
+                 int_max_retries=my_globals.int_http_max_retries,
+                 flt_backoff_base_secs=my_globals.flt_http_backoff_base_secs):
+        self.__template_session = authenticated_requests_session
+        self.flt_min_secs_between_requests_to_a_host = 0.0
+        if flt_max_requests_per_second_per_host > 0:
+            self.flt_min_secs_between_requests_to_a_host = 1.0 / flt_max_requests_per_second_per_host
+        self.int_max_retries = int_max_retries
+        self.flt_backoff_base_secs = flt_backoff_base_secs
+        self.__thread_local = threading.local()
+        self.__lock = threading.Lock()
+        self.__dict_host_next_slot = {}
+        self.int_num_requests = 0
+        self.int_num_retries = 0
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def get(self, url, **kwargs):
+        """Makes a GET request (rate limited, and with retries) and returns the response.
+        If all the attempts fail with an exception, the last exception is raised, exactly
+        as a plain requests session would have done on its single attempt."""
+        int_attempt = 0
+        while True:
+            self.__wait_for_turn(url)
+            try:
+                response = self.__fetch_session_of_this_thread().get(url, **kwargs)
+                with self.__lock:
+                    self.int_num_requests += 1
+                if (response.status_code not in self.__set_statuses_to_retry) or \
+                        (int_attempt >= self.int_max_retries):
+                    return response
+                logging.debug('Status ' + str(response.status_code) + ' from ' + url + '. Will retry.')
+                flt_secs_to_wait = self.__secs_to_wait_before_retrying(int_attempt, response)
+            except requests.exceptions.RequestException as e:
+                if int_attempt >= self.int_max_retries:
+                    raise
+                logging.debug('Request to ' + url + ' failed. Will retry. The Exception was: ' + repr(e))
+                flt_secs_to_wait = self.__secs_to_wait_before_retrying(int_attempt)
+            with self.__lock:
+                self.int_num_retries += 1
+            int_attempt += 1
+            time.sleep(flt_secs_to_wait)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __fetch_session_of_this_thread(self):
+        """Returns the requests session of the thread calling, creating it (as a copy
+        of the authenticated session) the first time a thread asks for it."""
+        sesh = getattr(self.__thread_local, 'sesh', None)
+        if sesh is None:
+            sesh = requests.session()
+            sesh.cookies.update(self.__template_session.cookies)
+            sesh.headers.update(self.__template_session.headers)
+            self.__thread_local.sesh = sesh
+        return sesh
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __wait_for_turn(self, url):
+        """Blocks the calling thread until it is its turn to make a request to the host
+        of the url. The turns are handed out under a lock, but the waiting is done outside
+        of it, so threads waiting for different hosts don't hold each other up."""
+        if self.flt_min_secs_between_requests_to_a_host <= 0:
+            return
+        str_host = urlparse(url).netloc
+        with self.__lock:
+            flt_now = time.monotonic()
+            flt_my_slot = max(flt_now, self.__dict_host_next_slot.get(str_host, 0.0))
+            self.__dict_host_next_slot[str_host] = flt_my_slot + self.flt_min_secs_between_requests_to_a_host
+        flt_secs_to_wait = flt_my_slot - flt_now
+        if flt_secs_to_wait > 0:
+            time.sleep(flt_secs_to_wait)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __secs_to_wait_before_retrying(self, int_attempt, response=None):
+        """Exponential backoff with some randomness (so threads that failed at the same time
+        don't all retry at the same time.) If the server said how long to wait, we wait that."""
+        if response is not None:
+            str_retry_after = response.headers.get('Retry-After', '')
+            if str_retry_after.isdigit():
+                return float(str_retry_after)
+        return self.flt_backoff_base_secs * (2 ** int_attempt) * (1 + random.random())
+    # ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,45 @@
+import time
+import threading
+
+
+class TokenBucket:
+    """A rate limiter. The bucket holds up to int_capacity tokens, and is refilled at
+    flt_tokens_per_second. Every request takes a token, and if the bucket is empty, the
+    request waits until a token is available. The capacity is how many requests can be
+    made in a burst (after a quiet period) before the rate kicks in; with a capacity of 1
+    the requests are simply spaced out evenly.
+    One instance can be shared by all the objects (and threads) making requests to the same
+    service, which is the whole point: the limit of a service applies to all of them together."""
+
+    def __init__(self, flt_tokens_per_second, int_capacity=1):
+        self.flt_tokens_per_second = flt_tokens_per_second
+        self.int_capacity = int_capacity
+        self.__flt_tokens = float(int_capacity)
+        self.__flt_last_refill = time.monotonic()
+        self.__lock = threading.Lock()
+        self.int_num_tokens_taken = 0
+        self.flt_secs_waited = 0.0
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def take(self):
+        """Takes a token, waiting for one if there are none. Tokens are handed out under a lock
+        (in the order they are asked for) but the waiting is done outside of it."""
+        if self.flt_tokens_per_second <= 0:
+            return
+        with self.__lock:
+            flt_now = time.monotonic()
+            self.__flt_tokens = min(float(self.int_capacity), self.__flt_tokens +
+                                    (flt_now - self.__flt_last_refill) * self.flt_tokens_per_second)
+            self.__flt_last_refill = flt_now
+            # the token is taken now, even if that leaves the bucket 'in debt', so the next
+            # caller waits for its own token after this one.
+            self.__flt_tokens -= 1.0
+            flt_secs_to_wait = 0.0
+            if self.__flt_tokens < 0:
+                flt_secs_to_wait = -self.__flt_tokens / self.flt_tokens_per_second
+            self.int_num_tokens_taken += 1
+            self.flt_secs_waited += flt_secs_to_wait
+        if flt_secs_to_wait > 0:
+            time.sleep(flt_secs_to_wait)
+    # ------------------------ END FUNCTION ------------------------ #
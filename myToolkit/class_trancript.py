@@ -1,12 +1,12 @@
 import os
-import PyPDF2
-import pdfplumber
 import logging
-from math import ceil
+from collections import Counter
+import numpy as np
 import pandas as pd
 import my_globals
 from textblob import TextBlob
 from nltk.corpus import stopwords
+from class_pdf_text_extractor import PdfTextExtractor
 from my_building_blocks import recursiveExtractFieldFromHierarchy, is_number, string_might_be_a_year
 
 
@@ -25,12 +25,16 @@ class Transcript:
     __df_tfidf_filename_suffix = '_tfidf_.csv'
 
     __separator = '\t'
+    __set_stopwords = None
 
     def __init__(self, vid_id):
         self.vid_id = vid_id
         self.str_transcript_text = ''
         self.str_pseudotranscript_text = ''
         self.source = ''
+        # set to True when fetching from the website, if the source of the transcript is known
+        # to be unchanged since it was last fetched, and so it was not parsed again.
+        self.transcript_unchanged_at_source = False
         self.path_to_transcript_directory = ''
         self.df_terms_count = pd.DataFrame()
         self.df_tfidf = pd.DataFrame()
@@ -84,10 +88,17 @@ class Transcript:
 
     # ------------------------ END FUNCTION ------------------------ #
 
-    def get_transcript_from_rv_website(self, authenticated_requests_sesh, trial_run=False):  # noqa: C901
+    def get_transcript_from_rv_website(self, authenticated_requests_sesh, trial_run=False,  # noqa: C901
+                                       http_cache=None, skip_parsing_pdf_if_unchanged=False, pdf_extractor=None):
         """Get the transcript of a video as a string.
         This method is passed
-        - an authenticated requests session."""
+        - an authenticated requests session.
+        - optionally, an HttpConditionalCache, through which the transcript urls are fetched.
+        - optionally, a PdfTextExtractor, used if the transcript has to be extracted from a PDF.
+        If skip_parsing_pdf_if_unchanged is True, and the cache says the PDF transcript is the same
+        as the last time it was fetched, the (slow) text extraction from the PDF is skipped, and
+        transcript_unchanged_at_source is set to True instead. The caller should only ask for this
+        if the transcript it already has came from that PDF."""
 
         # we keep a dictionary of some of the information of querying urls
         dct_results = {my_globals.str_transcripts_report_column_videoassetsurl: '',
@@ -107,7 +118,7 @@ class Transcript:
         fetch_status_string_json = ''
         fetch_status_string_pdf = ''
         try:
-            req = authenticated_requests_sesh.get(url, timeout=my_globals.int_timeout)
+            req = self.__get_url(authenticated_requests_sesh, url, 'videoassets', http_cache)
             status = str(req.status_code)
             logging.debug('Status: ' + status)
         except Exception:
@@ -145,7 +156,8 @@ class Transcript:
                 if transcriptjson_url:
                     fetch_status_string_json = \
                         self.__fetch_transcript_from_rv_website_jsonformat(transcriptjson_url,
-                                                                           authenticated_requests_sesh)
+                                                                           authenticated_requests_sesh,
+                                                                           http_cache)
                     if self.str_transcript_text:
                         self.source = my_globals.str_tag_transcript_source_json
 
@@ -156,7 +168,10 @@ class Transcript:
                     if transcriptpdf_url:
                         fetch_status_string_pdf = \
                             self.__fetch_transcript_from_rv_website_pdfformat(transcriptpdf_url,
-                                                                              authenticated_requests_sesh)
+                                                                              authenticated_requests_sesh,
+                                                                              http_cache,
+                                                                              skip_parsing_pdf_if_unchanged,
+                                                                              pdf_extractor)
                         if self.str_transcript_text:
                             self.source = my_globals.str_tag_transcript_source_pdf
         else:
@@ -173,10 +188,13 @@ class Transcript:
 
     # ------------------------ END FUNCTION ------------------------ #
 
-    def get_publication_fulltext_from_rv_website(self, authenticated_requests_sesh):  # noqa: C901
+    def get_publication_fulltext_from_rv_website(self, authenticated_requests_sesh,  # noqa: C901
+                                                 pdf_extractor=None):
         """Get the fulltext of a publication as a string.
         This method is passed
-        - an authenticated requests session."""
+        - an authenticated requests session.
+        - (optionally) a PdfTextExtractor, so one pool of processes can be shared by many
+        publications. If none is given, one is created (and closed) just for this publication."""
 
         # we keep a dictionary of some of the information of querying urls
         dct_results = {my_globals.str_fulltexts_report_column_url: '',
@@ -204,85 +222,28 @@ class Transcript:
 
         if '200' in status:
             fetch_status_string_pdfurl += '200'
-            str_text_pdfplumber = ''
-            str_text_pypdf2 = ''
-            # temporarily write the pdf to disk
-            temp_file_path = my_globals.str_path4_outputs_temp + self.vid_id + '.pdf'
-            with open(temp_file_path, mode='wb') as pdffile:
-                pdffile.write(req.content)
-                fetch_status_string_pdfurl += '-saved2disk'
-            with open(temp_file_path, mode='rb') as pdffile:
-                able2open_with_pdfplumber = False
-                logging.info('Attempting to open the PDF with pdfplumber.')
-                try:
-                    pdf_reader = pdfplumber.open(pdffile)
-                    able2open_with_pdfplumber = True
-                    extract_status_string_plumber += 'opened'
-                except Exception as e:
-                    logging.error('Problem opening the PDF with pdfplumber. The Exception was: ' + repr(e))
-                    extract_status_string_plumber += 'unable2open'
-                if able2open_with_pdfplumber:
-                    counter = 0
-                    counter_pages_success = 0
-                    for page in pdf_reader.pages:
-                        counter += 1
-                        logging.info('WORKING ON PAGE ' + str(counter))
-                        try:
-                            # on one PDF I ran into a page that threw an unknown exception
-                            # so rather than completely ignoring the PDF, I'm deciding to use
-                            # a try/except to process all the pages that don't throw an error.
-                            str_text_pdfplumber += page.extract_text()
-                            counter_pages_success += 1
-                        except Exception as e:
-                            logging.error(
-                                'While extracting text from the PDF using pdfplumber there was an issue with'
-                                ' publication ' + self.vid_id + ' at page ' + str(counter) +
-                                '. This try/except is inside a for loop, so the method'
-                                ' will attempt to continue processing all other pages for the PDF.'
-                                ' The Exception was: ' + repr(e))
-                    page_percent_success_plumber = 0
-                    if counter != 0:
-                        page_percent_success_plumber = counter_pages_success / counter
-                if (str_text_pdfplumber) and (page_percent_success_plumber > .9):
-                    str_full_text = str_text_pdfplumber.strip()
-                    extract_status_string_plumber += '--and-extracted'
-                    if not str_full_text:
-                        extract_status_string_plumber += '--no-content'
-
-                # now we check to see if PDF plumber was able to extract the text.
-                # if it was not, we try with PyPDF2
-                if not str_full_text:
-                    able2open_with_pypdf2 = False
-                    logging.info('Attempting to open the PDF with PyPDF2.')
-                    try:
-                        pdf_reader2 = PyPDF2.PdfFileReader(pdffile)
-                        extract_status_string_pypdf += 'opened'
-                        able2open_with_pypdf2 = True
-                    except Exception as e:
-                        logging.error('Problem opening the PDF with PyPDF2. The Exception was: ' + repr(e))
-                        extract_status_string_pypdf += 'unable2open'
-                    if able2open_with_pypdf2:
-                        num_pages = pdf_reader2.numPages
-                        page_counter = 0
-                        while page_counter < num_pages:
-                            logging.info('WORKING ON PAGE ' + str(page_counter))
-                            try:
-                                str_text_pypdf2 += pdf_reader2.getPage(page_counter).extractText().replace('\n', ' ')
-                            except Exception as e:
-                                logging.error(
-                                    'While extracting text from the PDF using PyPDF2 there was an issue with'
-                                    ' publication ' + self.vid_id + ' at page ' + str(page_counter) +
-                                    '. This try/except is inside a for loop, so the method'
-                                    ' will attempt to continue processing all other pages for the PDF.'
-                                    ' The Exception was: ' + repr(e))
-                            page_counter += 1
-                    str_text_pypdf2 = str_text_pypdf2.strip()
-                    if str_text_pypdf2:
-                        str_full_text = str_text_pypdf2
-                        extract_status_string_pypdf += '--and-extracted'
-                    else:
-                        extract_status_string_pypdf += '--no-content'
-            os.remove(temp_file_path)
+            # the text is extracted from the pdf in memory (no temporary file on disk.)
+            result = self.__extract_text_from_pdf(req.content, pdf_extractor)
+            if result.from_cache:
+                fetch_status_string_pdfurl += '-text-from-cache'
+            if result.timed_out:
+                fetch_status_string_pdfurl += '-timed-out'
+            if result.opened_with_pdfplumber:
+                extract_status_string_plumber += 'opened'
+            else:
+                extract_status_string_plumber += 'unable2open'
+            if result.extracted_with_pdfplumber:
+                extract_status_string_plumber += '--and-extracted'
+            if result.attempted_pypdf2:
+                if result.opened_with_pypdf2:
+                    extract_status_string_pypdf += 'opened'
+                else:
+                    extract_status_string_pypdf += 'unable2open'
+                if result.extracted_with_pypdf2:
+                    extract_status_string_pypdf += '--and-extracted'
+                else:
+                    extract_status_string_pypdf += '--no-content'
+            str_full_text = result.str_text
         else:
             fetch_status_string_pdfurl += 'non200'
 
@@ -519,6 +480,8 @@ class Transcript:
         # first we use a TextBlob based on the transcript as-is. This creates some odd
         # noun_phrases that have half complete strings with apostrophes, such as "'ve" or
         # "'s", which we'll take care of later.
+        # The same blob is used for both the noun-phrases and the words (there is no need
+        # to build a second blob from the exact same text.)
         transcript_blob_orig = TextBlob(self.str_transcript_text)
         # now we create a dataframe of COUNT of noun-phrases in the text, based on the
         # noun-phrases provided by the TextBlob
@@ -529,10 +492,8 @@ class Transcript:
         transcript_blob_apstrph_pre_removed = TextBlob(self.str_transcript_text.replace("'", ''))
         df_count_apstrphs_preremoved = self.__make_df_of_count_nounphrases__(transcript_blob_apstrph_pre_removed)
 
-        # now we start again, but this time to get a dictionary of just the words (not phrases)
-        # and their COUNT
-        transcript_blob_for_words = TextBlob(self.str_transcript_text)
-        df_count_words = self.__make_df_of_count_words__(transcript_blob_for_words)
+        # now we get a dataframe of just the words (not phrases) and their COUNT
+        df_count_words = self.__make_df_of_count_words__(transcript_blob_orig)
 
         # now we combine all the dataframes together by concatenation, and then we remove
         # duplicate rows, by taking whichever row ranked the highest number of COUNT
@@ -545,14 +506,19 @@ class Transcript:
 
     def make_pseudotranscript(self, keep_terms_that_appear_more_than_x_times=2,  # noqa: C901
                               list_of_terms_to_ignore=[],
-                              make_result_smaller_than_x_bytes=50000):
+                              make_result_smaller_than_x_bytes=50000,
+                              set_of_more_terms_to_ignore=frozenset()):
         """This method makes a pseudo-transcript.
         A pseudo-transcript is a reduced form of the transcript to be pushed to Algolia.
         It has stop-words removed, as well as terms that are only used a certain amount
         of times (parameter passed to the method.) However, all other terms are actually
         multiplied, so that they appear in the pseudo-transcript the same number of times
         as in the real transcript. This will allow Algolia to better gauge the relevance
-        of the terms as related to the transcript."""
+        of the terms as related to the transcript.
+        A term is ignored if it is in list_of_terms_to_ignore (which can also be a set or a frozenset, which
+        is used as it is) or in set_of_more_terms_to_ignore. The idea is that the first one holds the terms
+        to ignore in every document (and is shared by all of them) and the second one a handful of terms
+        to ignore in this document only, so the two don't need to be merged for every document."""
         # first we need to load the term-count vector if it exists. The function does
         # checks to see if the directory has been specified and what not, so we can
         # skip some checks here.
@@ -560,104 +526,92 @@ class Transcript:
         length_df = len(self.df_terms_count)
         if length_df > 0:
             self.df_terms_count.sort_values(by=self.__column_name_count, ascending=False, inplace=True)
-            # we loop through the dataframe in order to create the pseudo-transcript, with
-            # each term on a line, and each term repeated the same number of times as it occurs
-            # in the real transcript, divided by keep_terms_that_appear_more_than_x_times. This division
-            # normalizes the pseudo-transcript. So, for example, if we are keeping terms that appear twice
-            # or more, then all the terms taht appear the least (exactly 2 times) will show up
+            # everything below works on three numpy arrays, in the order of the sorted dataframe, which are
+            # built once: the count of each term, the size in bytes (UTF-8) of each term as a line of the
+            # pseudo-transcript (the term plus the '\n'), and whether the term is kept (as in, it ISN'T in
+            # the list of terms to ignore.) A term repeated n times takes exactly n times its line in bytes,
+            # so the size of any pseudo-transcript can be worked out without building it.
+            # (the list of terms to ignore is turned into a set, unless it already is one, for the look-ups)
+            set_of_terms_to_ignore = list_of_terms_to_ignore \
+                if isinstance(list_of_terms_to_ignore, (set, frozenset)) else set(list_of_terms_to_ignore)
+            lst_terms = self.df_terms_count.index.tolist()
+            array_counts = self.df_terms_count[self.__column_name_count].to_numpy(dtype=np.int64)
+            array_bytes_per_line = np.fromiter((len(term.encode('utf-8')) + 1 for term in lst_terms),
+                                               dtype=np.int64, count=length_df)
+            array_kept = np.fromiter(((term not in set_of_terms_to_ignore) and (term not in set_of_more_terms_to_ignore)
+                                      for term in lst_terms), dtype=bool, count=length_df)
+            # the pseudo-transcript has each term on a line, and each term repeated the same number of times
+            # as it occurs in the real transcript, divided by keep_terms_that_appear_more_than_x_times. This
+            # division normalizes the pseudo-transcript. So, for example, if we are keeping terms that appear
+            # twice or more, then all the terms taht appear the least (exactly 2 times) will show up
             # in the pseudo-transcript once, and if the maximum term appears 40 times, then in
             # the normalized pseudo-transcript it will appear 20 times.
-            str_pseudotranscript = ''
-            counter = 0
-            while counter < length_df:
-                term = self.df_terms_count.index[counter]
-                term_count = self.df_terms_count.loc[term, self.__column_name_count]
-                # now we only continue to add the term to the pseudo-transcript
-                # if it ISN'T in the list of terms to ignore.
-                if term not in list_of_terms_to_ignore:
-                    if term_count > keep_terms_that_appear_more_than_x_times:
-                        # the ceil() function below is from the 'math' library and rounds up
-                        # this favours small numbers in the pseudo-transcript. For example, a term
-                        # that shows up 3 times when we are keeping terms that appear more than
-                        # 1 time, ends up in the pseudo-transcript 2 times (because ceil(3/2) is 2.)
-                        # Whereas rounding (the division) up for a term that appears 51 times,
-                        # favours it much less. This is fine. Because the variable specifies
-                        # terms to be kept that appear MORE than x times, the numerator in the
-                        # division needs to be increased by one (otherwise it would represent
-                        # more than or equal to x times.)
-                        normalized_term_count = ceil(term_count / (keep_terms_that_appear_more_than_x_times + 1))
-                        str_pseudotranscript += ((term + '\n') * normalized_term_count)
-                    else:
-                        # we are here, if we reached a point in the dataframe where the frequency
-                        # of a term is not greater than keep_terms_that_appear_more_than_x_times.
-                        # Since the dataframe was sorted, we know all remaining terms will also
-                        # be inferior, so we can now exit the loop.
-                        break
-                counter += 1
-
-            size_of_pt_in_bytes = len(str_pseudotranscript.encode('utf-8'))
+            # The division rounds up (done with integers: -(-a // b) is the ceiling of a / b.) This
+            # favours small numbers in the pseudo-transcript. For example, a term that shows up 3 times
+            # when we are keeping terms that appear more than 1 time, ends up in the pseudo-transcript
+            # 2 times (because ceil(3/2) is 2.) Whereas rounding (the division) up for a term that appears
+            # 51 times, favours it much less. This is fine. Because the variable specifies terms to be kept
+            # that appear MORE than x times, the denominator in the division needs to be increased by one
+            # (otherwise it would represent more than or equal to x times.)
+            array_in_pt = array_kept & (array_counts > keep_terms_that_appear_more_than_x_times)
+            array_repetitions = -(-array_counts // (keep_terms_that_appear_more_than_x_times + 1))
+            size_of_pt_in_bytes = int(np.dot(array_repetitions[array_in_pt], array_bytes_per_line[array_in_pt]))
             if size_of_pt_in_bytes > make_result_smaller_than_x_bytes:
                 # Algolia only accepts records that are 100KB in size, but they recommend (I believe)
                 # that the average record be about 10KB. So we want to keep the pseudo-transcript (or pseudo-
                 # text, in the case of a publication) relatively small. I'm making an arbitrary decision
                 # to try to keep the pseudo-transcript or pseudo-text under 50KB (which is reflected
                 # in the default value of one of the parameters to this function.)
-                # So now, we check the size. Most times it will be fine off-the-bat and nothing else is needed,
-                # but if it is too large, we'll progressively remove terms from the tail
-                # end of the sorted dataframe of terms, and then normalize. Then we'll estimate the size of
-                # re-creating the pseudo-trancript. If it is still too large, we repeate removing the least
-                # and normalizing. We'll repeat until the projected size is under the desired size limit,
-                # and then re-create the pseudo-transcript or pseudo-text.
-                df = self.df_terms_count.copy()
-                while size_of_pt_in_bytes > make_result_smaller_than_x_bytes:
-                    # just dropping the most infrequent terms off the end of the dataframe isn't going to
-                    # do much. The real difference to size is going to come from the normalization. Example,
-                    # if the most infrequent term happens 1 time, then dropping all the terms that only happen
-                    # one time leaves terms that happen 2 or more times. Then then dataframe can be normalized
-                    # by dividing the term_counts by 2. At this point the terms taht used to have a term_count
-                    # of 2, now appear in the df as having a term count of 1 (after the division) and the terms
-                    # with a high-term count have also had their frequency halved. This is was will really
-                    # reduce the size of the resulting pseudo-text.
-                    # so the first thing we do in this loop is drop all terms that have a current (as of this
-                    # iteration of the loop) term count of 1. If I don't use the 'copy()' in the line below
-                    # pandas throws an error in the line of code further below where I normalize
-                    df = df[df[self.__column_name_count] > 1].copy()
-                    # now in order to normalize the dataframe, we need to find the lowest remaining term count
-                    last_term = df.index[len(df) - 1]
-                    lowest_term_count = df.loc[last_term, self.__column_name_count]
-                    # now we can normalize
-                    df[self.__column_name_count] = (df[self.__column_name_count] / lowest_term_count).apply(ceil)
-                    # now we estimate if creating a new pseudo-text using the new normalized numbers in
-                    # the dataframe will fit under the limit
-                    counter = 0
-                    length_df = len(df)
-                    projected_size_in_bytes = 0
-                    while counter < length_df:
-                        term = df.index[counter]
-                        term_count = df.loc[term, self.__column_name_count]
-                        if term not in list_of_terms_to_ignore:
-                            projected_size_in_bytes += len(((term + '\n') * term_count).encode('utf-8'))
-                        counter += 1
-                    size_of_pt_in_bytes = projected_size_in_bytes
-
-                # after the loop above, we are left with a df that contains terms and term-counts
-                # that we now KNOW can be used to construct a pseudo-text that is smaller than the limit
-                # ARGUABLY WE COULD DO THE CALCULATION ABOVE at the beginning of this function every time
-                # (rather than building a transcript first, and then finding out it is too big, and then
-                # figuring out how to reduce the size) but I've made the deliberate choice not to do this
-                # because for most transcripts and publication texts creating the pseudo-text will
-                # work off-the-bat without the adjustments needed.
-                str_pseudotranscript = ''
-                counter = 0
-                length_df = len(df)
-                while counter < length_df:
-                    term = df.index[counter]
-                    term_count = df.loc[term, self.__column_name_count]
-                    if term not in list_of_terms_to_ignore:
-                        str_pseudotranscript += ((term + '\n') * term_count)
-                    counter += 1
-
-            self.str_pseudotranscript_text = str_pseudotranscript
+                # If it is too large, terms are removed from the tail end of the sorted terms, and the rest
+                # are normalized, repeatedly, until the size is under the limit. Just dropping the most
+                # infrequent terms isn't going to do much; the real difference comes from the normalization.
+                # Example: if the most infrequent term happens 1 time, then dropping all the terms that only
+                # happen one time leaves terms that happen 2 or more times. Then the counts can be divided
+                # by 2 (rounding up.) The terms that used to have a count of 2 now have a count of 1 (so
+                # they are the ones dropped in the next round) and the terms with a high count have also
+                # had their frequency halved. This is what really reduces the size of the pseudo-text.
+                # NOTE: this starts again from ALL the terms and their original counts (not only the terms
+                # that made it into the pseudo-transcript above.)
+                # Each round divides the counts by the lowest count left, and dividing by a and then by b
+                # (rounding up both times) is the same as dividing by a * b (rounding up once.) So each round
+                # is fully described by the product of all the divisions so far (the 'divisor'):
+                # - the terms left are the ones whose original count is greater than the divisor of the
+                # round before (they are the ones whose count was still above 1.)
+                # - the count of each term left is its original count divided by the divisor, rounded up.
+                # The divisors of all the rounds can be worked out up front from the distinct counts (the
+                # lowest count left is the lowest distinct count above the previous divisor.) Then the size of
+                # the pseudo-transcript for every divisor is worked out at once, and we take the smallest
+                # divisor that gives a size under the limit.
+                array_distinct_counts = np.unique(array_counts)
+                lst_divisors = []
+                lst_previous_divisors = []
+                int_divisor = 1
+                int_position = np.searchsorted(array_distinct_counts, int_divisor, side='right')
+                while int_position < len(array_distinct_counts):
+                    lst_previous_divisors.append(int_divisor)
+                    int_lowest_count_left = -(-int(array_distinct_counts[int_position]) // int_divisor)
+                    int_divisor *= int_lowest_count_left
+                    lst_divisors.append(int_divisor)
+                    int_position = np.searchsorted(array_distinct_counts, int_divisor, side='right')
+                # one row per round, one column per term
+                array_divisors = np.array(lst_divisors, dtype=np.int64)[:, np.newaxis]
+                array_previous_divisors = np.array(lst_previous_divisors, dtype=np.int64)[:, np.newaxis]
+                array_left = array_kept & (array_counts > array_previous_divisors)
+                array_normalized_counts = -(-array_counts // array_divisors)
+                array_sizes = np.where(array_left, array_normalized_counts * array_bytes_per_line, 0).sum(axis=1)
+                array_rounds_that_fit = np.flatnonzero(array_sizes <= make_result_smaller_than_x_bytes)
+                if len(array_rounds_that_fit) == 0:
+                    # even with every term left appearing once, the pseudo-transcript is too large
+                    logging.error('Pseudo-transcript not created because it could not be made smaller than ' +
+                                  str(make_result_smaller_than_x_bytes) + ' bytes.')
+                    return
+                int_round = array_rounds_that_fit[0]
+                array_in_pt = array_left[int_round]
+                array_repetitions = array_normalized_counts[int_round]
+            # the pseudo-transcript (or pseudo-text) is built in one go
+            self.str_pseudotranscript_text = ''.join(
+                [(term + '\n') * int_repetitions for term, int_repetitions, bool_in_pt in
+                 zip(lst_terms, array_repetitions.tolist(), array_in_pt.tolist()) if bool_in_pt])
 
         else:
             logging.error('Pseudo-transcript not created because the terms-count vector is not populated.')
@@ -861,6 +815,29 @@ class Transcript:
 
     # ------------------------ END FUNCTION ------------------------ #
 
+    def __extract_text_from_pdf(self, bytes_pdf, pdf_extractor=None):
+        """Extracts the text of a pdf (given as bytes) and returns a PdfExtractionResult. If no
+        PdfTextExtractor is given, one is created for this pdf only."""
+        if pdf_extractor is not None:
+            return pdf_extractor.extract_text(bytes_pdf, self.vid_id)
+        pdf_extractor = PdfTextExtractor()
+        try:
+            return pdf_extractor.extract_text(bytes_pdf, self.vid_id)
+        finally:
+            pdf_extractor.close()
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __get_url(self, requests_sesh, str_url, str_endpoint_for_cache, http_cache=None, keep_body=True):
+        """Fetches a url with the session, or through the HTTP cache if one was given (keep_body is
+        passed on to the cache.)"""
+        if http_cache is not None:
+            return http_cache.get(requests_sesh, str_url, str_endpoint_for_cache, keep_body=keep_body,
+                                  timeout=my_globals.int_timeout)
+        return requests_sesh.get(str_url, timeout=my_globals.int_timeout)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
     def provide_tfidf(self, df_with_tfidf_data):
         """Because a Transcript object cannot be aware of the universe of documents
         it is part of, it cannot generate its own TranscriptAnalysis. So TranscriptAnalysis for a transcript
@@ -870,7 +847,8 @@ class Transcript:
 
     # ------------------------ END FUNCTION ------------------------ #
 
-    def __fetch_transcript_from_rv_website_jsonformat(self, transcriptjson_url, authenticated_requests_sesh):
+    def __fetch_transcript_from_rv_website_jsonformat(self, transcriptjson_url, authenticated_requests_sesh,
+                                                      http_cache=None):
         """This method fetches a video transcript that is returned by the server
         in json format, and re-constructs it into a string. The method is given:
          - the URL that should contain the JSON version of the transcript
@@ -902,7 +880,7 @@ class Transcript:
         str_full_transcript = ''
         transcript_json_data = []
         try:
-            req = authenticated_requests_sesh.get(transcriptjson_url, timeout=my_globals.int_timeout)
+            req = self.__get_url(authenticated_requests_sesh, transcriptjson_url, 'transcript json', http_cache)
             status = str(req.status_code)
             logging.debug('Status: ' + status)
             if '200' in status:
@@ -938,19 +916,23 @@ class Transcript:
     # ------------------------ END FUNCTION ------------------------ #
 
     def __fetch_transcript_from_rv_website_pdfformat(self, transcriptpdf_url,  # noqa: C901
-                                                     authenticated_requests_sesh):
+                                                     authenticated_requests_sesh, http_cache=None,
+                                                     skip_parsing_if_unchanged=False, pdf_extractor=None):
         """This method fetches a video transcript that is returned by the server
         as a pdf. The method is given:
          - the URL that should contain the PDF version of the transcript
          - an authenticated requests session.
          After fetching the URL (which should return a PDF) the plain text is
-         extracted from the pdf."""
+         extracted from the pdf (with the PdfTextExtractor given, if any.)"""
         logging.info('Getting pdf-based version of video transcript from: ' + transcriptpdf_url)
         str_method_status = ''
         str_full_transcript = ''
         status = ''
         try:
-            req = authenticated_requests_sesh.get(transcriptpdf_url, timeout=my_globals.int_timeout)
+            # if the text of an unchanged pdf is not going to be extracted again, the pdf itself is
+            # not needed when it is unchanged, so the cache only keeps its hash.
+            req = self.__get_url(authenticated_requests_sesh, transcriptpdf_url, 'transcript pdf', http_cache,
+                                 keep_body=not skip_parsing_if_unchanged)
             status = str(req.status_code)
             logging.debug('Status: ' + status)
         except Exception as e:
@@ -958,85 +940,32 @@ class Transcript:
                             '. The Exception was: ' + repr(e))
             str_method_status = '-' + repr(e)
 
-        if '200' in status:
+        if ('200' in status) and skip_parsing_if_unchanged and getattr(req, 'is_unchanged', False):
+            # the PDF is the same as the last time it was fetched, so there is no point in
+            # extracting its text again.
+            logging.info('The pdf version of the transcript is unchanged at source. Not extracting its text again.')
+            self.transcript_unchanged_at_source = True
+            str_method_status = '-200-unchanged'
+        elif '200' in status:
             str_method_status = '-200'
-            str_transcript_pdfplumber = ''
-            str_transcript_pypdf2 = ''
-            # temporarily write the pdf to disk
-            temp_file_path = my_globals.str_path4_outputs_temp + self.vid_id + '.pdf'
-            with open(temp_file_path, mode='wb') as pdffile:
-                pdffile.write(req.content)
-                str_method_status += '-saved'
-            with open(temp_file_path, mode='rb') as pdffile:
-                able2open_with_pdfplumber = False
-                logging.info('Attempting to open the PDF with pdfplumber.')
-                try:
-                    pdf_reader = pdfplumber.open(pdffile)
-                    able2open_with_pdfplumber = True
-                    str_method_status += '-reopened-pdfplumber'
-                except Exception as e:
-                    logging.error('Problem opening the PDF with pdfplumber. The Exception was: ' + repr(e))
-                if able2open_with_pdfplumber:
-                    counter = 0
-                    counter_pages_success = 0
-                    for page in pdf_reader.pages:
-                        counter += 1
-                        logging.info('WORKING ON PAGE ' + str(counter))
-                        try:
-                            # on one PDF I ran into a page that threw an unknown exception
-                            # so rather than completely ignoring the PDF, I'm deciding to use
-                            # a try/except to process all the pages that don't throw an error.
-                            str_transcript_pdfplumber += page.extract_text()
-                            counter_pages_success += 1
-                        except Exception as e:
-                            logging.error(
-                                'While extracting text from the PDF using pdfplumber there was an issue with'
-                                ' publication ' + self.vid_id + ' at page ' + str(counter) +
-                                '. This try/except is inside a for loop, so the method'
-                                ' will attempt to continue processing all other pages for the PDF.'
-                                ' The Exception was: ' + repr(e))
-                    page_percent_success_plumber = 0
-                    if counter != 0:
-                        page_percent_success_plumber = counter_pages_success / counter
-                if (str_transcript_pdfplumber) and (page_percent_success_plumber > .9):
-                    str_full_transcript = str_transcript_pdfplumber
-                    str_method_status += '-constructed-pdfplumber'
-
-                # now we check to see if PDF plumber was able to extract the text.
-                # if it was not, we try with PyPDF2
-                if not str_full_transcript:
-                    able2open_with_pypdf2 = False
-                    logging.info('Attempting to open the PDF with PyPDF2.')
-                    try:
-                        pdf_reader2 = PyPDF2.PdfFileReader(pdffile)
-                        able2open_with_pypdf2 = True
-                    except Exception as e:
-                        logging.error('Problem opening the PDF with PyPDF2. The Exception was: ' + repr(e))
-                    if able2open_with_pypdf2:
-                        num_pages = pdf_reader2.numPages
-                        page_counter = 0
-                        while page_counter < num_pages:
-                            logging.info('WORKING ON PAGE ' + str(page_counter))
-                            try:
-                                str_transcript_pypdf2 += pdf_reader2.getPage(page_counter).extractText().replace('\n',
-                                                                                                                 ' ')
-                            except Exception as e:
-                                logging.error(
-                                    'While extracting text from the PDF using PyPDF2 there was an issue with'
-                                    ' publication ' + self.vid_id + ' at page ' + str(page_counter) +
-                                    '. This try/except is inside a for loop, so the method'
-                                    ' will attempt to continue processing all other pages for the PDF.'
-                                    ' The Exception was: ' + repr(e))
-                            page_counter += 1
-                    if str_transcript_pypdf2:
-                        str_full_transcript = str_transcript_pypdf2
-                        str_method_status += '-constructed-pypdf2'
-            os.remove(temp_file_path)
+            # the text is extracted from the pdf in memory (no temporary file on disk.)
+            result = self.__extract_text_from_pdf(req.content, pdf_extractor)
+            if result.from_cache:
+                str_method_status += '-text-from-cache'
+            if result.timed_out:
+                str_method_status += '-timed-out'
+            if result.opened_with_pdfplumber:
+                str_method_status += '-opened-pdfplumber'
+            if result.extracted_with_pdfplumber:
+                str_method_status += '-constructed-pdfplumber'
+            elif result.extracted_with_pypdf2:
+                str_method_status += '-constructed-pypdf2'
+            str_full_transcript = result.str_text
         else:
             str_method_status = '-non200-web-reply'
         str_full_transcript = str_full_transcript.strip()
         self.str_transcript_text = str_full_transcript
-        if not self.str_transcript_text:
+        if (not self.str_transcript_text) and (not self.transcript_unchanged_at_source):
             logging.warning('Was not able to extract text from PDF for ' + self.vid_id)
         return str_method_status
 
@@ -1044,27 +973,26 @@ class Transcript:
 
     def __make_df_of_count_nounphrases__(self, blob):
         df_columns = [self.__column_name_terms, self.__column_name_count]
-        df = pd.DataFrame(columns=df_columns)
         the_nounphrases = blob.noun_phrases
         # an additional sept you can do if you want is:
         # the_nounphrases = blob.noun_phrases.singularize()
 
-        # noun_phrases has many duplicates, so we create a set, just to use
-        # as an iterable instead
-        set_nounphrases = set(the_nounphrases)
-        for np in set_nounphrases:
-            list_to_append_to_df = [str(np).lower(), the_nounphrases.count(np)]
-            # the next line appends the list to the dataframe
-            df.loc[len(df)] = list_to_append_to_df
-        # now we apply a function that applies some conversions to
+        # noun_phrases has many duplicates, so we count them all in one pass with a Counter.
+        # NOTE that the count is case-insensitive, which is the way the TextBlob WordList
+        # 'count' method (that used to be used here) counts.
+        counter_nounphrases = Counter(str(noun_phrase).lower() for noun_phrase in the_nounphrases)
+        # we apply a function that applies some conversions to
         # unwanted strings, and in some cases the conversion results in
-        # an empty string being left in the column, so then we remove
-        # rows where an empty string was left.
-        df[self.__column_name_terms] = df[self.__column_name_terms].apply(self.__convert_non_ideal_strings__)
-        df = df[df[self.__column_name_terms] != '']
+        # an empty string being left, so then we leave out those terms.
+        lst_rows = []
+        for noun_phrase in counter_nounphrases:
+            str_term = self.__convert_non_ideal_strings__(noun_phrase)
+            if str_term != '':
+                lst_rows.append([str_term, counter_nounphrases[noun_phrase]])
+        # the dataframe is built in one go (rather than appending one row at a time.)
+        df = pd.DataFrame(lst_rows, columns=df_columns)
         # now before returning we set the index to be the column of terms
-        # which by now should be unique, and we drop the current index which is just
-        # auto-gen numbers.
+        # and we drop the current index which is just auto-gen numbers.
         df.set_index(self.__column_name_terms, inplace=True)
         df.sort_values(by=[self.__column_name_count], ascending=False, inplace=True)
         return df
@@ -1072,28 +1000,25 @@ class Transcript:
     # ------------------------ END FUNCTION ------------------------ #
 
     def __make_df_of_count_words__(self, blob, remove_stopwords=True):
-        stop_words = set(stopwords.words('english'))
+        stop_words = self.__get_stopwords()
         df_columns = [self.__column_name_terms, self.__column_name_count]
-        df = pd.DataFrame(columns=df_columns)
         the_words = blob.words
         # OR alternatively
         # the_words = blob.words.singularize()
 
-        # the blob.words has many duplicates, so we create a set, just to use
-        # as an iterable instead
-        set_words = set(the_words)
-        for word in set_words:
-            word_lower = str(word).lower()
+        # the blob.words has many duplicates, so we count them all in one pass with a
+        # Counter (case-insensitive, same as the TextBlob WordList 'count' method.)
+        counter_words = Counter(str(word).lower() for word in the_words)
+        # we leave out stopwords, and apply a function that applies some conversions to
+        # unwanted strings. In some cases the conversion results in
+        # an empty string being left, so then we leave out those terms too.
+        lst_rows = []
+        for word_lower in counter_words:
             if word_lower not in stop_words:
-                list_to_append_to_df = [word_lower, the_words.count(word)]
-                # the next line appends the list to the dataframe
-                df.loc[len(df)] = list_to_append_to_df
-        # now we apply a function that applies some conversions to
-        # unwanted strings, and in some cases the conversion results in
-        # an empty string being left in the column, so then we remove
-        # rows where an empty string was left.
-        df[self.__column_name_terms] = df[self.__column_name_terms].apply(self.__convert_non_ideal_strings__)
-        df = df[df[self.__column_name_terms] != '']
+                str_term = self.__convert_non_ideal_strings__(word_lower)
+                if str_term != '':
+                    lst_rows.append([str_term, counter_words[word_lower]])
+        df = pd.DataFrame(lst_rows, columns=df_columns)
         # now before returning we drop the index and sort
         df.set_index(self.__column_name_terms, inplace=True)
         df.sort_values(by=[self.__column_name_terms], ascending=False, inplace=True)
@@ -1101,6 +1026,15 @@ class Transcript:
 
     # ------------------------ END FUNCTION ------------------------ #
 
+    def __get_stopwords(self):
+        """Returns the set of english stopwords. Reading them from the nltk corpus
+        involves reading a file, so it is only done once and then kept at the class level."""
+        if Transcript.__set_stopwords is None:
+            Transcript.__set_stopwords = set(stopwords.words('english'))
+        return Transcript.__set_stopwords
+
+    # ------------------------ END FUNCTION ------------------------ #
+
     def __convert_non_ideal_strings__(self, a_string):
         new_string = a_string
         # some of the string below are very weird, but they come from inspecting data
@@ -1,11 +1,13 @@
-import os
 import pandas as pd
 import logging
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from numpy import log
 import my_globals
 from class_simpleDS import SimpleDS
 from class_trancript import Transcript
 from class_percent_tracker import PercentTracker
+from class_sparse_tfidf_engine import SparseTfidfEngine
+from class_doc_count_store import DocCountStore
 from class_rv_website_json_vid import RVwebsiteVid
 from my_building_blocks import convert_file_to_list_by_lines, tokenize_list_containing_people_fullnames
 
@@ -53,12 +55,22 @@ class TranscriptAnalysis:
 
     # ------------------------ END FUNCTION ------------------------ #
 
-    def update_term_count_dataframes(self):
+    def update_term_count_dataframes(self, num_worker_processes=1, num_transcripts_per_chunk=0):  # noqa: C901
         """This method updates any missing transcript term COUNT info in the transcripts
         SimpleDS and on disk. NOTE that the info we are keeping on disk is term-COUNT and not
         term-frequency. It is very simple to convert from term-count to term-frequency, but
         not vice-versa. So later on in the process when we need term-frequency, we simply
-        create it, but on disk we store the version of the data that is most granular."""
+        create it, but on disk we store the version of the data that is most granular.
+        Building the term-count is CPU-heavy (it is natural language processing) so if
+        num_worker_processes is more than 1, the transcripts are processed in parallel by a
+        pool of processes. The workers build and save the term-count files, and hand back
+        the transcript metadata, so that only this (the main) process writes to the SimpleDS.
+        The work is handed out in chunks of num_transcripts_per_chunk transcripts (by default,
+        a few per worker) and the variable manager is checked in between chunks, so an
+        external stop request is still honoured.
+        If a record whose term-count is re-built had already contributed to the doc-count vector
+        (its transcript was updated, for example) its doc-count tag is removed, so the next update
+        of the doc-count vector replaces what it contributed."""
         logging.info('Starting method that updates missing Term COUNT info on disk')
         list_records_no_termcount_data_on_disk = self.__look__missing_termcount_info()
         num_missing_tc_entries = len(list_records_no_termcount_data_on_disk)
@@ -67,44 +79,81 @@ class TranscriptAnalysis:
         percent_tracker = PercentTracker(num_missing_tc_entries,
                                          int_output_every_x_percent=1, log_level='info')
         logging.info(str(num_missing_tc_entries) + " records don't have term-COUNT data on disk.")
-        for a_vid in list_records_no_termcount_data_on_disk:
-            execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
-            if not execution_should_continue:
-                break
-            # we'll only update the timestamp in the SimpleDS if there is an actual change
-            # to the transcript. So here, we'll keep the existing timestamp
-            timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_vid)
-            logging.info('Updating term COUNT for record # ' + str(counter + 1) + ' of ' + str(num_missing_tc_entries))
-            transcript = Transcript(a_vid)
-            transcript.set_transcript_directory(self.str_path_to_transcripts_files)
-            transcript.load_transcript_object_from_dictionary(self.transcripts_ds.fetch_data(a_vid))
-            transcript.get_transcript_from_disk()
-            transcript.construct_terms_count()
-            saved_to_disk_successfully = transcript.save_df_terms_count_2disk()
-            dict_for_ds = transcript.dump_transcript_metadata_to_dictionary()
-            self.transcripts_ds.update_entry(a_vid, dict_for_ds, timestamp_updated)
-            logging.debug('Added (to SimpleDS) the term-COUNT data for entry: ' + a_vid)
-            if saved_to_disk_successfully:
-                num_vids_success += 1
-            counter += 1
-            percent_tracker.update_progress(counter, show_time_remaining_estimate=True,
-                                            str_description_to_include_in_logging='Updating Term Count files.')
+        if num_worker_processes > 1:
+            if num_transcripts_per_chunk <= 0:
+                num_transcripts_per_chunk = num_worker_processes * 4
+            with ProcessPoolExecutor(max_workers=num_worker_processes) as executor:
+                for idx_chunk_start in range(0, num_missing_tc_entries, num_transcripts_per_chunk):
+                    execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
+                    if not execution_should_continue:
+                        break
+                    lst_chunk = list_records_no_termcount_data_on_disk[
+                        idx_chunk_start:idx_chunk_start + num_transcripts_per_chunk]
+                    dict_futures = {}
+                    for a_vid in lst_chunk:
+                        future = executor.submit(construct_and_save_term_count_for_a_transcript, a_vid,
+                                                 self.transcripts_ds.fetch_data(a_vid),
+                                                 self.str_path_to_transcripts_files)
+                        dict_futures[future] = a_vid
+                    for future in as_completed(dict_futures):
+                        a_vid = dict_futures[future]
+                        try:
+                            dict_for_ds, saved_to_disk_successfully = future.result()
+                        except Exception as e:
+                            logging.warning('Exception thrown while building the term-count for: ' + a_vid +
+                                            ' The Exception was: ' + repr(e))
+                            dict_for_ds = {}
+                            saved_to_disk_successfully = False
+                        if dict_for_ds:
+                            # we'll only update the timestamp in the SimpleDS if there is an actual change
+                            # to the transcript. So here, we'll keep the existing timestamp
+                            timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_vid)
+                            self.transcripts_ds.update_entry(a_vid, dict_for_ds, timestamp_updated)
+                            self.transcripts_ds.tag_remove(a_vid, self.__str_tag_vid_data_in_doc_count)
+                            logging.debug('Added (to SimpleDS) the term-COUNT data for entry: ' + a_vid)
+                        if saved_to_disk_successfully:
+                            num_vids_success += 1
+                        counter += 1
+                        percent_tracker.update_progress(counter, show_time_remaining_estimate=True,
+                                                        str_description_to_include_in_logging='Updating Term Count'
+                                                                                              ' files.')
+        else:
+            for a_vid in list_records_no_termcount_data_on_disk:
+                execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
+                if not execution_should_continue:
+                    break
+                # we'll only update the timestamp in the SimpleDS if there is an actual change
+                # to the transcript. So here, we'll keep the existing timestamp
+                timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_vid)
+                logging.info('Updating term COUNT for record # ' + str(counter + 1) + ' of ' +
+                             str(num_missing_tc_entries))
+                dict_for_ds, saved_to_disk_successfully = \
+                    construct_and_save_term_count_for_a_transcript(a_vid, self.transcripts_ds.fetch_data(a_vid),
+                                                                   self.str_path_to_transcripts_files)
+                self.transcripts_ds.update_entry(a_vid, dict_for_ds, timestamp_updated)
+                self.transcripts_ds.tag_remove(a_vid, self.__str_tag_vid_data_in_doc_count)
+                logging.debug('Added (to SimpleDS) the term-COUNT data for entry: ' + a_vid)
+                if saved_to_disk_successfully:
+                    num_vids_success += 1
+                counter += 1
+                percent_tracker.update_progress(counter, show_time_remaining_estimate=True,
+                                                str_description_to_include_in_logging='Updating Term Count files.')
         logging.info("Successfully saved to disk term-count data for " + str(num_vids_success) + ' records.')
         logging.info("Records processed: " + str(counter))
         self.transcripts_ds.save2disk()
 
     # ------------------------ END FUNCTION ------------------------ #
 
-    def update_tfidf_dataframes(self, force_update=False):
+    def update_tfidf_dataframes(self, force_update=False,
+                                flt_idf_shift_threshold=my_globals.flt_idf_shift_threshold_for_tfidf_refresh):
         """This method updates any missing TranscriptAnalysis info in the transcripts
-        SimpleDS and on disk"""
+        SimpleDS and on disk.
+        Apart from the videos that have no TF-IDF yet, the TF-IDF is also re-calculated for
+        videos that have a term whose IDF has moved by more than flt_idf_shift_threshold since
+        the last time TF-IDF was calculated (as the doc-count vector changes with videos being
+        added, updated and deleted.) Videos whose terms' IDF barely moved are left alone."""
         logging.info('Starting method updates the TranscriptAnalysis data.')
         list_vids_no_tfidf_data_on_disk = self.__find_missing_tfidf_for_vids(force_update=force_update)
-        num_missing_tfidf_vids = len(list_vids_no_tfidf_data_on_disk)
-        counter = 0
-        percent_tracker = PercentTracker(num_missing_tfidf_vids,
-                                         int_output_every_x_percent=1, log_level='info')
-        logging.info(str(num_missing_tfidf_vids) + " videos don't have TranscriptAnalysis data on disk.")
 
         # first we need to create a vector (series) that has the IDF of all terms
         # in the universe of documents (transcripts.)
@@ -123,50 +172,88 @@ class TranscriptAnalysis:
             # an IDF dataframe
             df_idf = self.convert_doc_count_to_idf(df_idf)
 
+        # now we add the videos that already have TF-IDF, but where the IDF of some of their terms
+        # has shifted past the threshold since their TF-IDF was calculated.
+        doc_count_store = self.__fetch_doc_count_store()
+        series_idf = df_idf.iloc[:, 0]
+        set_vids_idf_shifted = doc_count_store.find_documents_needing_tfidf_refresh(series_idf,
+                                                                                    flt_idf_shift_threshold)
+        set_vids_already_in_list = set(list_vids_no_tfidf_data_on_disk)
+        lst_vids_idf_shifted = [a_vid for a_vid in self.transcripts_ds
+                                if (a_vid in set_vids_idf_shifted) and (a_vid not in set_vids_already_in_list)]
+        logging.info(str(len(lst_vids_idf_shifted)) + " videos have TF-IDF data that is out of date, because the"
+                                                      " IDF of their terms has shifted.")
+        list_vids_no_tfidf_data_on_disk.extend(lst_vids_idf_shifted)
+        num_missing_tfidf_vids = len(list_vids_no_tfidf_data_on_disk)
+        counter = 0
+        percent_tracker = PercentTracker(num_missing_tfidf_vids,
+                                         int_output_every_x_percent=1, log_level='info')
+        logging.info(str(num_missing_tfidf_vids) + " videos need their TranscriptAnalysis data updated on disk.")
+
+        # first we load the term-count of all the videos that need TF-IDF, and keep the
+        # Transcript objects so we can save the results later on.
+        # in the method where we build the term-count
+        # we call a method of the Transcript class to build the term-count. This makes sense
+        # because the Transcript object has all the information it needs to calculate
+        # term-count. However, a Transcript does not 'know' the universe of documents
+        # it is part of, so it does not make sense for the method that creates TranscriptAnalysis
+        # to be part of the Transcript class. That is why it is done by this class
+        # instead, and then the TranscriptAnalysis info is passed to the Transcript class to be
+        # stored.
+        dict_transcripts = {}
+        dict_term_counts = {}
         for a_vid in list_vids_no_tfidf_data_on_disk:
             execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
             if not execution_should_continue:
                 break
-            # we'll only update the timestamp in the SimpleDS if there is an actual change
-            # to the transcript. So here, we'll keep the existing timestamp
-            timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_vid)
-            logging.debug(
-                'Updating TranscriptAnalysis for video # ' + str(counter) + ' of ' + str(num_missing_tfidf_vids))
             transcript = Transcript(a_vid)
             transcript.set_transcript_directory(self.str_path_to_transcripts_files)
             transcript.load_transcript_object_from_dictionary(self.transcripts_ds.fetch_data(a_vid))
             transcript.get_df_terms_count_from_disk()
+            dict_transcripts[a_vid] = transcript
+            dict_term_counts[a_vid] = transcript.df_terms_count
+
+        # then the TF-IDF of all of them is calculated at once, as a single sparse matrix operation
+        logging.info('Calculating TF-IDF for ' + str(len(dict_term_counts)) + ' videos in one go.')
+        tfidf_engine = SparseTfidfEngine()
+        tfidf_engine.load_term_counts(dict_term_counts)
+        tfidf_engine.compute_tfidf(df_idf)
 
-            # in the method where we build the term-count at this point
-            # we call a method of the Transcript class to build the term-count. This makes sense
-            # because the Transcript object has all the information it needs to calculate
-            # term-count. However, a Transcript does not 'know' the universe of documents
-            # it is part of, so it does not make sense for the method that creates TranscriptAnalysis
-            # to be part of the Transcript class. That is why it is a method of this class
-            # instead, and then the TranscriptAnalysis info is passed to the Transcript class to be
-            # stored. In fact, the cration of the term-count files probably should not have
-            # been coordinated by this TranscriptAnalysis class - but it's already done that way now.
-            df_tfidf = self.__create_tfidf_dataframe_for_a_vid(transcript.df_terms_count, df_idf)
-            df_tfidf.index.name = my_globals.str_trnscrpt_class_column_terms
-            df_tfidf.rename(
-                columns={my_globals.str_trnscrpt_class_column_count: my_globals.str_trnscrpt_class_column_tfidf})
-            df_tfidf.sort_values(by=self.__column_name_count, ascending=False, inplace=True)
-            transcript.provide_tfidf(df_tfidf)
+        # and finally the results are saved for each video
+        for a_vid in dict_transcripts:
+            execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
+            if not execution_should_continue:
+                break
+            # we'll only update the timestamp in the SimpleDS if there is an actual change
+            # to the transcript. So here, we'll keep the existing timestamp
+            timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_vid)
+            logging.debug(
+                'Saving TranscriptAnalysis for video # ' + str(counter) + ' of ' + str(num_missing_tfidf_vids))
+            transcript = dict_transcripts[a_vid]
+            transcript.provide_tfidf(tfidf_engine.fetch_tfidf_as_df(a_vid))
             transcript.save_df_tfidf_2disk()
             dict_for_ds = transcript.dump_transcript_metadata_to_dictionary()
             self.transcripts_ds.update_entry(a_vid, dict_for_ds, timestamp_updated)
             logging.debug('Added (to SimpleDS) the TranscriptAnalysis data for video: ' + a_vid)
             counter += 1
             percent_tracker.update_progress(counter, show_time_remaining_estimate=True,
-                                            str_description_to_include_in_logging='Updating Term Count files.')
+                                            str_description_to_include_in_logging='Updating TF-IDF files.')
         self.transcripts_ds.save2disk()
+        # the IDF used is only recorded if every video that needed it got its TF-IDF re-calculated,
+        # otherwise the next run would not know that the ones left behind are out of date.
+        # (and if the store has no contributions, the doc-count vector is from an older version
+        # of the code, and saving the store would overwrite it.)
+        if (counter == num_missing_tfidf_vids) and doc_count_store.contributions_were_found:
+            doc_count_store.record_idf_used(series_idf)
+            doc_count_store.save()
 
     # ------------------------ END FUNCTION ------------------------ #
 
     def update_pseudotranscript_files(self, fullpath_to_simpleds_with_vid_json_data,
                                       keep_terms_that_appear_more_than=2,
                                       force_update=False,
-                                      fullpath_file_with_terms_to_not_include=''):
+                                      fullpath_file_with_terms_to_not_include='',
+                                      num_worker_processes=1, num_transcripts_per_chunk=0):
         """This method updates any missing pseudo-transcript info in the transcripts
         SimpleDS and on disk.
         A pseudo-transcript is a reduced form of the transcript to be pushed to Algolia.
@@ -175,11 +262,12 @@ class TranscriptAnalysis:
         PARAMETERS for the method. The parameters are fairly self explanatory.
         The file of terms to not include in the pseudo-transcript should be a file
         NOT in json format (as in, nor a dictionary or a list), but rather where
-        each term is by itself on one line. One term per line."""
+        each term is by itself on one line. One term per line.
+        The file is read once, for all the videos, and on top of those terms each video
+        also ignores the names of the people in it (see __update_pseudotexts_of_documents,
+        which also explains num_worker_processes and num_transcripts_per_chunk.)"""
         logging.info('Starting method that updates the pseudo-transcript data.')
 
-        num_vids_success = 0
-
         # we need some 'guest' information at one point in the code, so we need the
         # SimpleDS of website json videos. We normally sort the SimpleDS as soon as
         # we load it, but here it will be queried, rather than used to iterate, so
@@ -189,64 +277,13 @@ class TranscriptAnalysis:
 
         # make a list of videos that don't have pseudo-transcript data yet
         list_vids_no_pt_data_on_disk = self.__look_for_missing_pseudotext_info(force_update=force_update)
-        num_missing_pt_vids = len(list_vids_no_pt_data_on_disk)
-        counter = 0
-        percent_tracker = PercentTracker(num_missing_pt_vids,
-                                         int_output_every_x_percent=1, log_level='info')
-        logging.info(str(num_missing_pt_vids) + " videos don't have pseudo-transcript data on disk.")
+        logging.info(str(len(list_vids_no_pt_data_on_disk)) + " videos don't have pseudo-transcript data on disk.")
 
-        for a_vid in list_vids_no_pt_data_on_disk:
-            try:
-                execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
-                if not execution_should_continue:
-                    break
-                # we'll only update the timestamp in the SimpleDS if there is an actual change
-                # to the transcript. So here, we'll keep the existing timestamp
-                timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_vid)
-                logging.debug(
-                    'Updating pseudo-transcript for video # ' + str(counter) + ' of ' + str(num_missing_pt_vids))
-                transcript = Transcript(a_vid)
-                transcript.set_transcript_directory(self.str_path_to_transcripts_files)
-                # now we load into the object, and data that has previously been stored
-                # about it to SimpleDS
-                transcript.load_transcript_object_from_dictionary(self.transcripts_ds.fetch_data(a_vid))
-
-                # call a method that makes the pseudo-transcript. However, what that method does can be improved
-                # by giving it a list of terms to ignore. So we create that list.
-                # we start with a basic static list.
-                list_of_unwanted_terms = convert_file_to_list_by_lines(fullpath_file_with_terms_to_not_include)
-                # now we want to customize the list a bit for this particular transcript, by
-                # adding terms related to the people in the interview. So, for example, if the interview
-                # has 'Ash Bennington' and 'Ed Harrison' in it, we want to augment the list of unwanted terms
-                # with ['ash', 'bennington', 'ash beggington', 'ed', 'harrison', 'ed harrison']
-                vid_obj = RVwebsiteVid(web_vid_ds.fetch_data(a_vid))
-                lst_people = vid_obj.make_python_list_of_people_in_video()
-                lst_people_tokens = tokenize_list_containing_people_fullnames(lst_people)
-                list_of_unwanted_terms.extend(lst_people_tokens)
-                # now we have the pieces in place to call the method that makes the pseudo-transcript
-                transcript.make_pseudotranscript(
-                    keep_terms_that_appear_more_than_x_times=keep_terms_that_appear_more_than,
-                    list_of_terms_to_ignore=list_of_unwanted_terms)
-                # save the pseudo-transcript to disk. This function also updates the filename metadata
-                # inside the Transcript object, so that when we dump the metadata back to dictionary for saving
-                # to SimpleDS, that will be included
-                saved_to_disk_successfully = transcript.save_pseudotranscript_2disk()
-                # dump current metadata of the Transcript object to a dictionary for saving to SimpleDS
-                dict_for_ds = transcript.dump_transcript_metadata_to_dictionary()
-                self.transcripts_ds.update_entry(a_vid, dict_for_ds, timestamp_updated)
-                logging.debug('Added (to SimpleDS) the pseudo-transcript for video: ' + a_vid)
-                if saved_to_disk_successfully:
-                    num_vids_success += 1
-                counter += 1
-                percent_tracker.update_progress(
-                    counter,
-                    show_time_remaining_estimate=True,
-                    str_description_to_include_in_logging='Updating pseudo-transcript files.')
-            except Exception as e:
-                logging.warning('While updating pseudo-transcripts there was an issue with video: ' + a_vid +
-                                '\nThis try/except is inside a loop, so the method will attempt to continue'
-                                ' processing other videos, and to save the SimpleDS afterwards.'
-                                '\nThe Exception was: ' + repr(e))
+        # the basic static list of terms to ignore, which is the same for all the videos.
+        frozenset_terms_to_ignore = frozenset(convert_file_to_list_by_lines(fullpath_file_with_terms_to_not_include))
+        counter, num_vids_success = self.__update_pseudotexts_of_documents(
+            list_vids_no_pt_data_on_disk, keep_terms_that_appear_more_than, frozenset_terms_to_ignore,
+            num_worker_processes, num_transcripts_per_chunk, web_vid_ds=web_vid_ds, str_type_of_document='video')
         logging.info("Successfully saved to disk video's pseudo-transcript data: " + str(num_vids_success))
         logging.info("Videos processed: " + str(counter))
         self.transcripts_ds.save2disk()
@@ -254,7 +291,8 @@ class TranscriptAnalysis:
     # ------------------------ END FUNCTION ------------------------ #
 
     def update_pub_pseudotext_files(self, keep_terms_that_appear_more_than=2,
-                                    force_update=False, fullpath_file_with_terms_to_not_include=''):
+                                    force_update=False, fullpath_file_with_terms_to_not_include='',
+                                    num_worker_processes=1, num_pubs_per_chunk=0):
         """This method updates any missing pseudo-text info in the fulltexts
         SimpleDS and on disk related to RV publications.
         A pseudo-text is a reduced form of the fulltext to be pushed to Algolia.
@@ -263,60 +301,125 @@ class TranscriptAnalysis:
         PARAMETERS for the method. The parameters are fairly self explanatory.
         The file of terms to not include in the pseudo-text should be a file
         NOT in json format (as in, not a dictionary or a list), but rather where
-        each term is by itself on one line. One term per line."""
+        each term is by itself on one line. One term per line.
+        See __update_pseudotexts_of_documents for num_worker_processes and num_pubs_per_chunk."""
         logging.info('Starting method that updates publication pseudo-text data.')
 
         # make a list of publications that don't have pseudo-text data yet
         list_pubs_no_pt_data_on_disk = self.__look_for_missing_pseudotext_info(force_update=force_update)
-        num_missing_pt_pubs = len(list_pubs_no_pt_data_on_disk)
-        counter = 0
-        percent_tracker = PercentTracker(num_missing_pt_pubs,
-                                         int_output_every_x_percent=1, log_level='info')
-        logging.info(str(num_missing_pt_pubs) + " publications don't have pseudo-text data on disk.")
+        logging.info(str(len(list_pubs_no_pt_data_on_disk)) + " publications don't have pseudo-text data on disk.")
 
-        for a_pub in list_pubs_no_pt_data_on_disk:
-            try:
-                execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
-                if not execution_should_continue:
-                    break
-                # we'll only update the timestamp in the SimpleDS if there is an actual change
-                # to the fulltext. So here, we'll keep the existing timestamp
-                timestamp_updated = self.transcripts_ds.fetch_lastupdated(a_pub)
-                logging.debug('Updating pseudo-text for publication # '
-                              + str(counter) + ' of ' + str(num_missing_pt_pubs))
-                transcript = Transcript(a_pub)
-                transcript.set_transcript_directory(self.str_path_to_transcripts_files)
-                # now we load into the object, and data that has previously been stored
-                # about it to SimpleDS
-                transcript.load_transcript_object_from_dictionary(self.transcripts_ds.fetch_data(a_pub))
-
-                # call a method that makes the pseudo-text. However, what that method does can be improved
-                # by giving it a list of terms to ignore. So we create that list.
-                list_of_unwanted_terms = convert_file_to_list_by_lines(fullpath_file_with_terms_to_not_include)
-                # now we have the pieces in place to call the method that makes the pseudo-text
-                transcript.make_pseudotranscript(
-                    keep_terms_that_appear_more_than_x_times=keep_terms_that_appear_more_than,
-                    list_of_terms_to_ignore=list_of_unwanted_terms)
-                # save the pseudo-text to disk. This function also updates the filename metadata
-                # inside the Transcript object, so that when we dump the metadata back to dictionary for saving
-                # to SimpleDS, that will be included
-                transcript.save_pseudotranscript_2disk()
-                # dump current metadata of the Transcript object to a dictionary for saving to SimpleDS
-                dict_for_ds = transcript.dump_transcript_metadata_to_dictionary()
-                self.transcripts_ds.update_entry(a_pub, dict_for_ds, timestamp_updated)
-                logging.debug('Added (to SimpleDS) the pseudo-text for publication: ' + a_pub)
-                counter += 1
-                percent_tracker.update_progress(counter, show_time_remaining_estimate=True,
-                                                str_description_to_include_in_logging='Updating pseudo-text files.')
-            except Exception as e:
-                logging.warning('While updating pseudo-texts there was an issue with publication: ' + a_pub +
-                                '\nThis try/except is inside a loop, so the method will attempt to continue'
-                                ' processing other publications, and to save the SimpleDS afterwards.'
-                                '\nThe Exception was: ' + repr(e))
+        frozenset_terms_to_ignore = frozenset(convert_file_to_list_by_lines(fullpath_file_with_terms_to_not_include))
+        self.__update_pseudotexts_of_documents(list_pubs_no_pt_data_on_disk, keep_terms_that_appear_more_than,
+                                               frozenset_terms_to_ignore, num_worker_processes, num_pubs_per_chunk,
+                                               str_type_of_document='publication')
         self.transcripts_ds.save2disk()
 
     # ------------------------ END FUNCTION ------------------------ #
 
+    def __update_pseudotexts_of_documents(self, list_documents_no_pt_data,  # noqa: C901
+                                          keep_terms_that_appear_more_than, frozenset_terms_to_ignore,
+                                          num_worker_processes=1, num_documents_per_chunk=0, web_vid_ds=None,
+                                          str_type_of_document=''):
+        """Makes the pseudo-text (or pseudo-transcript) of every document in the list, saves it to disk,
+        and updates the metadata of the document in the transcripts SimpleDS (but doesn't save the SimpleDS.)
+        This is what the methods that update the pseudo-texts of videos and of publications have in common.
+        The terms to ignore are split in two:
+        - the terms to ignore in every document, which are given once as a frozenset (so looking up
+        a term is quick, and it is the same object for all the documents.) It is handed to each process
+        only once (see share_terms_to_ignore_in_pseudotexts) rather than with every document.
+        - a small set of terms to ignore in one document only, on top of the others: if the SimpleDS of
+        website videos is given, the documents are videos, and these are the tokens of the names of the
+        people in the video. So, for example, if the interview has 'Ash Bennington' and 'Ed Harrison' in
+        it, the set is {'ash', 'bennington', 'ash bennington', 'ed', 'harrison', 'ed harrison'}
+        If num_worker_processes is more than 1, the pseudo-texts are made in parallel by a pool of
+        processes. The workers make and save the pseudo-text files, and hand back the metadata, so that
+        only this (the main) process writes to the SimpleDS. The work is handed out in chunks of
+        num_documents_per_chunk documents (by default, a few per worker) and the variable manager is
+        checked in between chunks, so an external stop request is still honoured.
+        RETURNS a tuple with the number of documents processed, and how many of them had their
+        pseudo-text saved to disk."""
+        num_missing_pt_docs = len(list_documents_no_pt_data)
+        counter = 0
+        num_docs_success = 0
+        percent_tracker = PercentTracker(num_missing_pt_docs, int_output_every_x_percent=1, log_level='info')
+        str_description_to_include_in_logging = 'Updating ' + str_type_of_document + ' pseudo-text files.'
+        if num_worker_processes > 1:
+            if num_documents_per_chunk <= 0:
+                num_documents_per_chunk = num_worker_processes * 4
+            with ProcessPoolExecutor(max_workers=num_worker_processes,
+                                     initializer=share_terms_to_ignore_in_pseudotexts,
+                                     initargs=(frozenset_terms_to_ignore,)) as executor:
+                for idx_chunk_start in range(0, num_missing_pt_docs, num_documents_per_chunk):
+                    execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
+                    if not execution_should_continue:
+                        break
+                    lst_chunk = list_documents_no_pt_data[idx_chunk_start:idx_chunk_start + num_documents_per_chunk]
+                    dict_futures = {}
+                    for a_doc in lst_chunk:
+                        try:
+                            future = executor.submit(make_and_save_pseudotext_for_a_document, a_doc,
+                                                     self.transcripts_ds.fetch_data(a_doc),
+                                                     self.str_path_to_transcripts_files,
+                                                     keep_terms_that_appear_more_than,
+                                                     make_set_of_people_tokens_of_video(web_vid_ds, a_doc))
+                            dict_futures[future] = a_doc
+                        except Exception as e:
+                            logging.warning('While updating pseudo-texts there was an issue with ' +
+                                            str_type_of_document + ': ' + a_doc + '\nThe Exception was: ' + repr(e))
+                    for future in as_completed(dict_futures):
+                        a_doc = dict_futures[future]
+                        try:
+                            dict_for_ds, saved_to_disk_successfully = future.result()
+                            self.__record_pseudotext_metadata(a_doc, dict_for_ds)
+                        except Exception as e:
+                            logging.warning('While updating pseudo-texts there was an issue with ' +
+                                            str_type_of_document + ': ' + a_doc + '\nThe Exception was: ' + repr(e))
+                            continue
+                        if saved_to_disk_successfully:
+                            num_docs_success += 1
+                        counter += 1
+                        percent_tracker.update_progress(
+                            counter, show_time_remaining_estimate=True,
+                            str_description_to_include_in_logging=str_description_to_include_in_logging)
+        else:
+            share_terms_to_ignore_in_pseudotexts(frozenset_terms_to_ignore)
+            for a_doc in list_documents_no_pt_data:
+                try:
+                    execution_should_continue = self.var_mgr.var_retrieve(my_globals.str_execution_may_go_on)
+                    if not execution_should_continue:
+                        break
+                    logging.debug('Updating pseudo-text for ' + str_type_of_document + ' # ' + str(counter) +
+                                  ' of ' + str(num_missing_pt_docs))
+                    dict_for_ds, saved_to_disk_successfully = make_and_save_pseudotext_for_a_document(
+                        a_doc, self.transcripts_ds.fetch_data(a_doc), self.str_path_to_transcripts_files,
+                        keep_terms_that_appear_more_than, make_set_of_people_tokens_of_video(web_vid_ds, a_doc))
+                    self.__record_pseudotext_metadata(a_doc, dict_for_ds)
+                    if saved_to_disk_successfully:
+                        num_docs_success += 1
+                    counter += 1
+                    percent_tracker.update_progress(
+                        counter, show_time_remaining_estimate=True,
+                        str_description_to_include_in_logging=str_description_to_include_in_logging)
+                except Exception as e:
+                    logging.warning('While updating pseudo-texts there was an issue with ' + str_type_of_document +
+                                    ': ' + a_doc + '\nThis try/except is inside a loop, so the method will attempt'
+                                    ' to continue processing other documents, and to save the SimpleDS afterwards.'
+                                    '\nThe Exception was: ' + repr(e))
+        return counter, num_docs_success
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __record_pseudotext_metadata(self, doc_id, dict_for_ds):
+        """Updates the metadata of a document in the transcripts SimpleDS (which includes the filename of
+        its pseudo-text, once saved.) We only update the timestamp in the SimpleDS if there is an actual
+        change to the transcript, so here we keep the existing timestamp."""
+        timestamp_updated = self.transcripts_ds.fetch_lastupdated(doc_id)
+        self.transcripts_ds.update_entry(doc_id, dict_for_ds, timestamp_updated)
+        logging.debug('Added (to SimpleDS) the pseudo-text for: ' + doc_id)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
     def update_doc_count_vector_on_disk(self, wipe_and_start_from_zero=False):
         """Method updates OR builds Document COUNT as a vector (one-column dataframe, not counting
         the index - the index contains terms, and the data-column contains the term COUNT
@@ -330,71 +433,54 @@ class TranscriptAnalysis:
         - this is the most granular level of the information (it is very easy to go from
         here to IDF, but not vice-versa), and
         - when stored just as the COUNT of terms, it is very easy to update this dataframe
-        with new transcripts as they get added."""
+        with new transcripts as they get added.
+        The vector is kept by a DocCountStore, which also remembers which terms each video
+        contributed, so videos that were deleted, or whose term-count was re-built, are taken out
+        of (or replaced in) the vector without having to re-build it from scratch."""
         logging.info('Starting method that builds term Document Count vector')
 
         int_vids_processed = 0
         int_vids_added_to_doc_count_vector = 0
         int_vids_not_touched = 0
+        int_vids_removed_from_doc_count_vector = 0
 
         percent_increments = 10
-        doc_count_file_exists = os.path.exists(self.fullpath_doc_count_vector_as_csv)
+        doc_count_store = self.__fetch_doc_count_store()
+        if not doc_count_store.contributions_were_found:
+            # the vector on disk was built by an older version of this method, which didn't
+            # keep track of what each video contributed. Without that, videos can't be taken
+            # out of the vector, so it is re-built from scratch (only this once.)
+            logging.info('The Document Count vector on disk does not have the contributions of each video.'
+                         ' It will be re-built from scratch.')
+            wipe_and_start_from_zero = True
 
         # if a fresh start was requested, we wipe the SimpleDS clean
         # from the tags that mark a video as already included in the current
-        # doc-count vector, and we delete the existing file.
+        # doc-count vector, and we empty the store.
         if wipe_and_start_from_zero:
             self.transcripts_ds.tag_remove_all_rows(self.__str_tag_vid_data_in_doc_count)
             percent_increments = 1
-            if doc_count_file_exists:
-                os.remove(self.fullpath_doc_count_vector_as_csv)
-                doc_count_file_exists = False
-
-        df_doc_count = pd.DataFrame()
-        # check to see if the DC (document count) vector CSV file already exists.
-        # If it does, we load a dataframe object with it, and
-        # if it doesn't, we create a dataframe.
-        if doc_count_file_exists:
-            logging.debug('Document Count vector csv file exists. Loading dataframe from disk.')
-            df_doc_count = pd.read_csv(self.fullpath_doc_count_vector_as_csv,
-                                       sep=self.__separator)
-            df_doc_count.set_index(self.__column_name_terms, drop=True, inplace=True)
-        else:
-            logging.debug('Document Count vector csv file does not exist. Will create it as part'
-                          ' of the execution of the method.')
-            # If we are not loading the dataframe from disk (because it does not yet exist)
-            # we need to initialize this dataframe a bit more formally than usual,
-            # because the loop below adds two columns together after concatenating the current
-            # iteration of the loop's dataframe, with the ongoing one.
-            # If we don't initialize the dataframe here with its proper columns, the sum
-            # of the two columns in the first iteration of the loop fails, because in the
-            # first iteration, the cumulative df declared below would not have a column to add
-            # with if it were just declared as an empty dataframe.
-            df_doc_count = pd.DataFrame(
-                columns=[self.__column_name_terms, self.__column_name_count])
-            df_doc_count.set_index(self.__column_name_terms, drop=True, inplace=True)
+            doc_count_store.wipe()
+
+        # videos that have contributed to the vector, but no longer exist in the SimpleDS
+        # (for example, because they were deleted from the website) are taken out of the vector.
+        set_vids_in_store_but_not_in_ds = \
+            doc_count_store.fetch_all_doc_ids_as_python_set() - self.transcripts_ds.fetch_all_ids_as_python_set()
+        for vid_id in set_vids_in_store_but_not_in_ds:
+            doc_count_store.remove_document(vid_id)
+            int_vids_removed_from_doc_count_vector += 1
 
         # now loop through the transcripts SimpleDS, and use the term count
         # dataframe of each video that has one to create a global document count vector.
         # by vector I mean a one-dimensional dataframe, where the index is
         # populated with all of the terms, and the data-column is the number of documents
         # (transcripts) where the term is present.
+        # NOTE. Videos whose term-count was re-built (for example because the transcript was updated)
+        # lose the tag, so they come through here again, and their previous contribution is replaced.
         counter = 0
         max_vids_to_process = self.num_vids_to_use
         percent_trkr = PercentTracker(max_vids_to_process,
                                       int_output_every_x_percent=percent_increments, log_level='info')
-        # we are going to add a cheeky term to the dataframe of each
-        # video. This will allow us to basically store, as a row, in the overall document-
-        # count dataframe the size of the document universe that has been
-        # examined to construct the current document-count vector.
-        # we do this by temporarily adding the same string (that will never be found naturally
-        # in a transcript) to every video term-count dataframe. To do this, we use the
-        # small, cheeky dataframe below.
-        dct_for_cheeky_df = {self.__column_name_terms: [self.__str_cheeky_document_counter],
-                             self.__column_name_count: [1]}
-        df_cheeky = pd.DataFrame(dct_for_cheeky_df)
-        df_cheeky.set_index(self.__column_name_terms, drop=True, inplace=True)
-        df_cheeky.index.name = self.__column_name_terms
         for vid_id in self.transcripts_ds:
             vid_data_already_in_existing_vector = \
                 self.transcripts_ds.tag_check(vid_id, self.__str_tag_vid_data_in_doc_count)
@@ -415,55 +501,35 @@ class TranscriptAnalysis:
                 df_vid_tc = self.__get_vid_term_count(vid_id)
                 # check that the term COUNT df isn't empty
                 if len(df_vid_tc) > 0:
-                    # this is where we use the cheeky dataframe describe above to add to each
-                    # video's term-count a specific string. This means that the overall
-                    # document-count vector will always have a row that tracks how many documents
-                    # have been used to construct the vector.
-                    df_vid_tc = pd.concat([df_vid_tc, df_cheeky])
-                    # now create a dataframe for this video that replaces all count values
-                    # with True. For document count, we don't care about the actual value
-                    # of the term-frequency, just whether it appears or not.
-                    # Because all terms of a document obviously appear in that document,
-                    # all rows will be marked as True.
-                    df_vid_tc = df_vid_tc > 0
-                    # now we convert the Trues into 1s so we can do math with them later
-                    # this will fail if there are any nans, but we know there are not because
-                    # every term exists in its own document
-                    df_vid_tc[self.__column_name_count] = \
-                        df_vid_tc[self.__column_name_count].astype(int)
-                    # now we concatenate the cumulative single-column dataframe that is tracking
-                    # the document COUNT, with the one built above.
-                    df_doc_count = pd.concat([df_doc_count, df_vid_tc], join='outer', axis=1, sort=False)
-                    # now we have two columns, instead of just one. In both columns there are nans
-                    # because some terms existed in one df, and not in the other, and viceversa
-                    # (and in for the terms that exist in both dfs, we have 1s in both.) This
-                    # allows us to add the columns together below, which results in an increment of
-                    # +1 in the cumulative df of all the terms (those and only those) that exist in
-                    # the current video being processed by the loop.
-                    # in the line below we replace the nans that got added at the concatenations with zeros
-                    df_doc_count.fillna(0, inplace=True)
-                    # now, as explained, we add the two columns together
-                    df_doc_count = df_doc_count.iloc[:, 0] + df_doc_count.iloc[:, 1]
+                    # For document count, we don't care about the actual value
+                    # of the term-count, just whether the term appears or not, so we
+                    # only keep the terms with a count above zero. The store also adds the
+                    # 'cheeky' term to every video, so the vector always has a row that
+                    # tracks how many documents have been used to construct it.
+                    doc_count_store.add_document(vid_id, df_vid_tc.index[df_vid_tc[self.__column_name_count] > 0])
                     self.transcripts_ds.tag_add(vid_id, self.__str_tag_vid_data_in_doc_count)
                     int_vids_added_to_doc_count_vector += 1
+                elif doc_count_store.remove_document(vid_id):
+                    # the term-count of the video was re-built, and now it has no terms (for example, its
+                    # transcript was emptied) so what it contributed before is taken out of the vector.
+                    int_vids_removed_from_doc_count_vector += 1
 
             int_vids_processed += 1
             counter += 1
             percent_trkr.update_progress(counter, show_time_remaining_estimate=True)
 
-        # we save the transcripts simpleDS to disk, because tags may have been added
+        # we save the document-count vector (and the contributions of each video) to disk first, and
+        # only then the transcripts SimpleDS (because tags may have been added.) If anything goes wrong
+        # in between, a video is left counted but not tagged, and the next run simply replaces its
+        # contribution; the other way around, it would be tagged as counted without being counted.
+        logging.debug('Saving the Document Count vector to disk.')
+        doc_count_store.save()
         self.transcripts_ds.save2disk()
-        # then save the document-count vector to disk
-        df_doc_count.index.name = self.__column_name_terms
-        save_index = True
-        logging.debug('Saving dataframe to CSV with __separator -> ' +
-                      str(self.__separator) + ' and saving index = ' + str(save_index))
-        df_doc_count.to_csv(self.fullpath_doc_count_vector_as_csv, sep=self.__separator,
-                            index=save_index, header=True)
 
         logging.info('---------- SUMMARY of updating the document count vector ----------')
         logging.info('Videos processed: ' + str(int_vids_processed))
         logging.info('Videos added to the document-count vector: ' + str(int_vids_added_to_doc_count_vector))
+        logging.info('Videos removed from the document-count vector: ' + str(int_vids_removed_from_doc_count_vector))
         logging.info('Videos not touched: ' + str(int_vids_not_touched))
 
     # ------------------------ END FUNCTION ------------------------ #
@@ -516,6 +582,10 @@ class TranscriptAnalysis:
         # we first need to loop through the SimpleDS in order to query the files
         # associated with each entry, and remove the files. Then after that, we
         # can delete the entries in the SimpleDS itself.
+        # The deleted transcripts are also taken out of the doc-count vector (only their
+        # own terms are touched, so there is no need to re-build the vector.)
+        doc_count_store = self.__fetch_doc_count_store()
+        int_removed_from_doc_count = 0
         for item in self.transcripts_ds:
             if self.transcripts_ds.tag_check(item, source_tag):
                 transcript = Transcript(item)
@@ -530,33 +600,11 @@ class TranscriptAnalysis:
                 # now we no longer need any of the data in the SimpleDS record, so we
                 # can proceed to delete it.
                 self.transcripts_ds.delete_entry(item)
-
-    # ------------------------ END FUNCTION ------------------------ #
-
-    def __create_tfidf_dataframe_for_a_vid(self, df_with_term_count_for_vid, df_with_overall_idf):
-        # note, the variable below is INITIALLY a misnomer. It does not start out being the tfidf
-        # but as the code proceeds it becomes the series containing the tfidf for the video
-        df_tfidf = df_with_term_count_for_vid
-        # first we need to convert the series that has the term-count, into
-        # term-frequency instead. This is done by dividing the term-count by
-        # the size of the transcript. Here, for the size of the transcript
-        # we are simply going to sum all the ocurrences of all the terms in the
-        # series (this is slightly different from the size of the original transcript
-        # because at some point stop-words were removed, and also because in the series
-        # we don't just have single words, but we have noun-phrases too, but for our purposes it
-        # should be fine.)
-        total_terms = df_tfidf.sum()
-        df_tfidf = df_tfidf / total_terms
-
-        # and now to arrive at TF-IDF we need to multiply the term-frequency
-        # (which we now have in the series) by the IDF for each term in the series
-        # so lets first get a series that is a sub-section of the IDF series (it is
-        # an intersection of the indexes of the two series - in other words, it is
-        # a sub-section of the IDF series, which only contains the terms we are
-        # interested in for the video that is currently being processed.)
-        df_sub_idf = df_with_overall_idf.loc[df_tfidf.index]
-        df_tfidf = df_tfidf * df_sub_idf
-        return df_tfidf
+                if doc_count_store.remove_document(item):
+                    int_removed_from_doc_count += 1
+        if int_removed_from_doc_count > 0:
+            logging.info('Transcripts removed from the doc-count vector: ' + str(int_removed_from_doc_count))
+            doc_count_store.save()
 
     # ------------------------ END FUNCTION ------------------------ #
 
@@ -665,6 +713,16 @@ class TranscriptAnalysis:
 
     # ------------------------ END FUNCTION ------------------------ #
 
+    def __fetch_doc_count_store(self):
+        """Returns a DocCountStore, already loaded from disk, for the doc-count vector of
+        this universe of documents."""
+        doc_count_store = DocCountStore(self.fullpath_doc_count_vector_as_csv, self.__column_name_terms,
+                                        self.__column_name_count, self.__str_cheeky_document_counter)
+        doc_count_store.load()
+        return doc_count_store
+
+    # ------------------------ END FUNCTION ------------------------ #
+
     def __get_vid_term_count(self, vid_id):
         """Method gets a videos term-count data, and returns it as
         a dataframe. If there is not term frequency to be found, an
@@ -688,3 +746,68 @@ class TranscriptAnalysis:
             'Saving IDF dataframe to CSV with separator -> ' + separator + ' and saving index =' + str(save_index))
         df_idf.to_csv(self.fullpath_doc_count_vector_as_csv, sep=separator, index=save_index)
     # ------------------------ END FUNCTION ------------------------ #
+
+
+def construct_and_save_term_count_for_a_transcript(str_transcript_id, dict_transcript_metadata,
+                                                   str_path_to_transcripts_files):
+    """This function builds the term-count of a single transcript and saves it to disk.
+    It lives outside of the TranscriptAnalysis class so that it can be sent to worker
+    processes (it only receives, and returns, simple python objects.)
+    It returns a tuple with the transcript metadata as a dictionary (ready to be saved to
+    the transcripts SimpleDS by the caller) and whether the term-count was saved successfully."""
+    transcript = Transcript(str_transcript_id)
+    transcript.set_transcript_directory(str_path_to_transcripts_files)
+    transcript.load_transcript_object_from_dictionary(dict_transcript_metadata)
+    transcript.get_transcript_from_disk()
+    transcript.construct_terms_count()
+    saved_to_disk_successfully = transcript.save_df_terms_count_2disk()
+    return transcript.dump_transcript_metadata_to_dictionary(), saved_to_disk_successfully
+# ------------------------ END FUNCTION ------------------------ #
+
+
+# the terms to ignore in every pseudo-text. Each process (the main one, or a worker of a pool) has its
+# own, set once with share_terms_to_ignore_in_pseudotexts before it makes any pseudo-texts.
+frozenset_terms_to_ignore_in_pseudotexts = frozenset()
+
+
+def share_terms_to_ignore_in_pseudotexts(frozenset_terms_to_ignore):
+    """Sets the terms to ignore in every pseudo-text made by this process. It is the initializer of
+    the worker processes that make pseudo-texts, so the terms (which can be many) are sent to each
+    worker once, rather than with every document."""
+    global frozenset_terms_to_ignore_in_pseudotexts
+    frozenset_terms_to_ignore_in_pseudotexts = frozenset_terms_to_ignore
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_and_save_pseudotext_for_a_document(str_document_id, dict_transcript_metadata,
+                                            str_path_to_transcripts_files, keep_terms_that_appear_more_than,
+                                            set_more_terms_to_ignore):
+    """This function makes the pseudo-text (or pseudo-transcript) of a single document, from its
+    term-count on disk, and saves it to disk. Like construct_and_save_term_count_for_a_transcript, it
+    lives outside of the TranscriptAnalysis class so that it can be sent to worker processes.
+    The terms in set_more_terms_to_ignore are ignored on top of the ones shared with this process
+    (see share_terms_to_ignore_in_pseudotexts.)
+    It returns a tuple with the transcript metadata as a dictionary (ready to be saved to
+    the transcripts SimpleDS by the caller) and whether the pseudo-text was saved successfully."""
+    transcript = Transcript(str_document_id)
+    transcript.set_transcript_directory(str_path_to_transcripts_files)
+    transcript.load_transcript_object_from_dictionary(dict_transcript_metadata)
+    transcript.make_pseudotranscript(keep_terms_that_appear_more_than_x_times=keep_terms_that_appear_more_than,
+                                     list_of_terms_to_ignore=frozenset_terms_to_ignore_in_pseudotexts,
+                                     set_of_more_terms_to_ignore=set_more_terms_to_ignore)
+    # this function also updates the filename metadata inside the Transcript object, so that it is
+    # included when the metadata is dumped to a dictionary.
+    saved_to_disk_successfully = transcript.save_pseudotranscript_2disk()
+    return transcript.dump_transcript_metadata_to_dictionary(), saved_to_disk_successfully
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_set_of_people_tokens_of_video(web_vid_ds, vid_id):
+    """Returns a set with the tokens of the names of the people in a video (see
+    tokenize_list_containing_people_fullnames), taken from the SimpleDS of website videos.
+    If no SimpleDS is given, an empty set is returned."""
+    if web_vid_ds is None:
+        return set()
+    vid_obj = RVwebsiteVid(web_vid_ds.fetch_data(vid_id))
+    return set(tokenize_list_containing_people_fullnames(vid_obj.make_python_list_of_people_in_video()))
+# ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,156 @@
+import os
+import pickle
+import logging
+import my_globals
+from my_building_blocks import recursiveExtractFieldFromHierarchy
+from class_simpleDS import SimpleDS
+
+
+class WebsiteVidsProjection:
+    """This class keeps a copy of a handful of fields of every video in the SimpleDS of website
+    videos (featuring, topics, tags, etc.) in a single compact file, so the functions that only
+    need those fields (like the ones that extract guests and interviewers) don't have to open
+    the JSON file of every single video, and walk the schema for every field, every time they run.
+    How it is stored:
+    - it is 'columnar'. For every field there is a dictionary of {video ID: value of the field},
+    and there is one more such dictionary with the hash each video had in the SimpleDS when its
+    fields were extracted.
+    - the whole thing is pickled into one file, next to the index of the SimpleDS.
+    How it is kept up to date:
+    - the function that updates the SimpleDS of website videos calls 'upsert' for every video it
+    adds or updates (and 'remove' for every video deleted) so normally only the videos that
+    changed are touched.
+    - when the projection is used, 'sync_with_simpleds' compares the hashes it has with the
+    hashes in the SimpleDS (which is in memory already, so this is cheap) and only re-extracts
+    the videos whose hash is different, or that are missing. So, if for whatever reason the
+    projection is out of date (or doesn't exist yet, or the list of fields changed) it fixes
+    itself, and the values returned are always the same as reading the JSON files would give."""
+    __key_fields = 'fields'
+    __key_columns = 'columns'
+    __key_hashes = 'hashes'
+
+    def __init__(self, fullpath_projection=my_globals.str_fullfilepath_website_vids_projection,
+                 lst_fields=my_globals.lst_website_vid_fields_in_projection):
+        self.fullpath_projection = fullpath_projection
+        self.lst_fields = list(lst_fields)
+        self.dict_columns = {a_field: {} for a_field in self.lst_fields}
+        self.dict_hashes = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __contains__(self, vid_id):
+        return vid_id in self.dict_hashes
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def __len__(self):
+        return len(self.dict_hashes)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_hash(self, vid_id):
+        """Returns the hash the video had in the SimpleDS when its fields were extracted."""
+        return self.dict_hashes[vid_id]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_field(self, vid_id, str_field):
+        return self.dict_columns[str_field][vid_id]
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def has_fields(self, lst_fields):
+        """Returns True if all the fields given are kept in the projection."""
+        return set(lst_fields).issubset(self.dict_columns)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def load(self):
+        """Loads the projection from disk. If it can't be loaded, or it was saved with a different
+        list of fields, the projection is left empty (and will be re-built by 'sync_with_simpleds'.)"""
+        if not os.path.isfile(self.fullpath_projection):
+            return
+        try:
+            with open(self.fullpath_projection, mode='rb') as projection_file:
+                dict_saved = pickle.load(projection_file)
+            if dict_saved[self.__key_fields] != self.lst_fields:
+                logging.info('The fields of the website videos projection have changed. It will be re-built.')
+                return
+            self.dict_columns = dict_saved[self.__key_columns]
+            self.dict_hashes = dict_saved[self.__key_hashes]
+        except Exception as e:
+            logging.warning('Could not load the projection of the website videos. It will be re-built.'
+                            ' The Exception was: ' + repr(e))
+            self.dict_columns = {a_field: {} for a_field in self.lst_fields}
+            self.dict_hashes = {}
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def save(self):
+        """Saves the projection to a temporary file, which is then moved into place, so an
+        interruption never leaves half a file."""
+        os.makedirs(os.path.dirname(self.fullpath_projection), exist_ok=True)
+        dict_to_save = {self.__key_fields: self.lst_fields,
+                        self.__key_columns: self.dict_columns,
+                        self.__key_hashes: self.dict_hashes}
+        fullpath_tmp = self.fullpath_projection + '.tmp'
+        with open(fullpath_tmp, mode='wb') as projection_file:
+            pickle.dump(dict_to_save, projection_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(fullpath_tmp, self.fullpath_projection)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def upsert(self, vid_id, dict_vid, str_hash):
+        """Extracts the fields of the projection from the data of a video (as stored in the SimpleDS)
+        and adds them to the projection, replacing whatever was there for this video."""
+        dict_vid_json_schema = my_globals.dict_vids_from_website_schema
+        for a_field in self.lst_fields:
+            self.dict_columns[a_field][vid_id] = \
+                recursiveExtractFieldFromHierarchy(dict_vid, dict_vid_json_schema[a_field].copy())
+        self.dict_hashes[vid_id] = str_hash
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def update_hash(self, vid_id, str_hash):
+        """For when the hash of a video in the SimpleDS is replaced but its data isn't, so there
+        is nothing to re-extract. Videos not in the projection are left alone."""
+        if vid_id in self.dict_hashes:
+            self.dict_hashes[vid_id] = str_hash
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def remove(self, vid_id):
+        if self.dict_hashes.pop(vid_id, None) is None:
+            return
+        for a_field in self.lst_fields:
+            self.dict_columns[a_field].pop(vid_id, None)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def sync_with_simpleds(self, web_vids_ds):
+        """Makes the projection match the SimpleDS of website videos given (already loaded):
+        videos that are not in the SimpleDS any more are removed, and videos that are new, or whose
+        hash in the SimpleDS is not the one in the projection, are (re)extracted from their JSON.
+        Returns the number of videos that were added, refreshed or removed (0 means the projection
+        was already up to date, so there is no need to save it.)"""
+        dict_ds_hashes = web_vids_ds.df[SimpleDS.ds_field_hash].to_dict()
+        lst_to_remove = [vid_id for vid_id in self.dict_hashes if vid_id not in dict_ds_hashes]
+        for vid_id in lst_to_remove:
+            self.remove(vid_id)
+        lst_to_refresh = [vid_id for vid_id, str_hash in dict_ds_hashes.items()
+                          if self.dict_hashes.get(vid_id) != str_hash]
+        for vid_id in lst_to_refresh:
+            self.upsert(vid_id, web_vids_ds.fetch_data(vid_id), dict_ds_hashes[vid_id])
+        if lst_to_remove or lst_to_refresh:
+            logging.info('Website videos projection synchronised with the SimpleDS. Videos (re)extracted: ' +
+                         str(len(lst_to_refresh)) + '. Videos removed: ' + str(len(lst_to_remove)))
+        return len(lst_to_remove) + len(lst_to_refresh)
+
+    # ------------------------ END FUNCTION ------------------------ #
+
+    def fetch_fields_as_list_of_dicts(self, lst_vid_ids, lst_fields):
+        """Returns a list with one dictionary per video ID given (in the same order) with the
+        fields requested for that video."""
+        lst_columns = [(a_field, self.dict_columns[a_field]) for a_field in lst_fields]
+        return [{a_field: dict_column[vid_id] for a_field, dict_column in lst_columns} for vid_id in lst_vid_ids]
+    # ------------------------ END FUNCTION ------------------------ #
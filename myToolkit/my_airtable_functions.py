@@ -85,6 +85,11 @@ def update_a_field_deltas_only(str_table_to_update,  # noqa: C901
     # and : 'in update but not in AirT'
     dict_log_of_changes_if_list = {}
 
+    # the updates are not pushed one at a time as they are found, they are collected
+    # here (item, Airtable ID of the record, fields to update) and pushed in batches
+    # once all of the items have been looked at.
+    lst_pending_updates = []
+
     # now for each row check to see if an update is necessary, and
     # if so, push the updated list of subjects
     logging.debug('Looping through rows to check if an update is necessary, and if so pushing the update')
@@ -148,13 +153,7 @@ def update_a_field_deltas_only(str_table_to_update,  # noqa: C901
                 # if this is a trial run.
                 num_items_would_have_updated += 1
                 if not only_a_trial_run:
-                    logging.debug('Pushing updated record to Airtable')
-                    airT.update(strRecordID, dictFieldsToUpdate, typecast=True)
-                    num_items_updated_for_realz += 1
-                    # The Airtable API accepts a maximum of 5 requests per second,
-                    # so we take a little pause here to make sure we are abiding
-                    # by that
-                    time.sleep(.2)
+                    lst_pending_updates.append((anItem, strRecordID, dictFieldsToUpdate))
             else:
                 logging.error("I don't think this code should ever be reached. Program terminating.")
                 exit(0)
@@ -162,6 +161,18 @@ def update_a_field_deltas_only(str_table_to_update,  # noqa: C901
             num_items_not_found_in_airT += 1
         percentTracker += 1
 
+    if lst_pending_updates:
+        logging.info('Pushing ' + str(len(lst_pending_updates)) + ' updated records to Airtable (in batches)')
+        lst_results = airT.batch_update_with_results([(strRecordID, dictFieldsToUpdate)
+                                                      for _, strRecordID, dictFieldsToUpdate in lst_pending_updates],
+                                                     typecast=True)
+        for (anItem, _, _), (pushed_record, e) in zip(lst_pending_updates, lst_results):
+            if pushed_record:
+                num_items_updated_for_realz += 1
+            else:
+                logging.error('Unable to update the ' + strFieldToBeUpdated + ' field of Airtable record for: '
+                              + anItem + ' The Exception was: ' + repr(e))
+
     logging.info('\n\nTotal items:         ' + str(num_items_total))
     if only_a_trial_run:
         logging.info('Would have been pushed if run for realz: ' + str(num_items_would_have_updated))
@@ -318,8 +329,22 @@ def find_website_ppl_not_in_airtable(do_fresh_pull_of_airtable=False):
 # ------------------------ END FUNCTION ------------------------ #
 
 
+def load_airtable_guests_by_name():
+    """Loads (from disk) the most recent dictionary of guests from Airtable, ordered by name."""
+    logging.debug('Loading a dictionary of guests from Aritable ordered by name')
+    list_of_guest_airtable_fields = my_globals.lst_fields_airT_tbl_guests
+    local_airt_data = AirtTableSubsetOnDisk(my_globals.str_dir4_airt_ondisk_guests_by_name,
+                                            my_globals.str_name_of_airt_guests_table,
+                                            list_of_guest_airtable_fields,
+                                            list_of_guest_airtable_fields[my_globals.idx_fields_airT_tbl_guests_name])
+    return local_airt_data.load_data()
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
 def convert_ppl_names2another_airtable_field(str_a_listing_of_persons_to_search,
-                                             idx_of_field_airT_tbl_guests):
+                                             idx_of_field_airT_tbl_guests, dict_with_airtable_guests=None):
     """This function receives a string. The string represents a
     listing of people (not a python list).
     The function checks if these people are known in Airtable.
@@ -332,18 +357,17 @@ def convert_ppl_names2another_airtable_field(str_a_listing_of_persons_to_search,
      2) An entry where the key is 'Not found'
         The associated value of this entry is a string with
         the names of people that were not found in airtable.
+     The dictionary of guests from Airtable is loaded from disk on every call, unless
+     it is passed to the function (see load_airtable_guests_by_name), which callers
+     that convert many listings in a row should do.
      """
     logging.debug('Starting function to convert people names into a different field from the '
                   'same Airtable row')
     # load the most recent Airtable guest dictionary
-    # ordered by name.
-    logging.debug('Loading a dictionary of guests from Aritable ordered by name')
-    list_of_guest_airtable_fields = my_globals.lst_fields_airT_tbl_guests
-    local_airt_data = AirtTableSubsetOnDisk(my_globals.str_dir4_airt_ondisk_guests_by_name,
-                                            my_globals.str_name_of_airt_guests_table,
-                                            list_of_guest_airtable_fields,
-                                            list_of_guest_airtable_fields[my_globals.idx_fields_airT_tbl_guests_name])
-    dictWithAirtableGuests = local_airt_data.load_data()
+    # ordered by name (unless it was given.)
+    dictWithAirtableGuests = dict_with_airtable_guests
+    if dictWithAirtableGuests is None:
+        dictWithAirtableGuests = load_airtable_guests_by_name()
     lst_names_can_be_ignored = my_globals.odd_strings_in_website_persons_fields
     # split up the string of people featured
     # in the video into a python list using a function
@@ -520,6 +544,13 @@ def push_vids(str_table_name, dict_airt_vid_data, only_a_trial_run=True):  # noq
     if not only_a_trial_run:
         airT = MyAirtWrapper(str_table_name)
 
+    # the records to update and to create are not pushed one at a time, they are
+    # collected in these lists as the videos are looked at, and then pushed in batches.
+    # (the website ID of the video is kept with each record, so that the result of
+    # pushing each record can be attributed to its video.)
+    lst_pending_updates = []
+    lst_pending_inserts = []
+
     # now we iterate through the datastructure, and process each row and
     # its respective file on disk
     int_length_airt_vids_DS = len(airt_vids_DS)
@@ -530,7 +561,6 @@ def push_vids(str_table_name, dict_airt_vid_data, only_a_trial_run=True):  # noq
         # didn't need either updating or adding.
         vid_tagged_for_uploading = False
 
-        pushed_record = {}
         # check if the video is in airtable
         if vid_id in dict_airt_vid_data:
             lst_vid_fields_from_airt = dict_airt_vid_data[vid_id].copy()
@@ -558,22 +588,7 @@ def push_vids(str_table_name, dict_airt_vid_data, only_a_trial_run=True):  # noq
                 if vid_id == website_vid_id_stored_in_airt and \
                         vid_id == dict_vid_data_in_DS['ID on RV website']:
                     if not only_a_trial_run:
-                        try:
-                            pushed_record = airT.update(airt_vid_id, dict_vid_data_in_DS, typecast=True)
-                        except Exception as e:
-                            logging.error('Unable to update airtable record for vid: '
-                                          + vid_id + ' The Exception was: ' + repr(e))
-                        if pushed_record:
-                            num_items_forrealz_pushed_update += 1
-                            if vid_was_tagged_for_repush:
-                                # if the video had been tagged for re-push
-                                # it has now been re-pushed, so the tag
-                                # should be cleared.
-                                airt_vids_DS.tag_remove(vid_id, str_vid_tagged_for_repush)
-                            # The Airtable API accepts a maximum of 5 requests per second,
-                            # so we take a little pause here to make sure we are abiding
-                            # by that
-                            time.sleep(.2)
+                        lst_pending_updates.append((vid_id, airt_vid_id, dict_vid_data_in_DS))
                     else:
                         num_items_trial_pushed_update += 1
                 else:
@@ -591,18 +606,7 @@ def push_vids(str_table_name, dict_airt_vid_data, only_a_trial_run=True):  # noq
             # be pushed.
             vid_tagged_for_uploading = True
             if not only_a_trial_run:
-                dict_vid_data_in_DS = airt_vids_DS.fetch_data(vid_id)
-                try:
-                    pushed_record = airT.insert(dict_vid_data_in_DS, typecast=True)
-                except Exception as e:
-                    logging.error('Unable to create airtable record for vid: '
-                                  + vid_id + ' The Exception was: ' + repr(e))
-                if pushed_record:
-                    num_items_forrealz_pushed_new += 1
-                    # The Airtable API accepts a maximum of 5 requests per second,
-                    # so we take a little pause here to make sure we are abiding
-                    # by that
-                    time.sleep(.2)
+                lst_pending_inserts.append((vid_id, airt_vids_DS.fetch_data(vid_id)))
             else:
                 num_items_trial_pushed_new += 1
 
@@ -615,29 +619,52 @@ def push_vids(str_table_name, dict_airt_vid_data, only_a_trial_run=True):  # noq
         percent_tracker.update_progress(num_items_total,
                                         str_description_to_include_in_logging='pushing video records to Airtable')
 
+    # now push the updates and the new records, in batches. Each record's result is checked
+    # on its own, so a video whose record could not be pushed keeps its 're-push' tag
+    # (and will be tried again next time) even if the rest of its batch was pushed.
+    if lst_pending_updates:
+        logging.info('Pushing ' + str(len(lst_pending_updates)) + ' updated video records to Airtable')
+        lst_results = airT.batch_update_with_results([(airt_vid_id, dict_vid_data_in_DS)
+                                                      for _, airt_vid_id, dict_vid_data_in_DS in lst_pending_updates],
+                                                     typecast=True)
+        for (vid_id, _, _), (pushed_record, e) in zip(lst_pending_updates, lst_results):
+            if pushed_record:
+                num_items_forrealz_pushed_update += 1
+                # the video had been tagged for re-push, and it has now
+                # been re-pushed, so the tag should be cleared.
+                airt_vids_DS.tag_remove(vid_id, str_vid_tagged_for_repush)
+            else:
+                logging.error('Unable to update airtable record for vid: '
+                              + vid_id + ' The Exception was: ' + repr(e))
+    if lst_pending_inserts:
+        logging.info('Pushing ' + str(len(lst_pending_inserts)) + ' new video records to Airtable')
+        lst_results = airT.batch_insert_with_results([dict_vid_data_in_DS
+                                                      for _, dict_vid_data_in_DS in lst_pending_inserts],
+                                                     typecast=True)
+        for (vid_id, _), (pushed_record, e) in zip(lst_pending_inserts, lst_results):
+            if pushed_record:
+                num_items_forrealz_pushed_new += 1
+            else:
+                logging.error('Unable to create airtable record for vid: '
+                              + vid_id + ' The Exception was: ' + repr(e))
+
     # now we find out if any records need to be deleted from Airtable
     set_vids_in_local_airtable_ds = airt_vids_DS.fetch_all_ids_as_python_set()
     set_vids_in_airtable = set(dict_airt_vid_data.keys())
-    set_vids_removed_at_source = set_vids_in_airtable - set_vids_in_local_airtable_ds
-    for entry in set_vids_removed_at_source:
-        if not only_a_trial_run:
-            try:
-                # I believe the method below returns the deleted record. I used to store this
-                # in a variable in case we needed it at some point, but pylama complained
-                # about the variable not being used, so I've removed that.
-                airT.delete(dict_airt_vid_data[entry][idx_vid_airt_id])
+    lst_vids_removed_at_source = sorted(set_vids_in_airtable - set_vids_in_local_airtable_ds)
+    if not only_a_trial_run:
+        lst_results = airT.batch_delete_with_results([dict_airt_vid_data[entry][idx_vid_airt_id]
+                                                      for entry in lst_vids_removed_at_source])
+        for entry, (deleted_record, e) in zip(lst_vids_removed_at_source, lst_results):
+            if deleted_record:
                 num_items_forrealz_deleted += 1
                 num_items_not_touched -= 1
-                # The Airtable API accepts a maximum of 5 requests per second,
-                # so we take a little pause here to make sure we are abiding
-                # by that
-                time.sleep(.2)
-            except Exception as e:
+            else:
                 logging.error('Unable to DELETE airtable record for vid (RV website ID): '
                               + entry + ' The Exception was: ' + repr(e))
-        else:
-            num_items_trial_deleted += 1
-            num_items_not_touched -= 1
+    else:
+        num_items_trial_deleted += len(lst_vids_removed_at_source)
+        num_items_not_touched -= len(lst_vids_removed_at_source)
 
     airt_vids_DS.save2disk()
     end_time = time.time()
@@ -0,0 +1,427 @@
+import logging
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+import my_globals
+from class_simpleDS import SimpleDS
+from class_rv_website_json_vid import RVwebsiteVid
+from class_rv_website_json_pub import RVwebsitePublication
+from class_myalgolia_unit import AlgoliaDataUnit
+from class_trancript import Transcript
+from my_airtable_functions import convert_ppl_names2another_airtable_field, load_airtable_guests_by_name
+from my_rv_website_functions import extractIDstringFromURLstring
+from my_data_manip_functions import load_website_vids_projection_in_sync
+from my_building_blocks import make_sha256_hash
+
+# The functions in this file make the dictionaries of fields that the Algolia units (see AlgoliaDataUnit)
+# of videos and publications are created, or updated, with. There are two ways of doing it:
+# - one record at a time ('make_algolia_fields_of_one_video' and 'make_algolia_fields_of_one_publication'.)
+# This is the way it was always done: for every video, its data is fetched from each of the SimpleDS
+# instances it comes from, one by one (and, for videos, the Airtable guests are loaded from disk twice.)
+# - all the records in one go ('make_algolia_fields_of_all_videos' and 'make_algolia_fields_of_all_publications'.)
+# The data needed is read from each source once (the website videos from their projection, which only
+# reads the videos that changed, the hashes of the transcripts from the index of their SimpleDS, etc.),
+# put in a pandas dataframe per source, joined by ID, and the dictionaries are made from the result.
+# Both ways give exactly the same dictionaries (the benchmark in One-Off-Scripts checks this.)
+
+
+def make_algolia_fields_of_one_video(webvid_id, web_vids_ds, other_info_vids_ds, transcripts_ds,  # noqa: C901
+                                     dict_shows_from_website):
+    """Returns the dictionary of fields for the Algolia unit of a video, gathering its data from the
+    SimpleDS instances given (all loaded already.)"""
+    dct_for_updating_algolia_unit = {}
+    # we're not going to do any detection method to see if things have changed
+    # upstream. We are simply going to update all records always.
+    rv_web_vid = RVwebsiteVid(web_vids_ds.fetch_data(webvid_id))
+
+    # first we populate the dictionary with values that are very straightforward to retrieve.
+    # populate the objectID. Algolia requires this field, and if not provided, it
+    # autogenerates it. It makes sense to use the same video ID as from the RV website.
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_id] = rv_web_vid.str_id
+    # populate the Title field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_title] = rv_web_vid.str_title
+    # populate the Type field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_type] = rv_web_vid.str_type
+    # populate the Description field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_description] = rv_web_vid.str_description
+    # populate the Thumbnail URL field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_thumbnail] = rv_web_vid.str_url_thumbnail
+    # populate the Likes field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_likes] = rv_web_vid.int_likes_count
+    # populate the Dislikes field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_dislikes] = rv_web_vid.int_dislikes_count
+    # populate the Published On field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon] = rv_web_vid.int_published_on
+    # populate the Duration field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_duration] = rv_web_vid.int_duration
+    # populate the Product field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_productid] = rv_web_vid.str_product_id
+
+    # next we populate values that are less straightforward to retrieve
+
+    # populate the Published On field in human read-able format
+    formatted_date_publishedon = (datetime.fromtimestamp(rv_web_vid.int_published_on / 1000)).strftime("%Y-%m-%d")
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon_readable] = formatted_date_publishedon
+
+    # populate the Featuring field. This field needs to be converted from a string
+    # to a list of names.
+    # IMPORTANT NOTE. I'M RE-USING A FUNCTION FROM AIRTABLE FUNCTIONS HERE. So if
+    # you ever stop using the Airtable functionality, it will still be required for
+    # this part of the code, unless you change it.
+    # we can easily access the names of the guests in the video,
+    # but just as a string. We want to convert
+    # them into a python list, and with some checks done like removing of pre-fixes.
+    str_of_names = rv_web_vid.str_featuring_raw
+    # we call a function that converts the names to whatever
+    # field we request. Normally we would convert to the ID of the guest,
+    # but in this case we convert to the simple name (no prefixes or suffixes)
+    # as it exists in Airtable. The function
+    # returns a dictionary with an entry for the people it found
+    # and with a string for the people it didn't find.
+    dictSearchedAndConverted = \
+        convert_ppl_names2another_airtable_field(
+            str_of_names, my_globals.idx_fields_airT_tbl_guests_name)
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_featuring] = \
+        dictSearchedAndConverted[my_globals.str_to_use_if_something_has_been_found]
+
+    # populate the interviewers field
+    str_of_interviewers = rv_web_vid.str_interviewer_raw
+    # do the same as above for the featuring field, but now for the interviewers field
+    dictSearchedAndConverted = \
+        convert_ppl_names2another_airtable_field(
+            str_of_interviewers, my_globals.idx_fields_airT_tbl_guests_name)
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_interviewer] = \
+        dictSearchedAndConverted[my_globals.str_to_use_if_something_has_been_found]
+
+    # populate the Human Tags field. This is a combination of fields
+    # from the website comprising tags, topics, and assets
+    # we convert to a set, and then back to a list in order to remove possible duplicates
+    set_tags = set(rv_web_vid.lst_tag_names + rv_web_vid.lst_asset_names + rv_web_vid.lst_topic_names)
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tags] = list(set_tags)
+
+    # populate the Show field
+    # first we need to extract the show ID from the URL that we get from the raw data
+    website_show_id = extractIDstringFromURLstring(rv_web_vid.str_url_show)
+    # we now need use a dictionary of SHOWs (pre-loaded before the beginning of the loop)
+    # to convert the ID to the name.
+    show_name = ''
+    if website_show_id:
+        show_name = dict_shows_from_website[website_show_id][0]
+        # the zero above is due to the fact that this function
+        # the dictionary's keys are "show IDs",
+        # and the corresponding data to each key is a list. In
+        # the [0] position of the list is the show's name, which
+        # is what we are looking for.
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_show] = show_name
+
+    # populate the video url field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_vidurl] = \
+        'https://www.realvision.com/tv/videos/id/' + webvid_id
+
+    # populate the tier field
+    product_vid_belongs_to = rv_web_vid.str_product_id
+    rv_tier = my_globals.dict_product_mapping_to_tiers[product_vid_belongs_to]
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tiers] = rv_tier
+
+    # populate the number of comments field
+    # First we check if the video currently being processed already
+    # exists in the datastructure that store 'other video info'. If it doesn't, we simply
+    # don't populate this field
+    if webvid_id in other_info_vids_ds:
+        dict_other_info = other_info_vids_ds.fetch_data(webvid_id)
+        if my_globals.str_vid_comments in dict_other_info:
+            dict_comments_info = dict_other_info[my_globals.str_vid_comments]
+            dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_numcomments] = \
+                dict_comments_info[my_globals.str_vid_comments_num_total]
+
+    # both of the following fields depend on the video existing in the
+    # SimpleDS that tracks transcript metadata, so we only check once if
+    # the video is in that SimpleDS
+    if webvid_id in transcripts_ds:
+        # populate the transcript field
+        # IMPORTANT NOTE. We do not store the whole transcript in the Algolia unit
+        # the idea is that we will only push the transcript at PUSH time
+        # in the Algolia unit, we will only store the hash of the transcript
+        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_transcript] = \
+            transcripts_ds.fetch_hash(webvid_id)
+
+        # populate the pseudo-transcript field
+        # IMPORTANT NOTE. We do not store the whole pseudo-transcript in the Algolia unit
+        # the idea is that we will only push the transcript at PUSH time
+        # in the Algolia unit, we will only store the hash of the pseudo-transcript
+        transcript = Transcript(webvid_id)
+        transcript.set_transcript_directory(my_globals.str_dir4_vid_transcripts_data)
+        transcript.load_transcript_object_from_dictionary(transcripts_ds.fetch_data(webvid_id))
+        str_hash_pseudotranscript = make_hash_of_pseudotext(transcript)
+        if str_hash_pseudotranscript:
+            dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_pseudotranscript] = str_hash_pseudotranscript
+    return dct_for_updating_algolia_unit
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_algolia_fields_of_one_publication(web_pub_id, web_pubs_ds, pubs_texts_ds):
+    """Returns the dictionary of fields for the Algolia unit of a publication, gathering its data from the
+    SimpleDS instances given (all loaded already.)"""
+    dct_for_updating_algolia_unit = {}
+    # we're not going to do any detection method to see if things have changed
+    # upstream. We are simply going to update all records always.
+    rv_web_pub_obj = RVwebsitePublication(web_pubs_ds.fetch_data(web_pub_id))
+
+    # first we populate the dictionary with values that are very straightforward to retrieve.
+
+    # populate the objectID. Algolia requires this field, and if not provided, it
+    # autogenerates it. It makes sense to use the same publication ID as from the RV website.
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_id] = rv_web_pub_obj.str_id
+    # populate the Title field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_title] = rv_web_pub_obj.str_title
+    # populate the Type field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_type] = rv_web_pub_obj.str_type
+    # populate the Description field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_description] = rv_web_pub_obj.str_summary
+    # populate the Thumbnail URL field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_thumbnail] = rv_web_pub_obj.str_url_thumbnail
+    # populate the Likes field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_likes] = rv_web_pub_obj.int_likes_count
+    # populate the Dislikes field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_dislikes] = rv_web_pub_obj.int_dislikes_count
+    # populate the Dislikes field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_numpages] = rv_web_pub_obj.int_page_count
+    # populate the Published On field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon] = rv_web_pub_obj.int_published_on
+    # populate the ProductID
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_productid] = rv_web_pub_obj.str_product_id
+
+    # next we populate values that are less straightforward to retrieve
+
+    # populate the Published On field in human read-able format
+    formatted_date_publishedon = (datetime.fromtimestamp(rv_web_pub_obj.int_published_on / 1000)).strftime(
+        "%Y-%m-%d")
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon_readable] = formatted_date_publishedon
+
+    # populate the Human Tags field. This is a combination of fields
+    # from the website comprising tags, topics, and assets
+    lst_tags = rv_web_pub_obj.lst_asset_names + rv_web_pub_obj.lst_topic_names
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tags] = lst_tags
+
+    # populate the publication url field
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_vidurl] = \
+        'https://www.realvision.com/issues/id/' + web_pub_id
+
+    # populate the tier field
+    product_pub_belongs_to = rv_web_pub_obj.str_product_id
+    rv_tier = my_globals.dict_product_mapping_to_tiers[product_pub_belongs_to]
+    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tiers] = rv_tier
+
+    # both of the following fields depend on the publication existing in the
+    # SimpleDS that tracks fulltext metadata, so we only check once if
+    # the publication is in that SimpleDS
+    if web_pub_id in pubs_texts_ds:
+        # populate the fulltext field
+        # IMPORTANT NOTE. We do not store the whole fulltext in the Algolia unit
+        # the idea is that we will only push the fulltext at PUSH time.
+        # in the Algolia unit, we will only store the hash of the fulltext
+        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_transcript] = \
+            pubs_texts_ds.fetch_hash(web_pub_id)
+
+        # populate the pseudo-text field
+        # IMPORTANT NOTE. We do not store the whole pseudo-text in the Algolia unit
+        # the idea is that we will only push the fulltext at PUSH time
+        # in the Algolia unit, we will only store the hash of the pseudo-text
+        fulltext = Transcript(web_pub_id)
+        fulltext.set_transcript_directory(my_globals.str_dir4_pubs_fulltext_data)
+        fulltext.load_transcript_object_from_dictionary(pubs_texts_ds.fetch_data(web_pub_id))
+        str_hash_pseudotext = make_hash_of_pseudotext(fulltext)
+        if str_hash_pseudotext:
+            dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_pseudotranscript] = str_hash_pseudotext
+    return dct_for_updating_algolia_unit
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_hash_of_pseudotext(transcript):
+    """Receives a Transcript object (with its metadata loaded) and returns the hash of its pseudo-text
+    as stored in the Algolia units, or an empty string if it doesn't have one (or it is empty.)"""
+    if transcript.is_pseudotranscript_filename_populated():
+        pt = transcript.get_pseudotranscript_from_disk()
+        if pt:
+            return make_sha256_hash(pt, sort_characters=False)
+    return ''
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_algolia_fields_of_all_videos(web_vids_ds, other_info_vids_ds, transcripts_ds, dict_shows_from_website):
+    """Returns a dictionary of {video ID: dictionary of fields for its Algolia unit} for all the videos
+    in the SimpleDS of website videos given, with the same dictionaries 'make_algolia_fields_of_one_video'
+    makes, but built in bulk (all the SimpleDS instances given must be loaded already.)"""
+    lst_vid_ids = web_vids_ds.df[SimpleDS.ds_field_dataid].tolist()
+    if not lst_vid_ids:
+        return {}
+
+    # the website videos, as the attributes RVwebsiteVid would give them, from the projection
+    # (only the videos that changed since it was last saved are read from disk.)
+    dict_mapping = my_globals.dict_mapping_rv_web_vid_json_2_rv_webvidclass_attrib
+    web_vids_projection = load_website_vids_projection_in_sync(web_vids_ds)
+    lst_fields = [a_field for a_field in dict_mapping if web_vids_projection.has_fields([a_field])]
+    df_vids = pd.DataFrame(web_vids_projection.fetch_fields_as_list_of_dicts(lst_vid_ids, lst_fields),
+                           index=lst_vid_ids, dtype=object).rename(columns=dict_mapping)
+    fill_empty_values_like_the_class(df_vids, RVwebsiteVid({}))
+
+    # the people in the featuring and interviewer fields. The Airtable guests are loaded once, and
+    # each distinct listing of people is converted once.
+    dict_airtable_guests = load_airtable_guests_by_name()
+    dict_people_converted = {}
+    for str_of_names in set(df_vids['str_featuring_raw']).union(df_vids['str_interviewer_raw']):
+        dict_people_converted[str_of_names] = convert_ppl_names2another_airtable_field(
+            str_of_names, my_globals.idx_fields_airT_tbl_guests_name,
+            dict_with_airtable_guests=dict_airtable_guests)[my_globals.str_to_use_if_something_has_been_found]
+
+    # the number of comments, from the SimpleDS with other info about the videos
+    dict_num_comments = {}
+    for webvid_id in other_info_vids_ds.df.index.intersection(df_vids.index):
+        dict_other_info = other_info_vids_ds.fetch_data(webvid_id)
+        if my_globals.str_vid_comments in dict_other_info:
+            dict_num_comments[webvid_id] = \
+                dict_other_info[my_globals.str_vid_comments][my_globals.str_vid_comments_num_total]
+
+    df_fields = make_df_of_common_algolia_fields(df_vids, 'https://www.realvision.com/tv/videos/id/')
+    df_fields[AlgoliaDataUnit.fieldname_description] = df_vids['str_description']
+    df_fields[AlgoliaDataUnit.fieldname_duration] = df_vids['int_duration']
+    df_fields[AlgoliaDataUnit.fieldname_featuring] = \
+        [list(dict_people_converted[str_of_names]) for str_of_names in df_vids['str_featuring_raw']]
+    df_fields[AlgoliaDataUnit.fieldname_interviewer] = \
+        [list(dict_people_converted[str_of_names]) for str_of_names in df_vids['str_interviewer_raw']]
+    df_fields[AlgoliaDataUnit.fieldname_tags] = \
+        [list(set(lst_tag_names + lst_asset_names + lst_topic_names)) for lst_tag_names, lst_asset_names,
+         lst_topic_names in zip(df_vids['lst_tag_names'], df_vids['lst_asset_names'], df_vids['lst_topic_names'])]
+    # the show ID is at the end of the URL of the show, and it is converted to the name of the show
+    df_fields[AlgoliaDataUnit.fieldname_show] = \
+        df_vids['str_url_show'].map(extractIDstringFromURLstring).map(
+            lambda website_show_id: dict_shows_from_website[website_show_id][0] if website_show_id else '')
+
+    # the fields in the same order they are put in the dictionary one video at a time
+    lst_columns_in_order = [AlgoliaDataUnit.fieldname_id, AlgoliaDataUnit.fieldname_title,
+                            AlgoliaDataUnit.fieldname_type, AlgoliaDataUnit.fieldname_description,
+                            AlgoliaDataUnit.fieldname_thumbnail, AlgoliaDataUnit.fieldname_likes,
+                            AlgoliaDataUnit.fieldname_dislikes, AlgoliaDataUnit.fieldname_publishedon,
+                            AlgoliaDataUnit.fieldname_duration, AlgoliaDataUnit.fieldname_productid,
+                            AlgoliaDataUnit.fieldname_publishedon_readable, AlgoliaDataUnit.fieldname_featuring,
+                            AlgoliaDataUnit.fieldname_interviewer, AlgoliaDataUnit.fieldname_tags,
+                            AlgoliaDataUnit.fieldname_show, AlgoliaDataUnit.fieldname_vidurl,
+                            AlgoliaDataUnit.fieldname_tiers]
+    dict_fields_of_vids = df_fields[lst_columns_in_order].to_dict(orient='index')
+    for webvid_id, num_comments in dict_num_comments.items():
+        dict_fields_of_vids[webvid_id][AlgoliaDataUnit.fieldname_numcomments] = num_comments
+    add_text_hashes_to_algolia_fields(dict_fields_of_vids, transcripts_ds, my_globals.str_dir4_vid_transcripts_data)
+    return dict_fields_of_vids
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_algolia_fields_of_all_publications(web_pubs_ds, pubs_texts_ds):
+    """Returns a dictionary of {publication ID: dictionary of fields for its Algolia unit} for all the
+    publications in the SimpleDS of website publications given, with the same dictionaries
+    'make_algolia_fields_of_one_publication' makes, but built in bulk (the SimpleDS instances given
+    must be loaded already.)"""
+    lst_pub_ids = web_pubs_ds.df[SimpleDS.ds_field_dataid].tolist()
+    if not lst_pub_ids:
+        return {}
+
+    # there is no projection of the publications (there are few of them) so they are read in one pass
+    df_pubs = pd.DataFrame([vars(RVwebsitePublication(web_pubs_ds.fetch_data(web_pub_id)))
+                            for web_pub_id in lst_pub_ids], index=lst_pub_ids, dtype=object)
+
+    df_fields = make_df_of_common_algolia_fields(df_pubs, 'https://www.realvision.com/issues/id/')
+    df_fields[AlgoliaDataUnit.fieldname_description] = df_pubs['str_summary']
+    df_fields[AlgoliaDataUnit.fieldname_numpages] = df_pubs['int_page_count']
+    df_fields[AlgoliaDataUnit.fieldname_tags] = \
+        [lst_asset_names + lst_topic_names for lst_asset_names, lst_topic_names in
+         zip(df_pubs['lst_asset_names'], df_pubs['lst_topic_names'])]
+
+    # the fields in the same order they are put in the dictionary one publication at a time
+    lst_columns_in_order = [AlgoliaDataUnit.fieldname_id, AlgoliaDataUnit.fieldname_title,
+                            AlgoliaDataUnit.fieldname_type, AlgoliaDataUnit.fieldname_description,
+                            AlgoliaDataUnit.fieldname_thumbnail, AlgoliaDataUnit.fieldname_likes,
+                            AlgoliaDataUnit.fieldname_dislikes, AlgoliaDataUnit.fieldname_numpages,
+                            AlgoliaDataUnit.fieldname_publishedon, AlgoliaDataUnit.fieldname_productid,
+                            AlgoliaDataUnit.fieldname_publishedon_readable, AlgoliaDataUnit.fieldname_tags,
+                            AlgoliaDataUnit.fieldname_vidurl, AlgoliaDataUnit.fieldname_tiers]
+    dict_fields_of_pubs = df_fields[lst_columns_in_order].to_dict(orient='index')
+    add_text_hashes_to_algolia_fields(dict_fields_of_pubs, pubs_texts_ds, my_globals.str_dir4_pubs_fulltext_data)
+    return dict_fields_of_pubs
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def fill_empty_values_like_the_class(df_records, empty_object):
+    """The classes of videos and publications from the website leave an attribute with its default
+    value (the one of an object made from no data) when the value in the data is empty, or missing.
+    This does the same to the columns of a dataframe (named after the attributes.)"""
+    for a_column in df_records.columns:
+        default_value = getattr(empty_object, a_column)
+        if type(default_value) is list:
+            # every record gets a list of its own
+            df_records[a_column] = [a_value if a_value else [] for a_value in df_records[a_column]]
+        else:
+            df_records[a_column] = df_records[a_column].where(df_records[a_column].map(bool), default_value)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_df_of_common_algolia_fields(df_records, str_url_before_id):
+    """Makes a dataframe (with the same index as the one given, which has a column per attribute of the
+    videos or publications) with the Algolia fields that are made in the same way for both."""
+    df_fields = pd.DataFrame(index=df_records.index, dtype=object)
+    df_fields[AlgoliaDataUnit.fieldname_id] = df_records['str_id']
+    df_fields[AlgoliaDataUnit.fieldname_title] = df_records['str_title']
+    df_fields[AlgoliaDataUnit.fieldname_type] = df_records['str_type']
+    df_fields[AlgoliaDataUnit.fieldname_thumbnail] = df_records['str_url_thumbnail']
+    df_fields[AlgoliaDataUnit.fieldname_likes] = df_records['int_likes_count']
+    df_fields[AlgoliaDataUnit.fieldname_dislikes] = df_records['int_dislikes_count']
+    df_fields[AlgoliaDataUnit.fieldname_publishedon] = df_records['int_published_on']
+    df_fields[AlgoliaDataUnit.fieldname_productid] = df_records['str_product_id']
+    # many records are published on the same day, so each distinct timestamp is formatted once
+    df_fields[AlgoliaDataUnit.fieldname_publishedon_readable] = df_records['int_published_on'].map(
+        {int_published_on: datetime.fromtimestamp(int_published_on / 1000).strftime("%Y-%m-%d")
+         for int_published_on in set(df_records['int_published_on'])})
+    df_fields[AlgoliaDataUnit.fieldname_vidurl] = [str_url_before_id + an_id for an_id in df_records.index]
+    df_fields[AlgoliaDataUnit.fieldname_tiers] = df_records['str_product_id'].map(
+        lambda product_id: my_globals.dict_product_mapping_to_tiers[product_id])
+    return df_fields.astype(object)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def add_text_hashes_to_algolia_fields(dict_fields_of_records, texts_ds, path_to_texts_data):
+    """Adds the hash of the full text (transcript) and of the pseudo-text of every record that is in the
+    SimpleDS of texts given to its dictionary of fields. The hashes of the full texts come straight
+    from the index of the SimpleDS. The pseudo-texts have to be read from disk (and hashed), which is
+    done by a few threads at the same time, as most of the time is spent waiting for the disk."""
+    idx_ids_with_text = texts_ds.df.index.intersection(pd.Index(list(dict_fields_of_records.keys())))
+    dict_text_hashes = texts_ds.df.loc[idx_ids_with_text, SimpleDS.ds_field_hash].to_dict()
+    # the metadata of the texts is read here (from the SimpleDS, which isn't meant to be used by many
+    # threads), and only the reading of the pseudo-texts themselves is left for the threads.
+    lst_transcripts = []
+    for text_id in idx_ids_with_text:
+        transcript = Transcript(text_id)
+        transcript.set_transcript_directory(path_to_texts_data)
+        transcript.load_transcript_object_from_dictionary(texts_ds.fetch_data(text_id))
+        lst_transcripts.append(transcript)
+    with ThreadPoolExecutor(max_workers=my_globals.int_algolia_join_threads_reading_pseudotexts) as executor:
+        lst_pseudotext_hashes = list(executor.map(make_hash_of_pseudotext, lst_transcripts))
+    for text_id, str_hash_pseudotext in zip(idx_ids_with_text, lst_pseudotext_hashes):
+        dict_fields_of_records[text_id][AlgoliaDataUnit.fieldname_transcript] = dict_text_hashes[text_id]
+        if str_hash_pseudotext:
+            dict_fields_of_records[text_id][AlgoliaDataUnit.fieldname_pseudotranscript] = str_hash_pseudotext
+    logging.info('Hashes of texts added to the fields of Algolia units: ' + str(len(lst_transcripts)))
+
+
+# ------------------------ END FUNCTION ------------------------ #
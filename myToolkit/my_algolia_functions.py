@@ -1,28 +1,30 @@
 import logging
-from datetime import datetime
 from algoliasearch.search_client import SearchClient
 import my_globals
 import my_config
 from class_simpleDS import SimpleDS
-from class_rv_website_json_vid import RVwebsiteVid
-from class_rv_website_json_pub import RVwebsitePublication
 from class_myalgolia_unit import AlgoliaDataUnit
+from class_algolia_batch_pusher import AlgoliaBatchPusher
+from class_algolia_dirty_index import make_dirty_index_of_algolia_simpleds
 from class_percent_tracker import PercentTracker
-from my_airtable_functions import convert_ppl_names2another_airtable_field
-from my_rv_website_functions import extractIDstringFromURLstring, extractFieldsFromShowsData
+from my_rv_website_functions import extractFieldsFromShowsData
 from my_building_blocks import make_now_timestamp, make_sha256_hash
-from class_trancript import Transcript
+from my_algolia_bulk_join import make_algolia_fields_of_one_video, make_algolia_fields_of_one_publication, \
+    make_algolia_fields_of_all_videos, make_algolia_fields_of_all_publications
 
 
 def push_simple_list_of_records_to_algolia(var_manager, str_index_name,
                                            list_records_to_push, trial_run=False):
     """This function loops through the set of records passed as a list, and pushes
     them to the Algolia index also passed as a parameter.
+    The records are pushed in batches (see AlgoliaBatchPusher) and a record is only
+    counted as pushed once its batch has been acknowledged by Algolia.
     The function returns the result """
 
     # setup the Algolia API
     algolia_client = SearchClient.create(my_config.algolia_app_id, my_config.algolia_admin_api_key)
     algolia_index = algolia_client.init_index(str_index_name)
+    batch_pusher = AlgoliaBatchPusher(algolia_index)
 
     int_records_pushed = 0
     int_records_push_issues = 0
@@ -39,20 +41,21 @@ def push_simple_list_of_records_to_algolia(var_manager, str_index_name,
             break
 
         if not trial_run:
-            try:
-                # push the record
-                algolia_index.partial_update_object(a_record, {'createIfNotExists': True})
-                int_records_pushed += 1
-            except Exception as e:
-                logging.warning('Exception thrown while trying to push a record to Algolia.'
-                                ' The Exception was: ' + repr(e))
-                int_records_push_issues += 1
+            # queue the record. It gets pushed along with others in a batch.
+            batch_pusher.add(a_record, len(str(a_record).encode('utf-8')))
 
         int_records_processed += 1
         percent_tracker.update_progress(int_records_processed,
                                         show_time_remaining_estimate=True,
                                         str_description_to_include_in_logging='Pushing simple records to Algolia')
 
+    # send whatever is left, and wait for Algolia to acknowledge all the batches
+    for _, exception_of_batch in batch_pusher.finish():
+        if exception_of_batch is None:
+            int_records_pushed += 1
+        else:
+            int_records_push_issues += 1
+
     logging.info('----- SUMMARY of Pushing records to Algolia SimpleDS ------')
     if trial_run:
         logging.info('ONLY A TRIAL RUN')
@@ -65,10 +68,12 @@ def push_simple_list_of_records_to_algolia(var_manager, str_index_name,
 
 def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  # noqa: C901
                                        display_name_for_logging_of_simpleds='',
-                                       trial_run=False):
+                                       trial_run=False, bool_bulk_join=True):
     """This function loops through the set of videos pulled from the Real Vision
     website (stored in an instance of SimpleDS) and adds/updates associated records
-    in the algolia instance of SimpleDS."""
+    in the algolia instance of SimpleDS.
+    The fields of the units are gathered for all the videos in one go (unless
+    bool_bulk_join is False, in which case they are gathered one video at a time.)"""
 
     int_vids_added = 0
     int_vids_updated = 0
@@ -89,6 +94,8 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
     algolia_ds = SimpleDS(path_to_algolia_simpleds, display_name_for_logging_of_simpleds)
     algolia_ds.load()
     algolia_ds.sort()
+    # and the index of its records that have changes not pushed to Algolia yet
+    dirty_index = make_dirty_index_of_algolia_simpleds(path_to_algolia_simpleds)
 
     # load the instance of SimpleDS that contains 'other info' about
     # videos, such as info about comments
@@ -112,6 +119,11 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
     # from its ID to its name
     dict_shows_from_website = extractFieldsFromShowsData()
 
+    # unless asked not to, the fields of all the videos are gathered in one go (see my_algolia_bulk_join)
+    if bool_bulk_join:
+        dict_fields_of_all_vids = make_algolia_fields_of_all_videos(web_vids_ds, other_info_vids_ds,
+                                                                    transcripts_ds, dict_shows_from_website)
+
     loop_iterations = len(web_vids_ds)
     percent_tracker = PercentTracker(loop_iterations, int_output_every_x_percent=5, log_level='info')
     for webvid_id in web_vids_ds:
@@ -122,140 +134,17 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
         if not execution_should_continue:
             break
 
-        dct_for_updating_algolia_unit = {}
-        # we're not going to do any detection method to see if things have changed
-        # upstream. We are simply going to update all records always.
-        rv_web_vid = RVwebsiteVid(web_vids_ds.fetch_data(webvid_id))
+        if bool_bulk_join:
+            dct_for_updating_algolia_unit = dict_fields_of_all_vids[webvid_id]
+        else:
+            dct_for_updating_algolia_unit = make_algolia_fields_of_one_video(webvid_id, web_vids_ds,
+                                                                             other_info_vids_ds, transcripts_ds,
+                                                                             dict_shows_from_website)
         algolia_unit = AlgoliaDataUnit()
 
-        # first we populate the dictionary with values that are very straightforward to retrieve.
-        # populate the objectID. Algolia requires this field, and if not provided, it
-        # autogenerates it. It makes sense to use the same video ID as from the RV website.
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_id] = rv_web_vid.str_id
-        # populate the Title field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_title] = rv_web_vid.str_title
-        # populate the Type field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_type] = rv_web_vid.str_type
-        # populate the Description field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_description] = rv_web_vid.str_description
-        # populate the Thumbnail URL field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_thumbnail] = rv_web_vid.str_url_thumbnail
-        # populate the Likes field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_likes] = rv_web_vid.int_likes_count
-        # populate the Dislikes field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_dislikes] = rv_web_vid.int_dislikes_count
-        # populate the Published On field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon] = rv_web_vid.int_published_on
-        # populate the Duration field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_duration] = rv_web_vid.int_duration
-        # populate the Product field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_productid] = rv_web_vid.str_product_id
-
-        # next we populate values that are less straightforward to retrieve
-
-        # populate the Published On field in human read-able format
-        formatted_date_publishedon = (datetime.fromtimestamp(rv_web_vid.int_published_on / 1000)).strftime("%Y-%m-%d")
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon_readable] = formatted_date_publishedon
-
-        # populate the Featuring field. This field needs to be converted from a string
-        # to a list of names.
-        # IMPORTANT NOTE. I'M RE-USING A FUNCTION FROM AIRTABLE FUNCTIONS HERE. So if
-        # you ever stop using the Airtable functionality, it will still be required for
-        # this part of the code, unless you change it.
-        # we can easily access the names of the guests in the video,
-        # but just as a string. We want to convert
-        # them into a python list, and with some checks done like removing of pre-fixes.
-        str_of_names = rv_web_vid.str_featuring_raw
-        # we call a function that converts the names to whatever
-        # field we request. Normally we would convert to the ID of the guest,
-        # but in this case we convert to the simple name (no prefixes or suffixes)
-        # as it exists in Airtable. The function
-        # returns a dictionary with an entry for the people it found
-        # and with a string for the people it didn't find.
-        dictSearchedAndConverted = \
-            convert_ppl_names2another_airtable_field(
-                str_of_names, my_globals.idx_fields_airT_tbl_guests_name)
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_featuring] = \
-            dictSearchedAndConverted[my_globals.str_to_use_if_something_has_been_found]
-
-        # populate the interviewers field
-        str_of_interviewers = rv_web_vid.str_interviewer_raw
-        # do the same as above for the featuring field, but now for the interviewers field
-        dictSearchedAndConverted = \
-            convert_ppl_names2another_airtable_field(
-                str_of_interviewers, my_globals.idx_fields_airT_tbl_guests_name)
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_interviewer] = \
-            dictSearchedAndConverted[my_globals.str_to_use_if_something_has_been_found]
-
-        # populate the Human Tags field. This is a combination of fields
-        # from the website comprising tags, topics, and assets
-        # we convert to a set, and then back to a list in order to remove possible duplicates
-        set_tags = set(rv_web_vid.lst_tag_names + rv_web_vid.lst_asset_names + rv_web_vid.lst_topic_names)
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tags] = list(set_tags)
-
-        # populate the Show field
-        # first we need to extract the show ID from the URL that we get from the raw data
-        website_show_id = extractIDstringFromURLstring(rv_web_vid.str_url_show)
-        # we now need use a dictionary of SHOWs (pre-loaded before the beginning of the loop)
-        # to convert the ID to the name.
-        show_name = ''
-        if website_show_id:
-            show_name = dict_shows_from_website[website_show_id][0]
-            # the zero above is due to the fact that this function
-            # the dictionary's keys are "show IDs",
-            # and the corresponding data to each key is a list. In
-            # the [0] position of the list is the show's name, which
-            # is what we are looking for.
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_show] = show_name
-
-        # populate the video url field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_vidurl] = \
-            'https://www.realvision.com/tv/videos/id/' + webvid_id
-
-        # populate the tier field
-        product_vid_belongs_to = rv_web_vid.str_product_id
-        rv_tier = my_globals.dict_product_mapping_to_tiers[product_vid_belongs_to]
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tiers] = rv_tier
-
-        # populate the number of comments field
-        # First we check if the video currently being processed already
-        # exists in the datastructure that store 'other video info'. If it doesn't, we simply
-        # don't populate this field
-        if webvid_id in other_info_vids_ds:
-            dict_other_info = other_info_vids_ds.fetch_data(webvid_id)
-            if my_globals.str_vid_comments in dict_other_info:
-                dict_comments_info = dict_other_info[my_globals.str_vid_comments]
-                dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_numcomments] = \
-                    dict_comments_info[my_globals.str_vid_comments_num_total]
-
-        # both of the following fields depend on the video existing in the
-        # SimpleDS that tracks transcript metadata, so we only check once if
-        # the video is in that SimpleDS
-        if webvid_id in transcripts_ds:
-            # populate the transcript field
-            # IMPORTANT NOTE. We do not store the whole transcript in the Algolia unit
-            # the idea is that we will only push the transcript at PUSH time
-            # in the Algolia unit, we will only store the hash of the transcript
-            dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_transcript] = \
-                transcripts_ds.fetch_hash(webvid_id)
-
-            # populate the pseudo-transcript field
-            # IMPORTANT NOTE. We do not store the whole pseudo-transcript in the Algolia unit
-            # the idea is that we will only push the transcript at PUSH time
-            # in the Algolia unit, we will only store the hash of the pseudo-transcript
-            transcript = Transcript(webvid_id)
-            transcript.set_transcript_directory(my_globals.str_dir4_vid_transcripts_data)
-            transcript.load_transcript_object_from_dictionary(transcripts_ds.fetch_data(webvid_id))
-            pseudo_transcript_exists = transcript.is_pseudotranscript_filename_populated()
-            if pseudo_transcript_exists:
-                pt = transcript.get_pseudotranscript_from_disk()
-                if pt:
-                    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_pseudotranscript] = \
-                        make_sha256_hash(pt, sort_characters=False)
-
         # now we check if this video data exists yet in the Algolia SimpleDS
         # and depending on that, we add it, or we update it.
-        vid_publishedon = rv_web_vid.int_published_on
+        vid_publishedon = dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon]
         hash_incoming_data = make_sha256_hash(dct_for_updating_algolia_unit, sort_characters=True)
         if webvid_id not in algolia_ds:
             # The simple case is if it doesn't exist yet. We add it.
@@ -265,6 +154,7 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
             if not trial_run:
                 dct_algolia_unit = algolia_unit.dump_algolia_unit_as_dict()
                 algolia_ds.add_entry(webvid_id, update_timestamp, vid_publishedon, dct_algolia_unit, hash_incoming_data)
+                dirty_index.set_dirty_fields(webvid_id, algolia_unit.fetch_fields_not_yet_pushed())
             int_vids_added += 1
         else:
             # otherwise, the video is already in the Algolia SimpleDS and may need to be updated
@@ -290,6 +180,11 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
                                                 log_changes=True)
                 else:
                     logging.debug('No changes detected by the update function of the Algolia unit class.')
+                # the dirty fields are set whenever the hashes don't match, even if there were no changes:
+                # if an earlier run wrote the unit to disk but crashed before saving the dirty index, the
+                # unit is already up to date (so there are no changes) but it was never marked as dirty.
+                if not trial_run:
+                    dirty_index.set_dirty_fields(webvid_id, algolia_unit.fetch_fields_not_yet_pushed())
 
             if vid_updated:
                 int_vids_updated += 1
@@ -318,6 +213,8 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
         int_vids_tagged_for_deletion += 1
 
     if not trial_run:
+        # the index of dirty records is saved first (see AlgoliaDirtyIndex for why)
+        dirty_index.save()
         algolia_ds.save2disk()
 
     logging.info('----- SUMMARY of Updating Algolia SimpleDS ------')
@@ -332,10 +229,13 @@ def update_local_algolia_video_records(path_to_algolia_simpleds, var_manager,  #
 
 
 def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manager,  # noqa: C901
-                                             display_name_for_logging_of_simpleds='', trial_run=False):
+                                             display_name_for_logging_of_simpleds='', trial_run=False,
+                                             bool_bulk_join=True):
     """This function loops through the set of publications pulled from the Real Vision
     website (stored in an instance of SimpleDS) and adds/updates associated records
-    in the algolia instance of SimpleDS."""
+    in the algolia instance of SimpleDS.
+    The fields of the units are gathered for all the publications in one go (unless
+    bool_bulk_join is False, in which case they are gathered one publication at a time.)"""
 
     int_pubs_added = 0
     int_pubs_updated = 0
@@ -356,6 +256,8 @@ def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manag
     algolia_ds = SimpleDS(path_to_algolia_simpleds, display_name_for_logging_of_simpleds)
     algolia_ds.load()
     algolia_ds.sort()
+    # and the index of its records that have changes not pushed to Algolia yet
+    dirty_index = make_dirty_index_of_algolia_simpleds(path_to_algolia_simpleds)
 
     # load the instance of SimpleDS that contains info about
     # publication fulltexts
@@ -368,6 +270,10 @@ def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manag
     # to be updated or created.
     update_timestamp = make_now_timestamp()
 
+    # unless asked not to, the fields of all the publications are gathered in one go (see my_algolia_bulk_join)
+    if bool_bulk_join:
+        dict_fields_of_all_pubs = make_algolia_fields_of_all_publications(web_pubs_ds, pubs_texts_ds)
+
     loop_iterations = len(web_pubs_ds)
     percent_tracker = PercentTracker(loop_iterations, int_output_every_x_percent=5, log_level='info')
     for web_pub_id in web_pubs_ds:
@@ -378,85 +284,16 @@ def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manag
         if not execution_should_continue:
             break
 
-        dct_for_updating_algolia_unit = {}
-        # we're not going to do any detection method to see if things have changed
-        # upstream. We are simply going to update all records always.
-        rv_web_pub_obj = RVwebsitePublication(web_pubs_ds.fetch_data(web_pub_id))
+        if bool_bulk_join:
+            dct_for_updating_algolia_unit = dict_fields_of_all_pubs[web_pub_id]
+        else:
+            dct_for_updating_algolia_unit = make_algolia_fields_of_one_publication(web_pub_id, web_pubs_ds,
+                                                                                   pubs_texts_ds)
         algolia_unit = AlgoliaDataUnit()
 
-        # first we populate the dictionary with values that are very straightforward to retrieve.
-
-        # populate the objectID. Algolia requires this field, and if not provided, it
-        # autogenerates it. It makes sense to use the same publication ID as from the RV website.
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_id] = rv_web_pub_obj.str_id
-        # populate the Title field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_title] = rv_web_pub_obj.str_title
-        # populate the Type field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_type] = rv_web_pub_obj.str_type
-        # populate the Description field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_description] = rv_web_pub_obj.str_summary
-        # populate the Thumbnail URL field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_thumbnail] = rv_web_pub_obj.str_url_thumbnail
-        # populate the Likes field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_likes] = rv_web_pub_obj.int_likes_count
-        # populate the Dislikes field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_dislikes] = rv_web_pub_obj.int_dislikes_count
-        # populate the Dislikes field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_numpages] = rv_web_pub_obj.int_page_count
-        # populate the Published On field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon] = rv_web_pub_obj.int_published_on
-        # populate the ProductID
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_productid] = rv_web_pub_obj.str_product_id
-
-        # next we populate values that are less straightforward to retrieve
-
-        # populate the Published On field in human read-able format
-        formatted_date_publishedon = (datetime.fromtimestamp(rv_web_pub_obj.int_published_on / 1000)).strftime(
-            "%Y-%m-%d")
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon_readable] = formatted_date_publishedon
-
-        # populate the Human Tags field. This is a combination of fields
-        # from the website comprising tags, topics, and assets
-        lst_tags = rv_web_pub_obj.lst_asset_names + rv_web_pub_obj.lst_topic_names
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tags] = lst_tags
-
-        # populate the publication url field
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_vidurl] = \
-            'https://www.realvision.com/issues/id/' + web_pub_id
-
-        # populate the tier field
-        product_pub_belongs_to = rv_web_pub_obj.str_product_id
-        rv_tier = my_globals.dict_product_mapping_to_tiers[product_pub_belongs_to]
-        dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_tiers] = rv_tier
-
-        # both of the following fields depend on the publication existing in the
-        # SimpleDS that tracks fulltext metadata, so we only check once if
-        # the publication is in that SimpleDS
-        if web_pub_id in pubs_texts_ds:
-            # populate the fulltext field
-            # IMPORTANT NOTE. We do not store the whole fulltext in the Algolia unit
-            # the idea is that we will only push the fulltext at PUSH time.
-            # in the Algolia unit, we will only store the hash of the fulltext
-            dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_transcript] = \
-                pubs_texts_ds.fetch_hash(web_pub_id)
-
-            # populate the pseudo-text field
-            # IMPORTANT NOTE. We do not store the whole pseudo-text in the Algolia unit
-            # the idea is that we will only push the fulltext at PUSH time
-            # in the Algolia unit, we will only store the hash of the pseudo-text
-            fulltext = Transcript(web_pub_id)
-            fulltext.set_transcript_directory(my_globals.str_dir4_pubs_fulltext_data)
-            fulltext.load_transcript_object_from_dictionary(pubs_texts_ds.fetch_data(web_pub_id))
-            pseudo_fulltext_exists = fulltext.is_pseudotranscript_filename_populated()
-            if pseudo_fulltext_exists:
-                pt = fulltext.get_pseudotranscript_from_disk()
-                if pt:
-                    dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_pseudotranscript] = \
-                        make_sha256_hash(pt, sort_characters=False)
-
         # now we check if this publication data exists yet in the Algolia SimpleDS
         # and depending on that, we add it, or we update it.
-        pub_publishedon = rv_web_pub_obj.int_published_on
+        pub_publishedon = dct_for_updating_algolia_unit[AlgoliaDataUnit.fieldname_publishedon]
         hash_incoming_data = make_sha256_hash(dct_for_updating_algolia_unit, sort_characters=True)
         if web_pub_id not in algolia_ds:
             # The simple case is if it doesn't exist yet. We add it.
@@ -467,6 +304,7 @@ def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manag
                 dct_algolia_unit = algolia_unit.dump_algolia_unit_as_dict()
                 algolia_ds.add_entry(web_pub_id, update_timestamp, pub_publishedon, dct_algolia_unit,
                                      hash_incoming_data)
+                dirty_index.set_dirty_fields(web_pub_id, algolia_unit.fetch_fields_not_yet_pushed())
             int_pubs_added += 1
         else:
             # otherwise, the publication is already in the Algolia SimpleDS and may need to be updated
@@ -492,6 +330,11 @@ def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manag
                                                 log_changes=True)
                 else:
                     logging.debug('No changes detected by the update function of the Algolia unit class.')
+                # the dirty fields are set whenever the hashes don't match, even if there were no changes:
+                # if an earlier run wrote the unit to disk but crashed before saving the dirty index, the
+                # unit is already up to date (so there are no changes) but it was never marked as dirty.
+                if not trial_run:
+                    dirty_index.set_dirty_fields(web_pub_id, algolia_unit.fetch_fields_not_yet_pushed())
 
             if pub_updated:
                 int_pubs_updated += 1
@@ -520,6 +363,8 @@ def update_local_algolia_publication_records(path_to_algolia_simpleds, var_manag
         int_pubs_tagged_for_deletion += 1
 
     if not trial_run:
+        # the index of dirty records is saved first (see AlgoliaDirtyIndex for why)
+        dirty_index.save()
         algolia_ds.save2disk()
 
     logging.info('----- SUMMARY of Updating Algolia SimpleDS ------')
@@ -539,6 +384,10 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
     """This function loops through the set of records in the Algolia instance
     of SimpleDS and creates 'delta' records to be pushed where there have
     been changes since the last push.
+    Only the records that the index of dirty records (see AlgoliaDirtyIndex) says
+    have changes in the fields pushed to this index, and the records tagged for
+    deletion, are looked at. If that index isn't complete, all the records are
+    looked at (and the index is made complete along the way.)
     A variable manager is passed to the function, in case the caller wants
     to stop execution gracefully (this is important so that the function
     can exit the loop, but still save the SimpleDS.)"""
@@ -546,6 +395,7 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
     # setup the Algolia API
     algolia_client = SearchClient.create(my_config.algolia_app_id, my_config.algolia_admin_api_key)
     algolia_index = algolia_client.init_index(str_index_name)
+    batch_pusher = AlgoliaBatchPusher(algolia_index)
 
     int_records_pushed = 0
     int_records_too_large = 0
@@ -566,14 +416,37 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
 
     list_fields_to_push = dict_index_and_fields_to_push[str_index_name]
 
-    loop_iterations = len(algolia_ds)
+    # load the index of the records that have changes not pushed yet, and figure out
+    # which records need looking at (in the order of the SimpleDS.)
+    dirty_index = make_dirty_index_of_algolia_simpleds(path_to_algolia_simpleds)
+    lst_all_ids = algolia_ds.df[SimpleDS.ds_field_dataid].tolist()
+    bool_full_scan = not dirty_index.bool_complete
+    if bool_full_scan:
+        logging.info('The index of dirty records is not complete. Looking at all the records.')
+        lst_ids_to_examine = lst_all_ids
+    else:
+        set_all_ids = set(lst_all_ids)
+        # records that are in the index, but not in the SimpleDS any more, are forgotten
+        for record_id in [an_id for an_id in dirty_index.dict_dirty_fields if an_id not in set_all_ids]:
+            dirty_index.remove(record_id)
+        set_ids_to_examine = dirty_index.fetch_ids_with_dirty_fields_in(list_fields_to_push)
+        set_ids_to_examine.update([record_id for record_id, lst_tags in
+                                   zip(lst_all_ids, algolia_ds.df[SimpleDS.ds_field_datatags])
+                                   if my_globals.str_tag_delete_from_algolia in lst_tags])
+        lst_ids_to_examine = [record_id for record_id in lst_all_ids if record_id in set_ids_to_examine]
+        logging.info('Records with changes to push, or to delete: ' + str(len(lst_ids_to_examine)) +
+                     ' (out of ' + str(len(lst_all_ids)) + ')')
+
+    execution_was_stopped = False
+    loop_iterations = len(lst_ids_to_examine)
     percent_tracker = PercentTracker(loop_iterations, int_output_every_x_percent=5, log_level='info')
-    for record_id in algolia_ds:
+    for record_id in lst_ids_to_examine:
         # The following IF checks the variable manager that was passed as a paramater
         # to this function. It allows for the loop to be stopped by an external factor
         # (script, human, etc.) if a specific variable has been set to false.
         execution_should_continue = var_manager.var_retrieve(my_globals.str_execution_may_go_on)
         if (not execution_should_continue):
+            execution_was_stopped = True
             break
 
         # an upstream function tags records if they need to be deleted from Algolia,
@@ -589,6 +462,9 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
             algolia_record = algolia_unit.make_algolia_record_for_pushing_delta(transcripts_ds,
                                                                                 path_to_transcripts_data,
                                                                                 list_fields_to_push)
+            # the dirty fields are recorded as they are before the push (they are set
+            # again below, for the records whose push is acknowledged.)
+            dirty_index.set_dirty_fields(record_id, algolia_unit.fetch_fields_not_yet_pushed())
             if algolia_record:
                 record_size_in_bytes = len(str(algolia_record).encode('utf-8'))
                 if record_size_in_bytes > 100000:
@@ -597,73 +473,48 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
                                     ' than 100,000 bytes (the Algolia limit per record)')
                 else:
                     if not trial_run:
-                        return_val = {}
-                        try:
-                            # push the record
-                            return_val = algolia_index.partial_update_object(algolia_record,
-                                                                             {'createIfNotExists': True})
-                        except Exception as e:
-                            logging.warning('Exception thrown while trying to push a record to Algolia.'
-                                            ' The Exception was: ' + repr(e))
-                            return_val = {}
-                            int_records_push_issues += 1
-                        # I'm not 100% sure on this, but I THINK if the 'return_val' gets populated
-                        # above by the algolia 'partial_update' function, then it means the records
-                        # were pushed successfully.
-                        # If that is the case - if the record was pushed successfully, then we need
-                        # to update our local version of the data to tell it what has been pushed.
-                        if return_val:
-                            int_records_pushed += 1
-                            # Merging the record into the Algolia unit that we save is fairly
-                            # straighforward, with the exceptions below.
-
-                            trscrpt_fieldname = AlgoliaDataUnit.fieldname_transcript
-                            # If the transcript was pushed, the record that was pushed contains
-                            # the whole transcript, whereas in the unit we save only the hash. So
-                            # we need to replace the transcript with the hash in the record.
-                            # However, this only needs to happen if the transcript field was in the
-                            # list of fields to push, so we check for that first.
-                            if trscrpt_fieldname in list_fields_to_push:
-                                # some records don't have a transcript. so the IF below is used to
-                                # make sure we are only trying to replace the hash for records that had the
-                                # transcript field populated.
-                                if trscrpt_fieldname in algolia_record:
-                                    # We don't re-calculate the hash, we simply grab it from the exiting unit
-                                    algolia_record[trscrpt_fieldname] = \
-                                        existing_algolia_unit_as_dict[trscrpt_fieldname][
-                                            AlgoliaDataUnit.key_for_values_current]
-
-                            pseudotrscrpt_fieldname = AlgoliaDataUnit.fieldname_pseudotranscript
-                            # Similarly, if the pseudo-transcript was pushed, the record that was pushed contains
-                            # the whole pseudo-transcript, whereas in the unit we save only the hash. So
-                            # we need to replace the pseudo-transcript with the hash in the record.
-                            # However, this only needs to happen if the pseudo-transcript field was in the
-                            # list of fields to push, so we check for that first.
-                            if pseudotrscrpt_fieldname in list_fields_to_push:
-                                # some records don't have a pseudo-transcript. so the IF below is used to
-                                # make sure we are only trying to replace the hash for records that had the
-                                # pseudo-transcript field populated.
-                                if pseudotrscrpt_fieldname in algolia_record:
-                                    # We don't re-calculate the hash, we simply grab it from the exiting unit
-                                    algolia_record[pseudotrscrpt_fieldname] = \
-                                        existing_algolia_unit_as_dict[pseudotrscrpt_fieldname][
-                                            AlgoliaDataUnit.key_for_values_current]
-
-                            # now update the algolia unit with the record that was pushed
-                            algolia_unit.provide_pushed2algolia_data(algolia_record)
-                            # once the unit is updated, then it can be saved back to the SimpleDS in dictionary form
-                            # (in the SimpleDS we are storing Algolia 'units' saved as dictionaries,
-                            # rather than just an Algolia 'record' as it gets pushed to Algolia.)
-                            # Note that the timestamp we are keeping in the SimpleDS is the time when
-                            # new data has been updated inside a unit in the SimpleDS. We will not
-                            # consider a push to Algolia something that updates the stored timestamp
-                            # because even though the unit is being updated, it isn't on account of
-                            # new information; it is simply being updated to 'remember' what was pushed.
-                            # so we'll grab the existing timestamp and use it for the update (in other words
-                            # no change to the timestamp.)
-                            dct_representation_of_unit = algolia_unit.dump_algolia_unit_as_dict()
-                            algolia_ds.update_entry(record_id, dct_representation_of_unit,
-                                                    algolia_ds.fetch_lastupdated(record_id))
+                        # Merging the record into the Algolia unit that we save (once it has been
+                        # pushed) is fairly straighforward, with the exceptions below. The record
+                        # to merge is prepared now (as a copy) because the record being pushed
+                        # is only kept until its batch is sent.
+                        dict_record_to_merge = dict(algolia_record)
+
+                        trscrpt_fieldname = AlgoliaDataUnit.fieldname_transcript
+                        # If the transcript is pushed, the record that is pushed contains
+                        # the whole transcript, whereas in the unit we save only the hash. So
+                        # we need to replace the transcript with the hash in the record.
+                        # However, this only needs to happen if the transcript field was in the
+                        # list of fields to push, so we check for that first.
+                        if trscrpt_fieldname in list_fields_to_push:
+                            # some records don't have a transcript. so the IF below is used to
+                            # make sure we are only trying to replace the hash for records that had the
+                            # transcript field populated.
+                            if trscrpt_fieldname in dict_record_to_merge:
+                                # We don't re-calculate the hash, we simply grab it from the exiting unit
+                                dict_record_to_merge[trscrpt_fieldname] = \
+                                    existing_algolia_unit_as_dict[trscrpt_fieldname][
+                                        AlgoliaDataUnit.key_for_values_current]
+
+                        pseudotrscrpt_fieldname = AlgoliaDataUnit.fieldname_pseudotranscript
+                        # Similarly, if the pseudo-transcript is pushed, the record that is pushed contains
+                        # the whole pseudo-transcript, whereas in the unit we save only the hash. So
+                        # we need to replace the pseudo-transcript with the hash in the record.
+                        # However, this only needs to happen if the pseudo-transcript field was in the
+                        # list of fields to push, so we check for that first.
+                        if pseudotrscrpt_fieldname in list_fields_to_push:
+                            # some records don't have a pseudo-transcript. so the IF below is used to
+                            # make sure we are only trying to replace the hash for records that had the
+                            # pseudo-transcript field populated.
+                            if pseudotrscrpt_fieldname in dict_record_to_merge:
+                                # We don't re-calculate the hash, we simply grab it from the exiting unit
+                                dict_record_to_merge[pseudotrscrpt_fieldname] = \
+                                    existing_algolia_unit_as_dict[pseudotrscrpt_fieldname][
+                                        AlgoliaDataUnit.key_for_values_current]
+
+                        # queue the record. It gets pushed along with others in a batch, and the
+                        # unit is only updated (further below) once that batch is acknowledged.
+                        batch_pusher.add(algolia_record, record_size_in_bytes,
+                                         (record_id, existing_algolia_unit_as_dict, dict_record_to_merge))
             else:
                 int_records_no_changes += 1
         else:
@@ -672,7 +523,7 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
                 record_removed = False
                 try:
                     # delete the record
-                    return_val = algolia_index.delete_object(record_id)
+                    algolia_index.delete_object(record_id)
                     record_removed = True
                 except Exception as e:
                     logging.warning('Exception thrown while trying to delete a record in Algolia.'
@@ -684,6 +535,7 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
                     # so now that the record was been removed from the interwebs
                     # we delete the record from the SimpleDS
                     algolia_ds.delete_entry(record_id, keep_version_of_file_in_log_directory=True)
+                    dirty_index.remove(record_id)
             int_records_deleted += 1
 
         int_records_processed += 1
@@ -691,8 +543,40 @@ def push_records_to_algolia(var_manager, str_index_name, dict_index_and_fields_t
                                         show_time_remaining_estimate=True,
                                         str_description_to_include_in_logging='Pushing records to Algolia')
 
+    # send whatever is left, and wait for Algolia to acknowledge all the batches. Only the
+    # records whose batch was acknowledged have their unit updated to 'remember' what was pushed.
+    for (record_id, existing_algolia_unit_as_dict, dict_record_to_merge), exception_of_batch \
+            in batch_pusher.finish():
+        if exception_of_batch is not None:
+            int_records_push_issues += 1
+            continue
+        int_records_pushed += 1
+        algolia_unit = AlgoliaDataUnit()
+        algolia_unit.load_from_dict(existing_algolia_unit_as_dict)
+        # now update the algolia unit with the record that was pushed
+        algolia_unit.provide_pushed2algolia_data(dict_record_to_merge)
+        # once the unit is updated, then it can be saved back to the SimpleDS in dictionary form
+        # (in the SimpleDS we are storing Algolia 'units' saved as dictionaries,
+        # rather than just an Algolia 'record' as it gets pushed to Algolia.)
+        # Note that the timestamp we are keeping in the SimpleDS is the time when
+        # new data has been updated inside a unit in the SimpleDS. We will not
+        # consider a push to Algolia something that updates the stored timestamp
+        # because even though the unit is being updated, it isn't on account of
+        # new information; it is simply being updated to 'remember' what was pushed.
+        # so we'll grab the existing timestamp and use it for the update (in other words
+        # no change to the timestamp.)
+        dct_representation_of_unit = algolia_unit.dump_algolia_unit_as_dict()
+        algolia_ds.update_entry(record_id, dct_representation_of_unit,
+                                algolia_ds.fetch_lastupdated(record_id))
+        dirty_index.set_dirty_fields(record_id, algolia_unit.fetch_fields_not_yet_pushed())
+
     if not trial_run:
         algolia_ds.save2disk()
+        # after looking at every single record, the index of dirty records is complete.
+        # It is saved after the SimpleDS (see AlgoliaDirtyIndex for why)
+        if bool_full_scan and not execution_was_stopped:
+            dirty_index.bool_complete = True
+        dirty_index.save()
 
     logging.info('----- SUMMARY of Pushing records to Algolia SimpleDS ------')
     if trial_run:
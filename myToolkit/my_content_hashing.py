@@ -0,0 +1,101 @@
+import json
+import logging
+import hashlib
+import my_globals
+from my_building_blocks import recursiveExtractFieldFromHierarchy
+
+
+def make_canonical_json(an_item):
+    """Serializes an item (typically a dictionary of json data from the RV website) to a string
+    that is always the same for the same data: keys are sorted at every level of the hierarchy and
+    there is no optional whitespace. Unlike sorting the characters of str(an_item) (which is what
+    make_sha256_hash does) two different items can't end up as the same string, for example when
+    two values are swapped."""
+    return json.dumps(an_item, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_canonical_hash(an_item, str_algorithm=my_globals.str_content_hash_algorithm):
+    """Returns the hash of the canonical json of an item, prefixed with the name of the algorithm
+    used (for example 'blake2b:8f3a...'.) The prefix lets us tell these hashes apart from the ones
+    made by make_sha256_hash (which have no prefix) that are still stored in the HASH column of
+    older SimpleDS instances, and lets the algorithm be changed in the future."""
+    bytes_canonical = make_canonical_json(an_item).encode('utf-8')
+    if str_algorithm == 'blake2b':
+        str_digest = hashlib.blake2b(bytes_canonical, digest_size=32).hexdigest()
+    else:
+        str_digest = hashlib.new(str_algorithm, bytes_canonical).hexdigest()
+    return str_algorithm + ':' + str_digest
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def is_legacy_hash(str_hash):
+    """Hashes made by make_sha256_hash (before canonical hashing existed) have no algorithm prefix."""
+    return ':' not in str(str_hash)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def hash_matches(str_stored_hash, an_item):
+    """Checks whether a stored hash is the hash of the item given, using the same algorithm the stored
+    hash was made with. Legacy hashes never match, so the item is compared field by field (and then
+    its hash is replaced by a canonical one.)"""
+    if is_legacy_hash(str_stored_hash):
+        return False
+    str_algorithm = str_stored_hash.split(':', 1)[0]
+    return str_stored_hash == make_canonical_hash(an_item, str_algorithm)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def make_field_hashes(an_item, dict_schema, dict_mapping_fields_2_attribs):
+    """Returns a dictionary with a (short) hash of each of the fields of an item. The keys of the
+    dictionary are the names of the attributes the fields map to (in dict_mapping_fields_2_attribs)
+    and the schema says where to find each field in the hierarchy of the item."""
+    dict_field_hashes = {}
+    for a_field in dict_mapping_fields_2_attribs:
+        value = recursiveExtractFieldFromHierarchy(an_item, dict_schema[a_field].copy())
+        dict_field_hashes[dict_mapping_fields_2_attribs[a_field]] = \
+            hashlib.blake2b(make_canonical_json(value).encode('utf-8'), digest_size=16).hexdigest()
+    return dict_field_hashes
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def find_attributes_that_changed(dict_old_item, dict_new_item, dict_schema, dict_mapping_fields_2_attribs):
+    """Compares two versions of the same item field by field (by their hashes) and returns the list
+    of the attributes whose fields are different. Only these need to be handed to the (much slower)
+    comparison methods of the RVwebsiteVid and RVwebsitePublication classes."""
+    dict_old_hashes = make_field_hashes(dict_old_item, dict_schema, dict_mapping_fields_2_attribs)
+    dict_new_hashes = make_field_hashes(dict_new_item, dict_schema, dict_mapping_fields_2_attribs)
+    return [an_attrib for an_attrib in dict_new_hashes if dict_new_hashes[an_attrib] != dict_old_hashes[an_attrib]]
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def migrate_legacy_hashes_of_simpleds(simple_ds, trial_run=False):
+    """Replaces the legacy hashes (made by make_sha256_hash) in the HASH column of a SimpleDS with
+    canonical ones. The hash stored for a row is always the hash of the data stored for that row, so
+    the canonical hash can be made from the data on disk, and no change goes undetected because of
+    the migration. It only has to load the data of rows that still have a legacy hash, so once a
+    SimpleDS has been migrated, this costs next to nothing. Returns the number of rows migrated.
+    NOTE. The SimpleDS is not saved to disk by this function."""
+    int_count_migrated = 0
+    for item_id in simple_ds.fetch_all_ids_as_python_set():
+        if is_legacy_hash(simple_ds.fetch_hash(item_id)):
+            if not trial_run:
+                simple_ds.update_hash(item_id, make_canonical_hash(simple_ds.fetch_data(item_id)))
+            int_count_migrated += 1
+    if int_count_migrated:
+        logging.info('Hashes migrated to canonical hashes in SimpleDS ' + simple_ds.name + ': ' +
+                     str(int_count_migrated))
+    return int_count_migrated
+# ------------------------ END FUNCTION ------------------------ #
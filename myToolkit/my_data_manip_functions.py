@@ -1,7 +1,6 @@
 import os
 import json
 import time
-import glob
 import logging
 import pandas as pd
 import my_globals
@@ -9,9 +8,12 @@ from my_building_blocks import projectStandardTimestamp
 from my_building_blocks import recursiveExtractFieldFromHierarchy
 from my_building_blocks import extractIndividualItemsFromTextList
 from my_building_blocks import make_now_timestamp
-from my_building_blocks import make_sha256_hash
+from my_content_hashing import find_attributes_that_changed, migrate_legacy_hashes_of_simpleds
 from my_building_blocks import cleanup_older_files_in_a_dir
 from class_simpleDS import SimpleDS
+from class_website_vids_projection import WebsiteVidsProjection
+from class_guests_subjects_graph import GuestsSubjectsGraph
+from class_set_files_manifest import make_manifest_of_vid_sets, make_manifest_of_pub_sets
 from my_airtable_functions import extractVideoFieldFromWebsiteJSON
 from my_airtable_functions import convert_ppl_names2another_airtable_field
 from class_percent_tracker import PercentTracker
@@ -95,6 +97,11 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
     logging.debug('Loading the SimpleDS containing vid metadata from the RV website')
     web_videos_ds = SimpleDS(my_globals.str_dir4_website_vids_ds, my_globals.str_name_simpleds_website_vids)
     web_videos_ds.load()
+    # hashes stored by older versions of the code are replaced by canonical hashes (only once)
+    migrate_legacy_hashes_of_simpleds(web_videos_ds, trial_run=trial_run)
+    # the projection (copy of the most used fields of all videos, in one file) is kept up to date as we go
+    web_vids_projection = WebsiteVidsProjection()
+    web_vids_projection.load()
 
     # get the current timestamp. This timestamp will be used to
     # tag all videos where it is detected that the incoming
@@ -108,10 +115,12 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
 
     # make a list of the files to be examined, so we can
     # know the size of the list to iterate and display percentages as
-    # we go along.
+    # we go along. The list comes from the manifest of the files, which also
+    # has the IDs and hashes of the videos in each file, so files where all
+    # the videos are already in the SimpleDS, unchanged, don't need opening.
     logging.debug('Making a list of the files that contain sets of videos metadata downloaded from the RV website.')
-    path_pattern = my_globals.str_dir_path_raw_website_json_video_sets + '*.json'
-    lst_of_filenames = glob.glob(path_pattern)
+    manifest_of_vid_sets = make_manifest_of_vid_sets()
+    lst_of_filenames = manifest_of_vid_sets.fetch_fullpaths_of_files()
 
     int_progress_counter = 0
     int_num_files = len(lst_of_filenames)
@@ -124,6 +133,15 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
         for a_file in lst_of_filenames:
             logging.info('Processing videos metadata. Percent '
                          'complete: ' + "{:.2%}".format(int_progress_counter / int_num_files))
+            if not manifest_of_vid_sets.file_has_records_that_differ_from(a_file, web_videos_ds):
+                int_num_vids_in_file = len(manifest_of_vid_sets.fetch_ids_in_file(a_file))
+                logging.debug('All videos in ' + a_file + ' are unchanged. Not opening it.')
+                int_vids_not_touched += int_num_vids_in_file
+                int_total_vids_examined += int_num_vids_in_file
+                int_progress_counter += 1
+                continue
+            # the hashes of the videos in the file (in the same order) were calculated for the manifest
+            lst_hashes_in_file = [str_hash for _, str_hash in manifest_of_vid_sets.fetch_ids_and_hashes_in_file(a_file)]
             # each of the files we open with this for loop contains a set
             # of videos in it. So now we will look at each video
             with open(a_file, mode='r') as file_with_set_of_vids:
@@ -134,7 +152,7 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
                 # line grabs the list of videos from inside the "data"
                 # wrapper.
                 list_videos = dict_json_data["data"]
-                for a_vid in list_videos:
+                for int_position_in_file, a_vid in enumerate(list_videos):
                     rv_vid_from_set = RVwebsiteVid(a_vid)
                     # variables below where I use 'from_set' in the name
                     # reference that the data is coming from the video
@@ -159,13 +177,9 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
                         # the first thing we do is compare the saved hash of the video
                         # with the hash of the incoming video
                         # Because the incoming object cannot be guaranteed to always contain
-                        # hierarchical data in the same order, we need to tell the hashing
-                        # function to sort the data. There might some cases
-                        # where sorting incoming data, might result in the
-                        # same data as the data saved on disk even if they are slightly
-                        # different, but for our purposes, this is deemed an acceptable
-                        # risk as the probability is extremely low.
-                        hash_vid_from_set = make_sha256_hash(a_vid, sort_characters=True)
+                        # hierarchical data in the same order, the hash is made from a canonical
+                        # json (with the keys sorted) of the video.
+                        hash_vid_from_set = lst_hashes_in_file[int_position_in_file]
                         hash_vid_in_ds = web_videos_ds.fetch_hash(str_vid_from_set_id)
                         # if the hashes of the two objects don't match, then we
                         # need to do the expensive operation of pulling the
@@ -174,13 +188,17 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
                             logging.debug('Difference detected based on hashes.')
                             # since based on the hash there is a difference, we load the existing
                             # data from disk in order to do a more specific comparison
-                            rv_vid_from_ds = RVwebsiteVid(web_videos_ds.fetch_data(str_vid_from_set_id))
-                            # the method that does the comparison asks for a list of attributes to compare
-                            # so we get that from the values of a dictionary that maps between RV website
-                            # fields and the attributes of the RVwebsiteVid class
-                            lst_attributes = my_globals.dict_mapping_rv_web_vid_json_2_rv_webvidclass_attrib.values()
-                            dict_results = rv_vid_from_ds.compare_with_other_version_of_same_vid(rv_vid_from_set,
-                                                                                                 lst_attributes)
+                            dict_vid_from_ds = web_videos_ds.fetch_data(str_vid_from_set_id)
+                            # the method that does the comparison asks for a list of attributes to compare.
+                            # Only the attributes whose fields have a different (sub)hash need comparing.
+                            lst_attributes = find_attributes_that_changed(
+                                dict_vid_from_ds, a_vid, my_globals.dict_vids_from_website_schema,
+                                my_globals.dict_mapping_rv_web_vid_json_2_rv_webvidclass_attrib)
+                            dict_results = {}
+                            if lst_attributes:
+                                rv_vid_from_ds = RVwebsiteVid(dict_vid_from_ds)
+                                dict_results = rv_vid_from_ds.compare_with_other_version_of_same_vid(rv_vid_from_set,
+                                                                                                     lst_attributes)
                             if dict_results:
                                 # if dict_results is not empty, then there are changes and we need
                                 # to update SimpleDS
@@ -200,10 +218,22 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
                                                                hash_vid_from_set,
                                                                dict_results,
                                                                log_changes=True)
+                                    web_vids_projection.upsert(str_vid_from_set_id, a_vid, hash_vid_from_set)
                                 else:
                                     logging.debug('Trial run: Would have updated entry in SimpleDS because changes were'
                                                   ' detected for video ' + str_vid_from_set_id)
                                 int_vids_updated += 1
+                            elif not trial_run:
+                                # none of the fields we keep track of changed, but something in the video did
+                                # (otherwise the hashes would match.) The incoming data is saved along with its
+                                # hash, so the stored hash is still the hash of the stored data, but there is no
+                                # entry in the change log and the 'last updated' timestamp is kept as it was.
+                                # This also lets the pages this video is on be seen as unchanged the next time
+                                # they are downloaded (see download_pages_until_unchanged.)
+                                web_videos_ds.update_entry(str_vid_from_set_id, a_vid,
+                                                           web_videos_ds.fetch_lastupdated(str_vid_from_set_id),
+                                                           new_data_hash=hash_vid_from_set)
+                                web_vids_projection.upsert(str_vid_from_set_id, a_vid, hash_vid_from_set)
                     else:
                         logging.debug('Video ' + str_vid_from_set_id + ' does NOT exist in SimpleDS')
                         # we are here if the video is not already in the data
@@ -212,9 +242,10 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
                         int_new_vids += 1
                         if not trial_run:
                             logging.debug(str_vid_from_set_id + ' is being added to SimpleDS')
-                            hash_vid_from_set = make_sha256_hash(a_vid, sort_characters=True)
+                            hash_vid_from_set = lst_hashes_in_file[int_position_in_file]
                             web_videos_ds.add_entry(str_vid_from_set_id, int_time_change_detected,
                                                     int_vid_from_set_published, a_vid, hash_vid_from_set)
+                            web_vids_projection.upsert(str_vid_from_set_id, a_vid, hash_vid_from_set)
                         else:
                             logging.debug('Trial run: ' + str_vid_from_set_id + ' would have been added to SimpleDS')
 
@@ -240,6 +271,10 @@ def update_website_videos_datastructure(trial_run=True):  # noqa: C901
         web_videos_ds.delete_all_items_with_specific_tag_and_save_2disk(
             my_globals.str_tag_delete_row_from_simpleds, keep_deleted_files_in_change_log=True, trial_run=trial_run)
     int_vids_deleted = len(set_of_deleted_vids)
+    if not trial_run:
+        for vid_id in set_of_deleted_vids:
+            web_vids_projection.remove(vid_id)
+        web_vids_projection.save()
 
     logging.info('--------UPDATE SimpleDS (of RV Website video data) SUMMARY--------')
     if trial_run:
@@ -270,6 +305,8 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
     logging.debug('Loading the SimpleDS containing PUBLICATIONS metadata from the RV website')
     web_pubs_ds = SimpleDS(my_globals.str_dir4_website_pubs_ds, my_globals.str_name_simpleds_website_pubs)
     web_pubs_ds.load()
+    # hashes stored by older versions of the code are replaced by canonical hashes (only once)
+    migrate_legacy_hashes_of_simpleds(web_pubs_ds, trial_run=trial_run)
 
     # get the current timestamp. This timestamp will be used to
     # tag all publications where it is detected that the incoming
@@ -281,11 +318,13 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
     logging.debug('Setting time that will be used to stamp publications where changes are detected')
     int_time_change_detected = make_now_timestamp()
 
-    # make a list of the files to be examined
+    # make a list of the files to be examined (from the manifest of the files, which also has
+    # the IDs and hashes of the publications in each file, so files where all the publications are
+    # already in the SimpleDS, unchanged, don't need opening.)
     logging.debug(
         'Making a list of the files that contain sets of publications metadata downloaded from the RV website.')
-    path_pattern = my_globals.str_dir_path_raw_website_json_pubs_sets + '*.json'
-    lst_of_filepaths = glob.glob(path_pattern)
+    manifest_of_pub_sets = make_manifest_of_pub_sets()
+    lst_of_filepaths = manifest_of_pub_sets.fetch_fullpaths_of_files()
 
     # we enclose the whole giant loop below in a try statement, because
     # if something goes wrong, it gives us a chance to still save the instance
@@ -295,6 +334,14 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
     try:
         for a_file in lst_of_filepaths:
             logging.info('Processing publications metadata. Working on file: ' + os.path.basename(a_file))
+            if not manifest_of_pub_sets.file_has_records_that_differ_from(a_file, web_pubs_ds):
+                int_num_pubs_in_file = len(manifest_of_pub_sets.fetch_ids_in_file(a_file))
+                logging.info('All publications in the file are unchanged. Not opening it.')
+                int_pubs_not_touched += int_num_pubs_in_file
+                int_total_pubs_examined += int_num_pubs_in_file
+                continue
+            # the hashes of the publications in the file (in the same order) were calculated for the manifest
+            lst_hashes_in_file = [str_hash for _, str_hash in manifest_of_pub_sets.fetch_ids_and_hashes_in_file(a_file)]
             # each of the files we open with this for loop contains a set
             # of publications in it. So now we will look at each publication
             list_pubs = []
@@ -308,7 +355,7 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
                 list_pubs = dict_json_data["data"]
             percent_tracker = PercentTracker(len(list_pubs), log_level='info')
             counter = 0
-            for a_publication in list_pubs:
+            for int_position_in_file, a_publication in enumerate(list_pubs):
                 rv_pub_from_set = RVwebsitePublication(a_publication)
                 # variables below where I use 'from_set' in the name
                 # reference that the data is coming from the publication
@@ -333,13 +380,9 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
                     # the first thing we do is compare the saved hash of the publication
                     # with the hash of the incoming publication
                     # Because the incoming object cannot be guaranteed to always contain
-                    # hierarchical data in the same order, we need to tell the hashing
-                    # function to sort the data. There might some cases
-                    # where sorting incoming data, might result in the
-                    # same data as the data saved on disk even if they are slightly
-                    # different, but for our purposes, this is deemed an acceptable
-                    # risk as the probability is extremely low.
-                    hash_pub_from_set = make_sha256_hash(a_publication, sort_characters=True)
+                    # hierarchical data in the same order, the hash is made from a canonical
+                    # json (with the keys sorted) of the publication.
+                    hash_pub_from_set = lst_hashes_in_file[int_position_in_file]
                     hash_pub_in_ds = web_pubs_ds.fetch_hash(str_pub_from_set_id)
                     # if the hashes of the two objects don't match, then we
                     # need to do the expensive operation of pulling the
@@ -348,13 +391,17 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
                         logging.debug('Difference detected based on hashes.')
                         # since based on the hash there is a difference, we load the existing
                         # data from disk in order to do a more specific comparison
-                        rv_pub_from_ds = RVwebsitePublication(web_pubs_ds.fetch_data(str_pub_from_set_id))
-                        # the method that does the comparison asks for a list of attributes to compare
-                        # so we get that from the values of a dictionary that maps between RV website
-                        # fields and the attributes of the RVwebsitePublication class
-                        lst_attributes = my_globals.dict_mapping_rv_webpubjson_2_rv_webpubclass_attrib.values()
-                        dict_results = rv_pub_from_ds.compare_with_other_version_of_same_pub(rv_pub_from_set,
-                                                                                             lst_attributes)
+                        dict_pub_from_ds = web_pubs_ds.fetch_data(str_pub_from_set_id)
+                        # the method that does the comparison asks for a list of attributes to compare.
+                        # Only the attributes whose fields have a different (sub)hash need comparing.
+                        lst_attributes = find_attributes_that_changed(
+                            dict_pub_from_ds, a_publication, my_globals.dict_pubs_from_website_schema,
+                            my_globals.dict_mapping_rv_webpubjson_2_rv_webpubclass_attrib)
+                        dict_results = {}
+                        if lst_attributes:
+                            rv_pub_from_ds = RVwebsitePublication(dict_pub_from_ds)
+                            dict_results = rv_pub_from_ds.compare_with_other_version_of_same_pub(rv_pub_from_set,
+                                                                                                 lst_attributes)
                         if dict_results:
                             # if dict_results is not empty, then there are changes and we need
                             # to update SimpleDS
@@ -378,6 +425,14 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
                                 logging.debug('Trial run: Would have updated entry in SimpleDS because changes were'
                                               ' detected for publication ' + str_pub_from_set_id)
                             int_pubs_updated += 1
+                        elif not trial_run:
+                            # none of the fields we keep track of changed, but something in the publication
+                            # did (otherwise the hashes would match.) The incoming data is saved along with its
+                            # hash, so the stored hash is still the hash of the stored data, but there is no
+                            # entry in the change log and the 'last updated' timestamp is kept as it was.
+                            web_pubs_ds.update_entry(str_pub_from_set_id, a_publication,
+                                                     web_pubs_ds.fetch_lastupdated(str_pub_from_set_id),
+                                                     new_data_hash=hash_pub_from_set)
                     # else:
                     # if we got to here, then the publication does already
                     # exist in the dataframe, and it doesn't need to
@@ -390,7 +445,7 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
                     int_new_pubs += 1
                     if not trial_run:
                         logging.debug(str_pub_from_set_id + ' is being added to SimpleDS')
-                        hash_pub_from_set = make_sha256_hash(a_publication, sort_characters=True)
+                        hash_pub_from_set = lst_hashes_in_file[int_position_in_file]
                         web_pubs_ds.add_entry(str_pub_from_set_id, int_time_change_detected,
                                               int_pub_from_set_published, a_publication, hash_pub_from_set)
                     else:
@@ -432,6 +487,21 @@ def update_website_pubs_datastructure(trial_run=True):  # noqa: C901
 # ------------------------ END FUNCTION ------------------------ #
 
 
+def load_website_vids_projection_in_sync(web_vids_ds):
+    """Loads the projection of the website videos (see WebsiteVidsProjection)
+    and brings it in line with the SimpleDS of website videos given (which
+    must be loaded already.) Only the videos that changed since the projection
+    was last saved are read from disk. Returns the projection."""
+    web_vids_projection = WebsiteVidsProjection()
+    web_vids_projection.load()
+    if web_vids_projection.sync_with_simpleds(web_vids_ds) > 0:
+        web_vids_projection.save()
+    return web_vids_projection
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
 def get_specific_fields_from_all_vids_into_list(lst_of_fields):
     """This function receives a list of fields that you want
     to extract from all videos. It uses the SimpleDS data
@@ -440,13 +510,22 @@ def get_specific_fields_from_all_vids_into_list(lst_of_fields):
     and extract the info from the individual file of each video.
     It returns the information as a list of dictionaries.
     Each dictionary represents one video, and contains the
-    fields requested for that video."""
+    fields requested for that video.
+    If all the fields requested are kept in the projection of
+    the website videos (see WebsiteVidsProjection) they are read
+    from there instead, which avoids opening every video's file.
+    The result is the same either way (same videos, same order.)"""
 
     dict_vid_json_schema = my_globals.dict_vids_from_website_schema
 
     web_vids_ds = SimpleDS(my_globals.str_dir4_website_vids_ds)
     web_vids_ds.load()
 
+    if WebsiteVidsProjection().has_fields(lst_of_fields):
+        web_vids_projection = load_website_vids_projection_in_sync(web_vids_ds)
+        return web_vids_projection.fetch_fields_as_list_of_dicts(
+            web_vids_ds.df[SimpleDS.ds_field_dataid].tolist(), lst_of_fields)
+
     # a list to store the dictionaries that will store the data
     lst_of_dicts = []
 
@@ -473,96 +552,37 @@ def get_specific_fields_from_all_vids_into_list(lst_of_fields):
 # ------------------------ END FUNCTION ------------------------ #
 
 
-def extract_guestsNsubjects(list_of_folks_2_ignore):  # noqa: C901
-    # a dictionary that will track the overall data
-    # regarding guests and the subjects they've discussed.
-    dict_overall_guests_subjects = {}
+def extract_guestsNsubjects(list_of_folks_2_ignore):
+    """Makes the dictionary of guests (persons in the featuring field of the
+    website videos) and the subjects (topics, tags and assets) of the videos
+    they've been in, and writes it to a JSON file.
+    The dictionary is made from a graph of guests and subjects (see the
+    GuestsSubjectsGraph class) that is kept on disk between runs, and only
+    the videos that are new, changed or deleted since the last run are
+    looked at. If no video changed at all (and the folks to ignore are the
+    same) the file written last time is still the latest, so nothing is
+    written, and the dictionary from last time is returned."""
+    str_field_featuring = 'video_featuring'
+    lst_fields_with_subjects = ['video_topic_names',
+                                'video_tag_names',
+                                'video_asset_names'
+                                ]
 
-    # Get a list containing a dictionary (one per video)
-    # that has in it, the fields we need to extract guest
-    # info and the subjects they talked about.
-    lst_of_fields_with_guests_subjects = ['video_featuring',
-                                          'video_topic_names',
-                                          'video_tag_names',
-                                          'video_asset_names'
-                                          ]
-    lst_data_guests_subjects = \
-        get_specific_fields_from_all_vids_into_list(lst_of_fields_with_guests_subjects)
+    web_vids_ds = SimpleDS(my_globals.str_dir4_website_vids_ds)
+    web_vids_ds.load()
+    lst_vid_ids = web_vids_ds.df[SimpleDS.ds_field_dataid].tolist()
+    web_vids_projection = load_website_vids_projection_in_sync(web_vids_ds)
 
-    for record in lst_data_guests_subjects:
-        dict_data_in_curret_vid = record.copy()
+    guests_subjects_graph = GuestsSubjectsGraph()
+    guests_subjects_graph.load()
+    int_num_vids_changed = guests_subjects_graph.sync_with_projection(lst_vid_ids, web_vids_projection,
+                                                                      str_field_featuring, lst_fields_with_subjects)
+    if (int_num_vids_changed == 0) and guests_subjects_graph.is_last_output_still_valid(list_of_folks_2_ignore):
+        logging.info('No videos changed since the guests and subjects were last extracted. Nothing to write.')
+        return guests_subjects_graph.dict_last_output
 
-        # first, make a list of persons that come from the
-        # featuring field.
-        lst_persons_in_this_record = []
-        # the code expects the list of persons to be extracted
-        # out of a string. If the data we have isn't a string
-        # or type None (which on ocassion the website might
-        # return instead of an empty string if there were no
-        # persons in the featuring field) we'll stop the code.
-        raw_persons_data = dict_data_in_curret_vid.pop('video_featuring')
-        type_persons_data = type(raw_persons_data)
-        if type_persons_data is str:
-            lst_persons_in_this_record = \
-                sorted(extractIndividualItemsFromTextList(raw_persons_data))
-        elif type_persons_data == type(None):  # noqa: E721
-            # we already initialized the list of persons
-            # as the empty string, so no need to do
-            # anything else here
-            pass
-        else:
-            logging.error("Unexpected type of object in function 'extract_guestsNsubjects'.")
-
-        # now we combine subjects that were talked about
-        # which are stored in the other fields this function
-        # requested, such as tags, topics, etc.
-        # Since, above we popped the only part of the dictionary
-        # which contained persons, only subjects that were
-        # discussed remain in the dictionary. So all remaining
-        # fields can be merged.
-        lst_subjects_discussed_in_this_record = []
-        for entry in dict_data_in_curret_vid:
-            lst_subjects_discussed_in_this_record += \
-                dict_data_in_curret_vid[entry]
-
-        # now we add the guests and subjects to the overall dictionary
-        for aperson in lst_persons_in_this_record:
-            if aperson not in list_of_folks_2_ignore:
-                if aperson not in dict_overall_guests_subjects:
-                    # if the person isn't in the overall dictionary
-                    # yet, we initialize their list of subjects
-                    dict_overall_guests_subjects[aperson] = []
-                # then we append the list of subjects in this record
-                # to the person's overall list of subjects.
-                dict_overall_guests_subjects[aperson].extend(
-                    lst_subjects_discussed_in_this_record)
-
-    # now do some data cleanup of the overall guest dictionary
-    # first, remove duplicates in the list of subjects and sort
-    # all the entries in the list of subjects as well.
-    # if you try to do everything at once (as in, also immediately search
-    # for the names of other guests to remove from the list of subjects)
-    # in a nested loop it doesn't work other than for the first guest,
-    # because subsequent guests have not been cleaned-up yet
-    # (duplicates removed.)
-    for person in dict_overall_guests_subjects:
-        # line below removes duplicates from within the list of subjects. This needs
-        # to be done first, or else the removal of names later, will only remove the first
-        # instance of the name
-        dict_overall_guests_subjects[person] = \
-            list(dict.fromkeys(dict_overall_guests_subjects[person]))
-        # sort the list of subjects
-        dict_overall_guests_subjects[person].sort()
-
-    # NOW that duplicates have been removed you can do a nested
-    # loop to remove guests from each other's list of subjects
-    for person in dict_overall_guests_subjects:
-        # any guests name, that shows up in the list of
-        # topics/tags/assets of any other guest (including itself)
-        guestNameToRemoveFromOtherGuestsSubjects = person
-        for aGuestLevel2 in dict_overall_guests_subjects:
-            if guestNameToRemoveFromOtherGuestsSubjects in dict_overall_guests_subjects[aGuestLevel2]:
-                dict_overall_guests_subjects[aGuestLevel2].remove(guestNameToRemoveFromOtherGuestsSubjects)
+    dict_overall_guests_subjects = guests_subjects_graph.make_guests_subjects_dict(lst_vid_ids,
+                                                                                   list_of_folks_2_ignore)
 
     # we can write the guest and subject data to a CSV file for ease of viewing/troubleshooting
     # To do so, the 'import csv' line must be added at the top of this file
@@ -588,6 +608,8 @@ def extract_guestsNsubjects(list_of_folks_2_ignore):  # noqa: C901
     fileName = theDirectory + midFileName + projectStandardTimestamp() + '.json'
     with open(fileName, mode='w') as guestsAndSubjectsJSONfile:
         json.dump(dict_overall_guests_subjects, guestsAndSubjectsJSONfile)
+    guests_subjects_graph.record_output(dict_overall_guests_subjects, list_of_folks_2_ignore, fileName)
+    guests_subjects_graph.save()
 
     return dict_overall_guests_subjects
 
@@ -21,9 +21,35 @@ str_job_sched_weekly_hours = my_config.job_sched_weekly_hours
 # timeout when doing web stuff
 int_timeout = 10
 
+# when downloading lots of pages from the RV website at the same time (for example transcripts)
+# these control how many downloads happen at once, how many requests per second can go to
+# the same host, and how many times (and how patiently) a failed request is retried.
+int_num_concurrent_downloads = 8
+flt_max_requests_per_second_per_host = 5.0
+int_http_max_retries = 3
+flt_http_backoff_base_secs = 1.0
+
+# text is extracted from PDFs (publications and PDF transcripts) by a pool of this many processes,
+# and a page (or a whole document) that takes longer than these many seconds is given up on.
+int_pdf_extraction_processes = 4
+flt_pdf_page_timeout_secs = 30.0
+flt_pdf_document_timeout_secs = 180.0
+
+# algorithm used to hash the data of videos and publications from the RV website (to detect changes)
+str_content_hash_algorithm = 'blake2b'
+
+# in an incremental pull of videos from the RV website (newest first) the pull of a product
+# stops after this many pages in a row have nothing new or changed in them.
+int_incremental_pull_unchanged_pages_to_stop = 1
+
 # airtable bases
 str_AT_base = my_config.AT_base
 str_AT_base_working_on = my_config.AT_base_working_on
+# the Airtable API accepts at most 5 requests per second (per base) and up to 10 records in each request
+# that creates, updates or deletes records. All requests to Airtable in a job share the same limiter.
+flt_airtable_max_requests_per_second = 5.0
+int_airtable_request_burst = 1
+int_airtable_max_records_per_request = 10
 
 # algolia variables
 # fieldnames:
@@ -48,6 +74,16 @@ str_alg_fieldname_numcomments = 'Number of Comments'
 str_alg_fieldname_transcript = 'Transcript'
 str_alg_fieldname_pseudotranscript = 'Pseudo-transcript'
 str_alg_fieldname_numpages = 'Page Count'
+# records are pushed to Algolia in batches of up to this many records, or bytes (whichever
+# comes first), with up to this many batches being sent at the same time.
+int_algolia_max_records_per_batch = 1000
+int_algolia_max_bytes_per_batch = 5000000
+int_algolia_batches_in_flight = 4
+# name of the file (in the directory of each Algolia SimpleDS) that keeps which records
+# have fields that were updated locally, but not pushed to Algolia yet.
+str_filename_algolia_dirty_index = 'dirty_records.json'
+# number of threads reading (and hashing) pseudo-texts from disk when building Algolia units in bulk
+int_algolia_join_threads_reading_pseudotexts = 8
 # Algolia indexes and dictionaries
 # VIDEOS index 01 is an index where we are pushing all fields, and the PSEUDO-transcript
 str_algolia_vids_idx_01 = my_config.algolia_vids_idx_01
@@ -157,6 +193,16 @@ lst_rv_website_product_ids_publications = [str_product_name_access, str_product_
 int_max_vid_deletions_tolerance = 10
 int_max_pub_deletions_tolerance = 5
 
+# number of worker processes to use for the CPU-heavy natural language processing
+# (for example, building term-count data for transcripts). A value of 1 means
+# everything runs serially in the main process, as it always used to.
+int_num_worker_processes_nlp = 4
+
+# when the doc-count vector changes (transcripts added, updated or deleted) the IDF of terms
+# moves. The TF-IDF of a transcript that already has it is only re-calculated if the IDF of
+# one of its terms has moved by more than this (absolute) amount since it was last calculated.
+flt_idf_shift_threshold_for_tfidf_refresh = 0.05
+
 # In the lists below, make sure you have a comma after each of the
 # sub-lists. Python won't warn about the syntax if you don't, but
 # the code won't run and it is an obscure error.
@@ -270,6 +316,14 @@ dict_vids_from_website_schema = {'id': ['id'],
                                  'video_published_on': ['attributes', 'video_published_on'],
                                  'video_is_free': ['attributes', 'video_is_free'],
                                  }
+# fields (from the schema above) of which a copy is kept for all videos in a single file (the
+# 'projection' of the website videos SimpleDS) so they can be read without opening every video.
+# The fields that make up the Algolia units of the videos are all in it as well.
+lst_website_vid_fields_in_projection = ['video_title', 'show', 'video_published_on', 'video_featuring',
+                                        'video_interviewer', 'video_topic_names', 'video_tag_names',
+                                        'video_asset_names', 'id', 'type', 'thumbnail', 'video_description',
+                                        'video_product_id', 'video_likes_count', 'video_dislikes_count',
+                                        'video_duration']
 dict_pubs_from_website_schema = {'id': ['id'],
                                  'type': ['type'],
                                  'thumbnail': ['links', 'thumbnail'],
@@ -540,6 +594,17 @@ str_fullfilepath_generic_execution_variables = str_dir4_execution_related_generi
 
 str_dir4_execution_related_rvwebsite = str_dir4_execution_related + 'rv_website/'
 str_dir4_product_id_info = str_dir4_execution_related_rvwebsite + 'product_ids/'
+str_dir4_http_cache = str_dir4_execution_related_rvwebsite + 'http_cache/'
+# the bodies kept by the HTTP cache are evicted (least recently used first) once they take more than
+# this many bytes, and any url that has not been requested for this many days is dropped from the cache.
+int_http_cache_max_bytes_of_bodies = 2000000000
+int_http_cache_max_days_unused = 30
+str_dir4_pdf_text_cache = str_dir4_execution_related_rvwebsite + 'pdf_text_cache/'
+str_fullfilepath_comments_refresh_schedule = str_dir4_execution_related_rvwebsite + 'comments_refresh_schedule.json'
+str_fullfilepath_guests_subjects_graph = str_dir4_execution_related_rvwebsite + 'guests_subjects_graph.pkl'
+# manifests (IDs, hashes, error flags) of the files with sets of videos/publications pulled from the RV website
+str_fullfilepath_manifest_video_sets = str_dir4_execution_related_rvwebsite + 'manifest_of_video_sets.json'
+str_fullfilepath_manifest_pub_sets = str_dir4_execution_related_rvwebsite + 'manifest_of_publication_sets.json'
 str_fullfilepath_rv_website_authentication_data = \
     str_dir4_execution_related_rvwebsite + 'Authentication/auth_data.json'
 str_fullfilepath_rv_website_authentication_vars = \
@@ -589,6 +654,7 @@ str_filename_base_string4_manipd_website_interviewers = 'interviewers'
 
 str_dir4_website_vids_ds = str_path4_outputs_raw_from_web + 'rv_website_videos_datastructure/'
 str_dir4_website_pubs_ds = str_path4_outputs_raw_from_web + 'rv_website_pubs_datastructure/'
+str_fullfilepath_website_vids_projection = str_dir4_website_vids_ds + 'projection_of_fields.pkl'
 
 str_dir4_airt_vids_ds = str_path4_outputs_manipd_simpledsinstances + 'website_vids_as_airT_format/'
 
@@ -6,7 +6,17 @@ import glob
 import time
 import my_globals
 import csv
+import itertools
+import requests
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from class_trancript import Transcript
+from class_throttled_session import ThrottledSession
+from class_http_conditional_cache import HttpConditionalCache
+from class_comments_refresh_scheduler import CommentsRefreshScheduler
+from class_pdf_text_extractor import PdfTextExtractor
+from class_set_files_manifest import make_manifest_of_vid_sets, make_manifest_of_pub_sets
+from my_content_hashing import hash_matches
 from class_simpleDS import SimpleDS
 from class_percent_tracker import PercentTracker
 from class_rv_website_json_vid import RVwebsiteVid
@@ -58,46 +68,76 @@ def make_list_of_urls_with_vids_data(product_id, multiple, max_multiple):
 # ------------------------ END FUNCTION ------------------------ #
 
 
-def pull_products_info_from_web_and_save2files():
+def pull_products_info_from_web_and_save2files(num_concurrent_downloads=my_globals.int_num_concurrent_downloads):
     """This function updates attributes about "products" (eg. 'television')
-    from the RV website."""
+    from the RV website. The products are looked up in parallel.
+    It returns a dictionary with the url of the last page of videos of each product as the
+    key, and the contents of that page as the value. Finding the max multiple means downloading
+    that page anyway, so this can be handed to the function that pulls the sets of videos, which
+    then doesn't need to download it again."""
     logging.info("Updating attributes about 'products' from RV website.")
     lst_product_ids = my_globals.lst_rv_website_product_ids
     high_limit_on_search = my_globals.num_upper_bound_on_search_of_highest_multiple
-    for prod_id in lst_product_ids:
-        logging.info('Finding info for product: ' + prod_id)
-        multiple = 0
-        max_multiple = 0
-        info_pulled_without_errors = False
-        try:
-            # function called below finds how many objects the
-            # website api is returning per page
-            multiple = refresh_integer_multiple_from_web(prod_id)
-            logging.info('Website returning ' + str(multiple) + ' items per page.')
-            # function called below uses a binary search to find the highest
-            # multiple of 24 that still returns data for a specific product_id
-            max_multiple = refresh_max_multiple_from_web(prod_id, multiple, high_limit_on_search)
-            logging.info('Maximum multiple: ' + str(max_multiple))
-            info_pulled_without_errors = True
-        except Exception as e:
-            logging.error("Problem during function 'pull_products_info_from_web_and_save2files'."
-                          " The Exception was: " + repr(e))
-
-        # we'll only modify the currently held information on disk if we are fairly
-        # confident that the code above ran without issues. If there were no problems
-        # the boolean variable should have been set to true, and also the variable 'multiple' should
-        # be different to zero (note that max_multiple can sometimes be zero for a
-        # new product. For example, for a few weeks, max multiple was zero for the crypto product.
-        if info_pulled_without_errors and (multiple != 0):
-            # save the max multiple in a dictionary, in case in the future
-            # we want to save other attributes related to the product id.
-            dict_attribs_prodid = {'base multiple': multiple,
-                                   'max multiple': max_multiple}
-            # Then we save that to a file
-            filename = my_globals.str_dir4_product_id_info + prod_id
-            with open(filename, 'w') as fileJSONdump:
-                logging.debug('Saving dictionary of attributes to file -> ' + filename)
-                json.dump(dict_attribs_prodid, fileJSONdump)
+    dict_prefetched_pages = {}
+    throttled_session = ThrottledSession(requests.session())
+    with ThreadPoolExecutor(max_workers=num_concurrent_downloads) as executor:
+        dict_futures = {executor.submit(refresh_product_info_from_web, throttled_session, prod_id,
+                                        high_limit_on_search): prod_id for prod_id in lst_product_ids}
+        for future in as_completed(dict_futures):
+            prod_id = dict_futures[future]
+            multiple = 0
+            max_multiple = 0
+            info_pulled_without_errors = False
+            try:
+                multiple, max_multiple, str_url_last_page, str_last_page = future.result()
+                logging.info('Product ' + prod_id + '. Website returning ' + str(multiple) + ' items per page.'
+                             ' Maximum multiple: ' + str(max_multiple))
+                dict_prefetched_pages[str_url_last_page] = str_last_page
+                info_pulled_without_errors = True
+            except Exception as e:
+                logging.error("Problem during function 'pull_products_info_from_web_and_save2files' for product: "
+                              + prod_id + " The Exception was: " + repr(e))
+
+            # we'll only modify the currently held information on disk if we are fairly
+            # confident that the code above ran without issues. If there were no problems
+            # the boolean variable should have been set to true, and also the variable 'multiple' should
+            # be different to zero (note that max_multiple can sometimes be zero for a
+            # new product. For example, for a few weeks, max multiple was zero for the crypto product.
+            if info_pulled_without_errors and (multiple != 0):
+                # save the max multiple in a dictionary, in case in the future
+                # we want to save other attributes related to the product id.
+                dict_attribs_prodid = {'base multiple': multiple,
+                                       'max multiple': max_multiple}
+                # Then we save that to a file
+                filename = my_globals.str_dir4_product_id_info + prod_id
+                with open(filename, 'w') as fileJSONdump:
+                    logging.debug('Saving dictionary of attributes to file -> ' + filename)
+                    json.dump(dict_attribs_prodid, fileJSONdump)
+    return dict_prefetched_pages
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def refresh_product_info_from_web(requests_session, prod_id, high_limit_on_search):
+    """Finds the multiple (videos per page) and max multiple of a product. The search for the max
+    multiple starts from the max multiple we already have on disk for the product (if any.)
+    Returns a tuple with the multiple, the max multiple, and the url and contents of the last page."""
+    logging.info('Finding info for product: ' + prod_id)
+    int_last_known_max_multiple = 0
+    try:
+        int_last_known_max_multiple = grab_from_disk_product_info(prod_id, 'max multiple')
+    except Exception:
+        logging.info('No max multiple on disk for product: ' + prod_id + '. Searching from zero.')
+    # function called below finds how many objects the
+    # website api is returning per page
+    multiple = refresh_integer_multiple_from_web(prod_id)
+    # function called below uses a galloping search to find the highest
+    # multiple of 24 that still returns data for a specific product_id
+    max_multiple, str_url_last_page, str_last_page = \
+        refresh_max_multiple_from_web(prod_id, multiple, high_limit_on_search, requests_session,
+                                      int_last_known_max_multiple=int_last_known_max_multiple)
+    return multiple, max_multiple, str_url_last_page, str_last_page
 
 
 # ------------------------ END FUNCTION ------------------------ #
@@ -212,12 +252,14 @@ def extractFieldsFromShowsData():
 
 # ------------------------ END FUNCTION ------------------------ #
 
-def detect_if_data_on_disk_is_full_set_of_vids():
+def detect_if_data_on_disk_is_full_set_of_vids(manifest_of_vid_sets=None):
     """This function takes a look at the set of files on disk regarding video metadata
     pulled form the RV website, and decides if the latest 'pull' was a partial pull or
     a full pull. This is done in order to assist with figuring out if any videos were deleted
     at the source. This can only be figured out when the latest pull is a 'full' pull.
-    It returns TRUE from a full pull, and FALSE for anything else."""
+    It returns TRUE from a full pull, and FALSE for anything else.
+    The files are counted using the manifest of the sets of videos (which is made if
+    it isn't passed to the function.)"""
 
     # What we need to do, is check (for each product) how many files there SHOULD be
     # on disk (if the entire set of files was pulled) and then compare that with how
@@ -226,6 +268,8 @@ def detect_if_data_on_disk_is_full_set_of_vids():
     logging.debug("Detecting if sets of videos on disk represent a 'full' or a 'partial' pull"
                   " from the RV website.")
     sets_of_files_represent_full_pull = True
+    if manifest_of_vid_sets is None:
+        manifest_of_vid_sets = make_manifest_of_vid_sets()
     list_of_rv_video_products = my_globals.lst_rv_website_product_ids
     for a_product in list_of_rv_video_products:
         multiple_used = 0
@@ -247,8 +291,7 @@ def detect_if_data_on_disk_is_full_set_of_vids():
         # now, after the division has been done safely we can add one to arrive at the right number
         num_files_should_have_for_full_pull += 1
         # now we find out how many files there actually are
-        path_pattern = my_globals.str_dir_path_raw_website_json_video_sets + '*' + a_product + '*'
-        num_files_on_disk = len(glob.glob(path_pattern))
+        num_files_on_disk = manifest_of_vid_sets.count_files_with_name_containing(a_product)
         if num_files_on_disk != num_files_should_have_for_full_pull:
             sets_of_files_represent_full_pull = False
             # as soon as we find a product that doesn't have the right number of files, we
@@ -259,7 +302,7 @@ def detect_if_data_on_disk_is_full_set_of_vids():
 
 # ------------------------ END FUNCTION ------------------------ #
 
-def detect_if_data_on_disk_is_full_set_of_pubs():
+def detect_if_data_on_disk_is_full_set_of_pubs(manifest_of_pub_sets=None):
     """AT THE MOMENT THIS FUNCTION IS REALLY A PLACEHOLDER.
     When it comes to videos, the similar function can actually do some checks, because video
     files are downloaded in sets of 24, and we save to disk the number of sets there should be
@@ -269,53 +312,60 @@ def detect_if_data_on_disk_is_full_set_of_pubs():
     list.
     POSSIBLY IN THE FUTURE, if the publications start being returned by the API in sets
     this function can be changed to be similar to its corresponding function for the videos,
-    and check that the right number of files exist on disk."""
+    and check that the right number of files exist on disk.
+    The files are checked using the manifest of the sets of publications (which is
+    made if it isn't passed to the function.)"""
 
     sets_of_files_represent_full_pull = True
+    if manifest_of_pub_sets is None:
+        manifest_of_pub_sets = make_manifest_of_pub_sets()
 
     # get a list of the products for publications
     list_pubs_products = my_globals.lst_rv_website_product_ids_publications
     # now, for each product, we make sure there is one (and exactly one) file on disk
     for a_product in list_pubs_products:
-        path_pattern = my_globals.str_dir_path_raw_website_json_pubs_sets + '*' + a_product + '*'
-        list_of_files_per_product = glob.glob(path_pattern)
-        if len(list_of_files_per_product) != 1:
+        if manifest_of_pub_sets.count_files_with_name_containing(a_product) != 1:
             sets_of_files_represent_full_pull = False
             # as soon as we find a product that doesn't have the right number of files, we
             # can exit the loop/function
             break
         else:
-            # otherwise, if there is indeed 1 and only 1 file per product, we
-            # open the file, load the json, and make sure the list inside the json data
-            # is not empty.
+            # otherwise, if there is indeed 1 and only 1 file per product, we make sure
+            # the list inside the json data (the publications) is not empty. If there isn't
+            # anything in it, we set the variable that is tracking the full pull to false.
             directory = my_globals.str_dir_path_raw_website_json_pubs_sets
             filename_base = my_globals.str_filename_base_string4_raw_website_json_pubs_sets
             filepath = directory + filename_base + a_product + '.json'
-            with open(filepath, mode='r') as file_with_set_of_pubs:
-                dict_json_data = json.load(file_with_set_of_pubs)
-                # there is a "data" structure in each file, and inside that
-                # structure is the list of all the publications. So the following
-                # line grabs the list of publications from inside the "data"
-                # wrapper.
-                list_vids = dict_json_data["data"]
-                # now, we check to make sure there is something inside the list. If there isn't
-                # we set the variable that is tracking the full pull to false.
-                if not list_vids:
-                    sets_of_files_represent_full_pull = False
+            if not manifest_of_pub_sets.fetch_ids_in_file(filepath):
+                sets_of_files_represent_full_pull = False
 
     return sets_of_files_represent_full_pull
 
 
 # ------------------------ END FUNCTION ------------------------ #
 
-def pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple_to_pull=-1):  # noqa: C901
+def pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple_to_pull=-1,  # noqa: C901
+                                                 num_concurrent_downloads=my_globals.int_num_concurrent_downloads,
+                                                 use_http_cache=True, stop_after_x_unchanged_pages=0,
+                                                 dict_prefetched_pages=None):
     """This function pulls data about videos from the RV website. The websites returns
     the videos in sets (currently in sets of 24 per page.) Each of these sets
     is saved to a file.
     If the variable passed to the function 'max_multiple' is -1, then this means
     that the caller would like this function to grab ALL the info from the
     website. Otherwise, if the multiple is specified, only a subset, up to and
-    including the multiple passed will be downloaded."""
+    including the multiple passed will be downloaded.
+    The pages of all products are downloaded in parallel (num_concurrent_downloads at a time.)
+    If any of them fails, none of the fresh files are kept, and the previous ones are restored.
+    If use_http_cache is True, pages are fetched through an HttpConditionalCache, so pages
+    that haven't changed since the last pull are not downloaded again.
+    If stop_after_x_unchanged_pages is more than zero, the pull is incremental: the pages of each
+    product are pulled from newest to oldest, and the pull of a product stops as soon as that many
+    pages in a row only have videos that are already in the website videos SimpleDS, unchanged.
+    An incremental pull is a partial pull, so it can't be used to detect deleted videos.
+    dict_prefetched_pages can have pages that were already downloaded (the url as the key, and the
+    contents as the value), such as the last page of each product, which is downloaded while
+    looking for the max multiple. Those are written to their files without downloading them again."""
 
     # First, we will move all the existing files into a temporary backup directory,
     # so that, just in case, if anything goes wrong during the pull of fresh data
@@ -338,10 +388,15 @@ def pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple_to_pull=-1):  # no
                       " will exit without downloading new data. The Exception was: " + repr(e))
 
     error_while_downloading_fresh_data = False
+    http_cache = None
     # we only proceed with the download if we were able to successfully create a temporary backup
     # of the existing files
     if success_in_making_temporary_backup_of_files:
         try:
+            # first we make a list of all the pages (of all the products) that need downloading,
+            # together with the file each one is saved to, so they can all be downloaded in parallel.
+            lst_urls_and_filenames = []
+            dict_product_urls_and_filenames = {}
             list_of_rv_video_products = my_globals.lst_rv_website_product_ids
             for a_product in list_of_rv_video_products:
                 logging.debug('Getting from disk the number (multiple) of videos returned by the RV'
@@ -369,27 +424,66 @@ def pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple_to_pull=-1):  # no
                 listOfUrls = make_list_of_urls_with_vids_data(a_product, multiple_used, max_multiple)
                 logging.debug(my_globals.str_logging_func_exited + make_list_of_urls_with_vids_data.__name__)
 
-                # Now, output the json data returned by each request into a file.
-                fileNumber = 0
-                logging.info('Working on product: ' + a_product)
-                logging.debug(
-                    'Pulling videos (for each URL constructed) from RV website and saving (one set per file) to disk.')
-                for eachURL in listOfUrls:
-                    if max_multiple != 0:
-                        logging.info(
-                            "{:.2%}".format(fileNumber / max_multiple) + " complete. Retreiving data from set: " + str(
-                                fileNumber))
-                    else:
-                        logging.info("Retreiving data from set: " + str(fileNumber))
-                    logging.debug('Downloading: ' + eachURL)
-                    response = urllib.request.urlopen(eachURL, timeout=my_globals.int_timeout)
-                    theDirectory = my_globals.str_dir_path_raw_website_json_video_sets
+                # each file is numbered with the number of videos skipped by its URL, which is
+                # the position of the URL in the list times the multiple the website is using.
+                theDirectory = my_globals.str_dir_path_raw_website_json_video_sets
+                dict_product_urls_and_filenames[a_product] = []
+                for int_position, eachURL in enumerate(listOfUrls):
+                    fileNumber = int_position * multiple_used
                     fileName = theDirectory + my_globals.str_filename_base_string4_raw_website_json_video_sets + \
                         a_product + str(fileNumber) + '.json'
-                    with open(fileName, 'w') as fileWithJSONdump:
-                        logging.debug('Saving json data from ' + eachURL + ' -> ' + fileName)
-                        fileWithJSONdump.write(response.read().decode('utf-8'))
-                    fileNumber += 24
+                    lst_urls_and_filenames.append((eachURL, fileName))
+                    dict_product_urls_and_filenames[a_product].append((eachURL, fileName))
+
+            # Now, output the json data returned by each request into a file. The pages are downloaded
+            # by a pool of threads, each of which keeps its connection to the website open (keep-alive)
+            # rather than opening a new one for every page.
+            throttled_session = ThrottledSession(requests.session())
+            if use_http_cache:
+                http_cache = HttpConditionalCache()
+            executor = ThreadPoolExecutor(max_workers=num_concurrent_downloads)
+            try:
+                if stop_after_x_unchanged_pages > 0:
+                    # incremental pull. The pages of each product are pulled in order (newest videos
+                    # first) until enough pages in a row have nothing new, so here the parallelism is
+                    # across products, not pages.
+                    logging.info('Pulling sets of videos from RV website (incrementally) and saving (one set per'
+                                 ' file) to disk.')
+                    dict_known_vid_hashes = fetch_hashes_of_videos_in_website_vids_ds()
+                    dict_futures = {executor.submit(download_pages_until_unchanged, throttled_session,
+                                                    dict_product_urls_and_filenames[a_product], dict_known_vid_hashes,
+                                                    stop_after_x_unchanged_pages, http_cache,
+                                                    dict_prefetched_pages): a_product
+                                    for a_product in dict_product_urls_and_filenames}
+                    for future in as_completed(dict_futures):
+                        # if a download failed, the line below raises the exception that made it fail
+                        int_pages_pulled = future.result()
+                        logging.info('Pages pulled for product ' + dict_futures[future] + ': ' +
+                                     str(int_pages_pulled) + ' (out of ' +
+                                     str(len(dict_product_urls_and_filenames[dict_futures[future]])) + ')')
+                else:
+                    logging.info('Pulling ' + str(len(lst_urls_and_filenames)) + ' sets of videos from RV website'
+                                 ' and saving (one set per file) to disk.')
+                    percent_tracker = PercentTracker(len(lst_urls_and_filenames), int_output_every_x_percent=10,
+                                                     log_level='info')
+                    counter = 0
+                    lst_futures = [executor.submit(download_a_page_to_file, throttled_session, eachURL, fileName,
+                                                   http_cache, 'video sets', dict_prefetched_pages)
+                                   for eachURL, fileName in lst_urls_and_filenames]
+                    for future in as_completed(lst_futures):
+                        # if the download failed, the line below raises the exception that made it fail
+                        future.result()
+                        counter += 1
+                        percent_tracker.update_progress(counter,
+                                                        str_description_to_include_in_logging='Pulling sets of'
+                                                                                              ' videos.')
+            finally:
+                # if a download failed, there is no point in carrying on with the ones not yet started.
+                # (we still wait for the ones already running, so no file is written after the rollback.)
+                executor.shutdown(wait=True, cancel_futures=True)
+                if http_cache is not None:
+                    http_cache.log_summary()
+                    http_cache.save()
         except Exception as e:
             logging.error("Problem during function 'pull_sets_of_videos_JSON_data_from_web_2disk' while trying"
                           " to download fresh sets of videos metadata. The Exception was: " + repr(e))
@@ -417,6 +511,81 @@ def pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple_to_pull=-1):  # no
             lst_of_files_fullpaths = glob.glob(path_pattern)
             for path in lst_of_files_fullpaths:
                 os.remove(path)
+    # the manifest of the files (IDs, hashes, errors) is made now, in one pass, so the functions that
+    # check and use the files afterwards don't each have to read all of them again.
+    make_manifest_of_vid_sets()
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def fetch_hashes_of_videos_in_website_vids_ds():
+    """Returns a dictionary with the ID of every video in the website videos SimpleDS as
+    the key, and the hash of its data as the value."""
+    web_vids_ds = SimpleDS(my_globals.str_dir4_website_vids_ds, my_globals.str_name_simpleds_website_vids)
+    web_vids_ds.load()
+    return {a_vid: web_vids_ds.fetch_hash(a_vid) for a_vid in web_vids_ds.fetch_all_ids_as_python_set()}
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def download_pages_until_unchanged(requests_session, lst_urls_and_filenames, dict_known_vid_hashes,
+                                   int_unchanged_pages_to_stop, http_cache=None, dict_prefetched_pages=None):
+    """Downloads pages with sets of videos (in the order given) and saves each one to its file,
+    until int_unchanged_pages_to_stop pages in a row are 'unchanged', which means every video on
+    them is already known, with the same hash (the hash is calculated the same way as it is
+    when videos are saved to the website videos SimpleDS.) Returns the number of pages downloaded."""
+    int_consecutive_unchanged_pages = 0
+    int_pages_downloaded = 0
+    for eachURL, fileName in lst_urls_and_filenames:
+        str_page = download_a_page_to_file(requests_session, eachURL, fileName, http_cache, 'video sets',
+                                           dict_prefetched_pages)
+        int_pages_downloaded += 1
+        list_vids = json.loads(str_page)['data']
+        page_is_unchanged = bool(list_vids)
+        for a_vid in list_vids:
+            if not hash_matches(dict_known_vid_hashes.get(a_vid['id'], ''), a_vid):
+                page_is_unchanged = False
+                break
+        if page_is_unchanged:
+            int_consecutive_unchanged_pages += 1
+        else:
+            int_consecutive_unchanged_pages = 0
+        if int_consecutive_unchanged_pages >= int_unchanged_pages_to_stop:
+            break
+    return int_pages_downloaded
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def download_a_page_to_file(requests_session, str_url, str_fullpath_file, http_cache=None, str_endpoint='',
+                            dict_prefetched_pages=None):
+    """Downloads a page and saves its contents (as text) to a file. Any problem, including the
+    website replying with an error status, raises an exception. If an HttpConditionalCache is
+    given, the page is fetched through it (and counted against str_endpoint.) If the url is in
+    dict_prefetched_pages, the contents in there are used, and nothing is downloaded.
+    Returns the contents of the page."""
+    if (dict_prefetched_pages is not None) and (str_url in dict_prefetched_pages):
+        logging.debug('Using the contents already downloaded from: ' + str_url)
+        str_page = dict_prefetched_pages[str_url]
+        with open(str_fullpath_file, 'w') as fileWithJSONdump:
+            fileWithJSONdump.write(str_page)
+        return str_page
+    logging.debug('Downloading: ' + str_url)
+    if http_cache is not None:
+        response = http_cache.get(requests_session, str_url, str_endpoint, timeout=my_globals.int_timeout)
+        if response.status_code != 200:
+            raise Exception('Status ' + str(response.status_code) + ' when downloading: ' + str_url)
+    else:
+        response = requests_session.get(str_url, timeout=my_globals.int_timeout)
+        response.raise_for_status()
+    str_page = response.content.decode('utf-8')
+    with open(str_fullpath_file, 'w') as fileWithJSONdump:
+        logging.debug('Saving json data from ' + str_url + ' -> ' + str_fullpath_file)
+        fileWithJSONdump.write(str_page)
+    return str_page
 
 
 # ------------------------ END FUNCTION ------------------------ #
@@ -510,6 +679,9 @@ def pull_sets_of_publications_JSON_data_from_web_2disk(requests_session):  # noq
             lst_of_files_fullpaths = glob.glob(path_pattern)
             for path in lst_of_files_fullpaths:
                 os.remove(path)
+    # the manifest of the files (IDs, hashes, errors) is made now, in one pass, so the functions that
+    # check and use the files afterwards don't each have to read all of them again.
+    make_manifest_of_pub_sets()
     # as stated in the function's documentation comment, we want to return
     # True if the download ran error free, so we negate the error variable and return it
     return not error_while_downloading_fresh_data
@@ -518,49 +690,33 @@ def pull_sets_of_publications_JSON_data_from_web_2disk(requests_session):  # noq
 # ------------------------ END FUNCTION ------------------------ #
 
 
-def check_if_sets_of_vids_are_error_free():
-    int_total_vids_examined = 0
-    # make a list of the files to be examined, so we can
-    # know the size of the list to iterate and display percentages as
-    # we go along.
-    logging.debug('Making list of files to be examined')
-    path_pattern = my_globals.str_dir_path_raw_website_json_video_sets + '*.json'
-    lst_of_filenames = glob.glob(path_pattern)
+def check_if_sets_of_vids_are_error_free(manifest_of_vid_sets=None):
+    """Checks the files with sets of videos (using their manifest, which is made if it isn't
+    passed to the function) for errors: files that could not be parsed, videos whose ID at the
+    top level of the json data is not the same as the one in its 'attributes', and duplicate IDs.
+    Returns True if no errors were found."""
+    if manifest_of_vid_sets is None:
+        manifest_of_vid_sets = make_manifest_of_vid_sets()
 
     sets_of_vids_are_error_free = True
 
-    # need a list to store the ID of each video
-    lst_all_video_ids = []
-
-    logging.debug('Looping through list of files with SETS of videos to do some error checking')
-    for a_file in lst_of_filenames:
-        # each of the files we open with this for loop contains a set
-        # of videos in it. So now we will look at each video
-        logging.debug('Opening file -> ' + a_file)
-        with open(a_file, mode='r') as file_with_set_of_vids:
-            logging.debug('Loading json data from -> ' + a_file)
-            dict_json_data = json.load(file_with_set_of_vids)
-            # there is a "data" structure in each file, and inside that
-            # structure is the list of all the videos. So the following
-            # line grabs the list of videos from inside the "data"
-            # wrapper.
-            list_videos = dict_json_data["data"]
-            for a_vid in list_videos:
-                int_total_vids_examined += 1
-                # the video ID, for some reason, appears in two places in the json
-                # data for each video. Not sure why, but I may as well check that they
-                # are they same, and exit the program if they are not.
-                vid_title = a_vid['attributes']['video_title']
-                logging.debug(
-                    'Checking consistency for video #' + str(int_total_vids_examined) + ' with title -> ' + vid_title)
-                vid_id = a_vid['id']
-                vid_attributes_id = a_vid['attributes']['video_id']
-                if vid_id != vid_attributes_id:
-                    logging.error("Video named: " + vid_title + " has two different IDs associated"
-                                  " with it. One at the top level of the json data, and one in"
-                                  " the 'attributes' area of the json data.")
-                    sets_of_vids_are_error_free = False
-                lst_all_video_ids.append(vid_id)
+    dict_files_not_parsed = manifest_of_vid_sets.fetch_files_that_could_not_be_parsed()
+    for a_file in dict_files_not_parsed:
+        logging.error('The file ' + a_file + ' with a set of videos could not be read. The Exception'
+                      ' was: ' + dict_files_not_parsed[a_file])
+        sets_of_vids_are_error_free = False
+
+    # the video ID, for some reason, appears in two places in the json
+    # data for each video. Not sure why, but I may as well check that they
+    # are they same.
+    for video_title in manifest_of_vid_sets.fetch_titles_with_mismatched_ids():
+        logging.error("Video named: " + video_title + " has two different IDs associated"
+                      " with it. One at the top level of the json data, and one in"
+                      " the 'attributes' area of the json data.")
+        sets_of_vids_are_error_free = False
+
+    lst_all_video_ids = manifest_of_vid_sets.fetch_all_ids_as_list()
+    int_total_vids_examined = len(lst_all_video_ids)
 
     # if for some reason there were to be duplicate IDs in
     # the list of all videos (which there never should be)
@@ -569,8 +725,7 @@ def check_if_sets_of_vids_are_error_free():
     # an issue if they are different.
     logging.info('Checking if any video IDs are duplicates (which there should not be.)')
     set_vid_ids = set(lst_all_video_ids)
-    if not (int_total_vids_examined == len(lst_all_video_ids)
-            and len(lst_all_video_ids) == len(set_vid_ids)):
+    if len(lst_all_video_ids) != len(set_vid_ids):
         logging.warning('There is some discrepancy in the raw data-set of videos.')
         sets_of_vids_are_error_free = False
     else:
@@ -583,49 +738,33 @@ def check_if_sets_of_vids_are_error_free():
 
 # ------------------------ END FUNCTION ------------------------ #
 
-def check_if_sets_of_pubs_are_error_free():
-    int_total_pubs_examined = 0
-    # make a list of the files to be examined, so we can
-    # know the size of the list to iterate and display percentages as
-    # we go along.
-    logging.debug('Making list of files to be examined')
-    path_pattern = my_globals.str_dir_path_raw_website_json_pubs_sets + '*.json'
-    lst_of_filenames = glob.glob(path_pattern)
+def check_if_sets_of_pubs_are_error_free(manifest_of_pub_sets=None):
+    """Checks the files with sets of publications (using their manifest, which is made if it isn't
+    passed to the function) for errors: files that could not be parsed, publications whose ID at the
+    top level of the json data is not the same as the one in its 'attributes', and duplicate IDs.
+    Returns True if no errors were found."""
+    if manifest_of_pub_sets is None:
+        manifest_of_pub_sets = make_manifest_of_pub_sets()
 
     sets_of_pubs_are_error_free = True
 
-    # need a list to store the ID of each publication
-    lst_all_publication_ids = []
-
-    logging.debug('Looping through list of files with SETS of publications to do some error checking')
-    for a_file in lst_of_filenames:
-        # each of the files we open with this for loop contains a set
-        # of publications in it. So now we will look at each publication
-        logging.debug('Opening file -> ' + a_file)
-        with open(a_file, mode='r') as file_with_set_of_pubs:
-            logging.debug('Loading json data from -> ' + a_file)
-            dict_json_data = json.load(file_with_set_of_pubs)
-            # there is a "data" structure in each file, and inside that
-            # structure is the list of all the publications. So the following
-            # line grabs the list of publications from inside the "data"
-            # wrapper.
-            list_publications = dict_json_data["data"]
-            for a_pub in list_publications:
-                int_total_pubs_examined += 1
-                # the publication ID, for some reason, appears in two places in the json
-                # data for each publication. Not sure why, but I may as well check that they
-                # are they same, and exit the program if they are not.
-                pub_title = a_pub[my_globals.str_vid_attributes]['issue_title']
-                logging.debug('Checking consistency for publication #' +
-                              str(int_total_pubs_examined) + ' with title -> ' + pub_title)
-                pub_id = a_pub[my_globals.str_vid_id]
-                pub_attributes_id = a_pub[my_globals.str_vid_attributes]['issue_id']
-                if pub_id != pub_attributes_id:
-                    logging.error("publication named: " + pub_title + " has two different IDs associated"
-                                  " with it. One at the top level of the json data, and one in"
-                                  " the 'attributes' area of the json data.")
-                    sets_of_pubs_are_error_free = False
-                lst_all_publication_ids.append(pub_id)
+    dict_files_not_parsed = manifest_of_pub_sets.fetch_files_that_could_not_be_parsed()
+    for a_file in dict_files_not_parsed:
+        logging.error('The file ' + a_file + ' with a set of publications could not be read. The Exception'
+                      ' was: ' + dict_files_not_parsed[a_file])
+        sets_of_pubs_are_error_free = False
+
+    # the publication ID, for some reason, appears in two places in the json
+    # data for each publication. Not sure why, but I may as well check that they
+    # are they same.
+    for publication_title in manifest_of_pub_sets.fetch_titles_with_mismatched_ids():
+        logging.error("Publication named: " + publication_title + " has two different IDs associated"
+                      " with it. One at the top level of the json data, and one in"
+                      " the 'attributes' area of the json data.")
+        sets_of_pubs_are_error_free = False
+
+    lst_all_publication_ids = manifest_of_pub_sets.fetch_all_ids_as_list()
+    int_total_pubs_examined = len(lst_all_publication_ids)
 
     # if for some reason there were to be duplicate IDs in
     # the list of all publications (which there never should be)
@@ -634,8 +773,7 @@ def check_if_sets_of_pubs_are_error_free():
     # an issue if they are different.
     logging.info('Checking if any publication IDs are duplicates (which there should not be.)')
     set_pub_ids = set(lst_all_publication_ids)
-    if not (int_total_pubs_examined == len(lst_all_publication_ids)
-            and len(lst_all_publication_ids) == len(set_pub_ids)):
+    if len(lst_all_publication_ids) != len(set_pub_ids):
         logging.warning('There is some discrepancy in the raw data-set of publications.')
         sets_of_pubs_are_error_free = False
     else:
@@ -661,9 +799,11 @@ def tag_rv_website_vids_for_deletion(tolerance_allow_max_deletions=3, trial_run=
     it should not, as there are several other safeguards in place) so that a maximum of
     X videos specified by the parameter can be tagged for deletion. If more than the
     allowed tolarance is detected, a WARNING is written to the log, and ZERO rows are
-    marked for deletion."""
+    marked for deletion.
+    The IDs of the videos in the files are taken from the manifest of the sets of videos."""
 
-    sets_of_videos_on_disk_are_complete = detect_if_data_on_disk_is_full_set_of_vids()
+    manifest_of_vid_sets = make_manifest_of_vid_sets()
+    sets_of_videos_on_disk_are_complete = detect_if_data_on_disk_is_full_set_of_vids(manifest_of_vid_sets)
     if sets_of_videos_on_disk_are_complete:
         int_total_vids_examined = 0
         int_vids_tagged_for_deletion = 0
@@ -681,43 +821,19 @@ def tag_rv_website_vids_for_deletion(tolerance_allow_max_deletions=3, trial_run=
         # the SimpleDS
         set_videoids_from_web = set()
 
-        # make a list of the files to be examined, so we can
-        # know the size of the list to iterate and display percentages as
-        # we go along.
-        logging.debug('Making a list of the files that contain sets of videos metadata downloaded from the RV website.')
-        path_pattern = my_globals.str_dir_path_raw_website_json_video_sets + '*.json'
-        lst_of_filenames = glob.glob(path_pattern)
-
-        int_progress_counter = 0
-        int_num_files = len(lst_of_filenames)
-        percent_tracker = PercentTracker(int_num_files)
-        # we enclose the whole giant loop below in a try statement, because
+        # we enclose the whole loop below in a try statement, because
         # if something goes wrong, it gives us a chance to still save the instance
         # of SimpleDS to disk, which may help avoid that would be caused by data
         # being saved to disk as part of the loop, but the related rows in the SimpleDS
         # not getting saved to disk at the end of the function.
         try:
             logging.info('Creating the set of all existing videos on the RV website')
-            for a_file in lst_of_filenames:
-                # each of the files we open with this for loop contains a set
-                # of videos in it. So now we will look at each video
-                with open(a_file, mode='r') as file_with_set_of_vids:
-                    logging.debug('Processing file -> ' + a_file)
-                    dict_json_data = json.load(file_with_set_of_vids)
-                    # there is a "data" structure in each file, and inside that
-                    # structure is the list of all the videos. So the following
-                    # line grabs the list of videos from inside the "data"
-                    # wrapper.
-                    list_videos = dict_json_data["data"]
-                    for a_vid in list_videos:
-                        vid_id = a_vid[my_globals.str_vid_id]
-                        # add the video id to the set being used to compile all the IDs of the
-                        # incoming videos
-                        set_videoids_from_web.add(vid_id)
-                        int_total_vids_examined += 1
-
-                int_progress_counter += 1
-                percent_tracker.update_progress(int_progress_counter, 'Examining sets of video files')
+            if manifest_of_vid_sets.fetch_files_that_could_not_be_parsed():
+                # the videos in a file that can't be read would look like they were deleted at source
+                raise Exception('Some of the files with sets of videos could not be read.')
+            lst_videoids_from_web = manifest_of_vid_sets.fetch_all_ids_as_list()
+            set_videoids_from_web.update(lst_videoids_from_web)
+            int_total_vids_examined = len(lst_videoids_from_web)
 
             # now we need to figure out if videos have been removed at source, and
             # if so, delete them from the SimpleDS
@@ -772,9 +888,11 @@ def tag_rv_website_pubs_for_deletion(tolerance_allow_max_deletions=1, trial_run=
     it should not, as there are several other safeguards in place) so that a maximum of
     X publications specified by the parameter can be tagged for deletion. If more than the
     allowed tolarance is detected, a WARNING is written to the log, and ZERO rows are
-    marked for deletion."""
+    marked for deletion.
+    The IDs of the publications in the files are taken from the manifest of the sets of publications."""
 
-    sets_of_publications_on_disk_are_complete = detect_if_data_on_disk_is_full_set_of_pubs()
+    manifest_of_pub_sets = make_manifest_of_pub_sets()
+    sets_of_publications_on_disk_are_complete = detect_if_data_on_disk_is_full_set_of_pubs(manifest_of_pub_sets)
     if sets_of_publications_on_disk_are_complete:
         int_total_pubs_found_locally = 0
         int_pubs_tagged_for_deletion = 0
@@ -792,44 +910,19 @@ def tag_rv_website_pubs_for_deletion(tolerance_allow_max_deletions=1, trial_run=
         # the SimpleDS
         set_publicationids_from_web = set()
 
-        # make a list of the files to be examined, so we can
-        # know the size of the list to iterate and display percentages as
-        # we go along.
-        logging.debug('Making a list of the files that contain sets of publications metadata'
-                      ' downloaded from the RV website.')
-        path_pattern = my_globals.str_dir_path_raw_website_json_pubs_sets + '*.json'
-        lst_of_filenames = glob.glob(path_pattern)
-
-        int_progress_counter = 0
-        int_num_files = len(lst_of_filenames)
-        percent_tracker = PercentTracker(int_num_files)
-        # we enclose the whole giant loop below in a try statement, because
+        # we enclose the whole loop below in a try statement, because
         # if something goes wrong, it gives us a chance to still save the instance
         # of SimpleDS to disk, which may help avoid that would be caused by data
         # being saved to disk as part of the loop, but the related rows in the SimpleDS
         # not getting saved to disk at the end of the function.
         try:
             logging.info('Creating the set of all existing publications on the RV website')
-            for a_file in lst_of_filenames:
-                # each of the files we open with this for loop contains a set
-                # of publications in it. So now we will look at each publication
-                with open(a_file, mode='r') as file_with_set_of_pubs:
-                    logging.debug('Processing file -> ' + a_file)
-                    dict_json_data = json.load(file_with_set_of_pubs)
-                    # there is a "data" structure in each file, and inside that
-                    # structure is the list of all the publications. So the following
-                    # line grabs the list of publications from inside the "data"
-                    # wrapper.
-                    list_publications = dict_json_data["data"]
-                    for a_pub in list_publications:
-                        pub_id = a_pub[my_globals.str_vid_id]
-                        # add the publication id to the set being used to compile all the IDs of the
-                        # incoming publications
-                        set_publicationids_from_web.add(pub_id)
-                        int_total_pubs_found_locally += 1
-
-                int_progress_counter += 1
-                percent_tracker.update_progress(int_progress_counter, 'Examining sets of publication files')
+            if manifest_of_pub_sets.fetch_files_that_could_not_be_parsed():
+                # the publications in a file that can't be read would look like they were deleted at source
+                raise Exception('Some of the files with sets of publications could not be read.')
+            lst_publicationids_from_web = manifest_of_pub_sets.fetch_all_ids_as_list()
+            set_publicationids_from_web.update(lst_publicationids_from_web)
+            int_total_pubs_found_locally = len(lst_publicationids_from_web)
 
             # now we need to figure out if publications have been removed at source, and
             # if so, delete them from the SimpleDS
@@ -872,7 +965,12 @@ def tag_rv_website_pubs_for_deletion(tolerance_allow_max_deletions=1, trial_run=
 
 # ------------------------ END FUNCTION ------------------------ #
 
-def refresh_vids_and_shows_from_rv_website(pullShowsInfo=False, pullVideosInfo=False, max_multiple=-1):
+def refresh_vids_and_shows_from_rv_website(pullShowsInfo=False, pullVideosInfo=False, max_multiple=-1,
+                                           stop_after_x_unchanged_pages=0, dict_prefetched_pages=None):
+    """Re-downloads information about shows and/or videos from the RV website. If
+    stop_after_x_unchanged_pages is more than zero, videos are pulled incrementally (see
+    pull_sets_of_videos_JSON_data_from_web_2disk.) dict_prefetched_pages (pages already downloaded,
+    by url) is passed on to the pull of videos. Returns True if there were no errors."""
     function_ran_error_free = False
     try:
         if pullShowsInfo:
@@ -885,7 +983,9 @@ def refresh_vids_and_shows_from_rv_website(pullShowsInfo=False, pullVideosInfo=F
             # call a function that re-creates the
             # raw videos metadata files (pulling from website)
             logging.debug(my_globals.str_logging_func_next + pull_sets_of_videos_JSON_data_from_web_2disk.__name__)
-            pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple)
+            pull_sets_of_videos_JSON_data_from_web_2disk(max_multiple,
+                                                         stop_after_x_unchanged_pages=stop_after_x_unchanged_pages,
+                                                         dict_prefetched_pages=dict_prefetched_pages)
             logging.debug(my_globals.str_logging_func_exited + pull_sets_of_videos_JSON_data_from_web_2disk.__name__)
         function_ran_error_free = True
     except Exception as e:
@@ -925,7 +1025,8 @@ def refresh_integer_multiple_from_web(str_product_id):
 # ------------------------ END FUNCTION ------------------------ #
 
 
-def refresh_max_multiple_from_web(str_product_id, multiple_of, int_high_number):
+def refresh_max_multiple_from_web(str_product_id, multiple_of, int_high_number, requests_session,  # noqa: C901
+                                  int_last_known_max_multiple=0):
     """Initially we were finding the maximum multiple (at time of writing of
     24) that would still return data from the website api
     manually. This function gets the max multiple
@@ -936,59 +1037,78 @@ def refresh_max_multiple_from_web(str_product_id, multiple_of, int_high_number):
     website returns videos in sets of 24, but that could change),
     as well as a high number that is likely to be higher than the
     max multiple. In other words, a guess of a high number that\
-    will certainly be higher than the max multiple."""
+    will certainly be higher than the max multiple.
+    The max multiple barely moves from one run to the next, so rather than a binary search over
+    everything up to the high number, the search starts at the last known max multiple and
+    'gallops' away from it (1, 2, 4, 8... pages at a time) until it has a page with data and the
+    next one without, and then does a binary search only between those two. When the max multiple
+    hasn't changed, this takes two requests.
+    Returns a tuple with the max multiple, and the url and contents of the page at the max multiple
+    (the last page with data.)"""
 
     logging.debug('Finding the maximum multiple index that can be queried on the website'
                   ' and still returns videos (separately for each product.)')
-    # create an array filled with multiples of the requested integer
-    int_counter_integers = 0
-    lst_multiples_of = [0]
-    logging.debug('The high number for the binay search starting point is: ' + str(int_high_number))
-    while lst_multiples_of[int_counter_integers] <= int_high_number:
-        int_counter_integers += 1
-        lst_multiples_of.append(int_counter_integers * multiple_of)
-
-    # now perform a binary search on versions of the URL to be searched
-
     first_part_url = 'https://www.realvision.com/rv/api/videos?page%5Bskip%5D='
     last_part_url = '&filter%5Bvideo_product_id%5D=' + str_product_id
-
-    # make sure there is actually data returned when the first URL is
-    # queried (using zero as the index.) If not, something is wrong.
-    url = first_part_url + str(0) + last_part_url
-    response = urllib.request.urlopen(url)
-    dictJSONdata = json.load(response)
-    lst_of_data_objects = dictJSONdata["data"]
-    if not lst_of_data_objects:
-        # list is empty, and it shouldn't be with index zero
-        logging.error('SOME data should be returned with index at zero,'
-                      ' so something has gone wrong. Terminating program.')
-        exit(0)
-
-    logging.debug('Starting binary search')
-    int_lower_index = 0
-    int_upper_index = len(lst_multiples_of) - 1
-    int_search_index = len(lst_multiples_of) - 1
-    bool_max_multiple_found = False
-    while not bool_max_multiple_found:
-        # we know there is data at the beginning, so we start searching in
-        # the upper half.
-        url = first_part_url + str(lst_multiples_of[int_search_index]) + last_part_url
-        response = urllib.request.urlopen(url)
-        dictJSONdata = json.load(response)
-        lst_of_data_objects = dictJSONdata["data"]
-        if lst_of_data_objects:
-            int_lower_index = int_search_index
+    # we work with the position of the pages (0, 1, 2...) and multiply by multiple_of to make the urls.
+    # The pages are kept, so the last one with data can be returned.
+    int_highest_page = int(int_high_number / multiple_of) + 1
+    dict_pages = {}
+
+    def page_has_data(int_page):
+        url = first_part_url + str(int_page * multiple_of) + last_part_url
+        response = requests_session.get(url, timeout=my_globals.int_timeout)
+        response.raise_for_status()
+        dict_pages[int_page] = (url, response.content.decode('utf-8'))
+        return bool(json.loads(dict_pages[int_page][1])['data'])
+
+    int_start_page = min(max(int(int_last_known_max_multiple / multiple_of), 0), int_highest_page)
+    logging.debug('Starting galloping search at page: ' + str(int_start_page))
+    int_step = 1
+    if page_has_data(int_start_page):
+        # gallop upwards, until a page without data is found
+        int_page_with_data = int_start_page
+        int_page_without_data = -1
+        while int_page_without_data == -1:
+            int_probe = int_page_with_data + int_step
+            if int_probe > int_highest_page:
+                # this (in theory) never happens, because the high number is deliberately far above
+                # the number of videos in any product.
+                int_page_without_data = int_highest_page + 1
+            elif page_has_data(int_probe):
+                int_page_with_data = int_probe
+                int_step *= 2
+            else:
+                int_page_without_data = int_probe
+    else:
+        # gallop downwards, until a page with data is found
+        int_page_without_data = int_start_page
+        int_page_with_data = -1
+        while int_page_with_data == -1:
+            int_probe = max(int_page_without_data - int_step, 0)
+            if page_has_data(int_probe):
+                int_page_with_data = int_probe
+            elif int_probe == 0:
+                # list is empty, and it shouldn't be with index zero
+                raise Exception('SOME data should be returned with index at zero, so something has gone wrong.'
+                                ' Product: ' + str_product_id)
+            else:
+                int_page_without_data = int_probe
+                int_step *= 2
+
+    logging.debug('Starting binary search between pages ' + str(int_page_with_data) + ' and ' +
+                  str(int_page_without_data))
+    while int_page_without_data - int_page_with_data > 1:
+        int_middle_page = int((int_page_with_data + int_page_without_data) / 2)
+        if page_has_data(int_middle_page):
+            int_page_with_data = int_middle_page
         else:
-            int_upper_index = int_search_index
-        int_search_index = int((int_upper_index - int_lower_index) / 2) + int_lower_index
-
-        if int_upper_index - int_lower_index <= 1:
-            bool_max_multiple_found = True
+            int_page_without_data = int_middle_page
 
-    max_multiple = lst_multiples_of[int_search_index]
-    logging.debug('Binary search result: ' + str(max_multiple))
-    return max_multiple
+    max_multiple = int_page_with_data * multiple_of
+    logging.debug('Search result: ' + str(max_multiple) + ' (pages requested: ' + str(len(dict_pages)) + ')')
+    str_url_last_page, str_last_page = dict_pages[int_page_with_data]
+    return max_multiple, str_url_last_page, str_last_page
 
 
 # ------------------------ END FUNCTION ------------------------ #
@@ -996,7 +1116,9 @@ def refresh_max_multiple_from_web(str_product_id, multiple_of, int_high_number):
 def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=10000, trial_run=False,  # noqa: C901
                             try_to_fetch_even_if_tagged_as_missing=False, num_of_days_to_consider_a_video_new=14,
                             refresh_even_if_already_have=False,
-                            refresh_even_if_hashes_match=False):
+                            refresh_even_if_hashes_match=False,
+                            num_concurrent_downloads=my_globals.int_num_concurrent_downloads,
+                            use_http_cache=True):
     """This function iterates through the datastructure of raw videos information
     returned from the Real Vision website, and grabs the transcript of each
     video if it exists.
@@ -1016,7 +1138,14 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
     If the flag is set to tell the function to update all videos, even if we already
     have a transcript, then the function will attempt to do so, BUT will still not
     update if the hashes match. This behaviour can also be overridden with the other
-    parameter passed to the function (which is named accordinly.)"""
+    parameter passed to the function (which is named accordinly.)
+    Most of the time of this function is spent waiting for the website, so the transcripts
+    are downloaded by a pool of num_concurrent_downloads threads (through a ThrottledSession,
+    which shares the cookies of the session passed, limits the requests per second to the website
+    and retries failed requests.) The downloaded transcripts are handed back, in order, to this
+    thread, which is the only one that writes to disk and to the SimpleDS instances.
+    If use_http_cache is True, the pages are fetched through an HttpConditionalCache, and
+    transcripts that came from a PDF that hasn't changed are not parsed again."""
 
     int_count_vids_processed = 0
     int_count_vids_transcript_added = 0
@@ -1156,7 +1285,18 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
                                                            ' Starting the addition process now.')
     percent_tracker = PercentTracker(len_lst_vids_to_add, int_output_every_x_percent=5, log_level='info')
     counter = 0
-    for vid2add in lst_vids_to_possibly_add:
+    throttled_session = ThrottledSession(requests_session)
+    http_cache = None
+    if use_http_cache:
+        http_cache = HttpConditionalCache()
+    executor = ThreadPoolExecutor(max_workers=num_concurrent_downloads)
+    # the text of pdf transcripts is extracted by a pool of processes, shared by all the threads
+    pdf_extractor = PdfTextExtractor()
+    for vid2add, future_transcript in fetch_transcripts_concurrently(executor, lst_vids_to_possibly_add,
+                                                                     throttled_session, trial_run,
+                                                                     num_concurrent_downloads * 2,
+                                                                     http_cache=http_cache,
+                                                                     pdf_extractor=pdf_extractor):
         vid_obj = RVwebsiteVid(web_vids_DS.fetch_data(vid2add))
         logging.info('-------- Attempting to extract transcript for video: ' + vid_obj.str_id
                      + ' (' + vid_obj.str_title + ')')
@@ -1173,8 +1313,7 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
             if not execution_should_continue:
                 break
 
-            transcript = Transcript(vid2add)
-            dct_results = transcript.get_transcript_from_rv_website(requests_session, trial_run=trial_run)
+            transcript, dct_results = future_transcript.result()
             dct_results[my_globals.str_transcripts_report_column_videoid] = vid2add
             lst_for_logging_transcript_urls.append(dct_results)
             for key in dct_results:
@@ -1222,7 +1361,17 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
                                                               ' Starting the updating process now.')
     percent_tracker = PercentTracker(len_lst_vids_to_update, int_output_every_x_percent=1, log_level='info')
     counter = 0
-    for vid2update in lst_vids_to_possibly_update:
+    # the transcripts that came from a PDF don't need their PDF parsed again, if it hasn't changed
+    # since it was last downloaded (unless we were asked to refresh transcripts regardless.)
+    set_vids_to_skip_parsing_pdf_if_unchanged = set()
+    if not refresh_even_if_hashes_match:
+        set_vids_to_skip_parsing_pdf_if_unchanged = \
+            {a_vid for a_vid in lst_vids_to_possibly_update
+             if transcripts_DS.tag_check(a_vid, my_globals.str_tag_transcript_source_pdf)}
+    for vid2update, future_transcript in fetch_transcripts_concurrently(
+            executor, lst_vids_to_possibly_update, throttled_session, trial_run, num_concurrent_downloads * 2,
+            http_cache=http_cache, set_vids_to_skip_parsing_pdf_if_unchanged=set_vids_to_skip_parsing_pdf_if_unchanged,
+            pdf_extractor=pdf_extractor):
         vid_obj = RVwebsiteVid(web_vids_DS.fetch_data(vid2update))
         logging.info('-------- Attempting to extract transcript for video: ' + vid_obj.str_id
                      + ' (' + vid_obj.str_title + ')')
@@ -1235,8 +1384,7 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
             if not execution_should_continue:
                 break
 
-            transcript = Transcript(vid2update)
-            dct_results = transcript.get_transcript_from_rv_website(requests_session, trial_run=trial_run)
+            transcript, dct_results = future_transcript.result()
             dct_results[my_globals.str_transcripts_report_column_videoid] = vid2update
             lst_for_logging_transcript_urls.append(dct_results)
             str_transcript = transcript.str_transcript_text
@@ -1287,6 +1435,8 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
                     int_count_vids_transcript_updated += 1
                 else:
                     logging.debug('Transcript untouched')
+            elif transcript.transcript_unchanged_at_source:
+                logging.debug('Transcript untouched (its source is unchanged since it was last fetched)')
             counter += 1
             percent_tracker.update_progress(counter, show_time_remaining_estimate=True,
                                             str_description_to_include_in_logging='Updating transcripts.')
@@ -1297,6 +1447,15 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
         logging.info('-------- Finished the attempt to extract transcript for video: ' + vid_obj.str_id
                      + ' (' + vid_obj.str_title + ')')
 
+    # any downloads that were still queued (if execution was stopped) are not needed any more
+    executor.shutdown(wait=True, cancel_futures=True)
+    pdf_extractor.close()
+    logging.info('Requests made to download transcripts: ' + str(throttled_session.int_num_requests) +
+                 ' (of which retries: ' + str(throttled_session.int_num_retries) + ')')
+    if http_cache is not None:
+        http_cache.log_summary()
+        http_cache.save()
+
     # now we compare the two instances of SimpleDS to see if there are any
     # transcripts that need deleting.
     logging.info('Examining if there are videos that need to be deleted.')
@@ -1355,6 +1514,48 @@ def get_all_vid_transcripts(requests_session, var_manager, max_vids_to_process=1
 # ------------------------ END FUNCTION ------------------------ #
 
 
+def fetch_transcript_from_rv_website(str_vid_id, requests_session, trial_run=False, http_cache=None,
+                                     skip_parsing_pdf_if_unchanged=False, pdf_extractor=None):
+    """Downloads the transcript of a video from the RV website. This is what the threads of
+    get_all_vid_transcripts run, so it doesn't write anything to disk or to a SimpleDS. It returns
+    a tuple with the Transcript object (with the transcript text in it, if it was found) and the
+    dictionary of results of querying the transcript-related urls."""
+    transcript = Transcript(str_vid_id)
+    dct_results = transcript.get_transcript_from_rv_website(requests_session, trial_run=trial_run,
+                                                            http_cache=http_cache,
+                                                            skip_parsing_pdf_if_unchanged=skip_parsing_pdf_if_unchanged,
+                                                            pdf_extractor=pdf_extractor)
+    return transcript, dct_results
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def fetch_transcripts_concurrently(executor, lst_vid_ids, requests_session, trial_run, int_num_to_fetch_ahead,
+                                   http_cache=None, set_vids_to_skip_parsing_pdf_if_unchanged=frozenset(),
+                                   pdf_extractor=None):
+    """This is a generator that hands out (video ID, future) pairs, in the same order as the
+    list of video IDs, where the future will have the result of fetch_transcript_from_rv_website.
+    Only int_num_to_fetch_ahead downloads are queued ahead of the one being handed out, so
+    if the loop using this generator stops early, there isn't a big pile of pointless downloads."""
+    deque_pending = deque()
+    iter_vid_ids = iter(lst_vid_ids)
+
+    def submit(a_vid):
+        deque_pending.append((a_vid, executor.submit(fetch_transcript_from_rv_website, a_vid, requests_session,
+                                                     trial_run, http_cache,
+                                                     a_vid in set_vids_to_skip_parsing_pdf_if_unchanged,
+                                                     pdf_extractor)))
+
+    for a_vid in itertools.islice(iter_vid_ids, int_num_to_fetch_ahead):
+        submit(a_vid)
+    while deque_pending:
+        a_vid, future = deque_pending.popleft()
+        next_vid = next(iter_vid_ids, None)
+        if next_vid is not None:
+            submit(next_vid)
+        yield a_vid, future
+# ------------------------ END FUNCTION ------------------------ #
+
+
 def get_all_publication_fulltexts(requests_session, var_manager, max_pubs_to_process=10000,  # noqa: C901
                                   trial_run=False, refresh_even_if_already_have=False,
                                   refresh_even_if_hashes_match=False):
@@ -1456,6 +1657,8 @@ def get_all_publication_fulltexts(requests_session, var_manager, max_pubs_to_pro
                                                            ' Starting the process now.')
     percent_tracker = PercentTracker(len_lst_pubs_to_add, int_output_every_x_percent=1, log_level='info')
     counter = 0
+    # the text of the pdfs is extracted by a pool of processes, shared by all the publications
+    pdf_extractor = PdfTextExtractor()
     for pub2add in lst_pubs_to_possibly_add:
         pub_obj = RVwebsitePublication(web_pubs_DS.fetch_data(pub2add))
         logging.info('-------- Attempting to extract fulltext from publication: ' + pub_obj.str_id
@@ -1471,7 +1674,7 @@ def get_all_publication_fulltexts(requests_session, var_manager, max_pubs_to_pro
 
             # the (video) Transcript class is useful for the purposes of publications as well
             transcript = Transcript(pub2add)
-            dct_results = transcript.get_publication_fulltext_from_rv_website(requests_session)
+            dct_results = transcript.get_publication_fulltext_from_rv_website(requests_session, pdf_extractor)
             dct_results[my_globals.str_fulltexts_report_column_videoid] = pub2add
             lst_for_logging_fulltext_urls.append(dct_results)
             str_fulltext = transcript.str_transcript_text
@@ -1525,7 +1728,7 @@ def get_all_publication_fulltexts(requests_session, var_manager, max_pubs_to_pro
 
             # the (video) Transcript class is useful for the purposes of publications as well
             transcript = Transcript(pub2update)
-            dct_results = transcript.get_publication_fulltext_from_rv_website(requests_session)
+            dct_results = transcript.get_publication_fulltext_from_rv_website(requests_session, pdf_extractor)
             dct_results[my_globals.str_fulltexts_report_column_videoid] = pub2update
             lst_for_logging_fulltext_urls.append(dct_results)
             str_fulltext = transcript.str_transcript_text
@@ -1585,6 +1788,7 @@ def get_all_publication_fulltexts(requests_session, var_manager, max_pubs_to_pro
                                            '\nThe Exception was: ' + repr(e))
         logging.info('-------- Finished the attempt to extract fulltext from publication: ' + pub_obj.str_id
                      + ' (' + pub_obj.str_title + ')')
+    pdf_extractor.close()
 
     # now we compare the two instances of SimpleDS to see if there are any
     # transcripts that need deleting.
@@ -1639,13 +1843,21 @@ def get_all_publication_fulltexts(requests_session, var_manager, max_pubs_to_pro
 
 
 def get_comments_stats(variable_manager, num_vids_to_process, requests_session, trial_run=False,  # noqa: C901
-                       update_regardless_of_changes=False):
+                       update_regardless_of_changes=False, use_http_cache=True, prioritise_by_activity=True,
+                       num_concurrent_downloads=my_globals.int_num_concurrent_downloads):
     """This function pulls statistics about the comments made
     about a video. Like how many comments, how many replies, how many likes,
     etc. and stores it in the SimpleDS for additional video info.
     This function expects to be given a requests session that is already logged in to the
     RV website.
-    If num_vids_to_process is -1, then all videos known to the SimpleDS will be processed."""
+    If num_vids_to_process is -1, then all videos known to the SimpleDS will be processed.
+    If use_http_cache is True, the comments are fetched through an HttpConditionalCache, and
+    if they haven't changed since they were last fetched (and we already have their stats)
+    they are not parsed again.
+    If prioritise_by_activity is True (and num_vids_to_process is not -1) then num_vids_to_process is
+    a budget of requests, and the videos refreshed are the ones a CommentsRefreshScheduler expects
+    to have gained the most comments since they were last checked (rather than simply the newest.)
+    The comments are downloaded num_concurrent_downloads at a time, and processed in order."""
 
     int_count_vids_processed = 0
     int_count_vids_added = 0
@@ -1689,15 +1901,35 @@ def get_comments_stats(variable_manager, num_vids_to_process, requests_session,
     num_iterations = int_length_vidsDS
     if (num_vids_to_process < int_length_vidsDS) and (num_vids_to_process != -1):
         num_iterations = num_vids_to_process
+    # now decide which videos, and in what order
+    scheduler = CommentsRefreshScheduler()
+    scheduler.load()
+    if prioritise_by_activity and (num_vids_to_process != -1):
+        lst_vids_to_process = scheduler.choose_videos_to_refresh(web_vid_ds, other_vidinfo_DS, num_iterations,
+                                                                 int_time_change_detected)
+        num_iterations = len(lst_vids_to_process)
+    else:
+        lst_vids_to_process = list(itertools.islice(web_vid_ds, num_iterations))
     logging.info('Refreshing comments metadata for ' + str(num_iterations) + ' videos.')
     percent_tracker = PercentTracker(num_iterations, int_output_every_x_percent=5, log_level='info')
+    http_cache = None
+    if use_http_cache:
+        http_cache = HttpConditionalCache()
+    executor = ThreadPoolExecutor(max_workers=num_concurrent_downloads)
+    throttled_session = ThrottledSession(requests_session)
     # we envelop the whole loop in a try/except, so that we are able to save the SimpleDS to disk
     # at the end gracefully, and hopefully avoid inconsistencies where some data has been added
     # to disk, but the corresponding data does not end up getting added to the dataframe because
     # of an error mid-execution (the dataframe does not get saved to disk until the end of the
     # function.)
     try:
-        for webvid_id in web_vid_ds:
+        webvid_id = ''
+        # unless every video is going to be updated regardless of changes, the body of the comments
+        # is only needed when they changed, so the cache does not keep it.
+        for webvid_id, future_comments in fetch_comments_concurrently(executor, lst_vids_to_process,
+                                                                      throttled_session, 2 * num_concurrent_downloads,
+                                                                      http_cache,
+                                                                      keep_body=update_regardless_of_changes):
             continue_execution = variable_manager.var_retrieve(my_globals.str_execution_may_go_on)
             # the following IF makes sure we only iterate through as many videos as
             # requested by one of the parameters passed to the function, and that the function
@@ -1712,20 +1944,40 @@ def get_comments_stats(variable_manager, num_vids_to_process, requests_session,
             int_vid_comments_likes = 0
             int_vid_comments_dislikes = 0
 
-            vid_comments_url = 'https://www.realvision.com/rv/api/threads/' + webvid_id + '/comments'
-            logging.debug("Opening URL of 'comments' for video: " + webvid_id)
             lst_comments = []
+            comments_unchanged_at_source = False
             try:
-                req = requests_session.get(vid_comments_url, timeout=my_globals.int_timeout)
+                # if the download failed, the line below raises the exception that made it fail
+                req = future_comments.result()
+                # if the comments are the same as the last time they were fetched, and we already
+                # have their stats, there is nothing to parse (or to update.)
+                if getattr(req, 'is_unchanged', False) and (not update_regardless_of_changes) and \
+                        (webvid_id in other_vidinfo_DS):
+                    comments_unchanged_at_source = \
+                        my_globals.str_vid_comments in other_vidinfo_DS.fetch_data(webvid_id)
+                if (not comments_unchanged_at_source) and (req.content is None):
+                    # the comments are unchanged at source, but the cache did not keep them, and we don't
+                    # have their stats (or we were asked to update them anyway) so they are downloaded again.
+                    req = fetch_comments_from_rv_website(webvid_id, throttled_session)
                 str_status = str(req.status_code)
                 if '200' in str_status:
                     logging.debug('Status: ' + str_status)
                 else:
                     logging.info('Status: ' + str_status)
-                lst_comments = req.json()[my_globals.str_vid_data]
+                if not comments_unchanged_at_source:
+                    lst_comments = req.json()[my_globals.str_vid_data]
+                if req.status_code == 200:
+                    if comments_unchanged_at_source:
+                        int_num_comments_now = other_vidinfo_DS.fetch_data(webvid_id)[my_globals.str_vid_comments][
+                            my_globals.str_vid_comments_num_total]
+                    else:
+                        int_num_comments_now = len(lst_comments)
+                    scheduler.record_checked(webvid_id, int_time_change_detected, int_num_comments_now)
             except Exception as e:
                 logging.warning('Unable to extract comments from website API for video: '
                                 + webvid_id + ' The Exception was: ' + repr(e))
+            if comments_unchanged_at_source:
+                int_count_vids_not_changed += 1
 
             # now, if we got some info back from the website API we loop
             # through the list of comments and extract some info
@@ -1851,6 +2103,8 @@ def get_comments_stats(variable_manager, num_vids_to_process, requests_session,
             percent_tracker.update_progress(int_count_vids_processed,
                                             show_time_remaining_estimate=True,
                                             str_description_to_include_in_logging='Pulling Video Comments Statistics')
+        # the downloads queued ahead of where the loop stopped (if it stopped early) are not needed.
+        executor.shutdown(wait=True, cancel_futures=True)
 
         # now we delete any videos that have been removed from the source (the source, in this case
         # is represented by the web_vid_ds)
@@ -1864,11 +2118,18 @@ def get_comments_stats(variable_manager, num_vids_to_process, requests_session,
             if not trial_run:
                 other_vidinfo_DS.delete_entry(entry, keep_version_of_file_in_log_directory=True)
             int_count_vids_deleted += 1
+        scheduler.forget_videos_not_in(set_vids_in_web_vid_ds)
 
     except Exception as e:
         logging.warning('Something went wrong during the loop that pulls stats about video comments. This happened'
                         ' while processing video: ' + webvid_id + ' The Exception was: ' + repr(e))
+    executor.shutdown(wait=True, cancel_futures=True)
     other_vidinfo_DS.save2disk()
+    if not trial_run:
+        scheduler.save()
+    if http_cache is not None:
+        http_cache.log_summary()
+        http_cache.save()
     logging.info('Video comments-section added: ' + str(int_count_vids_added))
     logging.info('Video comments-section updated: ' + str(int_count_vids_updated))
     logging.info('Video comments-section deleted: ' + str(int_count_vids_deleted) + ' (in ALL SimpleDS, not just in the'
@@ -1876,3 +2137,39 @@ def get_comments_stats(variable_manager, num_vids_to_process, requests_session,
     logging.info('Video comments-section unchanged: ' + str(int_count_vids_not_changed))
     logging.info('Videos processed: ' + str(int_count_vids_processed))
 # ------------------------ END FUNCTION ------------------------ #
+
+
+def fetch_comments_from_rv_website(webvid_id, requests_session, http_cache=None, keep_body=True):
+    """Downloads the comments of a video, and returns the response (a CachedHttpResponse if an
+    HttpConditionalCache is given.) It is safe to call from several threads at once.
+    keep_body is passed on to the HttpConditionalCache (if it is False, and the comments are
+    unchanged, the response may have no content.)"""
+    vid_comments_url = 'https://www.realvision.com/rv/api/threads/' + webvid_id + '/comments'
+    logging.debug("Opening URL of 'comments' for video: " + webvid_id)
+    if http_cache is not None:
+        return http_cache.get(requests_session, vid_comments_url, 'comments', keep_body=keep_body,
+                              timeout=my_globals.int_timeout)
+    return requests_session.get(vid_comments_url, timeout=my_globals.int_timeout)
+
+
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def fetch_comments_concurrently(executor, lst_vid_ids, requests_session, int_num_to_fetch_ahead, http_cache=None,
+                                keep_body=True):
+    """This is a generator that hands out (video ID, future) pairs, in the same order as the
+    list of video IDs, where the future will have the result of fetch_comments_from_rv_website.
+    Like fetch_transcripts_concurrently, only int_num_to_fetch_ahead downloads are queued ahead."""
+    deque_pending = deque()
+    iter_vid_ids = iter(lst_vid_ids)
+    for a_vid in itertools.islice(iter_vid_ids, int_num_to_fetch_ahead):
+        deque_pending.append((a_vid, executor.submit(fetch_comments_from_rv_website, a_vid, requests_session,
+                                                     http_cache, keep_body)))
+    while deque_pending:
+        a_vid, future = deque_pending.popleft()
+        next_vid = next(iter_vid_ids, None)
+        if next_vid is not None:
+            deque_pending.append((next_vid, executor.submit(fetch_comments_from_rv_website, next_vid,
+                                                            requests_session, http_cache, keep_body)))
+        yield a_vid, future
+# ------------------------ END FUNCTION ------------------------ #
@@ -0,0 +1,92 @@
+import time
+import my_globals
+from class_simpleDS import SimpleDS
+from my_rv_website_functions import extractFieldsFromShowsData
+from my_algolia_bulk_join import make_algolia_fields_of_one_video, make_algolia_fields_of_one_publication, \
+    make_algolia_fields_of_all_videos, make_algolia_fields_of_all_publications
+
+# This script compares the time it takes to gather the fields of the Algolia units of the whole library
+# (all the videos, and all the publications) one record at a time, as the functions that update the
+# Algolia SimpleDS instances used to, and in bulk (see my_algolia_bulk_join). It also checks that both
+# ways give exactly the same dictionaries (the tags of the videos are compared regardless of their
+# order, as they come from a python set.)
+# It does NOT write anything to disk, with one exception: if the projection of the website videos is
+# out of date, the bulk way brings it up to date and saves it (which is what the real job would do too.)
+# That is why the bulk way is timed twice: the first time may include the projection catching up.
+
+# ---- SETTINGS ---- #
+bool_benchmark_videos = True
+bool_benchmark_publications = True
+# -- END SETTINGS -- #
+
+
+def compare_dicts_of_fields(dict_one_at_a_time, dict_bulk):
+    """Returns the number of records whose dictionaries are not the same (same keys, in the same order,
+    same values, and same types of values.)"""
+    int_num_different = 0
+    for record_id in dict_one_at_a_time:
+        dict_one = dict(dict_one_at_a_time[record_id])
+        dict_other = dict(dict_bulk.get(record_id, {}))
+        for a_dict in (dict_one, dict_other):
+            if my_globals.str_alg_fieldname_tags in a_dict:
+                a_dict[my_globals.str_alg_fieldname_tags] = sorted(a_dict[my_globals.str_alg_fieldname_tags])
+        if (dict_one != dict_other) or (list(dict_one) != list(dict_other)) or \
+                any(type(dict_one[a_key]) is not type(dict_other[a_key]) for a_key in dict_one):
+            int_num_different += 1
+    return int_num_different + len(set(dict_bulk) - set(dict_one_at_a_time))
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def print_results(str_what, int_num_records, secs_one_at_a_time, secs_bulk_first, secs_bulk_second, int_different):
+    print(str_what + ': ' + str(int_num_records) + ' records.')
+    print('    one record at a time: ' + '{:.2f}'.format(secs_one_at_a_time) + ' seconds.')
+    print('    in bulk (first time): ' + '{:.2f}'.format(secs_bulk_first) + ' seconds.')
+    print('    in bulk (second time): ' + '{:.2f}'.format(secs_bulk_second) + ' seconds. Speedup: ' +
+          '{:.1f}'.format(secs_one_at_a_time / max(secs_bulk_second, 0.000001)) + 'x')
+    print('    records whose fields are NOT the same: ' + str(int_different))
+# ------------------------ END FUNCTION ------------------------ #
+
+
+if bool_benchmark_videos:
+    web_vids_ds = SimpleDS(my_globals.str_dir4_website_vids_ds, my_globals.str_name_simpleds_website_vids)
+    web_vids_ds.load()
+    web_vids_ds.sort()
+    other_info_vids_ds = SimpleDS(my_globals.str_dir4_additional_vids_info_ds,
+                                  my_globals.str_name_simpleds_additionalinfo_vids)
+    other_info_vids_ds.load()
+    transcripts_ds = SimpleDS(my_globals.str_dir4_vid_transcripts_ds, my_globals.str_name_simpleds_transcripts)
+    transcripts_ds.load()
+    dict_shows_from_website = extractFieldsFromShowsData()
+
+    start = time.perf_counter()
+    dict_one_at_a_time = {webvid_id: make_algolia_fields_of_one_video(webvid_id, web_vids_ds, other_info_vids_ds,
+                                                                      transcripts_ds, dict_shows_from_website)
+                          for webvid_id in web_vids_ds}
+    secs_one_at_a_time = time.perf_counter() - start
+    lst_secs_bulk = []
+    for _ in range(2):
+        start = time.perf_counter()
+        dict_bulk = make_algolia_fields_of_all_videos(web_vids_ds, other_info_vids_ds, transcripts_ds,
+                                                      dict_shows_from_website)
+        lst_secs_bulk.append(time.perf_counter() - start)
+    print_results('Videos', len(web_vids_ds), secs_one_at_a_time, lst_secs_bulk[0], lst_secs_bulk[1],
+                  compare_dicts_of_fields(dict_one_at_a_time, dict_bulk))
+
+if bool_benchmark_publications:
+    web_pubs_ds = SimpleDS(my_globals.str_dir4_website_pubs_ds, my_globals.str_name_simpleds_website_pubs)
+    web_pubs_ds.load()
+    web_pubs_ds.sort()
+    pubs_texts_ds = SimpleDS(my_globals.str_dir4_pubs_fulltext_ds, my_globals.str_name_simpleds_pubsfulltext)
+    pubs_texts_ds.load()
+
+    start = time.perf_counter()
+    dict_one_at_a_time = {web_pub_id: make_algolia_fields_of_one_publication(web_pub_id, web_pubs_ds, pubs_texts_ds)
+                          for web_pub_id in web_pubs_ds}
+    secs_one_at_a_time = time.perf_counter() - start
+    lst_secs_bulk = []
+    for _ in range(2):
+        start = time.perf_counter()
+        dict_bulk = make_algolia_fields_of_all_publications(web_pubs_ds, pubs_texts_ds)
+        lst_secs_bulk.append(time.perf_counter() - start)
+    print_results('Publications', len(web_pubs_ds), secs_one_at_a_time, lst_secs_bulk[0], lst_secs_bulk[1],
+                  compare_dicts_of_fields(dict_one_at_a_time, dict_bulk))
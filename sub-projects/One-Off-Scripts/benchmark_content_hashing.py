@@ -0,0 +1,68 @@
+import time
+import my_globals
+from class_simpleDS import SimpleDS
+from my_building_blocks import make_sha256_hash
+from my_content_hashing import make_canonical_hash, find_attributes_that_changed
+
+# This script compares the time it takes to hash the data of the videos in the website videos
+# SimpleDS with the old function (sha256 of the sorted characters of str(data)) and with the
+# canonical hashing (sorted-keys json) using sha256 and blake2b. It also counts, for each method,
+# how many of the videos would NOT be detected as changed if two of their values were swapped.
+# It does NOT write anything to disk.
+
+# ---- SETTINGS ---- #
+int_num_vids_to_hash = 2000
+int_repetitions = 5
+# -- END SETTINGS -- #
+
+
+def time_it(function_to_time, lst_items, repetitions):
+    """Hashes every item of the list the number of times requested, and returns the average
+    time (in seconds) per item."""
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        for an_item in lst_items:
+            function_to_time(an_item)
+    return (time.perf_counter() - start) / (repetitions * max(len(lst_items), 1))
+# ------------------------ END FUNCTION ------------------------ #
+
+
+web_vids_ds = SimpleDS(my_globals.str_dir4_website_vids_ds, my_globals.str_name_simpleds_website_vids)
+web_vids_ds.load()
+web_vids_ds.sort()
+lst_vids = []
+for vid_id in web_vids_ds:
+    if len(lst_vids) >= int_num_vids_to_hash:
+        break
+    lst_vids.append(web_vids_ds.fetch_data(vid_id))
+
+dct_methods = {'sha256 of sorted characters (old)': lambda a_vid: make_sha256_hash(a_vid, sort_characters=True),
+               'canonical json, sha256': lambda a_vid: make_canonical_hash(a_vid, 'sha256'),
+               'canonical json, blake2b': lambda a_vid: make_canonical_hash(a_vid, 'blake2b')}
+
+# a copy of each video with the likes and dislikes swapped (when they are different)
+lst_swapped_pairs = []
+for a_vid in lst_vids:
+    dict_attribs = a_vid.get('attributes', {})
+    if dict_attribs.get('video_likes_count') != dict_attribs.get('video_dislikes_count'):
+        dict_swapped_attribs = dict(dict_attribs, video_likes_count=dict_attribs.get('video_dislikes_count'),
+                                    video_dislikes_count=dict_attribs.get('video_likes_count'))
+        lst_swapped_pairs.append((a_vid, dict(a_vid, attributes=dict_swapped_attribs)))
+
+print('Videos hashed: ' + str(len(lst_vids)) + ' (videos with likes and dislikes that can be swapped: ' +
+      str(len(lst_swapped_pairs)) + ')')
+for name_of_method in dct_methods:
+    function_to_time = dct_methods[name_of_method]
+    secs_per_vid = time_it(function_to_time, lst_vids, int_repetitions)
+    int_missed_swaps = sum(1 for a_vid, a_swapped_vid in lst_swapped_pairs
+                           if function_to_time(a_vid) == function_to_time(a_swapped_vid))
+    print('{:<36}'.format(name_of_method) + '{:.1f}'.format(secs_per_vid * 1000000) + ' microseconds per video.'
+          ' Swaps NOT detected: ' + str(int_missed_swaps))
+
+# and how long the field by field comparison (done only when the hashes differ) takes
+dict_schema = my_globals.dict_vids_from_website_schema
+dict_mapping = my_globals.dict_mapping_rv_web_vid_json_2_rv_webvidclass_attrib
+secs_per_vid = time_it(lambda a_vid: find_attributes_that_changed(a_vid, a_vid, dict_schema, dict_mapping),
+                       lst_vids, int_repetitions)
+print('{:<36}'.format('per-field hashes (both versions)') + '{:.1f}'.format(secs_per_vid * 1000000) +
+      ' microseconds per video.')
@@ -0,0 +1,61 @@
+import os
+import time
+import shutil
+import tempfile
+import pandas as pd
+import my_globals
+from class_simpleDS import SimpleDS
+
+# This script compares the time it takes to load and save the dataframe (the index)
+# of a SimpleDS when it is stored in the original CSV format, versus the pickle format.
+# It does NOT touch the real SimpleDS instances. It copies the index file of each instance
+# into a temporary directory, and does all the loading and saving there.
+# The number of repetitions below is used to get a more stable average.
+int_repetitions = 5
+
+dct_simpleds_to_benchmark = {my_globals.str_name_simpleds_website_vids: my_globals.str_dir4_website_vids_ds,
+                             my_globals.str_name_simpleds_transcripts: my_globals.str_dir4_vid_transcripts_ds}
+
+
+def time_it(function_to_time, repetitions):
+    """Runs the function the number of times requested, and returns the average
+    time (in seconds) per run."""
+    start = time.perf_counter()
+    for _ in range(repetitions):
+        function_to_time()
+    return (time.perf_counter() - start) / repetitions
+# ------------------------ END FUNCTION ------------------------ #
+
+
+for name_of_ds in dct_simpleds_to_benchmark:
+    path_of_ds = dct_simpleds_to_benchmark[name_of_ds]
+    fullpath_csv = path_of_ds + 'pandasdf.csv'
+    fullpath_pickle = path_of_ds + 'pandasdf.pkl'
+    dir_tmp = tempfile.mkdtemp()
+    tmp_csv = os.path.join(dir_tmp, 'pandasdf.csv')
+    tmp_pickle = os.path.join(dir_tmp, 'pandasdf.pkl')
+
+    # the SimpleDS may already have been migrated, in which case only the pickle exists,
+    # so we create whichever of the two files is missing in the temporary directory.
+    if os.path.isfile(fullpath_csv):
+        shutil.copyfile(fullpath_csv, tmp_csv)
+        df = pd.read_csv(tmp_csv, sep='\t', converters={SimpleDS.ds_field_datatags: eval})
+        df.set_index(SimpleDS.ds_field_dataid, drop=False, inplace=True)
+        df.to_pickle(tmp_pickle)
+    else:
+        shutil.copyfile(fullpath_pickle, tmp_pickle)
+        df = pd.read_pickle(tmp_pickle)
+        df.to_csv(tmp_csv, sep='\t', index=False)
+
+    secs_load_csv = time_it(lambda: pd.read_csv(tmp_csv, sep='\t',
+                                                converters={SimpleDS.ds_field_datatags: eval}), int_repetitions)
+    secs_load_pickle = time_it(lambda: pd.read_pickle(tmp_pickle), int_repetitions)
+    secs_save_csv = time_it(lambda: df.to_csv(tmp_csv, sep='\t', index=False), int_repetitions)
+    secs_save_pickle = time_it(lambda: df.to_pickle(tmp_pickle), int_repetitions)
+
+    print('----- ' + name_of_ds + ' (' + str(len(df)) + ' rows) -----')
+    print('CSV    load: ' + '{:.4f}'.format(secs_load_csv) + 's   save: ' + '{:.4f}'.format(secs_save_csv) +
+          's   size: ' + str(os.path.getsize(tmp_csv)) + ' bytes')
+    print('pickle load: ' + '{:.4f}'.format(secs_load_pickle) + 's   save: ' + '{:.4f}'.format(secs_save_pickle) +
+          's   size: ' + str(os.path.getsize(tmp_pickle)) + ' bytes')
+    shutil.rmtree(dir_tmp)
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import pandas as pd
+import my_globals
+from class_simpleDS import SimpleDS
+from class_trancript import Transcript
+from class_variable_manager import VariableManager
+from class_transcript_universe import TranscriptAnalysis
+
+"""This file checks that when the term-count of a transcript is re-built and ends up empty (for
+example, because the transcript was emptied) what the transcript contributed to the doc-count vector
+before is taken out of it, rather than left there for good.
+It only writes to a temporary directory."""
+
+
+def write_term_count(path_to_transcript_files, vid_id, dict_term_counts):
+    df_tc = pd.DataFrame({my_globals.str_trnscrpt_class_column_terms: list(dict_term_counts),
+                          my_globals.str_trnscrpt_class_column_count: list(dict_term_counts.values())},
+                         columns=[my_globals.str_trnscrpt_class_column_terms,
+                                  my_globals.str_trnscrpt_class_column_count])
+    df_tc.to_csv(path_to_transcript_files + vid_id + '_tc.csv', sep='\t', index=False)
+# ------------------------ END FUNCTION ------------------------ #
+
+
+def fetch_doc_count_vector(path_for_tfidf_data, path_to_ds, path_to_transcript_files, var_mgr):
+    """Updates the doc-count vector, and returns it as a dictionary of term -> document count."""
+    ta = TranscriptAnalysis(path_for_tfidf_data, path_to_ds, path_to_transcript_files, var_mgr, num_vids_to_use=-1)
+    ta.update_doc_count_vector_on_disk()
+    df_doc_count = pd.read_csv(ta.fullpath_doc_count_vector_as_csv, sep='\t', index_col=0)
+    return df_doc_count.iloc[:, 0].to_dict()
+# ------------------------ END FUNCTION ------------------------ #
+
+
+with tempfile.TemporaryDirectory() as path_tmp_dir:
+    path_to_ds = os.path.join(path_tmp_dir, 'transcripts_ds') + '/'
+    path_to_transcript_files = os.path.join(path_tmp_dir, 'transcripts') + '/'
+    path_for_tfidf_data = os.path.join(path_tmp_dir, 'tfidf') + '/'
+    for a_path in (path_to_ds + SimpleDS.str_subdir_data, path_to_transcript_files, path_for_tfidf_data):
+        os.makedirs(a_path)
+    var_mgr = VariableManager(os.path.join(path_tmp_dir, 'variables.json'))
+    var_mgr.var_set(my_globals.str_execution_may_go_on, True)
+
+    # the SimpleDS is new, so instead of load() (which asks before creating a SimpleDS) the empty
+    # dataframe is set up here the same way load() does it.
+    transcripts_ds = SimpleDS(path_to_ds)
+    transcripts_ds.df.set_index('ID', drop=False, inplace=True)
+    for vid_id, dict_term_counts in (('vidA', {'alpha': 3, 'only in a': 2}), ('vidB', {'alpha': 1, 'beta': 4})):
+        with open(path_to_transcript_files + vid_id + '.txt', mode='w') as transcript_file:
+            transcript_file.write(' '.join(dict_term_counts))
+        write_term_count(path_to_transcript_files, vid_id, dict_term_counts)
+        transcripts_ds.add_entry(vid_id, 1, 1, {Transcript.fieldname_filename_rawtext: vid_id + '.txt',
+                                                Transcript.fieldname_filename_termcount: vid_id + '_tc.csv'})
+    transcripts_ds.save2disk()
+
+    dict_doc_count = fetch_doc_count_vector(path_for_tfidf_data, path_to_ds, path_to_transcript_files, var_mgr)
+    assert dict_doc_count['alpha'] == 2
+    assert dict_doc_count['only in a'] == 1
+
+    # the term-count of vidA is re-built, and it is now empty. Re-building the term-count removes the
+    # tag that says the video is in the doc-count vector (as update_term_count_dataframes does.)
+    write_term_count(path_to_transcript_files, 'vidA', {})
+    transcripts_ds = SimpleDS(path_to_ds)
+    transcripts_ds.load()
+    transcripts_ds.tag_remove('vidA', 'included_current_doc_count')
+    transcripts_ds.save2disk()
+
+    dict_doc_count = fetch_doc_count_vector(path_for_tfidf_data, path_to_ds, path_to_transcript_files, var_mgr)
+    assert dict_doc_count['alpha'] == 1
+    assert 'only in a' not in dict_doc_count
+    assert dict_doc_count['beta'] == 1
+    print('A transcript whose term-count became empty was taken out of the doc-count vector.')
@@ -0,0 +1,32 @@
+import os
+import tempfile
+from class_packed_payload_store import PackedPayloadStore
+
+"""This file checks that a PackedPayloadStore recovers from a record that was only partly written
+(the program stopped half-way through a write): the broken record is dropped, and the records written
+before and after it can all be fetched after the store is opened again.
+It only writes to a temporary directory."""
+
+with tempfile.TemporaryDirectory() as path_tmp_dir:
+    fullpath_packed_file = os.path.join(path_tmp_dir, 'payloads.packed')
+    store = PackedPayloadStore(fullpath_packed_file, 'torn write test')
+    store.open()
+    store.put('idA', {'title': 'first'})
+    store.close()
+    # a torn write: part of a record, with no end-of-record, and the index is not updated
+    with open(fullpath_packed_file, mode='ab') as packed_file:
+        packed_file.write(b'idP\t{"title": "hal')
+    # the store is opened again, a record is added, and the program stops without flushing
+    store = PackedPayloadStore(fullpath_packed_file, 'torn write test')
+    store.open()
+    store.put('idQ', {'title': 'after the torn write'})
+    store._PackedPayloadStore__file_for_appending.close()
+    # and finally the store is opened once more
+    store = PackedPayloadStore(fullpath_packed_file, 'torn write test')
+    store.open()
+    assert store.fetch('idA') == {'title': 'first'}
+    assert store.fetch('idQ') == {'title': 'after the torn write'}
+    assert 'idP' not in store
+    assert store.int_dead_bytes == 0
+    store.close()
+    print('The packed payload store recovered from a torn write.')
@@ -0,0 +1,64 @@
+import time
+import my_globals
+from class_simpleDS import SimpleDS
+from class_trancript import Transcript
+from class_rv_website_json_vid import RVwebsiteVid
+from my_building_blocks import convert_file_to_list_by_lines, tokenize_list_containing_people_fullnames
+
+"""This file re-builds the pseudo-transcript of a number of videos with the current code (from the
+term-count on disk, and with the same terms to ignore that the job uses) and compares the result, byte
+for byte, with the pseudo-transcript file already on disk for each video. The pseudo-transcripts on disk
+were generated by earlier versions of the code, so they act as a 'golden corpus': if the way the
+pseudo-transcript is built is changed (for example the way its size is brought under the limit) this
+script shows whether the output is still the same. NOTE that a pseudo-transcript will also be different
+if its term-count, or the list of terms to ignore, changed after it was saved.
+It also reports how long the pseudo-transcript took to build, on average, per video.
+It does NOT write anything to disk."""
+
+# ---- SETTINGS ---- #
+int_num_pseudotranscripts_to_check = 200
+int_keep_terms_that_appear_more_than = 2
+# -- END SETTINGS -- #
+
+transcripts_ds = SimpleDS(my_globals.str_dir4_vid_transcripts_ds, my_globals.str_name_simpleds_transcripts)
+transcripts_ds.load()
+transcripts_ds.sort()
+web_vid_ds = SimpleDS(my_globals.str_dir4_website_vids_ds)
+web_vid_ds.load()
+lst_unwanted_terms = convert_file_to_list_by_lines(my_globals.str_fullfilepath_pseudotranscript_unwanted_terms)
+
+int_checked = 0
+int_identical = 0
+lst_different = []
+secs_building = 0.0
+for vid_id in transcripts_ds:
+    if int_checked >= int_num_pseudotranscripts_to_check:
+        break
+    transcript = Transcript(vid_id)
+    transcript.set_transcript_directory(my_globals.str_dir4_vid_transcripts_data)
+    transcript.load_transcript_object_from_dictionary(transcripts_ds.fetch_data(vid_id))
+    # only videos that already have a pseudo-transcript (and the term-count it is made from) can be compared
+    if not (transcript.is_pseudotranscript_filename_populated() and transcript.is_termcount_filename_populated()):
+        continue
+    if vid_id not in web_vid_ds:
+        continue
+    str_golden = transcript.get_pseudotranscript_from_disk()
+    # the terms to ignore are the same ones the job uses: the static list, plus the people in the video
+    lst_people = RVwebsiteVid(web_vid_ds.fetch_data(vid_id)).make_python_list_of_people_in_video()
+    lst_terms_to_ignore = lst_unwanted_terms + tokenize_list_containing_people_fullnames(lst_people)
+    transcript.str_pseudotranscript_text = ''
+    start_time = time.perf_counter()
+    transcript.make_pseudotranscript(keep_terms_that_appear_more_than_x_times=int_keep_terms_that_appear_more_than,
+                                     list_of_terms_to_ignore=lst_terms_to_ignore)
+    secs_building += time.perf_counter() - start_time
+    if transcript.str_pseudotranscript_text.encode('utf-8') == str_golden.encode('utf-8'):
+        int_identical += 1
+    else:
+        lst_different.append(vid_id)
+    int_checked += 1
+
+print('Pseudo-transcripts checked: ' + str(int_checked))
+print('Identical to the golden corpus: ' + str(int_identical))
+print('Different from the golden corpus: ' + str(len(lst_different)) + ' ' + str(lst_different))
+if int_checked > 0:
+    print('Average time to build a pseudo-transcript: ' + '{:.4f}'.format(secs_building / int_checked) + ' seconds.')
@@ -0,0 +1,56 @@
+import io
+import time
+import my_globals
+from class_simpleDS import SimpleDS
+from class_trancript import Transcript
+
+"""This file re-builds the term-count of a number of transcripts with the current code, and
+compares the result (byte for byte, as it would be saved to CSV) with the term-count file
+already on disk for each transcript. The term-count files on disk were generated by earlier
+versions of the code, so they act as a 'golden corpus': if the way the term-count is built is
+changed (for example to make it faster) this script shows whether the output is still the same.
+It also reports how long the term-count took to build, on average, per transcript.
+It does NOT write anything to disk."""
+
+# ---- SETTINGS ---- #
+int_num_transcripts_to_check = 200
+# -- END SETTINGS -- #
+
+transcripts_ds = SimpleDS(my_globals.str_dir4_vid_transcripts_ds, my_globals.str_name_simpleds_transcripts)
+transcripts_ds.load()
+transcripts_ds.sort()
+
+int_checked = 0
+int_identical = 0
+lst_different = []
+secs_building = 0.0
+for vid_id in transcripts_ds:
+    if int_checked >= int_num_transcripts_to_check:
+        break
+    transcript = Transcript(vid_id)
+    transcript.set_transcript_directory(my_globals.str_dir4_vid_transcripts_data)
+    transcript.load_transcript_object_from_dictionary(transcripts_ds.fetch_data(vid_id))
+    # only transcripts that already have a term-count on disk can be compared
+    if not transcript.is_termcount_filename_populated():
+        continue
+    with open(my_globals.str_dir4_vid_transcripts_data + transcript.df_terms_count_csv_filename,
+              mode='r') as golden_file:
+        str_golden = golden_file.read()
+    transcript.get_transcript_from_disk()
+    start_time = time.perf_counter()
+    transcript.construct_terms_count()
+    secs_building += time.perf_counter() - start_time
+    # write the new term-count to a string, exactly as it would be written to disk
+    buffer_new = io.StringIO()
+    transcript.df_terms_count.to_csv(buffer_new, sep='\t', index=True)
+    if buffer_new.getvalue() == str_golden:
+        int_identical += 1
+    else:
+        lst_different.append(vid_id)
+    int_checked += 1
+
+print('Transcripts checked: ' + str(int_checked))
+print('Identical to the golden corpus: ' + str(int_identical))
+print('Different from the golden corpus: ' + str(len(lst_different)) + ' ' + str(lst_different))
+if int_checked > 0:
+    print('Average time to build a term-count: ' + '{:.3f}'.format(secs_building / int_checked) + ' seconds.')